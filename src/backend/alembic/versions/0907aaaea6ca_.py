@@ -0,0 +1,83 @@
+"""Add user_file_usage counter maintained by a trigger on files
+
+Revision ID: 0907aaaea6ca
+Revises: ed17f144f4bf
+Create Date: 2026-10-19 10:45:12.218734
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0907aaaea6ca"
+down_revision: Union[str, None] = "ed17f144f4bf"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_file_usage",
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("total_file_size", sa.BigInteger(), nullable=False),
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", name="user_file_usage_user_id_uc"),
+    )
+
+    # Keep the counter in sync on every insert, delete (including cascades) and size change
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION update_user_file_usage() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.user_id IS NOT NULL THEN
+                UPDATE user_file_usage
+                SET total_file_size = total_file_size - COALESCE(OLD.file_size, 0),
+                    updated_at = now()
+                WHERE user_id = OLD.user_id;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.user_id IS NOT NULL THEN
+                INSERT INTO user_file_usage (id, user_id, total_file_size, created_at, updated_at)
+                VALUES (gen_random_uuid()::text, NEW.user_id, COALESCE(NEW.file_size, 0), now(), now())
+                ON CONFLICT (user_id) DO UPDATE
+                SET total_file_size = user_file_usage.total_file_size + EXCLUDED.total_file_size,
+                    updated_at = now();
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER files_user_file_usage
+        AFTER INSERT OR DELETE OR UPDATE OF file_size, user_id ON files
+        FOR EACH ROW EXECUTE FUNCTION update_user_file_usage();
+        """
+    )
+
+    # Backfill the counters from the existing files
+    op.execute(
+        """
+        INSERT INTO user_file_usage (id, user_id, total_file_size, created_at, updated_at)
+        SELECT gen_random_uuid()::text, files.user_id, SUM(files.file_size), now(), now()
+        FROM files
+        JOIN users ON users.id = files.user_id
+        GROUP BY files.user_id
+        ON CONFLICT (user_id) DO NOTHING;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS files_user_file_usage ON files;")
+    op.execute("DROP FUNCTION IF EXISTS update_user_file_usage();")
+    op.drop_table("user_file_usage")
@@ -0,0 +1,114 @@
+"""Add full-text search vectors to conversations
+
+Revision ID: 636a3aea51f9
+Revises: 0907aaaea6ca
+Create Date: 2026-10-19 12:02:41.530912
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "636a3aea51f9"
+down_revision: Union[str, None] = "0907aaaea6ca"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# tsvector values are capped at 1MB, cap the text indexed per conversation well below it
+MAX_INDEXED_TEXT_LENGTH = 500000
+
+
+def upgrade() -> None:
+    op.add_column(
+        "conversations",
+        sa.Column("messages_search_vector", postgresql.TSVECTOR(), nullable=True),
+    )
+
+    # Backfill the message vectors before the generated column is computed from them
+    op.execute(
+        f"""
+        UPDATE conversations
+        SET messages_search_vector = agg.vector
+        FROM (
+            SELECT conversation_id, user_id,
+                to_tsvector('english', left(string_agg(text, ' '), {MAX_INDEXED_TEXT_LENGTH})) AS vector
+            FROM messages
+            GROUP BY conversation_id, user_id
+        ) AS agg
+        WHERE conversations.id = agg.conversation_id
+            AND conversations.user_id = agg.user_id;
+        """
+    )
+
+    op.add_column(
+        "conversations",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('english', coalesce(title, '')), 'A') "
+                "|| coalesce(messages_search_vector, ''::tsvector)",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "conversation_search_vector_index",
+        "conversations",
+        ["search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+    # New messages are appended to the vector, edits and deletes rebuild it.
+    # Deletes cascading from a deleted conversation match no row and cost nothing.
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION update_conversation_search_vector() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE conversations
+                SET messages_search_vector = coalesce(messages_search_vector, ''::tsvector)
+                    || to_tsvector('english', coalesce(NEW.text, ''))
+                WHERE id = NEW.conversation_id AND user_id = NEW.user_id;
+            ELSE
+                UPDATE conversations
+                SET messages_search_vector = (
+                    SELECT to_tsvector('english', left(coalesce(string_agg(text, ' '), ''), {MAX_INDEXED_TEXT_LENGTH}))
+                    FROM messages
+                    WHERE conversation_id = OLD.conversation_id AND user_id = OLD.user_id
+                )
+                WHERE id = OLD.conversation_id AND user_id = OLD.user_id;
+            END IF;
+
+            RETURN NULL;
+        EXCEPTION
+            -- The vector is full, keep it as is rather than failing the message write
+            WHEN program_limit_exceeded THEN
+                RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER messages_conversation_search_vector
+        AFTER INSERT OR DELETE OR UPDATE OF text ON messages
+        FOR EACH ROW EXECUTE FUNCTION update_conversation_search_vector();
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "DROP TRIGGER IF EXISTS messages_conversation_search_vector ON messages;"
+    )
+    op.execute("DROP FUNCTION IF EXISTS update_conversation_search_vector();")
+    op.drop_index("conversation_search_vector_index", table_name="conversations")
+    op.drop_column("conversations", "search_vector")
+    op.drop_column("conversations", "messages_search_vector")
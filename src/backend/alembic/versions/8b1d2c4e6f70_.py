@@ -0,0 +1,30 @@
+"""Add page offsets to files
+
+Revision ID: 8b1d2c4e6f70
+Revises: 636a3aea51f9
+Create Date: 2026-10-19 14:21:08.204117
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "8b1d2c4e6f70"
+down_revision: Union[str, None] = "636a3aea51f9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "files",
+        sa.Column("page_offsets", postgresql.ARRAY(sa.Integer()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("files", "page_offsets")
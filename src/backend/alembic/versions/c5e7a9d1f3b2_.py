@@ -0,0 +1,103 @@
+"""Add file_contents shared by files with the same content hash
+
+Revision ID: c5e7a9d1f3b2
+Revises: 8b1d2c4e6f70
+Create Date: 2026-10-19 16:02:37.518204
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "c5e7a9d1f3b2"
+down_revision: Union[str, None] = "8b1d2c4e6f70"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "file_contents",
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("content_hash", sa.String(), nullable=False),
+        sa.Column("file_content", sa.String(), nullable=False),
+        sa.Column("page_offsets", postgresql.ARRAY(sa.Integer()), nullable=True),
+        sa.Column("content_size", sa.BigInteger(), nullable=False),
+        sa.Column("parse_seconds", sa.Float(), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "content_hash", "user_id", name="file_contents_content_hash_user_id_uc"
+        ),
+    )
+    op.add_column("files", sa.Column("content_hash", sa.String(), nullable=True))
+    op.create_foreign_key(
+        "file_content_hash_user_id_fkey",
+        "files",
+        "file_contents",
+        ["content_hash", "user_id"],
+        ["content_hash", "user_id"],
+    )
+    op.create_index(
+        "file_content_hash_user_id",
+        "files",
+        ["content_hash", "user_id"],
+        unique=False,
+    )
+
+    # Count the files referencing each content on every insert, delete (including
+    # cascades) and change, and drop the contents no file references anymore
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION update_file_content_ref_count() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE'
+                AND OLD.content_hash IS NOT DISTINCT FROM NEW.content_hash
+                AND OLD.user_id IS NOT DISTINCT FROM NEW.user_id THEN
+                RETURN NULL;
+            END IF;
+
+            IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.content_hash IS NOT NULL THEN
+                UPDATE file_contents
+                SET ref_count = ref_count + 1, updated_at = now()
+                WHERE content_hash = NEW.content_hash AND user_id = NEW.user_id;
+            END IF;
+
+            IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.content_hash IS NOT NULL THEN
+                UPDATE file_contents
+                SET ref_count = ref_count - 1, updated_at = now()
+                WHERE content_hash = OLD.content_hash AND user_id = OLD.user_id;
+
+                DELETE FROM file_contents
+                WHERE content_hash = OLD.content_hash AND user_id = OLD.user_id
+                    AND ref_count <= 0;
+            END IF;
+
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER files_file_content_ref_count
+        AFTER INSERT OR DELETE OR UPDATE OF content_hash, user_id ON files
+        FOR EACH ROW EXECUTE FUNCTION update_file_content_ref_count();
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS files_file_content_ref_count ON files;")
+    op.execute("DROP FUNCTION IF EXISTS update_file_content_ref_count();")
+    op.drop_index("file_content_hash_user_id", table_name="files")
+    op.drop_constraint("file_content_hash_user_id_fkey", "files", type_="foreignkey")
+    op.drop_column("files", "content_hash")
+    op.drop_table("file_contents")
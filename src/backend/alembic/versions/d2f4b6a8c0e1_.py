@@ -0,0 +1,137 @@
+"""Add word count, token count, preview and language to files
+
+Revision ID: d2f4b6a8c0e1
+Revises: c5e7a9d1f3b2
+Create Date: 2026-10-19 17:12:44.902316
+
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d2f4b6a8c0e1"
+down_revision: Union[str, None] = "c5e7a9d1f3b2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rows backfilled per batch, so the content of every file is never loaded at once
+BACKFILL_BATCH_SIZE = 500
+
+# Frozen copy of backend.services.file_stats as of this revision, so that later
+# changes to the service do not change what this migration computes
+PREVIEW_WORDS = 25
+CHARS_PER_TOKEN = 4
+LANGUAGE_SAMPLE_WORDS = 1000
+LANGUAGE_MIN_STOPWORD_RATIO = 0.05
+UNKNOWN_LANGUAGE = "und"
+STOPWORDS = {
+    "en": set(
+        "the and of to in is that for it with as was on are by this be from or which".split()
+    ),
+    "fr": set(
+        "le la les et des est un une du dans que qui pour pas sur au avec il ce sont".split()
+    ),
+    "es": set(
+        "el la los las y de que en un una es por con para se del al como su lo".split()
+    ),
+    "de": set(
+        "der die das und ist nicht ein eine zu den mit von auf für dem im sich auch es wird".split()
+    ),
+    "it": set(
+        "il di che e la un una per non sono gli della del con le nel come anche più alla".split()
+    ),
+    "pt": set(
+        "o a os as e de do da que em um uma para com não por se dos das mais".split()
+    ),
+    "nl": set(
+        "de het een en van is dat op te niet zijn voor met die ook aan er maar om wordt".split()
+    ),
+}
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def compute_file_stats(text: str) -> dict:
+    words = text.split()
+    return {
+        "word_count": len(words),
+        "token_count": math.ceil(len(text) / CHARS_PER_TOKEN),
+        "preview": " ".join(words[:PREVIEW_WORDS]),
+        "language": detect_language(words[:LANGUAGE_SAMPLE_WORDS]),
+    }
+
+
+def detect_language(words: list[str]) -> str:
+    tokens = Counter(
+        token.lower() for word in words for token in WORD_PATTERN.findall(word)
+    )
+    total = sum(tokens.values())
+    if not total:
+        return UNKNOWN_LANGUAGE
+
+    best_language = None
+    best_count = 0
+    for language, stopwords in STOPWORDS.items():
+        count = sum(tokens[stopword] for stopword in stopwords)
+        if count > best_count:
+            best_language, best_count = language, count
+
+    if best_language is None or best_count / total < LANGUAGE_MIN_STOPWORD_RATIO:
+        return UNKNOWN_LANGUAGE
+    return best_language
+
+
+def upgrade() -> None:
+    op.add_column("files", sa.Column("word_count", sa.Integer(), nullable=True))
+    op.add_column("files", sa.Column("token_count", sa.Integer(), nullable=True))
+    op.add_column("files", sa.Column("preview", sa.String(), nullable=True))
+    op.add_column("files", sa.Column("language", sa.String(), nullable=True))
+
+    connection = op.get_bind()
+    select_batch = sa.text(
+        """
+        SELECT files.id, COALESCE(file_contents.file_content, files.file_content)
+        FROM files
+        LEFT JOIN file_contents
+            ON file_contents.content_hash = files.content_hash
+            AND file_contents.user_id = files.user_id
+        WHERE files.word_count IS NULL AND files.id > :last_id
+        ORDER BY files.id
+        LIMIT :batch_size
+        """
+    )
+    update_file = sa.text(
+        """
+        UPDATE files
+        SET word_count = :word_count, token_count = :token_count,
+            preview = :preview, language = :language
+        WHERE id = :id
+        """
+    )
+
+    last_id = ""
+    while True:
+        rows = connection.execute(
+            select_batch, {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE}
+        ).all()
+        if not rows:
+            break
+
+        updates = []
+        for file_id, content in rows:
+            stats = compute_file_stats((content or "").replace("\x00", ""))
+            updates.append({"id": file_id, **stats})
+        connection.execute(update_file, updates)
+        last_id = rows[-1][0]
+
+
+def downgrade() -> None:
+    op.drop_column("files", "language")
+    op.drop_column("files", "preview")
+    op.drop_column("files", "token_count")
+    op.drop_column("files", "word_count")
@@ -0,0 +1,30 @@
+"""Add chunk indexes to files and file_contents
+
+Revision ID: e3a5c7e9b1d4
+Revises: d2f4b6a8c0e1
+Create Date: 2026-10-19 18:40:05.337120
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e3a5c7e9b1d4"
+down_revision: Union[str, None] = "d2f4b6a8c0e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("files", sa.Column("chunk_index", sa.LargeBinary(), nullable=True))
+    op.add_column(
+        "file_contents", sa.Column("chunk_index", sa.LargeBinary(), nullable=True)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("file_contents", "chunk_index")
+    op.drop_column("files", "chunk_index")
@@ -14,6 +14,7 @@ from backend.schemas.chat import ChatMessage, ChatRole
 from backend.schemas.cohere_chat import CohereChatRequest
 from backend.schemas.context import Context
 from backend.schemas.tool import Tool
+from backend.services.file_stats import compute_file_stats
 from backend.services.logger.utils import get_logger
 
 logger = get_logger()
@@ -245,6 +246,7 @@ class CustomChat(BaseChat):
                 user_id=ctx.get_user_id(),
                 trace_id=ctx.get_trace_id(),
                 agent_id=kwargs.get("agent_id"),
+                conversation_id=ctx.get_conversation_id(),
             )
 
             # If the tool returns a list of outputs, append each output to the tool_results list
@@ -280,17 +282,18 @@ class CustomChat(BaseChat):
         if session is None or conversation_id is None or len(conversation_id) == 0:
             return chat_history
 
+        # Only the stats computed at upload are needed, not the content
         available_files = get_files_by_conversation_id(
             session, conversation_id, user_id
         )
         files_message = "The user uploaded the following attachments:\n"
 
         for file in available_files:
-            word_count = len(file.file_content.split())
-
-            # Use the first 25 words as the document preview in the preamble
-            num_words = min(25, word_count)
-            preview = " ".join(file.file_content.split()[:num_words])
+            word_count, preview = file.word_count, file.preview
+            # Files created before the stats were stored and not backfilled yet
+            if word_count is None or preview is None:
+                stats = compute_file_stats(file.content)
+                word_count, preview = stats.word_count, stats.preview
 
             files_message += f"Filename: {file.file_name}\nWord Count: {word_count} Preview: {preview}\n\n"
 
@@ -1,8 +1,7 @@
-from functools import lru_cache
+from backend.config.settings import Settings, get_settings, reload_settings
 
-from backend.config.settings import Settings
-
-
-@lru_cache(maxsize=1)
-def settings() -> Settings:
-    return Settings()
+__all__ = [
+    "Settings",
+    "get_settings",
+    "reload_settings",
+]
@@ -1,6 +1,6 @@
 from enum import StrEnum
 
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from backend.model_deployments import (
     AzureDeployment,
     BedrockDeployment,
@@ -27,7 +27,7 @@ class ModelDeploymentName(StrEnum):
 
 
 logger = get_logger()
-use_community_features = Settings().feature_flags.use_community_features
+use_community_features = get_settings().feature_flags.use_community_features
 
 # TODO names in the map below should not be the display names but ids
 ALL_MODEL_DEPLOYMENTS = {
@@ -89,12 +89,12 @@ def get_available_deployments() -> dict[ModelDeploymentName, Deployment]:
                 event="[Deployments] No available community deployments have been configured"
             )
 
-    deployments = Settings().deployments.enabled_deployments
+    deployments = get_settings().deployments.enabled_deployments
     if deployments is not None and len(deployments) > 0:
         return {
             key: value
             for key, value in ALL_MODEL_DEPLOYMENTS.items()
-            if value.id in Settings().deployments.enabled_deployments
+            if value.id in get_settings().deployments.enabled_deployments
         }
 
     return ALL_MODEL_DEPLOYMENTS
@@ -107,7 +107,7 @@ def get_default_deployment(**kwargs) -> BaseDeployment:
             fallback = deployment.deployment_class(**kwargs)
             break
 
-    default = Settings().deployments.default_deployment
+    default = get_settings().deployments.default_deployment
     if default:
         return next(
             (
@@ -1,4 +1,7 @@
+import os
 import sys
+import threading
+import time
 from typing import List, Optional, Tuple, Type
 
 from pydantic import AliasChoices, BaseModel, Field
@@ -60,6 +63,12 @@ class AuthSettings(BaseSettings, BaseModel):
     )
     oidc: Optional[OIDCSettings]
     google_oauth: Optional[GoogleOAuthSettings]
+    blacklist_refresh_seconds: Optional[float] = Field(
+        default=30,
+        validation_alias=AliasChoices(
+            "AUTH_BLACKLIST_REFRESH_SECONDS", "blacklist_refresh_seconds"
+        ),
+    )
 
 
 class FeatureFlags(BaseSettings, BaseModel):
@@ -80,6 +89,10 @@ class FeatureFlags(BaseSettings, BaseModel):
             "USE_COMMUNITY_FEATURES", "use_community_features"
         ),
     )
+    hot_reload_settings: Optional[bool] = Field(
+        default=False,
+        validation_alias=AliasChoices("HOT_RELOAD_SETTINGS", "hot_reload_settings"),
+    )
 
 
 class PythonToolSettings(BaseSettings, BaseModel):
@@ -87,6 +100,56 @@ class PythonToolSettings(BaseSettings, BaseModel):
     url: Optional[str] = Field(
         validation_alias=AliasChoices("PYTHON_INTERPRETER_URL", "url")
     )
+    timeout_seconds: Optional[float] = Field(
+        default=60,
+        validation_alias=AliasChoices(
+            "PYTHON_INTERPRETER_TIMEOUT_SECONDS", "timeout_seconds"
+        ),
+    )
+    # Keeps the files created by the code of a conversation for its next runs
+    warm_sessions: Optional[bool] = Field(
+        default=False,
+        validation_alias=AliasChoices(
+            "PYTHON_INTERPRETER_WARM_SESSIONS", "warm_sessions"
+        ),
+    )
+    max_output_bytes: Optional[int] = Field(
+        default=20_000_000,
+        validation_alias=AliasChoices(
+            "PYTHON_INTERPRETER_MAX_OUTPUT_BYTES", "max_output_bytes"
+        ),
+    )
+    max_output_file_bytes: Optional[int] = Field(
+        default=5_000_000,
+        validation_alias=AliasChoices(
+            "PYTHON_INTERPRETER_MAX_OUTPUT_FILE_BYTES", "max_output_file_bytes"
+        ),
+    )
+    # Warm sessions are kept in the memory of each worker
+    session_ttl_seconds: Optional[float] = Field(
+        default=1800,
+        validation_alias=AliasChoices(
+            "PYTHON_INTERPRETER_SESSION_TTL_SECONDS", "session_ttl_seconds"
+        ),
+    )
+    max_sessions: Optional[int] = Field(
+        default=200,
+        validation_alias=AliasChoices(
+            "PYTHON_INTERPRETER_MAX_SESSIONS", "max_sessions"
+        ),
+    )
+    max_session_files_bytes: Optional[int] = Field(
+        default=10_000_000,
+        validation_alias=AliasChoices(
+            "PYTHON_INTERPRETER_MAX_SESSION_FILES_BYTES", "max_session_files_bytes"
+        ),
+    )
+    max_sessions_files_bytes: Optional[int] = Field(
+        default=100_000_000,
+        validation_alias=AliasChoices(
+            "PYTHON_INTERPRETER_MAX_SESSIONS_FILES_BYTES", "max_sessions_files_bytes"
+        ),
+    )
 
 
 class CompassSettings(BaseSettings, BaseModel):
@@ -134,11 +197,47 @@ class GDriveSettings(BaseSettings, BaseModel):
     )
 
 
+class SearchFileSettings(BaseSettings, BaseModel):
+    model_config = setting_config
+    # "cohere" or "hash", semantic file search is disabled when unset
+    embedder: Optional[str] = Field(
+        default=None,
+        validation_alias=AliasChoices("SEARCH_FILE_EMBEDDER", "embedder"),
+    )
+    embedding_model: Optional[str] = Field(
+        default="embed-english-v3.0",
+        validation_alias=AliasChoices("SEARCH_FILE_EMBEDDING_MODEL", "embedding_model"),
+    )
+    embedding_index_path: Optional[str] = Field(
+        default="embedding_index",
+        validation_alias=AliasChoices(
+            "SEARCH_FILE_EMBEDDING_INDEX_PATH", "embedding_index_path"
+        ),
+    )
+
+
+class VectorRetrieverSettings(BaseSettings, BaseModel):
+    model_config = setting_config
+    # Directory of the Chroma collections built from the retriever's files
+    persist_directory: Optional[str] = Field(
+        default="vector_store",
+        validation_alias=AliasChoices(
+            "VECTOR_RETRIEVER_PERSIST_DIRECTORY", "persist_directory"
+        ),
+    )
+
+
 class ToolSettings(BaseSettings, BaseModel):
     model_config = setting_config
     enabled_tools: Optional[List[str]]
 
     python_interpreter: Optional[PythonToolSettings]
+    search_file: Optional[SearchFileSettings] = Field(
+        default_factory=SearchFileSettings
+    )
+    vector_retriever: Optional[VectorRetrieverSettings] = Field(
+        default_factory=VectorRetrieverSettings
+    )
     compass: Optional[CompassSettings]
     web_search: Optional[WebSearchSettings]
     wolfram_alpha: Optional[WolframAlphaSettings]
@@ -151,6 +250,38 @@ class DatabaseSettings(BaseSettings, BaseModel):
     migrate_token: Optional[str] = Field(
         validation_alias=AliasChoices("MIGRATE_TOKEN", "migrate_token")
     )
+    replica_urls: Optional[List[str]] = Field(
+        default=None,
+        validation_alias=AliasChoices("DATABASE_REPLICA_URLS", "replica_urls"),
+    )
+    replica_max_lag_seconds: Optional[float] = Field(
+        default=5,
+        validation_alias=AliasChoices(
+            "DATABASE_REPLICA_MAX_LAG_SECONDS", "replica_max_lag_seconds"
+        ),
+    )
+    replica_sticky_seconds: Optional[float] = Field(
+        default=10,
+        validation_alias=AliasChoices(
+            "DATABASE_REPLICA_STICKY_SECONDS", "replica_sticky_seconds"
+        ),
+    )
+    write_behind_enabled: Optional[bool] = Field(
+        default=False,
+        validation_alias=AliasChoices("WRITE_BEHIND_ENABLED", "write_behind_enabled"),
+    )
+    write_behind_journal_path: Optional[str] = Field(
+        default="write_behind_journal.jsonl",
+        validation_alias=AliasChoices(
+            "WRITE_BEHIND_JOURNAL_PATH", "write_behind_journal_path"
+        ),
+    )
+    entity_cache_ttl_seconds: Optional[float] = Field(
+        default=30,
+        validation_alias=AliasChoices(
+            "ENTITY_CACHE_TTL_SECONDS", "entity_cache_ttl_seconds"
+        ),
+    )
 
 
 class SageMakerSettings(BaseSettings, BaseModel):
@@ -282,3 +413,64 @@ class Settings(BaseSettings, case_sensitive=False):
             file_secret_settings,
             init_settings,
         )
+
+
+# Seconds between checks of the settings files when hot reloading is enabled
+SETTINGS_WATCH_INTERVAL_SECONDS = 2
+
+_settings: Optional[Settings] = None
+_settings_files_mtimes: Tuple[Optional[float], ...] = ()
+_settings_checked_at = 0.0
+_settings_lock = threading.Lock()
+
+
+def _get_settings_files_mtimes() -> Tuple[Optional[float], ...]:
+    mtimes = []
+    for path in (".env", config_file, secrets_file):
+        try:
+            mtimes.append(os.stat(path).st_mtime)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+
+def get_settings() -> Settings:
+    """
+    Returns the process-wide Settings, built once instead of on every call.
+
+    Call reload_settings after changing the environment variables or the settings
+    files. With the hot_reload_settings feature flag, the .env and YAML files are
+    checked for changes every SETTINGS_WATCH_INTERVAL_SECONDS.
+
+    Returns:
+        Settings: Cached settings.
+    """
+    global _settings_checked_at
+
+    settings = _settings
+    if settings is None:
+        return reload_settings()
+
+    if settings.feature_flags.hot_reload_settings:
+        now = time.monotonic()
+        if now - _settings_checked_at >= SETTINGS_WATCH_INTERVAL_SECONDS:
+            _settings_checked_at = now
+            if _get_settings_files_mtimes() != _settings_files_mtimes:
+                return reload_settings()
+
+    return settings
+
+
+def reload_settings() -> Settings:
+    """
+    Rebuilds the cached Settings from the environment and the settings files.
+
+    Returns:
+        Settings: Reloaded settings.
+    """
+    global _settings, _settings_files_mtimes
+
+    with _settings_lock:
+        _settings_files_mtimes = _get_settings_files_mtimes()
+        _settings = Settings()
+        return _settings
@@ -1,6 +1,6 @@
 from enum import StrEnum
 
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from backend.schemas.tool import Category, ManagedTool
 from backend.services.logger.utils import get_logger
 from backend.tools import (
@@ -86,13 +86,38 @@ ALL_TOOLS = {
                 "description": "The name of the attached file to read.",
                 "type": "str",
                 "required": True,
-            }
+            },
+            "outline": {
+                "description": "Whether to return the outline of the file, its pages or chunks with their offset and first words, instead of its text.",
+                "type": "bool",
+                "required": False,
+            },
+            "page": {
+                "description": "Page of a PDF, or sheet of a spreadsheet, to start reading from, starting at 1.",
+                "type": "int",
+                "required": False,
+            },
+            "chunk": {
+                "description": "Chunk to start reading from, starting at 0.",
+                "type": "int",
+                "required": False,
+            },
+            "offset": {
+                "description": "Character offset to start reading from, such as the next_offset of a previous read.",
+                "type": "int",
+                "required": False,
+            },
+            "max_chars": {
+                "description": f"Maximum number of characters to read, {ReadFileTool.MAX_CHARS} by default and at most {ReadFileTool.MAX_CHARS_LIMIT}.",
+                "type": "int",
+                "required": False,
+            },
         },
         is_visible=True,
         is_available=ReadFileTool.is_available(),
         error_message="ReadFileTool not available.",
         category=Category.FileLoader,
-        description="Returns the textual contents of an uploaded file, broken up in text chunks.",
+        description="Returns a window of the textual contents of an uploaded file, from a page, chunk or character offset, or the outline of the file. Read large files progressively, continuing from next_offset.",
     ),
     ToolName.Python_Interpreter: ManagedTool(
         display_name="Python Interpreter",
@@ -187,8 +212,8 @@ ALL_TOOLS = {
 
 def get_available_tools() -> dict[ToolName, dict]:
     langchain_tools = [ToolName.Python_Interpreter, ToolName.Tavily_Internet_Search]
-    use_langchain_tools = Settings().feature_flags.use_experimental_langchain
-    use_community_tools = Settings().feature_flags.use_community_features
+    use_langchain_tools = get_settings().feature_flags.use_experimental_langchain
+    use_community_tools = get_settings().feature_flags.use_community_features
 
     if use_langchain_tools:
         return {
@@ -213,7 +238,7 @@ def get_available_tools() -> dict[ToolName, dict]:
         # Retrieve name
         tool.name = tool.implementation.NAME
 
-    enabled_tools = Settings().tools.enabled_tools
+    enabled_tools = get_settings().tools.enabled_tools
     if enabled_tools is not None and len(enabled_tools) > 0:
         tools = {key: value for key, value in tools.items() if key in enabled_tools}
     return tools
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 
 from backend.database_models.agent import Agent
 from backend.schemas.agent import UpdateAgentRequest
+from backend.services.cache import agent_cache
 from backend.services.transaction import validate_transaction
 
 
@@ -28,7 +29,7 @@ def create_agent(db: Session, agent: Agent) -> Agent:
 @validate_transaction
 def get_agent_by_id(db: Session, agent_id: str) -> Agent:
     """
-    Get an agent by its ID.
+    Get an agent by its ID, cached per request and across requests.
 
     Args:
       db (Session): Database session.
@@ -37,7 +38,9 @@ def get_agent_by_id(db: Session, agent_id: str) -> Agent:
     Returns:
       Agent: Agent with the given ID.
     """
-    return db.query(Agent).filter(Agent.id == agent_id).first()
+    return agent_cache.get(
+        db, agent_id, lambda: db.query(Agent).filter(Agent.id == agent_id).first()
+    )
 
 
 def get_agent_by_name(db: Session, agent_name: str) -> Agent:
@@ -97,6 +100,7 @@ def update_agent(db: Session, agent: Agent, new_agent: UpdateAgentRequest) -> Ag
         setattr(agent, attr, value)
 
     db.commit()
+    agent_cache.invalidate(db, agent.id)
     db.refresh(agent)
     return agent
 
@@ -112,4 +116,5 @@ def delete_agent(db: Session, agent_id: str) -> None:
     agent = db.query(Agent).filter(Agent.id == agent_id)
     agent.delete()
     db.commit()
+    agent_cache.invalidate(db, agent_id)
     return None
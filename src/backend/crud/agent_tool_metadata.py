@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 
 from backend.database_models.agent_tool_metadata import AgentToolMetadata
 from backend.schemas.agent import UpdateAgentToolMetadataRequest
+from backend.services.cache import agent_tool_metadata_cache
 
 
 def create_agent_tool_metadata(
@@ -19,6 +20,7 @@ def create_agent_tool_metadata(
     """
     db.add(agent_tool_metadata)
     db.commit()
+    agent_tool_metadata_cache.invalidate(db, agent_tool_metadata.agent_id)
     db.refresh(agent_tool_metadata)
     return agent_tool_metadata
 
@@ -47,7 +49,7 @@ def get_all_agent_tool_metadata_by_agent_id(
     db: Session, agent_id: str
 ) -> list[AgentToolMetadata]:
     """
-    Get a agent tool metadata by its agent ID.
+    Get a agent tool metadata by its agent ID, cached per request and across requests.
 
     Args:
         db (Session): Database session.
@@ -56,8 +58,12 @@ def get_all_agent_tool_metadata_by_agent_id(
     Returns:
         list[AgentToolMetadata]: List of agent tool metadata with the given agent ID.
     """
-    return (
-        db.query(AgentToolMetadata).filter(AgentToolMetadata.agent_id == agent_id).all()
+    return agent_tool_metadata_cache.get(
+        db,
+        agent_id,
+        lambda: db.query(AgentToolMetadata)
+        .filter(AgentToolMetadata.agent_id == agent_id)
+        .all(),
     )
 
 
@@ -80,6 +86,7 @@ def update_agent_tool_metadata(
     for attr, value in new_agent_tool_metadata.model_dump(exclude_none=True).items():
         setattr(agent_tool_metadata, attr, value)
     db.commit()
+    agent_tool_metadata_cache.invalidate(db, agent_tool_metadata.agent_id)
     db.refresh(agent_tool_metadata)
 
     return agent_tool_metadata
@@ -103,3 +110,4 @@ def delete_agent_tool_metadata_by_id(db: Session, agent_tool_metadata_id: str) -
     )
     db.delete(agent_tool_metadata)
     db.commit()
+    agent_tool_metadata_cache.invalidate(db, agent_tool_metadata.agent_id)
@@ -1,6 +1,9 @@
-from sqlalchemy.orm import Session
+import re
 
-from backend.database_models.conversation import Conversation
+from sqlalchemy import func
+from sqlalchemy.orm import Session, selectinload
+
+from backend.database_models.conversation import SEARCH_CONFIG, Conversation
 from backend.schemas.conversation import UpdateConversationRequest
 from backend.services.transaction import validate_transaction
 
@@ -78,6 +81,80 @@ def get_conversations(
     return query.all()
 
 
+def _to_prefix_tsquery(query: str) -> str | None:
+    """
+    Build a tsquery matching conversations that contain every term of the query,
+    treating each term as a prefix so partially typed words still match.
+
+    Args:
+        query (str): Raw search query.
+
+    Returns:
+        str | None: tsquery string, or None if the query has no searchable terms.
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return None
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+@validate_transaction
+def search_conversations(
+    db: Session,
+    user_id: str,
+    query: str,
+    offset: int = 0,
+    limit: int = 100,
+    agent_id: str | None = None,
+    organization_id: str | None = None,
+    with_messages: bool = False,
+) -> list[Conversation]:
+    """
+    Full-text search over the titles and messages of a user's conversations,
+    ranked by relevance (title matches weigh more) and then by recency.
+
+    Args:
+        db (Session): Database session.
+        user_id (str): User ID.
+        query (str): Search query.
+        offset (int): Offset to start the list.
+        limit (int): Limit of conversations to be listed.
+        agent_id (str): Agent ID.
+        organization_id (str): Organization ID.
+        with_messages (bool): Whether to eagerly load the conversation messages.
+
+    Returns:
+        list[Conversation]: List of matching conversations.
+    """
+    ts_query_string = _to_prefix_tsquery(query)
+    if ts_query_string is None:
+        return []
+
+    ts_query = func.to_tsquery(SEARCH_CONFIG, ts_query_string)
+    search_query = db.query(Conversation).filter(
+        Conversation.user_id == user_id,
+        Conversation.search_vector.op("@@")(ts_query),
+    )
+    if agent_id is not None:
+        search_query = search_query.filter(Conversation.agent_id == agent_id)
+    if organization_id is not None:
+        search_query = search_query.filter(
+            Conversation.organization_id == organization_id
+        )
+    if with_messages:
+        search_query = search_query.options(selectinload(Conversation.text_messages))
+    search_query = (
+        search_query.order_by(
+            func.ts_rank_cd(Conversation.search_vector, ts_query).desc(),
+            Conversation.updated_at.desc(),
+        )
+        .offset(offset)
+        .limit(limit)
+    )
+
+    return search_query.all()
+
+
 @validate_transaction
 def update_conversation(
     db: Session, conversation: Conversation, new_conversation: UpdateConversationRequest
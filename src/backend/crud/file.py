@@ -1,40 +1,267 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import Integer, func, literal, select, text, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.orm import Session, joinedload, undefer
 
-from backend.database_models.file import File
+from backend.database_models.file import File, FileContent, UserFileUsage
 from backend.schemas.file import UpdateFileRequest
+from backend.services.file_stats import FileStats
 from backend.services.transaction import validate_transaction
 
 
 @validate_transaction
-def create_file(db: Session, file: File) -> File:
+def create_file(
+    db: Session, file: File, max_total_file_size: int | None = None
+) -> File:
     """
     Create a new file.
 
     Args:
         db (Session): Database session.
         file (File): File data to be created.
+        max_total_file_size (int): Maximum total file size allowed for the user.
 
     Returns:
         File: Created file.
+
+    Raises:
+        ValueError: If the user's total file size would exceed max_total_file_size.
     """
     db.add(file)
+    db.flush()
+    validate_total_file_size(db, file.user_id, max_total_file_size)
     db.commit()
     db.refresh(file)
     return file
 
 
 @validate_transaction
-def batch_create_files(db: Session, files: list[File]) -> list[File]:
+def batch_create_files(
+    db: Session,
+    files: list[File],
+    max_total_file_size: int | None = None,
+    file_contents: list[FileContent] | None = None,
+) -> list[File]:
     """
     Batch create files.
+
+    Args:
+        db (Session): Database session.
+        files (list[File]): Files to be created.
+        max_total_file_size (int): Maximum total file size allowed for the users.
+        file_contents (list[FileContent]): Shared contents referenced by the files,
+            stored unless they already exist.
+
+    Returns:
+        list[File]: Created files.
+
+    Raises:
+        ValueError: If a user's total file size would exceed max_total_file_size.
     """
+    if file_contents:
+        store_file_contents(db, file_contents)
     db.add_all(files)
+    db.flush()
+    for user_id in {file.user_id for file in files}:
+        validate_total_file_size(db, user_id, max_total_file_size)
     db.commit()
     for file in files:
         db.refresh(file)
     return files
 
 
+def store_file_contents(db: Session, file_contents: list[FileContent]) -> None:
+    """
+    Store shared file contents within the current transaction, keeping the existing ones.
+
+    Existing rows are locked until commit, so they can't be deleted by the last file
+    referencing them going away before the new files reference them.
+
+    Args:
+        db (Session): Database session.
+        file_contents (list[FileContent]): Contents to store.
+    """
+    values = {}
+    for file_content in file_contents:
+        values[(file_content.content_hash, file_content.user_id)] = {
+            "user_id": file_content.user_id,
+            "content_hash": file_content.content_hash,
+            "file_content": file_content.file_content,
+            "page_offsets": file_content.page_offsets,
+            "chunk_index": file_content.chunk_index,
+            "content_size": file_content.content_size,
+            "parse_seconds": file_content.parse_seconds,
+            "ref_count": 0,
+        }
+
+    statement = insert(FileContent).values(list(values.values()))
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[FileContent.content_hash, FileContent.user_id],
+            set_={"updated_at": func.now()},
+        )
+    )
+
+
+@validate_transaction
+def get_file_contents_by_hashes(
+    db: Session, user_id: str, content_hashes: list[str]
+) -> list[FileContent]:
+    """
+    Get the shared contents of a user's files by content hash.
+
+    Args:
+        db (Session): Database session.
+        user_id (str): User ID.
+        content_hashes (list[str]): SHA-256 hashes of the uploaded bytes.
+
+    Returns:
+        list[FileContent]: The stored contents, hashes without one are left out.
+    """
+    return (
+        db.query(FileContent)
+        .filter(
+            FileContent.user_id == user_id,
+            FileContent.content_hash.in_(content_hashes),
+        )
+        .all()
+    )
+
+
+@validate_transaction
+def get_file_content_stats(db: Session) -> dict[str, float]:
+    """
+    Get the savings of sharing file contents: each file referencing a stored content
+    past the first one skipped parsing and storing another copy of the text.
+
+    Args:
+        db (Session): Database session.
+
+    Returns:
+        dict[str, float]: Number of stored contents, of files reusing one, of bytes
+            not stored and of seconds of parsing avoided.
+    """
+    reuses = FileContent.ref_count - 1
+    contents, reused_files, saved_bytes, saved_seconds = db.execute(
+        select(
+            func.count(FileContent.id),
+            func.coalesce(func.sum(reuses), 0),
+            func.coalesce(func.sum(reuses * FileContent.content_size), 0),
+            func.coalesce(func.sum(reuses * FileContent.parse_seconds), 0),
+        )
+    ).one()
+    return {
+        "contents": contents,
+        "reused_files": int(reused_files),
+        "storage_saved_bytes": int(saved_bytes),
+        "parse_seconds_saved": float(saved_seconds),
+    }
+
+
+def validate_total_file_size(
+    db: Session, user_id: str, max_total_file_size: int | None = None
+) -> None:
+    """
+    Check the user's total file size within the current transaction.
+
+    Must be called after the new files are flushed: the trigger updating the
+    counter locks the user's row until commit, so parallel uploads are serialized
+    and cannot overshoot the limit.
+
+    Args:
+        db (Session): Database session.
+        user_id (str): User ID.
+        max_total_file_size (int): Maximum total file size allowed for the user.
+
+    Raises:
+        ValueError: If the total file size exceeds max_total_file_size.
+    """
+    if max_total_file_size is None:
+        return
+
+    total_file_size = get_total_file_size(db, user_id)
+    if total_file_size > max_total_file_size:
+        raise ValueError(
+            f"Total file size {total_file_size} exceeds the maximum allowed size of {max_total_file_size} bytes."
+        )
+
+
+@validate_transaction
+def get_total_file_size(db: Session, user_id: str) -> int:
+    """
+    Get the total size of the files uploaded by a user.
+
+    Args:
+        db (Session): Database session.
+        user_id (str): User ID.
+
+    Returns:
+        int: Total file size in bytes.
+    """
+    total_file_size = (
+        db.query(UserFileUsage.total_file_size)
+        .filter(UserFileUsage.user_id == user_id)
+        .scalar()
+    )
+    return total_file_size or 0
+
+
+@validate_transaction
+def reconcile_user_file_usage(db: Session) -> int:
+    """
+    Recompute every user's total file size from the files table.
+
+    The counters table is locked for the duration of the transaction so that
+    concurrent uploads wait for the reconciliation instead of being lost.
+
+    Args:
+        db (Session): Database session.
+
+    Returns:
+        int: Number of users whose total file size was corrected.
+    """
+    db.execute(text("LOCK TABLE user_file_usage IN SHARE ROW EXCLUSIVE MODE"))
+    file_sizes = (
+        select(
+            File.user_id,
+            func.coalesce(func.sum(File.file_size), 0).label("total_file_size"),
+        )
+        .where(File.user_id.isnot(None))
+        .group_by(File.user_id)
+        .subquery()
+    )
+    actual_usage = dict(
+        db.execute(select(file_sizes.c.user_id, file_sizes.c.total_file_size)).all()
+    )
+    stored_usage = dict(
+        db.execute(select(UserFileUsage.user_id, UserFileUsage.total_file_size)).all()
+    )
+
+    drifted = {
+        user_id: actual_usage.get(user_id, 0)
+        for user_id in actual_usage.keys() | stored_usage.keys()
+        if actual_usage.get(user_id, 0) != stored_usage.get(user_id)
+    }
+    if drifted:
+        statement = insert(UserFileUsage).values(
+            [
+                {"user_id": user_id, "total_file_size": total_file_size}
+                for user_id, total_file_size in drifted.items()
+            ]
+        )
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[UserFileUsage.user_id],
+                set_={
+                    "total_file_size": statement.excluded.total_file_size,
+                    "updated_at": func.now(),
+                },
+            )
+        )
+    db.commit()
+
+    return len(drifted)
+
+
 @validate_transaction
 def get_file(db: Session, file_id: str, user_id: str) -> File:
     """
@@ -72,7 +299,7 @@ def get_files(db: Session, user_id: str, offset: int = 0, limit: int = 100):
 
 @validate_transaction
 def get_files_by_conversation_id(
-    db: Session, conversation_id: str, user_id: str
+    db: Session, conversation_id: str, user_id: str, with_content: bool = False
 ) -> list[File]:
     """
     List all files from a conversation.
@@ -81,15 +308,20 @@ def get_files_by_conversation_id(
         db (Session): Database session.
         conversation_id (str): Conversation ID.
         user_id (str): User ID.
+        with_content (bool): Whether to load the file content in the same query.
 
     Returns:
         list[File]: List of files from the conversation.
     """
-    return (
-        db.query(File)
-        .filter(File.conversation_id == conversation_id, File.user_id == user_id)
-        .all()
+    query = db.query(File).filter(
+        File.conversation_id == conversation_id, File.user_id == user_id
     )
+    if with_content:
+        query = query.options(
+            undefer(File.file_content), joinedload(File.shared_content)
+        )
+
+    return query.all()
 
 
 @validate_transaction
@@ -113,7 +345,7 @@ def get_files_by_file_names(
     db: Session, file_names: list[str], user_id: str
 ) -> list[File]:
     """
-    Get files by file names.
+    Get files by file names, including their content.
 
     Args:
         db (Session): Database session.
@@ -126,6 +358,12 @@ def get_files_by_file_names(
     return (
         db.query(File)
         .filter(File.file_name.in_(file_names), File.user_id == user_id)
+        .options(
+            undefer(File.file_content),
+            undefer(File.page_offsets),
+            undefer(File.chunk_index),
+            joinedload(File.shared_content),
+        )
         .all()
     )
 
@@ -166,6 +404,49 @@ def update_file(db: Session, file: File, new_file: UpdateFileRequest) -> File:
     return file
 
 
+@validate_transaction
+def append_file_content(
+    db: Session,
+    file_id: str,
+    user_id: str,
+    content: str,
+    page_offsets: list[int] | None = None,
+    stats: FileStats | None = None,
+    chunk_index: bytes | None = None,
+) -> None:
+    """
+    Append extracted text to a file, for documents parsed in several steps.
+
+    Args:
+        db (Session): Database session.
+        file_id (str): File ID.
+        user_id (str): User ID.
+        content (str): Text to append.
+        page_offsets (list[int]): Offsets of the appended pages in the file content.
+        stats (FileStats): Stats of the whole text, replacing the stored ones.
+        chunk_index (bytes): Chunk index of the whole text, replacing the stored one.
+    """
+    values = {"file_content": File.file_content + content}
+    if stats is not None:
+        values.update(
+            word_count=stats.word_count,
+            token_count=stats.token_count,
+            preview=stats.preview,
+            language=stats.language,
+        )
+    if chunk_index is not None:
+        values["chunk_index"] = chunk_index
+    if page_offsets:
+        values["page_offsets"] = func.array_cat(
+            File.page_offsets, literal(page_offsets, ARRAY(Integer))
+        )
+
+    db.execute(
+        update(File).where(File.id == file_id, File.user_id == user_id).values(values)
+    )
+    db.commit()
+
+
 @validate_transaction
 def delete_file(db: Session, file_id: str, user_id: str) -> None:
     """
@@ -1,6 +1,14 @@
+from uuid import uuid4
+
+from sqlalchemy import insert, select, update
 from sqlalchemy.orm import Session
 
+from backend.database_models.citation import Citation, citation_documents
+from backend.database_models.conversation import Conversation
+from backend.database_models.document import Document
+from backend.database_models.file import File
 from backend.database_models.message import Message
+from backend.database_models.tool_call import ToolCall
 from backend.schemas.message import UpdateMessage
 from backend.services.transaction import validate_transaction
 
@@ -23,6 +31,220 @@ def create_message(db: Session, message: Message) -> Message:
     return message
 
 
+@validate_transaction
+def create_user_message(
+    db: Session,
+    message: Message,
+    conversation: Conversation,
+    file_ids: list[str] | None = None,
+) -> Message:
+    """
+    Create a user message in the same transaction as the rest of the turn setup:
+    the conversation is created if it is new and the files that are not attached
+    to a message yet are attached to this one.
+
+    Server generated values are fetched with RETURNING on flush, the message is
+    not refreshed after the commit.
+
+    Args:
+        db (Session): Database session.
+        message (Message): Message data to be created.
+        conversation (Conversation): Conversation of the message, created if new.
+        file_ids (list[str]): IDs of the files sent with the message.
+
+    Returns:
+        Message: Created message.
+    """
+    db.add(conversation)
+    db.add(message)
+    db.flush()
+
+    if file_ids:
+        db.execute(
+            update(File)
+            .where(
+                File.id.in_(file_ids),
+                File.user_id == message.user_id,
+                File.message_id.is_(None),
+            )
+            .values(message_id=message.id)
+        )
+
+    db.commit()
+    return message
+
+
+@validate_transaction
+def create_message_with_tool_calls(
+    db: Session, message: Message, tool_calls: list[ToolCall]
+) -> Message:
+    """
+    Create a new message and its tool calls in one transaction.
+
+    Args:
+        db (Session): Database session.
+        message (Message): Message data to be created.
+        tool_calls (list[ToolCall]): Tool calls of the message.
+
+    Returns:
+        Message: Created message.
+    """
+    db.add(message)
+    db.flush()
+
+    for tool_call in tool_calls:
+        tool_call.message_id = message.id
+    db.add_all(tool_calls)
+
+    db.commit()
+    return message
+
+
+@validate_transaction
+def create_message_with_documents_and_citations(
+    db: Session,
+    message: Message,
+    documents: list[Document],
+    citations: list[Citation],
+    conversation_description: str | None = None,
+) -> Message:
+    """
+    Create a new message along with its documents and citations in one transaction.
+
+    Documents, citations and the citation_documents association rows are written
+    with one multi-row INSERT per table instead of one INSERT per object.
+    IDs are generated client side, so no RETURNING round trip is needed.
+
+    Args:
+        db (Session): Database session.
+        message (Message): Message data to be created.
+        documents (list[Document]): Documents retrieved for the message.
+        citations (list[Citation]): Citations of the message, referencing the documents
+            through their documents relationship.
+        conversation_description (str): If set, also updates the description of the
+            message's conversation.
+
+    Returns:
+        Message: Created message.
+    """
+    _add_message_with_documents_and_citations(
+        db, message, documents, citations, conversation_description
+    )
+    db.commit()
+    return message
+
+
+@validate_transaction
+def create_messages_with_documents_and_citations(
+    db: Session,
+    turns: list[tuple[Message, list[Document], list[Citation], str | None]],
+) -> list[Message]:
+    """
+    Create several messages along with their documents and citations in one transaction,
+    in the given order. Messages that already exist are skipped, so the same turns can
+    safely be written again.
+
+    Args:
+        db (Session): Database session.
+        turns (list[tuple[Message, list[Document], list[Citation], str | None]]):
+            Message, documents, citations and conversation description of each turn.
+
+    Returns:
+        list[Message]: Created messages.
+    """
+    existing_ids = set(
+        db.scalars(
+            select(Message.id).where(
+                Message.id.in_([message.id for message, _, _, _ in turns])
+            )
+        )
+    )
+
+    messages = []
+    for message, documents, citations, conversation_description in turns:
+        if message.id in existing_ids:
+            continue
+        _add_message_with_documents_and_citations(
+            db, message, documents, citations, conversation_description
+        )
+        messages.append(message)
+
+    db.commit()
+    return messages
+
+
+def _add_message_with_documents_and_citations(
+    db: Session,
+    message: Message,
+    documents: list[Document],
+    citations: list[Citation],
+    conversation_description: str | None = None,
+) -> None:
+    db.add(message)
+    db.flush()
+
+    for document in documents:
+        document.id = document.id or str(uuid4())
+    for citation in citations:
+        citation.id = citation.id or str(uuid4())
+
+    if documents:
+        db.execute(
+            insert(Document),
+            [
+                {
+                    "id": document.id,
+                    "text": document.text,
+                    "user_id": document.user_id,
+                    "title": document.title,
+                    "url": document.url,
+                    "fields": document.fields,
+                    "tool_name": document.tool_name,
+                    "conversation_id": document.conversation_id,
+                    "message_id": message.id,
+                    "document_id": document.document_id,
+                }
+                for document in documents
+            ],
+        )
+
+    if citations:
+        db.execute(
+            insert(Citation),
+            [
+                {
+                    "id": citation.id,
+                    "text": citation.text,
+                    "user_id": citation.user_id,
+                    "start": citation.start,
+                    "end": citation.end,
+                    "message_id": message.id,
+                    "document_ids": citation.document_ids,
+                }
+                for citation in citations
+            ],
+        )
+
+        associations = [
+            {"left_id": document.id, "right_id": citation.id}
+            for citation in citations
+            for document in citation.documents
+            if document.id is not None
+        ]
+        if associations:
+            db.execute(insert(citation_documents), associations)
+
+    if conversation_description is not None:
+        db.execute(
+            update(Conversation)
+            .where(
+                Conversation.id == message.conversation_id,
+                Conversation.user_id == message.user_id,
+            )
+            .values(description=conversation_description)
+        )
+
+
 @validate_transaction
 def get_message(db: Session, message_id: str, user_id: str) -> Message:
     """
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 
 from backend.database_models.user import User
 from backend.schemas.user import UpdateUser
+from backend.services.cache import agent_cache, agent_tool_metadata_cache, user_cache
 
 
 def create_user(db: Session, user: User) -> User:
@@ -23,7 +24,7 @@ def create_user(db: Session, user: User) -> User:
 
 def get_user(db: Session, user_id: str) -> User:
     """
-    Get a user by ID.
+    Get a user by ID, cached per request and across requests.
 
     Args:
         db (Session): Database session.
@@ -32,7 +33,9 @@ def get_user(db: Session, user_id: str) -> User:
     Returns:
         User: User with the given ID.
     """
-    return db.query(User).filter(User.id == user_id).first()
+    return user_cache.get(
+        db, user_id, lambda: db.query(User).filter(User.id == user_id).first()
+    )
 
 
 def get_users(db: Session, offset: int = 0, limit: int = 100) -> list[User]:
@@ -65,6 +68,7 @@ def update_user(db: Session, user: User, new_user: UpdateUser) -> User:
     for attr, value in new_user.model_dump(exclude_none=True).items():
         setattr(user, attr, value)
     db.commit()
+    user_cache.invalidate(db, user.id)
     db.refresh(user)
     return user
 
@@ -80,3 +84,7 @@ def delete_user(db: Session, user_id: str) -> None:
     user = db.query(User).filter(User.id == user_id)
     user.delete()
     db.commit()
+    user_cache.invalidate(db, user_id)
+    # The user's agents and their tool metadata were deleted in cascade
+    agent_cache.clear()
+    agent_tool_metadata_cache.clear()
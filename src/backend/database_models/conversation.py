@@ -1,13 +1,24 @@
 from typing import List, Optional
 from uuid import uuid4
 
-from sqlalchemy import ForeignKey, Index, PrimaryKeyConstraint, String, UniqueConstraint
+from sqlalchemy import (
+    Computed,
+    ForeignKey,
+    Index,
+    PrimaryKeyConstraint,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from backend.database_models.base import Base
 from backend.database_models.file import File
 from backend.database_models.message import Message
 
+# Text search configuration used to index and query conversations
+SEARCH_CONFIG = "english"
+
 
 class Conversation(Base):
     __tablename__ = "conversations"
@@ -30,6 +41,22 @@ class Conversation(Base):
         )
     )
 
+    # Full-text search vectors maintained by the database, never written by the ORM:
+    # messages_search_vector is updated by a trigger on the messages table and
+    # search_vector is computed from it and the title
+    messages_search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR, nullable=True, deferred=True
+    )
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        Computed(
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') "
+            "|| coalesce(messages_search_vector, ''::tsvector)",
+            persisted=True,
+        ),
+        deferred=True,
+    )
+
     @property
     def messages(self):
         return sorted(self.text_messages, key=lambda x: x.created_at)
@@ -39,4 +66,9 @@ class Conversation(Base):
         PrimaryKeyConstraint("id", "user_id", name="conversation_pkey"),
         Index("conversation_user_agent_index", "user_id", "agent_id"),
         Index("conversation_user_id_index", "id", "user_id", unique=True),
+        Index(
+            "conversation_search_vector_index",
+            "search_vector",
+            postgresql_using="gin",
+        ),
     )
@@ -1,24 +1,119 @@
+import math
 import os
+import time
 from typing import Annotated, Any, Generator
 
 from dotenv import load_dotenv
-from fastapi import Depends
-from sqlalchemy import create_engine
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
+from backend.database_models.replica import ReplicaRouter
 
 load_dotenv()
 
-SQLALCHEMY_DATABASE_URL = Settings().database.url
+# Unix time of the client's last write, so that every worker process sends the
+# client's next reads to the primary
+LAST_WRITE_COOKIE = "last_write_at"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+SQLALCHEMY_DATABASE_URL = get_settings().database.url
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, pool_size=5, max_overflow=10, pool_timeout=30
 )
 
+replica_router = None
+if get_settings().database.replica_urls:
+    replica_router = ReplicaRouter(
+        replicas=[
+            create_engine(url, pool_size=5, max_overflow=10, pool_timeout=30)
+            for url in get_settings().database.replica_urls
+        ],
+        max_lag_seconds=get_settings().database.replica_max_lag_seconds,
+        sticky_seconds=get_settings().database.replica_sticky_seconds,
+    )
+
+
+def get_request_user_id(request: Request) -> str | None:
+    context = request.scope.get("context")
+    return context.get_user_id() if context else None
+
+
+def record_user_write(user_id: str | None) -> None:
+    """
+    Reads of a user who just wrote go to the primary for a while, see ReplicaRouter.
+    """
+    if replica_router is not None and user_id:
+        replica_router.record_write(user_id)
 
-def get_session() -> Generator[Session, Any, None]:
+
+@event.listens_for(Session, "after_commit")
+def record_session_write(session: Session) -> None:
+    record_user_write(session.info.get("user_id"))
+
+
+def get_session(request: Request) -> Generator[Session, Any, None]:
     with Session(engine) as session:
+        session.info["user_id"] = get_request_user_id(request)
+        yield session
+
+
+def get_last_write_at(request: Request) -> float | None:
+    try:
+        return float(request.cookies.get(LAST_WRITE_COOKIE, ""))
+    except ValueError:
+        return None
+
+
+class LastWriteMiddleware:
+    """
+    Sets LAST_WRITE_COOKIE on the successful responses of requests that may write,
+    when read replicas are configured. The worker process serving the client's
+    next read may not have seen the write.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            replica_router is None
+            or scope["type"] != "http"
+            or scope["method"] in SAFE_METHODS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                MutableHeaders(scope=message).append(
+                    "set-cookie",
+                    f"{LAST_WRITE_COOKIE}={time.time():.3f}; "
+                    f"Max-Age={math.ceil(replica_router.sticky_seconds)}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+def get_read_session(request: Request) -> Generator[Session, Any, None]:
+    """
+    Session for read-only endpoints, bound to a read replica when one is configured,
+    healthy and the user did not write recently. Falls back to the primary otherwise.
+    """
+    replica = None
+    if replica_router is not None:
+        replica = replica_router.get_engine(
+            get_request_user_id(request), get_last_write_at(request)
+        )
+
+    with Session(replica or engine) as session:
         yield session
 
 
 DBSessionDep = Annotated[Session, Depends(get_session)]
+DBReadSessionDep = Annotated[Session, Depends(get_read_session)]
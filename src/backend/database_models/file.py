@@ -1,5 +1,18 @@
-from sqlalchemy import ForeignKey, ForeignKeyConstraint, Index, String
-from sqlalchemy.orm import Mapped, mapped_column
+from typing import Optional
+
+from sqlalchemy import (
+    BigInteger,
+    Float,
+    ForeignKey,
+    ForeignKeyConstraint,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from backend.database_models.base import Base
 
@@ -16,7 +29,28 @@ class File(Base):
     file_name: Mapped[str]
     file_path: Mapped[str]
     file_size: Mapped[int] = mapped_column(default=0)
-    file_content: Mapped[str] = mapped_column(default="")
+    # Deferred so that listing and quota queries don't pull the extracted text,
+    # use `undefer(File.file_content)` in queries that need to read it
+    file_content: Mapped[str] = mapped_column(default="", deferred=True)
+    # Offset in file_content where each page starts, for PDFs
+    page_offsets: Mapped[Optional[list[int]]] = mapped_column(
+        ARRAY(Integer), nullable=True, deferred=True
+    )
+    # Serialized ChunkIndex of file_content
+    chunk_index: Mapped[Optional[bytes]] = mapped_column(
+        LargeBinary, nullable=True, deferred=True
+    )
+    # Set when the extracted text is shared through file_contents,
+    # file_content, page_offsets and chunk_index are empty then
+    content_hash: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    # Computed from the extracted text at upload, so that listing files for the
+    # preamble does not load their content
+    word_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    token_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    preview: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    language: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+
+    shared_content: Mapped[Optional["FileContent"]] = relationship(viewonly=True)
 
     __table_args__ = (
         ForeignKeyConstraint(
@@ -25,8 +59,78 @@ class File(Base):
             name="file_conversation_id_user_id_fkey",
             ondelete="CASCADE",
         ),
+        ForeignKeyConstraint(
+            ["content_hash", "user_id"],
+            ["file_contents.content_hash", "file_contents.user_id"],
+            name="file_content_hash_user_id_fkey",
+        ),
         Index("file_conversation_id_user_id", conversation_id, user_id),
         Index("file_conversation_id", conversation_id),
         Index("file_message_id", message_id),
         Index("file_user_id", user_id),
+        Index("file_content_hash_user_id", content_hash, user_id),
     )
+
+    @property
+    def content(self) -> str:
+        """
+        Extracted text of the file, whether it is stored with the file or shared.
+        """
+        if self.content_hash is not None:
+            return self.shared_content.file_content
+        return self.file_content
+
+    @property
+    def content_page_offsets(self) -> Optional[list[int]]:
+        if self.content_hash is not None:
+            return self.shared_content.page_offsets
+        return self.page_offsets
+
+    @property
+    def content_chunk_index(self) -> Optional[bytes]:
+        if self.content_hash is not None:
+            return self.shared_content.chunk_index
+        return self.chunk_index
+
+
+class FileContent(Base):
+    """
+    Text extracted from uploaded bytes, shared by the files of a user with the same
+    content hash. ref_count is maintained by the `files_file_content_ref_count`
+    trigger on the files table, which deletes the row once no file references it.
+    """
+
+    __tablename__ = "file_contents"
+
+    user_id: Mapped[str] = mapped_column(String)
+    # SHA-256 of the uploaded bytes
+    content_hash: Mapped[str] = mapped_column(String)
+    file_content: Mapped[str] = mapped_column(default="")
+    page_offsets: Mapped[Optional[list[int]]] = mapped_column(
+        ARRAY(Integer), nullable=True
+    )
+    chunk_index: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    # Size of the extracted text in bytes
+    content_size: Mapped[int] = mapped_column(BigInteger, default=0)
+    parse_seconds: Mapped[float] = mapped_column(Float, default=0)
+    ref_count: Mapped[int] = mapped_column(default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "content_hash", "user_id", name="file_contents_content_hash_user_id_uc"
+        ),
+    )
+
+
+class UserFileUsage(Base):
+    """
+    Total size of the files uploaded by a user.
+    Maintained by the `files_user_file_usage` trigger on the files table.
+    """
+
+    __tablename__ = "user_file_usage"
+
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    total_file_size: Mapped[int] = mapped_column(BigInteger, default=0)
+
+    __table_args__ = (UniqueConstraint("user_id", name="user_file_usage_user_id_uc"),)
@@ -0,0 +1,192 @@
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import Engine, text
+
+HEALTH_CHECK_INTERVAL_SECONDS = 10
+# Checks older than this many intervals are ignored, in case the checks stopped
+HEALTH_STALE_INTERVALS = 3
+# Upper bound of users tracked in the sticky primary window
+MAX_TRACKED_WRITERS = 100_000
+
+# Replication lag in seconds, 0 when the replica replayed everything it received
+REPLICATION_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+@dataclass
+class ReplicaHealth:
+    healthy: bool = False
+    lag_seconds: float | None = None
+    checked_at: float | None = None
+
+
+class ReplicaRouter:
+    """
+    Picks the engine used by read-only sessions.
+
+    Reads go to a healthy replica whose replication lag is within max_lag_seconds,
+    in round robin. Replicas are checked every health_check_interval seconds in a
+    background thread once started, requests only read the last results.
+    Users who wrote within the last sticky_seconds read from the primary, so they
+    always see their own writes. Writes are tracked in this process, and the time
+    of a client's last write can be passed along for writes made by other processes.
+    """
+
+    def __init__(
+        self,
+        replicas: list[Engine],
+        max_lag_seconds: float,
+        sticky_seconds: float,
+        health_check_interval: float = HEALTH_CHECK_INTERVAL_SECONDS,
+    ) -> None:
+        self.replicas = replicas
+        self.max_lag_seconds = max_lag_seconds
+        self.sticky_seconds = sticky_seconds
+        self.health_check_interval = health_check_interval
+
+        self._health = {replica: ReplicaHealth() for replica in replicas}
+        self._round_robin = itertools.cycle(replicas)
+        self._last_writes: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._checker: threading.Thread | None = None
+
+    def start(self) -> None:
+        """
+        Starts checking the replicas in the background.
+        """
+        if self._checker is not None:
+            return
+        self._stopped.clear()
+        self._checker = threading.Thread(
+            target=self._check_periodically, name="replica-health", daemon=True
+        )
+        self._checker.start()
+
+    def stop(self) -> None:
+        if self._checker is None:
+            return
+        self._stopped.set()
+        self._checker.join()
+        self._checker = None
+
+    def check_all(self) -> None:
+        for replica in self.replicas:
+            self.check(replica)
+
+    def _check_periodically(self) -> None:
+        while not self._stopped.is_set():
+            self.check_all()
+            self._stopped.wait(self.health_check_interval)
+
+    def record_write(self, user_id: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._last_writes) >= MAX_TRACKED_WRITERS:
+                self._last_writes = {
+                    writer: written_at
+                    for writer, written_at in self._last_writes.items()
+                    if now - written_at < self.sticky_seconds
+                }
+            self._last_writes[user_id] = now
+
+    def is_sticky(
+        self, user_id: str | None, last_write_at: float | None = None
+    ) -> bool:
+        # Written by another process, whose clock may be slightly ahead
+        if (
+            last_write_at is not None
+            and abs(time.time() - last_write_at) < self.sticky_seconds
+        ):
+            return True
+        if not user_id:
+            return False
+        written_at = self._last_writes.get(user_id)
+        return (
+            written_at is not None
+            and time.monotonic() - written_at < self.sticky_seconds
+        )
+
+    def get_engine(
+        self, user_id: str | None = None, last_write_at: float | None = None
+    ) -> Engine | None:
+        """
+        Returns the replica to read from, or None to read from the primary.
+
+        Args:
+            user_id (str): ID of the user reading.
+            last_write_at (float): Unix time of the client's last write, from any process.
+
+        Returns:
+            Engine | None: Replica engine, None if the primary should be used.
+        """
+        if self.is_sticky(user_id, last_write_at):
+            return None
+
+        for _ in range(len(self.replicas)):
+            replica = next(self._round_robin)
+            if self.is_available(replica):
+                return replica
+        return None
+
+    def is_available(self, replica: Engine) -> bool:
+        health = self._health[replica]
+        if (
+            health.checked_at is None
+            or time.monotonic() - health.checked_at
+            > self.health_check_interval * HEALTH_STALE_INTERVALS
+        ):
+            return False
+        return (
+            health.healthy
+            and health.lag_seconds is not None
+            and health.lag_seconds <= self.max_lag_seconds
+        )
+
+    def check(self, replica: Engine) -> ReplicaHealth:
+        """
+        Checks that a replica is reachable and measures its replication lag.
+        """
+        # Imported here, the logger depends on modules importing the database models
+        from backend.services.logger.utils import get_logger
+
+        logger = get_logger()
+        health = ReplicaHealth(checked_at=time.monotonic())
+        try:
+            with replica.connect() as connection:
+                health.lag_seconds = float(
+                    connection.execute(REPLICATION_LAG_QUERY).scalar()
+                )
+            health.healthy = True
+        except Exception as e:
+            logger.warning(
+                event=f"[Database] Read replica {replica.url.host} is unavailable: {e}"
+            )
+
+        if health.healthy and health.lag_seconds > self.max_lag_seconds:
+            logger.warning(
+                event=f"[Database] Read replica {replica.url.host} is lagging by {health.lag_seconds:.1f}s"
+            )
+
+        self._health[replica] = health
+        return health
+
+    def status(self) -> list[dict]:
+        return [
+            {
+                "host": replica.url.host,
+                "healthy": self._health[replica].healthy,
+                "lag_seconds": self._health[replica].lag_seconds,
+            }
+            for replica in self.replicas
+        ]
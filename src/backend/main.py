@@ -14,7 +14,14 @@ from backend.config.auth import (
     verify_migrate_token,
 )
 from backend.config.routers import ROUTER_DEPENDENCIES
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
+from backend.crud import file as file_crud
+from backend.database_models.database import (
+    DBReadSessionDep,
+    DBSessionDep,
+    LastWriteMiddleware,
+    replica_router,
+)
 from backend.routers.agent import default_agent_router
 from backend.routers.agent import router as agent_router
 from backend.routers.auth import router as auth_router
@@ -25,10 +32,19 @@ from backend.routers.experimental_features import router as experimental_feature
 from backend.routers.snapshot import router as snapshot_router
 from backend.routers.tool import router as tool_router
 from backend.routers.user import router as user_router
+from backend.services.cache import get_cache_stats
 from backend.services.context import ContextMiddleware
+from backend.services.file import reconcile_file_usage
+from backend.services.file_parsing import shutdown_file_parser
+from backend.services.http_client import close_http_client
 from backend.services.logger.middleware import LoggingMiddleware
 from backend.services.logger.utils import get_logger
 from backend.services.metrics import MetricsMiddleware
+from backend.services.web_scraper import shutdown_web_scraper
+from backend.services.write_behind import (
+    start_write_behind_queue,
+    stop_write_behind_queue,
+)
 
 logger = get_logger()
 
@@ -59,7 +75,7 @@ def create_app():
     dependencies_type = "default"
     if is_authentication_enabled():
         # Required to save temporary OAuth state in session
-        auth_secret = Settings().auth.secret_key
+        auth_secret = get_settings().auth.secret_key
         app.add_middleware(SessionMiddleware, secret_key=auth_secret)
         dependencies_type = "auth"
     for router in routers:
@@ -81,6 +97,7 @@ def create_app():
     app.add_middleware(ContextMiddleware)  # This should be the first middleware
     app.add_middleware(LoggingMiddleware)
     app.add_middleware(MetricsMiddleware)
+    app.add_middleware(LastWriteMiddleware)
 
     return app
 
@@ -108,18 +125,53 @@ async def validation_exception_handler(request: Request, exc: Exception):
 @app.on_event("startup")
 async def startup_event():
     """
-    Retrieves all the Auth provider endpoints if authentication is enabled.
+    Retrieves all the Auth provider endpoints if authentication is enabled,
+    starts the read replica health checks and the write-behind queue.
     """
     if is_authentication_enabled():
         await get_auth_strategy_endpoints()
 
+    if replica_router is not None:
+        replica_router.start()
+
+    # Replays the turns left in the write-behind journal, if enabled
+    await start_write_behind_queue()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Stores the turns still queued for the database, if the write-behind queue is enabled,
+    stops the file parser and web scraper workers and the read replica health checks,
+    and closes the pooled HTTP connections.
+    """
+    await stop_write_behind_queue()
+    if replica_router is not None:
+        replica_router.stop()
+    shutdown_file_parser()
+    shutdown_web_scraper()
+    await close_http_client()
+
 
 @app.get("/health")
 async def health():
     """
-    Health check for backend APIs
+    Health check for backend APIs, with the entity cache hit rates and
+    the read replicas if configured
     """
-    return {"status": "OK"}
+    health = {"status": "OK", "caches": get_cache_stats()}
+    if replica_router is not None:
+        health["replicas"] = replica_router.status()
+    return health
+
+
+@app.get("/health/files")
+async def file_content_health(session: DBReadSessionDep):
+    """
+    Storage and parse time saved by sharing the content of identical uploads,
+    kept out of /health since it aggregates every stored content
+    """
+    return {"status": "OK", "file_contents": file_crud.get_file_content_stats(session)}
 
 
 @app.post("/migrate", dependencies=[Depends(verify_migrate_token)])
@@ -136,3 +188,14 @@ async def apply_migrations():
         )
 
     return {"status": "Migration successful"}
+
+
+@app.post("/reconcile-file-usage", dependencies=[Depends(verify_migrate_token)])
+async def apply_file_usage_reconciliation(session: DBSessionDep):
+    """
+    Recomputes the per-user total file size counters from the stored files.
+    Meant to be called periodically by a scheduled job.
+    """
+    corrected = reconcile_file_usage(session)
+
+    return {"status": "Reconciliation successful", "corrected": corrected}
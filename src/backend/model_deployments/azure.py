@@ -4,7 +4,7 @@ from typing import Any, AsyncGenerator, Dict, List
 import cohere
 
 from backend.chat.collate import to_dict
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from backend.model_deployments.base import BaseDeployment
 from backend.model_deployments.utils import get_model_config_var
 from backend.schemas.cohere_chat import CohereChatRequest
@@ -27,7 +27,7 @@ class AzureDeployment(BaseDeployment):
 
     DEFAULT_MODELS = ["azure-command"]
 
-    azure_config = Settings().deployments.azure
+    azure_config = get_settings().deployments.azure
     default_api_key = azure_config.api_key
     default_chat_endpoint_url = azure_config.endpoint_url
 
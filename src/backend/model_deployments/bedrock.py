@@ -3,7 +3,7 @@ from typing import Any, AsyncGenerator, Dict, List
 import cohere
 
 from backend.chat.collate import to_dict
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from backend.model_deployments.base import BaseDeployment
 from backend.model_deployments.utils import get_model_config_var
 from backend.schemas.cohere_chat import CohereChatRequest
@@ -25,7 +25,7 @@ BEDROCK_ENV_VARS = [
 class BedrockDeployment(BaseDeployment):
     DEFAULT_MODELS = ["cohere.command-r-plus-v1:0"]
 
-    bedrock_config = Settings().deployments.bedrock
+    bedrock_config = get_settings().deployments.bedrock
     region_name = bedrock_config.region_name
     access_key = bedrock_config.access_key
     secret_access_key = bedrock_config.secret_key
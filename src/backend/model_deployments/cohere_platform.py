@@ -4,7 +4,7 @@ import cohere
 import requests
 
 from backend.chat.collate import to_dict
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from backend.model_deployments.base import BaseDeployment
 from backend.model_deployments.utils import get_model_config_var
 from backend.schemas.cohere_chat import CohereChatRequest
@@ -23,7 +23,7 @@ class CohereDeployment(BaseDeployment):
     """Cohere Platform Deployment."""
 
     client_name = "cohere-toolkit"
-    api_key = Settings().deployments.cohere_platform.api_key
+    api_key = get_settings().deployments.cohere_platform.api_key
 
     def __init__(self, **kwargs: Any):
         # Override the environment variable from the request
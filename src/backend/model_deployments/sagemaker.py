@@ -4,7 +4,7 @@ from typing import Any, AsyncGenerator, Dict, List
 
 import boto3
 
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from backend.model_deployments.base import BaseDeployment
 from backend.model_deployments.utils import get_model_config_var
 from backend.schemas.cohere_chat import CohereChatRequest
@@ -34,7 +34,7 @@ class SageMakerDeployment(BaseDeployment):
 
     DEFAULT_MODELS = ["sagemaker-command"]
 
-    sagemaker_config = Settings().deployments.sagemaker
+    sagemaker_config = get_settings().deployments.sagemaker
     endpoint = sagemaker_config.endpoint_name
     region_name = sagemaker_config.region_name
     aws_access_key_id = sagemaker_config.access_key
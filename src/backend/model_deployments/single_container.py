@@ -5,7 +5,7 @@ import cohere
 from cohere.types import StreamedChatResponse
 
 from backend.chat.collate import to_dict
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from backend.model_deployments.base import BaseDeployment
 from backend.model_deployments.utils import get_model_config_var
 from backend.schemas.cohere_chat import CohereChatRequest
@@ -22,7 +22,7 @@ class SingleContainerDeployment(BaseDeployment):
     """Single Container Deployment."""
 
     client_name = "cohere-toolkit"
-    config = Settings().deployments.single_container
+    config = get_settings().deployments.single_container
     default_url = config.url
     default_model = config.model
 
@@ -7,7 +7,7 @@ from backend.database_models.agent import Agent as AgentModel
 from backend.database_models.agent_tool_metadata import (
     AgentToolMetadata as AgentToolMetadataModel,
 )
-from backend.database_models.database import DBSessionDep
+from backend.database_models.database import DBReadSessionDep, DBSessionDep
 from backend.schemas.agent import (
     Agent,
     AgentPublic,
@@ -107,7 +107,7 @@ async def list_agents(
     *,
     offset: int = 0,
     limit: int = 100,
-    session: DBSessionDep,
+    session: DBReadSessionDep,
     ctx: Context = Depends(get_context),
 ) -> list[AgentPublic]:
     """
@@ -116,7 +116,7 @@ async def list_agents(
     Args:
         offset (int): Offset to start the list.
         limit (int): Limit of agents to be listed.
-        session (DBSessionDep): Database session.
+        session (DBReadSessionDep): Database session.
         ctx (Context): Context object.
 
     Returns:
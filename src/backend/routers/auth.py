@@ -9,7 +9,7 @@ from starlette.requests import Request
 
 from backend.config.auth import ENABLED_AUTH_STRATEGY_MAPPING
 from backend.config.routers import RouterName
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from backend.config.tools import AVAILABLE_TOOLS
 from backend.crud import blacklist as blacklist_crud
 from backend.database_models import Blacklist
@@ -18,6 +18,7 @@ from backend.schemas.auth import JWTResponse, ListAuthStrategy, Login, Logout
 from backend.schemas.context import Context
 from backend.services.auth.jwt import JWTService
 from backend.services.auth.request_validators import validate_authorization
+from backend.services.auth.token_cache import token_blacklist
 from backend.services.auth.utils import (
     get_or_create_user,
     is_enabled_authentication_strategy,
@@ -230,6 +231,7 @@ async def logout(
     if token is not None:
         db_blacklist = Blacklist(token_id=token["jti"])
         blacklist_crud.create_blacklist(session, db_blacklist)
+        token_blacklist.add(token["jti"])
 
     return {}
 
@@ -258,7 +260,7 @@ async def login(
     Raises:
         HTTPException: If no redirect_uri set.
     """
-    redirect_uri = Settings().auth.frontend_hostname
+    redirect_uri = get_settings().auth.frontend_hostname
 
     if not redirect_uri:
         raise HTTPException(
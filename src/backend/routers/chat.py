@@ -8,7 +8,7 @@ from sse_starlette.sse import EventSourceResponse
 from backend.chat.custom.custom import CustomChat
 from backend.chat.custom.langchain import LangChainChat
 from backend.config.routers import RouterName
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from backend.crud import agent as agent_crud
 from backend.database_models.database import DBSessionDep
 from backend.schemas.chat import ChatResponseEvent, NonStreamedChatResponse
@@ -25,6 +25,7 @@ from backend.services.chat import (
 from backend.services.context import get_context
 from backend.services.logger.utils import get_logger
 from backend.services.request_validators import validate_deployment_header
+from backend.services.write_behind import wait_for_pending_turns
 
 router = APIRouter(
     prefix="/v1",
@@ -64,6 +65,9 @@ async def chat_stream(
     else:
         ctx.with_metrics_agent(DEFAULT_METRICS_AGENT)
 
+    # The previous turn may still be queued for storage, the history has to include it
+    await wait_for_pending_turns(chat_request.conversation_id, ctx.get_user_id())
+
     (
         session,
         chat_request,
@@ -120,6 +124,9 @@ async def chat(
     agent_id = chat_request.agent_id
     ctx.with_agent_id(agent_id)
 
+    # The previous turn may still be queued for storage, the history has to include it
+    await wait_for_pending_turns(chat_request.conversation_id, ctx.get_user_id())
+
     (
         session,
         chat_request,
@@ -168,7 +175,7 @@ def langchain_chat_stream(
         EventSourceResponse: Server-sent event response with chatbot responses.
     """
     user_id = ctx.get_user_id()
-    use_langchain = Settings().feature_flags.use_experimental_langchain
+    use_langchain = get_settings().feature_flags.use_experimental_langchain
     if not use_langchain:
         logger.error(
             event=f"[Chat] Error handling LangChain streaming chat request: LangChain is not enabled",
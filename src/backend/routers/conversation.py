@@ -1,7 +1,8 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, BackgroundTasks, Depends
 from fastapi import File as RequestFile
 from fastapi import Form, HTTPException, Request
 from fastapi import UploadFile as FastAPIUploadFile
+from sse_starlette.sse import EventSourceResponse
 
 from backend.chat.custom.custom import CustomChat
 from backend.chat.custom.utils import get_deployment
@@ -10,8 +11,7 @@ from backend.crud import agent as agent_crud
 from backend.crud import conversation as conversation_crud
 from backend.crud import file as file_crud
 from backend.database_models import Conversation as ConversationModel
-from backend.database_models import File as FileModel
-from backend.database_models.database import DBSessionDep
+from backend.database_models.database import DBReadSessionDep, DBSessionDep
 from backend.schemas.cohere_chat import CohereChatRequest
 from backend.schemas.context import Context
 from backend.schemas.conversation import (
@@ -22,6 +22,7 @@ from backend.schemas.conversation import (
     UpdateConversationRequest,
 )
 from backend.schemas.file import (
+    BatchUploadFileResponse,
     DeleteFileResponse,
     FilePublic,
     ListFile,
@@ -40,7 +41,18 @@ from backend.services.conversation import (
     validate_conversation,
 )
 from backend.services.file import (
+    build_file,
+    complete_file_content,
+    create_files,
+    delete_file_embeddings,
+    discard_spooled_file,
     get_file_content,
+    index_file_embeddings,
+    parse_batch_uploads,
+    reuse_stored_contents,
+    save_batch_uploads,
+    spool_batch_uploads,
+    stream_batch_upload,
     validate_batch_file_size,
     validate_file,
     validate_file_size,
@@ -59,7 +71,7 @@ router.name = RouterName.CONVERSATION
 @router.get("/{conversation_id}", response_model=ConversationPublic)
 async def get_conversation(
     conversation_id: str,
-    session: DBSessionDep,
+    session: DBReadSessionDep,
     request: Request,
     ctx: Context = Depends(get_context),
 ) -> ConversationPublic:
@@ -68,7 +80,7 @@ async def get_conversation(
 
     Args:
         conversation_id (str): Conversation ID.
-        session (DBSessionDep): Database session.
+        session (DBReadSessionDep): Database session.
         request (Request): Request object.
 
     Returns:
@@ -88,7 +100,7 @@ async def list_conversations(
     offset: int = 0,
     limit: int = 100,
     agent_id: str = None,
-    session: DBSessionDep,
+    session: DBReadSessionDep,
     request: Request,
     ctx: Context = Depends(get_context),
 ) -> list[ConversationWithoutMessages]:
@@ -99,7 +111,7 @@ async def list_conversations(
         offset (int): Offset to start the list.
         limit (int): Limit of conversations to be listed.
         agent_id (str): Query parameter for agent ID to optionally filter conversations by agent.
-        session (DBSessionDep): Database session.
+        session (DBReadSessionDep): Database session.
         request (Request): Request object.
 
     Returns:
@@ -162,8 +174,16 @@ async def delete_conversation(
     """
     user_id = ctx.get_user_id()
     _ = validate_conversation(session, conversation_id, user_id)
+    # The files are deleted in cascade, their embeddings are not
+    file_ids = [
+        file.id
+        for file in file_crud.get_files_by_conversation_id(
+            session, conversation_id, user_id
+        )
+    ]
 
     conversation_crud.delete_conversation(session, conversation_id, user_id)
+    delete_file_embeddings(file_ids, user_id)
 
     return DeleteConversationResponse()
 
@@ -179,10 +199,13 @@ async def search_conversations(
     ctx: Context = Depends(get_context),
 ) -> list[ConversationWithoutMessages]:
     """
-    Search conversations by title.
+    Search conversations by title and message content.
+
+    Candidates are retrieved with full-text search and, when the deployment
+    supports it, reranked by relevance.
 
     Args:
-        query (str): Query string to search for in conversation titles.
+        query (str): Query string to search for in conversation titles and messages.
         session (DBSessionDep): Database session.
         request (Request): Request object.
         offset (int): Offset to start the list.
@@ -197,10 +220,6 @@ async def search_conversations(
     deployment_name = ctx.get_deployment_name()
     model_deployment = get_deployment(deployment_name, ctx)
 
-    agent = DEFAULT_METRICS_AGENT
-    if agent_id:
-        agent = agent_crud.get_agent_by_id(session, agent_id)
-
     if agent_id:
         agent = agent_crud.get_agent_by_id(session, agent_id)
         ctx.with_agent(agent)
@@ -208,12 +227,18 @@ async def search_conversations(
     else:
         ctx.with_metrics_agent(DEFAULT_METRICS_AGENT)
 
-    conversations = conversation_crud.get_conversations(
-        session, offset=offset, limit=limit, user_id=user_id, agent_id=agent_id
+    conversations = conversation_crud.search_conversations(
+        session,
+        user_id=user_id,
+        query=query,
+        offset=offset,
+        limit=limit,
+        agent_id=agent_id,
+        with_messages=model_deployment.rerank_enabled,
     )
 
-    if not conversations:
-        return []
+    if not conversations or not model_deployment.rerank_enabled:
+        return conversations
 
     rerank_documents = get_documents_to_rerank(conversations)
     filtered_documents = await filter_conversations(
@@ -232,6 +257,7 @@ async def search_conversations(
 @router.post("/upload_file", response_model=UploadFileResponse)
 async def upload_file(
     session: DBSessionDep,
+    background_tasks: BackgroundTasks,
     conversation_id: str = Form(None),
     file: FastAPIUploadFile = RequestFile(...),
     ctx: Context = Depends(get_context),
@@ -242,6 +268,8 @@ async def upload_file(
 
     Args:
         session (DBSessionDep): Database session.
+        background_tasks (BackgroundTasks): Parses the remaining pages of large PDFs
+            and embeds the files.
         conversation_id (Optional[str]): Conversation ID passed from request query parameter.
         file (FastAPIUploadFile): File to be uploaded.
         ctx (Context): Context object.
@@ -286,49 +314,69 @@ async def upload_file(
     # TODO: check if file already exists in DB once we have files per agents
 
     # Handle uploading File
+    parsed = None
     try:
-        content = await get_file_content(file)
-        cleaned_content = content.replace("\x00", "")
-        filename = file.filename.encode("ascii", "ignore").decode("utf-8")
+        parsed = await get_file_content(
+            file, session=session, user_id=conversation.user_id
+        )
 
         # Create File
-        upload_file = FileModel(
-            user_id=conversation.user_id,
-            conversation_id=conversation.id,
-            file_name=filename,
-            file_path=filename,
-            file_size=file.size,
-            file_content=cleaned_content,
+        upload_file, file_content = build_file(
+            conversation.user_id, conversation.id, file.filename, file.size, parsed
         )
 
-        upload_file = file_crud.create_file(session, upload_file)
+        upload_file = create_files(
+            session, [upload_file], [file_content] if file_content else None
+        )[0]
+    except HTTPException:
+        if parsed is not None:
+            discard_spooled_file(parsed)
+        raise
     except Exception as e:
+        if parsed is not None:
+            discard_spooled_file(parsed)
         raise HTTPException(
             status_code=500, detail=f"Error while uploading file {file.filename}."
         )
 
+    if parsed.is_partial:
+        background_tasks.add_task(
+            complete_file_content, upload_file.id, upload_file.user_id, parsed
+        )
+    background_tasks.add_task(
+        index_file_embeddings, [upload_file.id], upload_file.user_id
+    )
+
     return upload_file
 
 
-@router.post("/batch_upload_file", response_model=list[UploadFileResponse])
+@router.post("/batch_upload_file", response_model=list[BatchUploadFileResponse])
 async def batch_upload_file(
     session: DBSessionDep,
+    background_tasks: BackgroundTasks,
     conversation_id: str = Form(None),
+    stream: bool = Form(False),
     files: list[FastAPIUploadFile] = RequestFile(...),
     ctx: Context = Depends(get_context),
-) -> UploadFileResponse:
+) -> list[BatchUploadFileResponse]:
     """
-    Uploads and creates a batch of File object.
+    Uploads and creates a batch of File object, parsing the files concurrently.
     If no conversation_id is provided, a new Conversation is created as well.
+    A file that can't be uploaded is returned with a failed status, the others are still uploaded.
+    With stream, a progress event is sent as each file is parsed, then a done event
+    with the status of every file.
 
     Args:
         session (DBSessionDep): Database session.
+        background_tasks (BackgroundTasks): Parses the remaining pages of large PDFs
+            and embeds the files.
         conversation_id (Optional[str]): Conversation ID passed from request query parameter.
+        stream (bool): Whether to stream progress events.
         files (list[FastAPIUploadFile]): List of files to be uploaded.
         ctx (Context): Context object.
 
     Returns:
-        list[UploadFileResponse]: List of uploaded files.
+        list[BatchUploadFileResponse]: Status of each file, in order.
 
     Raises:
         HTTPException: If the conversation with the given ID is not found. Status code 404.
@@ -366,43 +414,47 @@ async def batch_upload_file(
 
     # TODO: check if file already exists in DB once we have files per agents
 
-    # Handle uploading File
-    files_to_upload = []
-    for file in files:
-        content = await get_file_content(file)
-        cleaned_content = content.replace("\x00", "")
-        filename = file.filename.encode("ascii", "ignore").decode("utf-8")
+    # Request files are closed once the response starts, spool them first
+    uploads = await spool_batch_uploads(files)
+    await reuse_stored_contents(session, conversation.user_id, uploads)
 
-        # Create File
-        upload_file = FileModel(
-            user_id=conversation.user_id,
-            conversation_id=conversation.id,
-            file_name=filename,
-            file_path=filename,
-            file_size=file.size,
-            file_content=cleaned_content,
+    if stream:
+        return EventSourceResponse(
+            stream_batch_upload(
+                session,
+                background_tasks,
+                conversation.id,
+                conversation.user_id,
+                uploads,
+            ),
+            media_type="text/event-stream",
         )
-        files_to_upload.append(upload_file)
+
+    async for _ in parse_batch_uploads(uploads):
+        pass
+
     try:
-        uploaded_files = file_crud.batch_create_files(session, files_to_upload)
+        return save_batch_uploads(
+            session, background_tasks, conversation.id, conversation.user_id, uploads
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error while uploading file(s): {e}."
         )
 
-    return uploaded_files
-
 
 @router.get("/{conversation_id}/files", response_model=list[ListFile])
 async def list_files(
-    conversation_id: str, session: DBSessionDep, ctx: Context = Depends(get_context)
+    conversation_id: str, session: DBReadSessionDep, ctx: Context = Depends(get_context)
 ) -> list[ListFile]:
     """
     List all files from a conversation. Important - no pagination support yet.
 
     Args:
         conversation_id (str): Conversation ID.
-        session (DBSessionDep): Database session.
+        session (DBReadSessionDep): Database session.
         ctx (Context): Context object.
 
     Returns:
@@ -477,6 +529,7 @@ async def delete_file(
     _ = validate_file(session, file_id, user_id)
 
     file_crud.delete_file(session, file_id, user_id)
+    delete_file_embeddings([file_id], user_id)
 
     return DeleteFileResponse()
 
@@ -4,7 +4,7 @@ from distutils.util import strtobool
 from fastapi import APIRouter, Depends
 
 from backend.config.routers import RouterName
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from backend.schemas.context import Context
 from backend.services.context import get_context
 
@@ -27,7 +27,7 @@ def list_experimental_features(ctx: Context = Depends(get_context)):
     """
 
     experimental_features = {
-        "USE_EXPERIMENTAL_LANGCHAIN": Settings().feature_flags.use_experimental_langchain,
-        "USE_AGENTS_VIEW": Settings().feature_flags.use_agents_view,
+        "USE_EXPERIMENTAL_LANGCHAIN": get_settings().feature_flags.use_experimental_langchain,
+        "USE_AGENTS_VIEW": get_settings().feature_flags.use_agents_view,
     }
     return experimental_features
@@ -5,7 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from backend.chat.collate import to_dict
 from backend.config.routers import RouterName
 from backend.crud import snapshot as snapshot_crud
-from backend.database_models.database import DBSessionDep
+from backend.database_models.database import DBReadSessionDep, DBSessionDep
 from backend.schemas.context import Context
 from backend.schemas.snapshot import (
     CreateSnapshotRequest,
@@ -76,14 +76,14 @@ async def create_snapshot(
 
 @router.get("", response_model=list[SnapshotWithLinks])
 async def list_snapshots(
-    session: DBSessionDep,
+    session: DBReadSessionDep,
     ctx: Context = Depends(get_context),
 ) -> list[SnapshotWithLinks]:
     """
     List all snapshots.
 
     Args:
-        session (DBSessionDep): Database session.
+        session (DBReadSessionDep): Database session.
         ctx (Context): Context object.
 
     Returns:
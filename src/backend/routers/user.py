@@ -10,6 +10,7 @@ from backend.schemas.user import CreateUser, DeleteUser, UpdateUser
 from backend.schemas.user import User
 from backend.schemas.user import User as UserSchema
 from backend.services.context import get_context
+from backend.services.file import delete_user_embeddings
 
 router = APIRouter(prefix="/v1/users")
 router.name = RouterName.USER
@@ -163,5 +164,6 @@ async def delete_user(
 
     ctx.with_user(user=user)
     user_crud.delete_user(session, user_id)
+    delete_user_embeddings(user_id)
 
     return DeleteUser()
@@ -1,4 +1,5 @@
 import datetime
+from enum import StrEnum
 from typing import Optional
 
 from pydantic import BaseModel, Field
@@ -31,6 +32,35 @@ class UploadFileResponse(FilePublic):
     pass
 
 
+class UploadFileStatus(StrEnum):
+    PARSED = "parsed"
+    UPLOADED = "uploaded"
+    FAILED = "failed"
+
+
+class BatchUploadFileResponse(UploadFileResponse):
+    """
+    Outcome of one file of a batch upload. Failed files only have a file_name and an error.
+    """
+
+    id: Optional[str] = None
+    created_at: Optional[datetime.datetime] = None
+    updated_at: Optional[datetime.datetime] = None
+    user_id: Optional[str] = Field(default=None, exclude=True)
+    conversation_id: Optional[str] = None
+    file_path: Optional[str] = None
+    status: UploadFileStatus = UploadFileStatus.UPLOADED
+    error: Optional[str] = None
+
+
+class BatchUploadProgress(BaseModel):
+    file_name: str
+    status: UploadFileStatus
+    error: Optional[str] = None
+    completed: int
+    total: int
+
+
 class DeleteFileResponse(BaseModel):
     pass
 
@@ -4,12 +4,12 @@ import os
 
 from cryptography.fernet import Fernet
 
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 
 
 def get_cipher() -> Fernet:
     # 1. Get env var
-    auth_key = Settings().auth.secret_key
+    auth_key = get_settings().auth.secret_key
     # 2. Hash env var using SHA-256
     hash_digest = hashlib.sha256(auth_key.encode()).digest()
     # 3. Base64 encode hash and get 32-byte key
@@ -4,7 +4,7 @@ import uuid
 
 import jwt
 
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from backend.services.logger.utils import get_logger
 
 logger = get_logger()
@@ -16,7 +16,7 @@ class JWTService:
     ALGORITHM = "HS256"
 
     def __init__(self):
-        secret_key = Settings().auth.secret_key
+        secret_key = get_settings().auth.secret_key
 
         if not secret_key:
             raise ValueError(
@@ -1,8 +1,9 @@
 from fastapi import Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 
-from backend.database_models import Blacklist, get_session
+from backend.database_models import get_session
 from backend.services.auth.jwt import JWTService
+from backend.services.auth.token_cache import token_blacklist, verified_tokens
 
 
 def validate_authorization(
@@ -36,19 +37,19 @@ def validate_authorization(
             detail="Authorization: Bearer <token> required in request headers.",
         )
 
-    decoded = JWTService().decode_jwt(token)
+    decoded = verified_tokens.get(token)
+    if decoded is None:
+        decoded = JWTService().decode_jwt(token)
 
-    if not decoded or "context" not in decoded:
-        raise HTTPException(
-            status_code=401, detail="Bearer token is invalid or expired."
-        )
+        if not decoded or "context" not in decoded:
+            raise HTTPException(
+                status_code=401, detail="Bearer token is invalid or expired."
+            )
 
-    blacklist = (
-        session.query(Blacklist).filter(Blacklist.token_id == decoded["jti"]).first()
-    )
+        verified_tokens.set(token, decoded)
 
     # Token was blacklisted
-    if blacklist is not None:
+    if token_blacklist.is_blacklisted(session, decoded["jti"]):
         raise HTTPException(status_code=401, detail="Bearer token is blacklisted.")
 
     return decoded
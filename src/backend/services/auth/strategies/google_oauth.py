@@ -2,7 +2,7 @@ import requests
 from authlib.integrations.requests_client import OAuth2Session
 from starlette.requests import Request
 
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from backend.services.auth.strategies.base import BaseOAuthStrategy
 from backend.services.logger.utils import get_logger
 
@@ -19,9 +19,9 @@ class GoogleOAuth(BaseOAuthStrategy):
 
     def __init__(self):
         try:
-            self.settings = Settings().auth.google_oauth
+            self.settings = get_settings().auth.google_oauth
             self.REDIRECT_URI = (
-                f"{Settings().auth.frontend_hostname}/auth/{self.NAME.lower()}"
+                f"{get_settings().auth.frontend_hostname}/auth/{self.NAME.lower()}"
             )
             self.client = OAuth2Session(
                 client_id=self.settings.client_id,
@@ -3,7 +3,7 @@ from authlib.integrations.requests_client import OAuth2Session
 from fastapi import HTTPException
 from starlette.requests import Request
 
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from backend.services.auth.strategies.base import BaseOAuthStrategy
 from backend.services.logger.utils import get_logger
 
@@ -20,9 +20,9 @@ class OpenIDConnect(BaseOAuthStrategy):
 
     def __init__(self):
         try:
-            self.settings = Settings().auth.oidc
+            self.settings = get_settings().auth.oidc
             self.REDIRECT_URI = (
-                f"{Settings().auth.frontend_hostname}/auth/{self.NAME.lower()}"
+                f"{get_settings().auth.frontend_hostname}/auth/{self.NAME.lower()}"
             )
             self.WELL_KNOWN_ENDPOINT = self.settings.well_known_endpoint
             self.client = OAuth2Session(
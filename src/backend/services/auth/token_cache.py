@@ -0,0 +1,221 @@
+import datetime
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy.orm import Session
+
+from backend.config.settings import get_settings
+from backend.database_models.blacklist import Blacklist
+
+# Upper bound of verified tokens kept in memory
+MAX_VERIFIED_TOKENS = 10_000
+# Upper bound of Bloom filter hits kept in the exact set
+MAX_CONFIRMED_TOKENS = 10_000
+# Refreshes re-read the rows created in this window before the cursor, in case their
+# created_at is older than the time they were committed
+BLACKLIST_REFRESH_OVERLAP = datetime.timedelta(minutes=5)
+DEFAULT_BLACKLIST_CAPACITY = 100_000
+BLOOM_FILTER_ERROR_RATE = 0.001
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class BloomFilter:
+    """
+    Set membership without false negatives, with a false positive rate of about
+    error_rate as long as it holds at most capacity items.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_FILTER_ERROR_RATE):
+        self.capacity = capacity
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray(math.ceil(self.size / 8))
+        self.count = 0
+
+    def _positions(self, item: str) -> list[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        if item in self:
+            return
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
+
+
+class VerifiedTokenCache:
+    """
+    Decoded payloads of tokens whose signature was verified, keyed by token digest.
+    Entries are dropped once the token expires.
+    """
+
+    def __init__(self, max_size: int = MAX_VERIFIED_TOKENS) -> None:
+        self.max_size = max_size
+        self._payloads: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> dict | None:
+        digest = token_digest(token)
+        with self._lock:
+            payload = self._payloads.get(digest)
+            if payload is None:
+                return None
+            if payload["exp"] <= time.time():
+                del self._payloads[digest]
+                return None
+            self._payloads.move_to_end(digest)
+            return payload
+
+    def set(self, token: str, payload: dict) -> None:
+        if "exp" not in payload:
+            return
+
+        with self._lock:
+            self._payloads[token_digest(token)] = payload
+            if len(self._payloads) > self.max_size:
+                self._payloads.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._payloads.clear()
+
+
+class TokenBlacklist:
+    """
+    In-memory view of the blacklist table.
+
+    A Bloom filter of the blacklisted token IDs answers most lookups without
+    querying the database. Its rare hits are confirmed against the database and
+    kept in a small exact set. The filter is refreshed incrementally every
+    refresh_seconds, so a token blacklisted by another process is rejected
+    within refresh_seconds. Tokens blacklisted by this process are rejected
+    right away.
+    """
+
+    def __init__(
+        self,
+        refresh_seconds: float,
+        capacity: int = DEFAULT_BLACKLIST_CAPACITY,
+    ) -> None:
+        self.refresh_seconds = refresh_seconds
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self) -> None:
+        """
+        Drops the filter, it is reloaded from the database on next use.
+        """
+        with self._lock:
+            self._filter = BloomFilter(self.capacity)
+            self._confirmed: OrderedDict[str, bool] = OrderedDict()
+            self._cursor: datetime.datetime | None = None
+            self._refreshed_at: float | None = None
+
+    def add(self, token_id: str) -> None:
+        with self._lock:
+            self._filter.add(token_id)
+            self._confirm(token_id, True)
+
+    def is_blacklisted(self, session: Session, token_id: str) -> bool:
+        """
+        Checks whether a token was blacklisted.
+
+        Args:
+            session (Session): Database session, only used on refreshes and filter hits.
+            token_id (str): Token ID, the jti claim.
+
+        Returns:
+            bool: Whether the token was blacklisted.
+        """
+        if self._needs_refresh():
+            self.refresh(session)
+
+        if token_id not in self._filter:
+            return False
+
+        with self._lock:
+            if token_id in self._confirmed:
+                self._confirmed.move_to_end(token_id)
+                return self._confirmed[token_id]
+
+        blacklisted = (
+            session.query(Blacklist.id).filter(Blacklist.token_id == token_id).first()
+            is not None
+        )
+        with self._lock:
+            self._confirm(token_id, blacklisted)
+        return blacklisted
+
+    def refresh(self, session: Session) -> None:
+        """
+        Adds the token IDs blacklisted since the last refresh to the filter.
+        The filter is rebuilt from the whole table the first time and when it is full.
+
+        Args:
+            session (Session): Database session.
+        """
+        refreshed_at = time.monotonic()
+        cursor = self._cursor
+        rows = self._get_blacklisted_since(session, cursor)
+        if cursor is not None and self._filter.count + len(rows) > self.capacity:
+            cursor = None
+            rows = self._get_blacklisted_since(session, None)
+
+        with self._lock:
+            if cursor is None:
+                self.capacity = max(self.capacity, 2 * len(rows))
+                self._filter = BloomFilter(self.capacity)
+                self._cursor = None
+
+            for token_id, created_at in rows:
+                self._filter.add(token_id)
+                # Blacklisted since it was confirmed, the exact set is outdated
+                if self._confirmed.get(token_id) is False:
+                    del self._confirmed[token_id]
+                if created_at is not None and (
+                    self._cursor is None or created_at > self._cursor
+                ):
+                    self._cursor = created_at
+            self._refreshed_at = refreshed_at
+
+    def _get_blacklisted_since(
+        self, session: Session, cursor: datetime.datetime | None
+    ) -> list[tuple[str, datetime.datetime]]:
+        query = session.query(Blacklist.token_id, Blacklist.created_at)
+        if cursor is not None:
+            query = query.filter(
+                Blacklist.created_at >= cursor - BLACKLIST_REFRESH_OVERLAP
+            )
+        return query.all()
+
+    def _needs_refresh(self) -> bool:
+        return (
+            self._refreshed_at is None
+            or time.monotonic() - self._refreshed_at >= self.refresh_seconds
+        )
+
+    def _confirm(self, token_id: str, blacklisted: bool) -> None:
+        self._confirmed[token_id] = blacklisted
+        self._confirmed.move_to_end(token_id)
+        if len(self._confirmed) > MAX_CONFIRMED_TOKENS:
+            self._confirmed.popitem(last=False)
+
+
+verified_tokens = VerifiedTokenCache()
+token_blacklist = TokenBlacklist(get_settings().auth.blacklist_refresh_seconds)
@@ -0,0 +1,191 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, Type, TypeVar
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from backend.config.settings import get_settings
+from backend.database_models.agent import Agent
+from backend.database_models.agent_tool_metadata import AgentToolMetadata
+from backend.database_models.user import User
+
+T = TypeVar("T")
+
+# Key of the request-scoped entities in Session.info
+SESSION_CACHE_KEY = "entity_cache"
+MAX_CACHED_ENTRIES = 10_000
+
+
+class EntityCache(Generic[T]):
+    """
+    Two-level cache of read-mostly ORM entities, or lists of them.
+
+    The first level is scoped to a Session, so the same request gets the same
+    instances without querying again. The second level is shared across requests
+    and holds snapshots of the column values for ttl_seconds. Snapshots are
+    attached to the request session without a query.
+
+    CRUD functions writing an entity must call invalidate. Other processes only
+    see the change after ttl_seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: Type[Any],
+        ttl_seconds: float,
+        max_size: int = MAX_CACHED_ENTRIES,
+    ) -> None:
+        self.name = name
+        self.model = model
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+
+        self._snapshots: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.request_hits = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session, key: Hashable, load: Callable[[], T]) -> T:
+        """
+        Returns the cached value for a key, calling load on misses.
+        None results are not cached.
+
+        Args:
+            db (Session): Database session.
+            key (Hashable): Cache key.
+            load (Callable): Loads the value from the database.
+
+        Returns:
+            T: Entity, list of entities or None.
+        """
+        session_cache = db.info.setdefault(SESSION_CACHE_KEY, {})
+        cached = session_cache.get((self.name, key))
+        if cached is not None and self._is_attached(db, cached):
+            self.request_hits += 1
+            return cached
+
+        value = self._get_snapshot(db, key)
+        if value is None:
+            self.misses += 1
+            value = load()
+            if value is not None:
+                self._set_snapshot(key, value)
+        else:
+            self.hits += 1
+
+        if value is not None:
+            session_cache[(self.name, key)] = value
+        return value
+
+    def invalidate(self, db: Session, key: Hashable) -> None:
+        """
+        Drops a key from both the session and the shared cache.
+
+        Args:
+            db (Session): Database session.
+            key (Hashable): Cache key.
+        """
+        db.info.get(SESSION_CACHE_KEY, {}).pop((self.name, key), None)
+        with self._lock:
+            self._snapshots.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Drops the shared cache, for changes whose keys are unknown such as cascades.
+        """
+        with self._lock:
+            self._snapshots.clear()
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.request_hits + self.hits + self.misses
+        return {
+            "size": len(self._snapshots),
+            "request_hits": self.request_hits,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.request_hits + self.hits) / lookups if lookups else 0,
+        }
+
+    def _is_attached(self, db: Session, value: Any) -> bool:
+        # Deleted or rolled back entities are reloaded
+        entities = value if isinstance(value, list) else [value]
+        return all(
+            entity in db and not inspect(entity).was_deleted for entity in entities
+        )
+
+    def _set_snapshot(self, key: Hashable, value: Any) -> None:
+        if self.ttl_seconds <= 0:
+            return
+
+        if isinstance(value, list):
+            snapshot = [self._snapshot(entity) for entity in value]
+        else:
+            snapshot = self._snapshot(value)
+
+        with self._lock:
+            self._snapshots[key] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._snapshots.move_to_end(key)
+            if len(self._snapshots) > self.max_size:
+                self._snapshots.popitem(last=False)
+
+    def _get_snapshot(self, db: Session, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            cached = self._snapshots.get(key)
+            if cached is None:
+                return None
+            expires_at, snapshot = cached
+            if expires_at <= time.monotonic():
+                del self._snapshots[key]
+                return None
+
+        if isinstance(snapshot, list):
+            return [self._attach(db, values) for values in snapshot]
+        return self._attach(db, snapshot)
+
+    def _snapshot(self, entity: Any) -> dict[str, Any]:
+        return {
+            attr.key: copy.deepcopy(getattr(entity, attr.key))
+            for attr in inspect(self.model).column_attrs
+        }
+
+    def _attach(self, db: Session, values: dict[str, Any]) -> Any:
+        mapper = inspect(self.model)
+        identity_key = mapper.identity_key_from_primary_key(
+            [values[column.key] for column in mapper.primary_key]
+        )
+        existing = db.identity_map.get(identity_key)
+        if existing is not None:
+            return existing
+
+        entity = self.model(**copy.deepcopy(values))
+        # Persistent in the session as if it was loaded, without a query
+        make_transient_to_detached(entity)
+        db.add(entity)
+        return entity
+
+
+def _get_ttl_seconds() -> float:
+    return get_settings().database.entity_cache_ttl_seconds
+
+
+agent_cache: EntityCache[Agent] = EntityCache("agents", Agent, _get_ttl_seconds())
+user_cache: EntityCache[User] = EntityCache("users", User, _get_ttl_seconds())
+agent_tool_metadata_cache: EntityCache[list[AgentToolMetadata]] = EntityCache(
+    "agent_tool_metadata", AgentToolMetadata, _get_ttl_seconds()
+)
+
+ENTITY_CACHES = [agent_cache, user_cache, agent_tool_metadata_cache]
+
+
+def get_cache_stats() -> dict[str, dict[str, Any]]:
+    return {cache.name: cache.stats() for cache in ENTITY_CACHES}
+
+
+def clear_caches() -> None:
+    for cache in ENTITY_CACHES:
+        cache.clear()
@@ -1,3 +1,4 @@
+import asyncio
 import json
 from typing import Any, AsyncGenerator, Generator, List, Union
 from uuid import uuid4
@@ -16,7 +17,6 @@ from backend.crud import agent as agent_crud
 from backend.crud import conversation as conversation_crud
 from backend.crud import file as file_crud
 from backend.crud import message as message_crud
-from backend.crud import tool_call as tool_call_crud
 from backend.database_models.citation import Citation
 from backend.database_models.conversation import Conversation
 from backend.database_models.database import DBSessionDep
@@ -45,12 +45,11 @@ from backend.schemas.chat import (
 )
 from backend.schemas.cohere_chat import CohereChatRequest
 from backend.schemas.context import Context
-from backend.schemas.conversation import UpdateConversationRequest
-from backend.schemas.file import UpdateFileRequest
 from backend.schemas.search_query import SearchQuery
 from backend.schemas.tool import Tool, ToolCall, ToolCallDelta
 from backend.services.context import get_context
 from backend.services.generators import AsyncGeneratorContextManager
+from backend.services.write_behind import TurnRecord, get_write_behind_queue
 
 
 def process_chat(
@@ -112,6 +111,10 @@ def process_chat(
 
     # Get position to put next message in
     next_message_position = get_next_message_position(conversation)
+    chat_history = create_chat_history(
+        conversation, next_message_position, chat_request
+    )
+
     user_message = create_message(
         session,
         chat_request,
@@ -120,7 +123,7 @@ def process_chat(
         next_message_position,
         chat_request.message,
         MessageAgent.USER,
-        should_store,
+        False,
         id=str(uuid4()),
     )
     chatbot_message = create_message(
@@ -135,17 +138,17 @@ def process_chat(
         id=str(uuid4()),
     )
 
+    file_ids = None
     file_paths = None
     if isinstance(chat_request, CohereChatRequest):
-        file_paths = handle_file_retrieval(session, user_id, chat_request.file_ids)
-        if should_store:
-            attach_files_to_messages(
-                session, user_id, user_message.id, chat_request.file_ids
-            )
+        file_ids = chat_request.file_ids
+        file_paths = handle_file_retrieval(session, user_id, file_ids)
 
-    chat_history = create_chat_history(
-        conversation, next_message_position, chat_request
-    )
+    # Store the conversation, the user message and its file attachments in one transaction
+    if should_store:
+        message_crud.create_user_message(
+            session, user_message, conversation, file_ids=file_ids
+        )
 
     # co.chat expects either chat_history or conversation_id, not both
     chat_request.chat_history = chat_history
@@ -199,6 +202,7 @@ def get_or_create_conversation(
 ) -> Conversation:
     """
     Gets or creates a Conversation based on the chat request.
+    A new conversation is stored along with the user message, see process_chat.
 
     Args:
         session (DBSessionDep): Database session.
@@ -216,16 +220,14 @@ def get_or_create_conversation(
         # Get the first 5 words of the user message as the title
         title = " ".join(user_message.split()[:5])
 
+        # The ID is generated upfront as the conversation is only stored with the user message
         conversation = Conversation(
             user_id=user_id,
-            id=chat_request.conversation_id,
+            id=chat_request.conversation_id or (str(uuid4()) if should_store else None),
             agent_id=agent_id,
             title=title,
         )
 
-        if should_store:
-            conversation_crud.create_conversation(session, conversation)
-
     return conversation
 
 
@@ -323,33 +325,6 @@ def handle_file_retrieval(
     return file_paths
 
 
-def attach_files_to_messages(
-    session: DBSessionDep,
-    user_id: str,
-    message_id: str,
-    file_ids: List[str] | None = None,
-) -> None:
-    """
-    Attach Files to Message if the File does not have a message_id foreign key.
-
-    Args:
-        session (DBSessionDep): Database session.
-        user_id (str): User ID.
-        message_id (str): Message ID to attach to if needed.
-        file_ids (List): List of File IDs.
-
-    Returns:
-        None
-    """
-    if file_ids is not None:
-        files = file_crud.get_files_by_ids(session, file_ids, user_id)
-        for file in files:
-            if file.message_id is None:
-                file_crud.update_file(
-                    session, file, UpdateFileRequest(message_id=message_id)
-                )
-
-
 def create_chat_history(
     conversation: Conversation,
     user_message_position: int,
@@ -393,25 +368,42 @@ def update_conversation_after_turn(
     conversation_id: str,
     final_message_text: str,
     user_id: str,
+    documents: List[Document] | None = None,
+    citations: List[Citation] | None = None,
 ) -> None:
     """
-    After the last message in a conversation, updates the conversation description with that message's text
+    After the last message in a conversation, stores the message with its documents
+    and citations and updates the conversation description with that message's text
 
     Args:
         session (DBSessionDep): Database session.
         response_message (Message): Response message object.
         conversation_id (str): Conversation ID.
         final_message_text (str): Final message text.
+        user_id (str): User ID.
+        documents (List[Document]): Documents retrieved during the turn.
+        citations (List[Citation]): Citations generated during the turn.
     """
-    message_crud.create_message(session, response_message)
+    # Hand the writes over to the background queue when enabled, off the request path
+    write_behind_queue = get_write_behind_queue()
+    if write_behind_queue is not None:
+        write_behind_queue.enqueue(
+            TurnRecord.from_turn(
+                response_message,
+                documents or [],
+                citations or [],
+                conversation_description=final_message_text,
+            )
+        )
+        return
 
-    # Update conversation description with final message
-    conversation = conversation_crud.get_conversation(session, conversation_id, user_id)
-    new_conversation = UpdateConversationRequest(
-        description=final_message_text,
-        user_id=conversation.user_id,
+    message_crud.create_message_with_documents_and_citations(
+        session,
+        response_message,
+        documents or [],
+        citations or [],
+        conversation_description=final_message_text,
     )
-    conversation_crud.update_conversation(session, conversation, new_conversation)
 
 
 def save_tool_calls_message(
@@ -431,7 +423,6 @@ def save_tool_calls_message(
         message (str): Message text.
         position (int): Message position.
     """
-    # Save message to the database
     message = create_message(
         session,
         chat_request=None,
@@ -441,17 +432,18 @@ def save_tool_calls_message(
         text=text,
         tool_plan=text,
         agent=MessageAgent.CHATBOT,
-        should_store=True,
+        should_store=False,
     )
-
-    # Save tool calls to the database
-    for tool_call in tool_calls:
-        tool_call = ToolCallModel(
+    tool_call_models = [
+        ToolCallModel(
             name=tool_call.name,
             parameters=to_dict(tool_call.parameters),
-            message_id=message.id,
         )
-        tool_call_crud.create_tool_call(session, tool_call)
+        for tool_call in tool_calls
+    ]
+
+    # Save the message and its tool calls to the database in one transaction
+    message_crud.create_message_with_tool_calls(session, message, tool_call_models)
 
 
 async def generate_chat_response(
@@ -584,8 +576,16 @@ async def generate_chat_stream(
         )
 
     if should_store:
-        update_conversation_after_turn(
-            session, response_message, conversation_id, stream_end_data["text"], user_id
+        # Off the event loop, the write-behind journal is synced to disk
+        await asyncio.to_thread(
+            update_conversation_after_turn,
+            session,
+            response_message,
+            conversation_id,
+            stream_end_data["text"],
+            user_id,
+            documents=list(document_ids_to_document.values()),
+            citations=stream_end_data["citations"],
         )
 
 
@@ -687,8 +687,8 @@ def handle_stream_search_results(
         )
         document_ids_to_document[document["id"]] = storage_document
 
+    # Documents are persisted in bulk with the response message at the end of the turn
     documents = list(document_ids_to_document.values())
-    response_message.documents = documents
 
     stream_end_data["documents"].extend(documents)
     if "search_results" not in event or event["search_results"] is None:
@@ -822,7 +822,6 @@ def handle_stream_end(
     **kwargs: Any,
 ) -> tuple[StreamEnd, dict[str, Any], Message, dict[str, Document]]:
     if response_message:
-        response_message.citations = stream_end_data["citations"]
         response_message.text = stream_end_data["text"]
 
     stream_end_data["chat_history"] = (
@@ -107,7 +107,7 @@ def get_documents_to_rerank(conversations: List[Conversation]) -> List[str]:
 
         document = f"Title: {conversation.title}\n"
         if len(chatlog.strip()) != 0:
-            document += "\nChatlog:\n{chatlog}"
+            document += f"\nChatlog:\n{chatlog}"
 
         rerank_documents.append(document)
 
@@ -0,0 +1,437 @@
+import bisect
+import fcntl
+import hashlib
+import json
+import os
+import threading
+from abc import abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+import cohere
+import numpy as np
+
+from backend.config.settings import get_settings
+from backend.services.file_index import tokenize
+
+HASH_EMBEDDER = "hash"
+COHERE_EMBEDDER = "cohere"
+DEFAULT_EMBEDDING_MODEL = "embed-english-v3.0"
+HASH_EMBEDDING_DIMENSIONS = 256
+# Maximum number of texts per call to the embed endpoint
+COHERE_EMBED_BATCH_SIZE = 96
+
+EMBEDDING_DTYPE = np.float32
+# Rows added to the matrix file when it is full, so appends don't resize it each time
+EMBEDDING_INDEX_GROWTH_ROWS = 4096
+# Rows scored at once, bounds the memory used by a search whatever the index size
+EMBEDDING_SEARCH_BLOCK_ROWS = 65536
+# Tombstoned rows are dropped from the matrix file past this share of its rows
+EMBEDDING_INDEX_COMPACT_RATIO = 0.5
+
+
+class Embedder:
+    """
+    Embeds texts as vectors whose dot product measures their similarity.
+
+    name identifies the embedding model, vectors of different embedders are
+    never compared.
+    """
+
+    name: str
+
+    @abstractmethod
+    def embed(self, texts: list[str], input_type: str) -> np.ndarray:
+        """
+        Embeds texts, called in a thread since it may block on the network.
+
+        Args:
+            texts (list[str]): The texts to embed
+            input_type (str): "search_document" for indexed texts, "search_query"
+                for queries
+
+        Returns:
+            np.ndarray: One row per text
+        """
+        ...
+
+
+class HashEmbedder(Embedder):
+    """
+    Deterministic local embedder hashing the terms of a text in a fixed number of
+    dimensions. Texts are only similar when they share terms, it stands in for an
+    embedding model in tests and deployments without one.
+    """
+
+    def __init__(self, dimensions: int = HASH_EMBEDDING_DIMENSIONS) -> None:
+        self.dimensions = dimensions
+        self.name = f"{HASH_EMBEDDER}-{dimensions}"
+
+    def embed(self, texts: list[str], input_type: str) -> np.ndarray:
+        embeddings = np.zeros((len(texts), self.dimensions), dtype=EMBEDDING_DTYPE)
+        for row, text in enumerate(texts):
+            for term in tokenize(text):
+                digest = hashlib.blake2b(term.encode(), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                sign = 1 if value & 1 else -1
+                embeddings[row, (value >> 1) % self.dimensions] += sign
+        return embeddings
+
+
+class CohereEmbedder(Embedder):
+    """
+    Embeds texts with the embed endpoint of the Cohere platform.
+    """
+
+    client_name = "cohere-toolkit"
+
+    def __init__(self, model: str = DEFAULT_EMBEDDING_MODEL) -> None:
+        self.name = f"{COHERE_EMBEDDER}-{model}"
+        self.model = model
+        self.client = cohere.Client(
+            get_settings().deployments.cohere_platform.api_key,
+            client_name=self.client_name,
+        )
+
+    def embed(self, texts: list[str], input_type: str) -> np.ndarray:
+        embeddings = []
+        for start in range(0, len(texts), COHERE_EMBED_BATCH_SIZE):
+            response = self.client.embed(
+                texts=texts[start : start + COHERE_EMBED_BATCH_SIZE],
+                model=self.model,
+                input_type=input_type,
+            )
+            embeddings.extend(response.embeddings)
+        return np.asarray(embeddings, dtype=EMBEDDING_DTYPE)
+
+
+def normalize(embeddings: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    return (embeddings / np.where(norms == 0, 1, norms)).astype(EMBEDDING_DTYPE)
+
+
+@dataclass
+class EmbeddingIndexMetadata:
+    """
+    Layout of an embedding index. Each document owns a contiguous range of rows,
+    stored as [start, count]. Removing a document only drops its range, leaving
+    tombstoned rows in the matrix until it is compacted.
+    """
+
+    embedder: str
+    # Set by the first append
+    dimensions: int = 0
+    rows: int = 0
+    capacity: int = 0
+    deleted_rows: int = 0
+    documents: dict[str, list[int]] = field(default_factory=dict)
+
+
+class EmbeddingIndex:
+    """
+    Embeddings of document chunks, stored as a float32 matrix in a memory-mapped
+    file with a JSON file describing which rows belong to which document.
+
+    Appends write the new rows past the used ones before publishing them in the
+    metadata, so searches never see partial rows. Writers are serialized with a
+    file lock, the index can be shared by several processes. Searches hold the
+    lock shared while they read the metadata and map the matrix, so they never
+    map a compacted matrix with the row offsets of the previous one.
+    """
+
+    def __init__(self, path: str, embedder: str) -> None:
+        self.path = path
+        self.matrix_path = f"{path}.f32"
+        self.metadata_path = f"{path}.json"
+        self.lock_path = f"{path}.lock"
+        self.embedder = embedder
+        self._lock = threading.Lock()
+
+    def load_metadata(self) -> EmbeddingIndexMetadata:
+        try:
+            with open(self.metadata_path) as f:
+                metadata = EmbeddingIndexMetadata(**json.load(f))
+        except FileNotFoundError:
+            metadata = None
+
+        # Embeddings of another model can't be compared, start over
+        if metadata is None or metadata.embedder != self.embedder:
+            return EmbeddingIndexMetadata(embedder=self.embedder)
+        return metadata
+
+    def document_rows(self) -> dict[str, int]:
+        """
+        Returns the number of rows of each indexed document.
+        """
+        return {
+            document_id: count
+            for document_id, (_, count) in self.load_metadata().documents.items()
+        }
+
+    def append(self, document_id: str, embeddings: np.ndarray) -> None:
+        """
+        Adds the chunk embeddings of a document, replacing its previous ones.
+
+        Args:
+            document_id (str): Document ID
+            embeddings (np.ndarray): One row per chunk, in chunk order
+
+        Raises:
+            ValueError: If the embeddings don't have the dimensions of the index
+        """
+        embeddings = np.asarray(embeddings, dtype=EMBEDDING_DTYPE)
+        with self._write_lock():
+            metadata = self.load_metadata()
+            self._tombstone(metadata, document_id)
+            start = metadata.rows
+            # Documents without chunks are recorded so they are not embedded again
+            if len(embeddings):
+                self._write(metadata, normalize(embeddings))
+
+            metadata.rows += len(embeddings)
+            metadata.documents[document_id] = [start, len(embeddings)]
+            self._save(metadata)
+
+    def delete(self, document_ids: list[str]) -> None:
+        """
+        Tombstones the rows of documents, compacting the matrix when most of its
+        rows are tombstoned.
+
+        Args:
+            document_ids (list[str]): Document IDs
+        """
+        with self._write_lock():
+            metadata = self.load_metadata()
+            for document_id in document_ids:
+                self._tombstone(metadata, document_id)
+            if metadata.deleted_rows > metadata.rows * EMBEDDING_INDEX_COMPACT_RATIO:
+                self._compact(metadata)
+            self._save(metadata)
+
+    def search(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        document_ids: Optional[list[str]] = None,
+    ) -> list[tuple[str, int, float]]:
+        """
+        Finds the rows most similar to a query embedding.
+
+        Args:
+            query (np.ndarray): The query embedding
+            top_k (int): Maximum number of results
+            document_ids (Optional[list[str]]): Documents to search, all when None
+
+        Returns:
+            list[tuple[str, int, float]]: Document ID, chunk number and cosine
+                similarity of the best rows, best first
+        """
+        with self._read_lock():
+            metadata = self.load_metadata()
+            if document_ids is None:
+                document_ids = list(metadata.documents)
+            segments = sorted(
+                metadata.documents[document_id]
+                for document_id in document_ids
+                if document_id in metadata.documents
+            )
+            if not segments or not metadata.rows or top_k <= 0:
+                return []
+
+            query = normalize(np.asarray(query, dtype=EMBEDDING_DTYPE).reshape(-1))
+            if len(query) != metadata.dimensions:
+                return []
+            # The mapping keeps reading this file once it is compacted
+            matrix = np.memmap(
+                self.matrix_path,
+                dtype=EMBEDDING_DTYPE,
+                mode="r",
+                shape=(metadata.rows, metadata.dimensions),
+            )
+
+        candidate_rows = []
+        candidate_scores = []
+        for start, stop in self._ranges(segments):
+            scores = matrix[start:stop] @ query
+            if len(scores) > top_k:
+                best = np.argpartition(scores, -top_k)[-top_k:]
+            else:
+                best = np.arange(len(scores))
+            candidate_rows.append(best + start)
+            candidate_scores.append(scores[best])
+        del matrix
+
+        rows = np.concatenate(candidate_rows)
+        scores = np.concatenate(candidate_scores)
+        order = np.argsort(-scores, kind="stable")[:top_k]
+
+        owners = {
+            start: document_id for document_id, (start, _) in metadata.documents.items()
+        }
+        starts = [start for start, _ in segments]
+        results = []
+        for position in order:
+            row = int(rows[position])
+            start = starts[bisect.bisect_right(starts, row) - 1]
+            results.append((owners[start], row - start, float(scores[position])))
+        return results
+
+    def _ranges(self, segments: list[list[int]]) -> Iterator[tuple[int, int]]:
+        # Documents appended one after the other are searched as a single range,
+        # split in blocks to bound the memory of the scores
+        merged = []
+        for start, count in segments:
+            if merged and merged[-1][1] == start:
+                merged[-1][1] = start + count
+            elif count:
+                merged.append([start, start + count])
+
+        for start, stop in merged:
+            for block in range(start, stop, EMBEDDING_SEARCH_BLOCK_ROWS):
+                yield block, min(stop, block + EMBEDDING_SEARCH_BLOCK_ROWS)
+
+    def _write(self, metadata: EmbeddingIndexMetadata, embeddings: np.ndarray) -> None:
+        if not metadata.rows and metadata.dimensions != embeddings.shape[1]:
+            metadata.dimensions = embeddings.shape[1]
+            metadata.capacity = 0
+        elif embeddings.shape[1] != metadata.dimensions:
+            raise ValueError(
+                f"Embeddings have {embeddings.shape[1]} dimensions, "
+                f"the index has {metadata.dimensions}"
+            )
+
+        start = metadata.rows
+        if start + len(embeddings) > metadata.capacity:
+            metadata.capacity = start + len(embeddings) + EMBEDDING_INDEX_GROWTH_ROWS
+            self._resize(metadata)
+
+        matrix = np.memmap(
+            self.matrix_path,
+            dtype=EMBEDDING_DTYPE,
+            mode="r+",
+            shape=(metadata.capacity, metadata.dimensions),
+        )
+        matrix[start : start + len(embeddings)] = embeddings
+        matrix.flush()
+        del matrix
+
+    def _tombstone(self, metadata: EmbeddingIndexMetadata, document_id: str) -> None:
+        segment = metadata.documents.pop(document_id, None)
+        if segment is not None:
+            metadata.deleted_rows += segment[1]
+
+    def _compact(self, metadata: EmbeddingIndexMetadata) -> None:
+        rows = sum(count for _, count in metadata.documents.values())
+        capacity = rows + EMBEDDING_INDEX_GROWTH_ROWS
+        compacted_path = f"{self.matrix_path}.tmp"
+        compacted = np.memmap(
+            compacted_path,
+            dtype=EMBEDDING_DTYPE,
+            mode="w+",
+            shape=(capacity, metadata.dimensions),
+        )
+        matrix = np.memmap(
+            self.matrix_path,
+            dtype=EMBEDDING_DTYPE,
+            mode="r",
+            shape=(metadata.rows, metadata.dimensions),
+        )
+
+        offset = 0
+        for document_id, (start, count) in sorted(
+            metadata.documents.items(), key=lambda item: item[1][0]
+        ):
+            compacted[offset : offset + count] = matrix[start : start + count]
+            metadata.documents[document_id] = [offset, count]
+            offset += count
+        compacted.flush()
+        del compacted, matrix
+
+        # Searches that mapped the old file keep reading it, new ones wait for the
+        # metadata to be saved, see search
+        os.replace(compacted_path, self.matrix_path)
+        metadata.rows = rows
+        metadata.capacity = capacity
+        metadata.deleted_rows = 0
+
+    def _resize(self, metadata: EmbeddingIndexMetadata) -> None:
+        with open(self.matrix_path, "ab") as f:
+            f.truncate(
+                metadata.capacity
+                * metadata.dimensions
+                * np.dtype(EMBEDDING_DTYPE).itemsize
+            )
+
+    def _save(self, metadata: EmbeddingIndexMetadata) -> None:
+        temporary_path = f"{self.metadata_path}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(metadata.__dict__, f, separators=(",", ":"))
+        os.replace(temporary_path, self.metadata_path)
+
+    @contextmanager
+    def _read_lock(self) -> Iterator[None]:
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        with self._lock, open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+_embedders: dict[tuple[Optional[str], Optional[str]], Optional[Embedder]] = {}
+_indexes: dict[tuple[str, str], EmbeddingIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_embedder() -> Optional[Embedder]:
+    """
+    Returns the embedder configured for file search, None when semantic search
+    is disabled.
+    """
+    settings = get_settings().tools.search_file
+    key = (settings.embedder, settings.embedding_model)
+    if key not in _embedders:
+        if settings.embedder == COHERE_EMBEDDER:
+            _embedders[key] = CohereEmbedder(
+                settings.embedding_model or DEFAULT_EMBEDDING_MODEL
+            )
+        elif settings.embedder == HASH_EMBEDDER:
+            _embedders[key] = HashEmbedder()
+        else:
+            _embedders[key] = None
+    return _embedders[key]
+
+
+def get_embedding_index(user_id: str, embedder: Embedder) -> EmbeddingIndex:
+    """
+    Returns the embedding index of a user's files.
+
+    Args:
+        user_id (str): User ID
+        embedder (Embedder): Embedder of the index
+
+    Returns:
+        EmbeddingIndex: The index, created on the first append
+    """
+    directory = get_settings().tools.search_file.embedding_index_path
+    os.makedirs(directory, exist_ok=True)
+    # User IDs are not safe file names
+    name = hashlib.sha256(user_id.encode()).hexdigest()[:32]
+    path = os.path.join(directory, name)
+
+    with _indexes_lock:
+        index = _indexes.get((path, embedder.name))
+        if index is None:
+            index = EmbeddingIndex(path, embedder.name)
+            _indexes[(path, embedder.name)] = index
+        return index
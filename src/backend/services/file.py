@@ -1,32 +1,69 @@
-import io
-from typing import Any
-
-import pandas as pd
-from docx import Document
-from fastapi import HTTPException
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Optional
+
+from fastapi import BackgroundTasks, HTTPException
 from fastapi import UploadFile as FastAPIUploadFile
-from pypdf import PdfReader
-from python_calamine.pandas import pandas_monkeypatch
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 import backend.crud.file as file_crud
-from backend.database_models.database import DBSessionDep
-from backend.database_models.file import File
+from backend.database_models.database import DBSessionDep, engine
+from backend.database_models.file import File, FileContent
+from backend.schemas.file import (
+    BatchUploadFileResponse,
+    BatchUploadProgress,
+    UploadFileStatus,
+)
+from backend.services.embedding_index import (
+    Embedder,
+    get_embedder,
+    get_embedding_index,
+)
+from backend.services.file_index import ChunkIndex, build_chunk_index
+from backend.services.file_parsing import (
+    PARSED_EXTENSIONS,
+    TEXT_EXTENSIONS,
+    ParsedFile,
+    get_file_parser,
+)
+from backend.services.file_stats import compute_file_stats
+from backend.services.logger.utils import get_logger
+
+logger = get_logger()
 
 MAX_FILE_SIZE = 20_000_000  # 20MB
 MAX_TOTAL_FILE_SIZE = 1_000_000_000  # 1GB
+SPOOL_CHUNK_SIZE = 1_048_576  # 1MB
+# Pages past this are not extracted from PDFs, None to extract all of them
+PDF_MAX_PAGES = None
+# When set, only the first pages of PDFs are parsed during the upload,
+# the remaining pages are parsed in the background
+PDF_FOREGROUND_PAGES = None
+# Files of a batch upload spooled or parsed at the same time
+BATCH_UPLOAD_CONCURRENCY = 4
+
+
+@dataclass
+class BatchUpload:
+    """
+    A file of a batch upload, processed independently of the other files.
+    error is set when the file failed, the other files are still uploaded.
+    """
 
-PDF_EXTENSION = "pdf"
-TEXT_EXTENSION = "txt"
-MARKDOWN_EXTENSION = "md"
-CSV_EXTENSION = "csv"
-EXCEL_EXTENSION = "xlsx"
-EXCEL_OLD_EXTENSION = "xls"
-JSON_EXTENSION = "json"
-DOCX_EXTENSION = "docx"
-
-
-# Monkey patch Pandas to use Calamine for Excel reading because Calamine is faster than Pandas
-pandas_monkeypatch()
+    file_name: str
+    file_size: int
+    spooled_path: Optional[str] = None
+    # SHA-256 of the uploaded bytes
+    content_hash: Optional[str] = None
+    parsed: Optional[ParsedFile] = None
+    file: Optional[File] = None
+    error: Optional[str] = None
 
 
 def validate_file(session: DBSessionDep, file_id: str, user_id: str) -> File:
@@ -66,79 +103,381 @@ def get_file_extension(file_name: str) -> str:
     return file_name.split(".")[-1].lower()
 
 
-async def get_file_content(file: FastAPIUploadFile) -> str:
-    """Reads the file contents based on the file extension
+async def get_file_content(
+    file: FastAPIUploadFile,
+    max_pages: Optional[int] = PDF_MAX_PAGES,
+    foreground_pages: Optional[int] = PDF_FOREGROUND_PAGES,
+    session: Optional[Session] = None,
+    user_id: Optional[str] = None,
+) -> ParsedFile:
+    """Reads the file contents based on the file extension.
+    Uploads are spooled to disk and hashed along the way, documents are parsed in
+    the file parser worker processes.
+    With a session, the content a user already uploaded is reused without parsing.
 
     Args:
         file (UploadFile): The file to read
+        max_pages (Optional[int]): Maximum number of PDF pages to parse
+        foreground_pages (Optional[int]): Number of PDF pages to parse right away,
+            the rest is left to complete_file_content
+        session (Optional[Session]): Database session, to look up stored contents
+        user_id (Optional[str]): User ID, to look up stored contents
 
     Returns:
-        str: The file contents
+        ParsedFile: The file contents. When it is partial, spooled_path is kept
+            for complete_file_content
 
     Raises:
-        ValueError: If the file extension is not supported
+        ValueError: If the file extension is not supported, or the file can't be parsed
     """
-    file_contents = await file.read()
     file_extension = get_file_extension(file.filename)
 
-    if file_extension == PDF_EXTENSION:
-        return read_pdf(file_contents)
-    elif file_extension == DOCX_EXTENSION:
-        return read_docx(file_contents)
-    elif file_extension in [
-        TEXT_EXTENSION,
-        MARKDOWN_EXTENSION,
-        CSV_EXTENSION,
-        JSON_EXTENSION,
-    ]:
-        return file_contents.decode("utf-8")
-    elif file_extension in [EXCEL_EXTENSION, EXCEL_OLD_EXTENSION]:
-        return read_excel(file_contents)
+    if file_extension not in TEXT_EXTENSIONS + PARSED_EXTENSIONS:
+        raise ValueError(f"File extension {file_extension} is not supported")
+
+    path, content_hash = await spool_upload(file)
+    if session is not None:
+        stored = await get_stored_contents(session, user_id, [content_hash])
+        if content_hash in stored:
+            os.remove(path)
+            return stored[content_hash]
+
+    parsed = await parse_spooled_file(path, file_extension, max_pages, foreground_pages)
+    parsed.content_hash = content_hash
+    return parsed
+
+
+async def get_stored_contents(
+    session: DBSessionDep, user_id: str, content_hashes: list[str]
+) -> dict[str, ParsedFile]:
+    """Gets the contents a user already uploaded, so identical files skip parsing
+
+    Args:
+        session (DBSessionDep): Database session
+        user_id (str): User ID
+        content_hashes (list[str]): SHA-256 hashes of the uploaded bytes
+
+    Returns:
+        dict[str, ParsedFile]: The stored contents, by content hash
+    """
+    stored = {}
+    for file_content in file_crud.get_file_contents_by_hashes(
+        session, user_id, content_hashes
+    ):
+        logger.info(
+            event=f"[File] Reusing stored content {file_content.content_hash}, "
+            f"skipped {file_content.parse_seconds:.2f}s of parsing and "
+            f"{file_content.content_size} bytes of storage"
+        )
+        stored[file_content.content_hash] = ParsedFile(
+            text=file_content.file_content,
+            page_offsets=file_content.page_offsets,
+            content_hash=file_content.content_hash,
+            parse_seconds=file_content.parse_seconds,
+            stats=await run_in_threadpool(
+                compute_file_stats, file_content.file_content
+            ),
+            chunk_index=file_content.chunk_index,
+        )
+    return stored
+
+
+def analyze_content(parsed: ParsedFile) -> None:
+    """Removes the null characters of an extracted text, which can't be stored, then
+    computes its stats and chunk index. Run in a thread, off the event loop
+
+    Args:
+        parsed (ParsedFile): The file contents, updated in place
+    """
+    parsed.text = parsed.text.replace("\x00", "")
+    parsed.stats = compute_file_stats(parsed.text)
+    parsed.chunk_index = build_chunk_index(parsed.text).to_bytes()
 
-    raise ValueError(f"File extension {file_extension} is not supported")
 
+def build_file(
+    user_id: str,
+    conversation_id: str,
+    file_name: str,
+    file_size: int,
+    parsed: ParsedFile,
+) -> tuple[File, Optional[FileContent]]:
+    """Builds the file of a parsed upload. Its text is shared through a FileContent,
+    unless the parse is partial and the remaining pages are appended to the file later
+
+    Args:
+        user_id (str): User ID
+        conversation_id (str): Conversation ID
+        file_name (str): The uploaded file name
+        file_size (int): The uploaded file size
+        parsed (ParsedFile): The file contents
 
-def read_pdf(file_contents: bytes) -> str:
-    """Reads the text from a PDF file using PyPDF2
+    Returns:
+        tuple[File, Optional[FileContent]]: The file, and the content to store with it
+    """
+    file_name = file_name.encode("ascii", "ignore").decode("utf-8")
+    if parsed.stats is None or parsed.chunk_index is None:
+        analyze_content(parsed)
+    text, stats = parsed.text, parsed.stats
+    file = File(
+        user_id=user_id,
+        conversation_id=conversation_id,
+        file_name=file_name,
+        file_path=file_name,
+        file_size=file_size,
+        word_count=stats.word_count,
+        token_count=stats.token_count,
+        preview=stats.preview,
+        language=stats.language,
+    )
+
+    if parsed.content_hash is None or parsed.is_partial:
+        file.file_content = text
+        file.page_offsets = parsed.page_offsets
+        file.chunk_index = parsed.chunk_index
+        return file, None
+
+    file.content_hash = parsed.content_hash
+    return file, FileContent(
+        user_id=user_id,
+        content_hash=parsed.content_hash,
+        file_content=text,
+        page_offsets=parsed.page_offsets,
+        chunk_index=parsed.chunk_index,
+        content_size=len(text.encode("utf-8")),
+        parse_seconds=parsed.parse_seconds,
+    )
+
+
+async def parse_spooled_file(
+    path: str,
+    file_extension: str,
+    max_pages: Optional[int] = PDF_MAX_PAGES,
+    foreground_pages: Optional[int] = PDF_FOREGROUND_PAGES,
+) -> ParsedFile:
+    """Parses a spooled upload. The spooled file is removed, unless the parse is
+    partial and it is kept for complete_file_content
 
     Args:
-        file_contents (bytes): The file contents
+        path (str): Path of the spooled file
+        file_extension (str): The file extension
+        max_pages (Optional[int]): Maximum number of PDF pages to parse
+        foreground_pages (Optional[int]): Number of PDF pages to parse right away
 
     Returns:
-        str: The text extracted from the PDF
+        ParsedFile: The file contents
+
+    Raises:
+        ValueError: If the file extension is not supported, or the file can't be parsed
+    """
+    if foreground_pages is not None and max_pages is not None:
+        foreground_pages = min(foreground_pages, max_pages)
+
+    start = time.perf_counter()
+    try:
+        if file_extension in TEXT_EXTENSIONS:
+            parsed = ParsedFile(text=await run_in_threadpool(read_text_file, path))
+        elif file_extension in PARSED_EXTENSIONS:
+            parsed = await get_file_parser().parse(
+                path, file_extension, max_pages=foreground_pages or max_pages
+            )
+        else:
+            raise ValueError(f"File extension {file_extension} is not supported")
+    except Exception:
+        os.remove(path)
+        raise
+    parsed.parse_seconds = time.perf_counter() - start
+    await run_in_threadpool(analyze_content, parsed)
+
+    # Pages past max_pages are dropped, they are not left for the background
+    if max_pages is not None and parsed.page_count is not None:
+        parsed.page_count = min(parsed.page_count, max_pages)
+
+    if parsed.is_partial:
+        parsed.spooled_path = path
+    else:
+        os.remove(path)
+
+    return parsed
+
+
+def read_text_file(path: str) -> str:
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8")
+
+
+async def complete_file_content(
+    file_id: str,
+    user_id: str,
+    parsed: ParsedFile,
+    session_factory: Callable[[], Session] = lambda: Session(engine),
+) -> None:
+    """Parses the remaining pages of a partially parsed PDF and appends them to the file,
+    run as a background task after the upload
+
+    Args:
+        file_id (str): File ID
+        user_id (str): User ID
+        parsed (ParsedFile): The partial contents returned by get_file_content
+        session_factory (Callable): Creates the database session
     """
-    pdf_reader = PdfReader(io.BytesIO(file_contents))
-    text = ""
+    try:
+        remaining = await get_file_parser().parse_pdf(
+            parsed.spooled_path,
+            first_page=parsed.parsed_pages,
+            max_pages=parsed.page_count - parsed.parsed_pages,
+            start_offset=len(parsed.text),
+        )
+        complete = ParsedFile(text=parsed.text + remaining.text)
+        await run_in_threadpool(analyze_content, complete)
+        with session_factory() as session:
+            file_crud.append_file_content(
+                session,
+                file_id,
+                user_id,
+                remaining.text,
+                remaining.page_offsets,
+                stats=complete.stats,
+                chunk_index=complete.chunk_index,
+            )
+    except Exception as e:
+        logger.error(
+            event=f"[File] Error parsing the remaining pages of file {file_id}: {e}"
+        )
+    finally:
+        discard_spooled_file(parsed)
+
 
-    # Extract text from each page
-    for page in pdf_reader.pages:
-        page_text = page.extract_text()
-        text += page_text
+def discard_spooled_file(parsed: ParsedFile) -> None:
+    """Removes the spooled copy kept for a partially parsed file
 
-    return text
+    Args:
+        parsed (ParsedFile): The partial contents returned by get_file_content
+    """
+    if parsed.spooled_path is not None and os.path.exists(parsed.spooled_path):
+        os.remove(parsed.spooled_path)
 
 
-def read_excel(file_contents: bytes) -> str:
-    """Reads the text from an Excel file using Pandas
+def load_chunk_index(file: File) -> ChunkIndex:
+    """Loads the chunk index of a file, built from its content for files uploaded
+    before chunk indexes were stored
 
     Args:
-        file_contents (bytes): The file contents
+        file (File): File with its content loaded
 
     Returns:
-        str: The text extracted from the Excel
+        ChunkIndex: The chunk index
+    """
+    if file.content_chunk_index is None:
+        return build_chunk_index(file.content)
+    return ChunkIndex.from_bytes(file.content_chunk_index)
+
+
+def embed_files(files: list[File], embedder: Embedder) -> None:
+    """Adds the chunks of files to the embedding index of their user, skipping the
+    files already indexed with the same number of chunks. Blocks on the embedder,
+    run in a thread
+
+    Args:
+        files (list[File]): Files with their content loaded
+        embedder (Embedder): Embedder of the index
+    """
+    indexed = {}
+    for file in files:
+        index = get_embedding_index(file.user_id, embedder)
+        if file.user_id not in indexed:
+            indexed[file.user_id] = index.document_rows()
+
+        chunk_index = load_chunk_index(file)
+        if indexed[file.user_id].get(file.id) == len(chunk_index.offsets):
+            continue
+
+        chunks = [file.content[start:end] for start, end in chunk_index.offsets]
+        embeddings = embedder.embed(chunks, "search_document") if chunks else []
+        index.append(file.id, embeddings)
+
+
+async def index_file_embeddings(
+    file_ids: list[str],
+    user_id: str,
+    session_factory: Callable[[], Session] = lambda: Session(engine),
+) -> None:
+    """Embeds the chunks of uploaded files for semantic search, run as a background
+    task after the upload. Does nothing when no embedder is configured
+
+    Args:
+        file_ids (list[str]): File IDs
+        user_id (str): User ID
+        session_factory (Callable): Creates the database session
+    """
+    embedder = get_embedder()
+    if embedder is None:
+        return
+
+    try:
+        with session_factory() as session:
+            files = file_crud.get_files_by_ids(session, file_ids, user_id)
+            await run_in_threadpool(embed_files, files, embedder)
+    except Exception as e:
+        logger.error(event=f"[File] Error embedding files {file_ids}: {e}")
+
+
+def delete_file_embeddings(file_ids: list[str], user_id: str) -> None:
+    """Tombstones the embeddings of deleted files
+
+    Args:
+        file_ids (list[str]): File IDs
+        user_id (str): User ID
+    """
+    embedder = get_embedder()
+    if embedder is not None and file_ids:
+        get_embedding_index(user_id, embedder).delete(file_ids)
+
+
+def delete_user_embeddings(user_id: str) -> None:
+    """Tombstones the embeddings of every file of a deleted user
+
+    Args:
+        user_id (str): User ID
     """
-    excel = pd.read_excel(io.BytesIO(file_contents), engine="calamine")
-    return excel.to_string()
+    embedder = get_embedder()
+    if embedder is not None:
+        index = get_embedding_index(user_id, embedder)
+        index.delete(list(index.document_rows()))
 
 
-def read_docx(file_contents: bytes) -> str:
-    document = Document(io.BytesIO(file_contents))
-    text = ""
+async def spool_upload(file: FastAPIUploadFile) -> tuple[str, str]:
+    """Copies an uploaded file to a temporary file in chunks, never holding it in memory,
+    and hashes its content along the way
+
+    Args:
+        file (UploadFile): The file to copy
 
-    for paragraph in document.paragraphs:
-        text += paragraph.text + "\n"
+    Returns:
+        tuple[str, str]: Path of the temporary file, to be removed by the caller,
+            and the SHA-256 hash of its content
 
-    return text
+    Raises:
+        ValueError: If the file is larger than MAX_FILE_SIZE
+    """
+    spooled = tempfile.NamedTemporaryFile(delete=False)
+    content_hash = hashlib.sha256()
+    size = 0
+    try:
+        while chunk := await file.read(SPOOL_CHUNK_SIZE):
+            size += len(chunk)
+            if size > MAX_FILE_SIZE:
+                raise ValueError(
+                    f"File size exceeds the maximum allowed size of {MAX_FILE_SIZE} bytes."
+                )
+            content_hash.update(chunk)
+            await run_in_threadpool(spooled.write, chunk)
+    except Exception:
+        spooled.close()
+        os.remove(spooled.name)
+        raise
+
+    spooled.close()
+    return spooled.name, content_hash.hexdigest()
 
 
 def validate_file_size(
@@ -159,8 +498,7 @@ def validate_file_size(
             detail=f"File size exceeds the maximum allowed size of {MAX_FILE_SIZE} bytes.",
         )
 
-    existing_files = file_crud.get_files_by_user_id(session, user_id)
-    total_file_size = sum([f.file_size for f in existing_files]) + file.size
+    total_file_size = file_crud.get_total_file_size(session, user_id) + file.size
 
     if total_file_size > MAX_TOTAL_FILE_SIZE:
         raise HTTPException(
@@ -172,29 +510,288 @@ def validate_file_size(
 def validate_batch_file_size(
     session: DBSessionDep, user_id: str, files: list[FastAPIUploadFile]
 ) -> None:
-    """Validate sizes of files in batch
+    """Validate the total size of files in batch. Files larger than MAX_FILE_SIZE
+    are not counted, they fail on their own without failing the batch
 
     Args:
         user_id (str): The user ID
         files (list[FastAPIUploadFile]): The files to validate
 
     Raises:
-        HTTPException: If the file size is too large
+        HTTPException: If the total file size is too large
     """
-    total_batch_size = 0
-    for file in files:
-        if file.size > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"{file.filename} exceeds the maximum allowed size of {MAX_FILE_SIZE} bytes.",
-            )
-        total_batch_size += file.size
+    total_batch_size = sum(file.size for file in files if file.size <= MAX_FILE_SIZE)
 
-    existing_files = file_crud.get_files_by_user_id(session, user_id)
-    total_file_size = sum([f.file_size for f in existing_files]) + total_batch_size
+    total_file_size = file_crud.get_total_file_size(session, user_id) + total_batch_size
 
     if total_file_size > MAX_TOTAL_FILE_SIZE:
         raise HTTPException(
             status_code=400,
             detail=f"Total file size exceeds the maximum allowed size of {MAX_TOTAL_FILE_SIZE} bytes.",
         )
+
+
+def create_files(
+    session: DBSessionDep,
+    files: list[File],
+    file_contents: Optional[list[FileContent]] = None,
+) -> list[File]:
+    """Creates files, checking the total file size limit in the same transaction
+
+    Args:
+        session (DBSessionDep): Database session
+        files (list[File]): The files to create
+        file_contents (Optional[list[FileContent]]): Shared contents of the files
+
+    Returns:
+        list[File]: The created files
+
+    Raises:
+        HTTPException: If the total file size is too large
+    """
+    try:
+        return file_crud.batch_create_files(
+            session,
+            files,
+            max_total_file_size=MAX_TOTAL_FILE_SIZE,
+            file_contents=file_contents,
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Total file size exceeds the maximum allowed size of {MAX_TOTAL_FILE_SIZE} bytes.",
+        )
+
+
+async def spool_batch_uploads(
+    files: list[FastAPIUploadFile], concurrency: int = BATCH_UPLOAD_CONCURRENCY
+) -> list[BatchUpload]:
+    """Spools the files of a batch upload, so they can be parsed after the request
+    files are closed
+
+    Args:
+        files (list[FastAPIUploadFile]): The uploaded files
+        concurrency (int): Files spooled at the same time
+
+    Returns:
+        list[BatchUpload]: The uploads, in the order of files
+    """
+    slots = asyncio.Semaphore(concurrency)
+
+    async def spool(file: FastAPIUploadFile) -> BatchUpload:
+        upload = BatchUpload(file_name=file.filename, file_size=file.size)
+        async with slots:
+            try:
+                upload.spooled_path, upload.content_hash = await spool_upload(file)
+            except ValueError as e:
+                upload.error = str(e)
+        return upload
+
+    return await asyncio.gather(*[spool(file) for file in files])
+
+
+async def reuse_stored_contents(
+    session: DBSessionDep, user_id: str, uploads: list[BatchUpload]
+) -> None:
+    """Sets the contents of the uploads the user already uploaded, which are not parsed again
+
+    Args:
+        session (DBSessionDep): Database session
+        user_id (str): User ID
+        uploads (list[BatchUpload]): The spooled uploads
+    """
+    content_hashes = [
+        upload.content_hash for upload in uploads if upload.content_hash is not None
+    ]
+    if not content_hashes:
+        return
+
+    stored = await get_stored_contents(session, user_id, content_hashes)
+    for upload in uploads:
+        if upload.content_hash in stored:
+            upload.parsed = stored[upload.content_hash]
+            os.remove(upload.spooled_path)
+            upload.spooled_path = None
+
+
+async def parse_batch_uploads(
+    uploads: list[BatchUpload], concurrency: int = BATCH_UPLOAD_CONCURRENCY
+) -> AsyncIterator[BatchUpload]:
+    """Parses spooled uploads concurrently, a failed file does not fail the others
+
+    Args:
+        uploads (list[BatchUpload]): The spooled uploads
+        concurrency (int): Files parsed at the same time
+
+    Yields:
+        BatchUpload: Each upload, as soon as it is parsed or failed
+    """
+    slots = asyncio.Semaphore(concurrency)
+
+    async def parse(upload: BatchUpload) -> BatchUpload:
+        if upload.error is not None or upload.parsed is not None:
+            return upload
+
+        async with slots:
+            try:
+                upload.parsed = await parse_spooled_file(
+                    upload.spooled_path, get_file_extension(upload.file_name)
+                )
+                upload.parsed.content_hash = upload.content_hash
+            except ValueError as e:
+                upload.error = str(e)
+            except Exception as e:
+                logger.error(event=f"[File] Error parsing file {upload.file_name}: {e}")
+                upload.error = f"Error while uploading file {upload.file_name}."
+        return upload
+
+    for parsed in asyncio.as_completed([parse(upload) for upload in uploads]):
+        yield await parsed
+
+
+def save_batch_uploads(
+    session: DBSessionDep,
+    background_tasks: BackgroundTasks,
+    conversation_id: str,
+    user_id: str,
+    uploads: list[BatchUpload],
+) -> list[BatchUploadFileResponse]:
+    """Creates the files of the parsed uploads in one transaction
+
+    Args:
+        session (DBSessionDep): Database session
+        background_tasks (BackgroundTasks): Parses the remaining pages of large PDFs
+            and embeds the files
+        conversation_id (str): ID of the conversation the files are uploaded to
+        user_id (str): User ID
+        uploads (list[BatchUpload]): The parsed uploads
+
+    Returns:
+        list[BatchUploadFileResponse]: The status of each upload, in order
+
+    Raises:
+        HTTPException: If the total file size is too large
+    """
+    parsed_uploads = [upload for upload in uploads if upload.parsed is not None]
+    files_to_upload = []
+    file_contents = []
+    for upload in parsed_uploads:
+        file, file_content = build_file(
+            user_id, conversation_id, upload.file_name, upload.file_size, upload.parsed
+        )
+        files_to_upload.append(file)
+        if file_content is not None:
+            file_contents.append(file_content)
+
+    try:
+        uploaded_files = (
+            create_files(session, files_to_upload, file_contents)
+            if files_to_upload
+            else []
+        )
+    except Exception:
+        for upload in parsed_uploads:
+            discard_spooled_file(upload.parsed)
+        raise
+
+    for upload, file in zip(parsed_uploads, uploaded_files):
+        upload.file = file
+        if upload.parsed.is_partial:
+            background_tasks.add_task(
+                complete_file_content, file.id, file.user_id, upload.parsed
+            )
+    # Background tasks run in order, after the remaining pages are parsed
+    if uploaded_files:
+        background_tasks.add_task(
+            index_file_embeddings, [file.id for file in uploaded_files], user_id
+        )
+
+    return [
+        (
+            BatchUploadFileResponse.model_validate(upload.file)
+            if upload.file is not None
+            else BatchUploadFileResponse(
+                file_name=upload.file_name,
+                file_size=upload.file_size,
+                status=UploadFileStatus.FAILED,
+                error=upload.error,
+            )
+        )
+        for upload in uploads
+    ]
+
+
+async def stream_batch_upload(
+    session: DBSessionDep,
+    background_tasks: BackgroundTasks,
+    conversation_id: str,
+    user_id: str,
+    uploads: list[BatchUpload],
+) -> AsyncIterator[dict[str, str]]:
+    """Parses and saves a batch upload, streaming a progress event as each file is
+    parsed, then a done event with the status of every file
+
+    Args:
+        session (DBSessionDep): Database session
+        background_tasks (BackgroundTasks): Parses the remaining pages of large PDFs
+            and embeds the files
+        conversation_id (str): ID of the conversation the files are uploaded to
+        user_id (str): User ID
+        uploads (list[BatchUpload]): The spooled uploads
+
+    Yields:
+        dict[str, str]: Server-sent events
+    """
+    completed = 0
+    async for upload in parse_batch_uploads(uploads):
+        completed += 1
+        progress = BatchUploadProgress(
+            file_name=upload.file_name,
+            status=(
+                UploadFileStatus.FAILED
+                if upload.error is not None
+                else UploadFileStatus.PARSED
+            ),
+            error=upload.error,
+            completed=completed,
+            total=len(uploads),
+        )
+        yield {"event": "progress", "data": progress.model_dump_json()}
+
+    try:
+        results = save_batch_uploads(
+            session, background_tasks, conversation_id, user_id, uploads
+        )
+    except HTTPException as e:
+        yield {"event": "error", "data": json.dumps({"detail": e.detail})}
+        return
+    except Exception as e:
+        logger.error(event=f"[File] Error saving batch upload: {e}")
+        yield {
+            "event": "error",
+            "data": json.dumps({"detail": "Error while uploading file(s)."}),
+        }
+        return
+
+    yield {
+        "event": "done",
+        "data": json.dumps([result.model_dump(mode="json") for result in results]),
+    }
+
+
+def reconcile_file_usage(session: DBSessionDep) -> int:
+    """Recomputes the per-user total file size counters from the stored files
+
+    Args:
+        session (DBSessionDep): Database session
+
+    Returns:
+        int: Number of users whose counter was corrected
+    """
+    corrected = file_crud.reconcile_user_file_usage(session)
+    if corrected:
+        logger.warning(
+            event=f"[File] Reconciled total file size for {corrected} user(s)"
+        )
+
+    return corrected
@@ -0,0 +1,166 @@
+import json
+import math
+import re
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Hashable
+
+# Same limits as the chunking done before reranking
+CHUNK_SOFT_WORD_LIMIT = 100
+CHUNK_HARD_WORD_LIMIT = 300
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Reciprocal rank fusion constant, dampens the weight of the first ranks
+RRF_K = 60
+
+WORD_PATTERN = re.compile(r"\S+")
+TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list[str]:
+    return [term.lower() for term in TERM_PATTERN.findall(text)]
+
+
+@dataclass
+class ChunkIndex:
+    """
+    Chunks of a file's text and their BM25 statistics, built once at upload.
+
+    Chunks are stored as offsets in the text. postings maps each term to a flat
+    list of (chunk number, term frequency) pairs.
+    """
+
+    offsets: list[tuple[int, int]] = field(default_factory=list)
+    lengths: list[int] = field(default_factory=list)
+    postings: dict[str, list[int]] = field(default_factory=dict)
+
+    def to_bytes(self) -> bytes:
+        return zlib.compress(
+            json.dumps(
+                [self.offsets, self.lengths, self.postings], separators=(",", ":")
+            ).encode()
+        )
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ChunkIndex":
+        offsets, lengths, postings = json.loads(zlib.decompress(data))
+        return cls(
+            offsets=[tuple(offset) for offset in offsets],
+            lengths=lengths,
+            postings=postings,
+        )
+
+
+def chunk_offsets(text: str) -> list[tuple[int, int]]:
+    """Splits a text in chunks of up to CHUNK_HARD_WORD_LIMIT words, ending chunks
+    at the first sentence end past CHUNK_SOFT_WORD_LIMIT words
+
+    Args:
+        text (str): The text to split
+
+    Returns:
+        list[tuple[int, int]]: Start and end offset of each chunk in the text
+    """
+    offsets = []
+    start = end = None
+    word_count = 0
+    for word in WORD_PATTERN.finditer(text):
+        if word_count + 1 > CHUNK_HARD_WORD_LIMIT:
+            offsets.append((start, end))
+            start = None
+            word_count = 0
+
+        if start is None:
+            start = word.start()
+        end = word.end()
+        word_count += 1
+
+        if word_count > CHUNK_SOFT_WORD_LIMIT and word.group().endswith("."):
+            offsets.append((start, end))
+            start = None
+            word_count = 0
+
+    if start is not None:
+        offsets.append((start, end))
+    return offsets
+
+
+def build_chunk_index(text: str) -> ChunkIndex:
+    """Chunks a text and counts the terms of each chunk
+
+    Args:
+        text (str): The extracted text of a file
+
+    Returns:
+        ChunkIndex: The chunk index
+    """
+    index = ChunkIndex(offsets=chunk_offsets(text))
+    for number, (start, end) in enumerate(index.offsets):
+        terms = tokenize(text[start:end])
+        index.lengths.append(len(terms))
+        for term, frequency in Counter(terms).items():
+            index.postings.setdefault(term, []).extend((number, frequency))
+    return index
+
+
+def search_chunks(
+    indexes: list[ChunkIndex], query: str, top_k: int
+) -> list[tuple[int, int, float]]:
+    """Ranks the chunks of several files against a query with BM25, the collection
+    statistics being those of all the given files
+
+    Args:
+        indexes (list[ChunkIndex]): Chunk index of each file
+        query (str): The search query
+        top_k (int): Maximum number of chunks returned
+
+    Returns:
+        list[tuple[int, int, float]]: Position of the file in indexes, chunk number
+            and score of the best chunks, best first. Chunks matching no query
+            term are left out.
+    """
+    chunk_count = sum(len(index.lengths) for index in indexes)
+    if not chunk_count:
+        return []
+    average_length = sum(sum(index.lengths) for index in indexes) / chunk_count
+
+    scores: dict[tuple[int, int], float] = {}
+    for term in set(tokenize(query)):
+        postings = [index.postings.get(term, []) for index in indexes]
+        document_frequency = sum(len(posting) // 2 for posting in postings)
+        if not document_frequency:
+            continue
+
+        idf = math.log(
+            1 + (chunk_count - document_frequency + 0.5) / (document_frequency + 0.5)
+        )
+        for position, posting in enumerate(postings):
+            lengths = indexes[position].lengths
+            for i in range(0, len(posting), 2):
+                number, frequency = posting[i], posting[i + 1]
+                norm = 1 - BM25_B + BM25_B * lengths[number] / average_length
+                key = (position, number)
+                scores[key] = scores.get(key, 0) + idf * (
+                    frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * norm)
+                )
+
+    best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+    return [(position, number, score) for (position, number), score in best]
+
+
+def fuse_rankings(rankings: list[list[Hashable]]) -> list[Hashable]:
+    """Merges rankings of the same items, such as lexical and semantic search
+    results, with reciprocal rank fusion
+
+    Args:
+        rankings (list[list[Hashable]]): Items of each ranking, best first
+
+    Returns:
+        list[Hashable]: Items of all the rankings, best first
+    """
+    scores: dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking):
+            scores[item] = scores.get(item, 0) + 1 / (RRF_K + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
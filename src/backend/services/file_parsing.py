@@ -0,0 +1,522 @@
+import asyncio
+import datetime
+import io
+import multiprocessing
+import os
+import resource
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Iterator, Optional
+
+from docx import Document
+from openpyxl import load_workbook
+from pypdf import PdfReader
+from python_calamine import CalamineWorkbook
+
+from backend.services.file_stats import FileStats
+
+# This module is imported by the parser worker processes, keep its imports light
+
+PDF_EXTENSION = "pdf"
+TEXT_EXTENSION = "txt"
+MARKDOWN_EXTENSION = "md"
+CSV_EXTENSION = "csv"
+EXCEL_EXTENSION = "xlsx"
+EXCEL_OLD_EXTENSION = "xls"
+JSON_EXTENSION = "json"
+DOCX_EXTENSION = "docx"
+
+TEXT_EXTENSIONS = [TEXT_EXTENSION, MARKDOWN_EXTENSION, CSV_EXTENSION, JSON_EXTENSION]
+# Extensions parsed in the worker processes
+PARSED_EXTENSIONS = [
+    PDF_EXTENSION,
+    DOCX_EXTENSION,
+    EXCEL_EXTENSION,
+    EXCEL_OLD_EXTENSION,
+]
+
+PARSER_MAX_WORKERS = min(4, os.cpu_count() or 1)
+PARSE_TIMEOUT_SECONDS = 60
+PARSER_MEMORY_LIMIT = 2_000_000_000  # 2GB address space per worker
+# Each task reopens the PDF, smaller page ranges are not worth splitting
+PDF_MIN_PAGES_PER_TASK = 8
+# Rows of each spreadsheet sheet converted to text, the others are left out
+SPREADSHEET_MAX_ROWS = 10_000
+# Longer cell values are truncated
+SPREADSHEET_MAX_CELL_CHARS = 200
+SPREADSHEET_EXTENSIONS = [EXCEL_EXTENSION, EXCEL_OLD_EXTENSION]
+
+
+@dataclass
+class ParsedFile:
+    """
+    Text extracted from a file. For PDFs, page_offsets holds the offset in text
+    where each page starts, and parsed_pages is less than page_count when only
+    the first pages were parsed. For spreadsheets, page_offsets holds the offset
+    where each sheet starts.
+    """
+
+    text: str
+    page_offsets: Optional[list[int]] = None
+    page_count: Optional[int] = None
+    parsed_pages: Optional[int] = None
+    # Spooled copy kept to parse the remaining pages
+    spooled_path: Optional[str] = None
+    # SHA-256 of the uploaded bytes
+    content_hash: Optional[str] = None
+    parse_seconds: float = 0
+    stats: Optional[FileStats] = None
+    # Serialized ChunkIndex of text
+    chunk_index: Optional[bytes] = None
+
+    @property
+    def is_partial(self) -> bool:
+        return self.parsed_pages is not None and self.parsed_pages < self.page_count
+
+
+def join_pages(pages: list[str], start_offset: int = 0) -> tuple[str, list[int]]:
+    """Joins page texts, returning the text and the offset where each page starts
+
+    Args:
+        pages (list[str]): Text of each page
+        start_offset (int): Offset of the first page, when appending to a text
+
+    Returns:
+        tuple[str, list[int]]: The text and the page offsets
+    """
+    page_offsets = []
+    offset = start_offset
+    for page in pages:
+        page_offsets.append(offset)
+        offset += len(page)
+    return "".join(pages), page_offsets
+
+
+def extract_pdf_pages(pdf_reader: PdfReader, start: int, stop: int) -> list[str]:
+    # Null characters can't be stored, remove them before computing the offsets
+    return [
+        pdf_reader.pages[number].extract_text().replace("\x00", "")
+        for number in range(start, stop)
+    ]
+
+
+def read_pdf(file_contents: bytes) -> str:
+    """Reads the text from a PDF file using PyPDF2
+
+    Args:
+        file_contents (bytes): The file contents
+
+    Returns:
+        str: The text extracted from the PDF
+    """
+    pdf_reader = PdfReader(io.BytesIO(file_contents))
+    text, _ = join_pages(extract_pdf_pages(pdf_reader, 0, len(pdf_reader.pages)))
+    return text
+
+
+def count_pdf_pages(path: str) -> int:
+    return len(PdfReader(path).pages)
+
+
+def read_pdf_pages(path: str, start: int, stop: int) -> list[str]:
+    """Reads the text of a range of pages of a PDF file, runs in a parser worker process
+
+    Args:
+        path (str): Path of the spooled file
+        start (int): First page
+        stop (int): Page after the last one
+
+    Returns:
+        list[str]: Text of each page
+    """
+    return extract_pdf_pages(PdfReader(path), start, stop)
+
+
+def split_pages(start: int, stop: int, parts: int) -> list[tuple[int, int]]:
+    """Splits a range of pages in at most parts ranges of similar sizes
+
+    Args:
+        start (int): First page
+        stop (int): Page after the last one
+        parts (int): Maximum number of ranges
+
+    Returns:
+        list[tuple[int, int]]: Page ranges, as (start, stop)
+    """
+    page_count = stop - start
+    parts = max(1, min(parts, page_count // PDF_MIN_PAGES_PER_TASK))
+    size, remainder = divmod(page_count, parts)
+    ranges = []
+    for part in range(parts):
+        stop = start + size + (1 if part < remainder else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def format_cell(value: Any, max_chars: int) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    elif isinstance(value, datetime.datetime) and value.time() == datetime.time():
+        # openpyxl reads dates as datetimes at midnight
+        value = value.date().isoformat()
+    elif isinstance(value, (datetime.date, datetime.time)):
+        value = value.isoformat()
+
+    text = " ".join(str(value).split())
+    if len(text) > max_chars:
+        text = text[: max_chars - 1] + "…"
+    return text.replace("|", "\\|")
+
+
+def read_spreadsheet(
+    path: str,
+    extension: str = EXCEL_EXTENSION,
+    max_rows: int = SPREADSHEET_MAX_ROWS,
+    max_cell_chars: int = SPREADSHEET_MAX_CELL_CHARS,
+) -> tuple[str, list[int]]:
+    """Converts every sheet of a spreadsheet to a Markdown table, stopping at
+    max_rows non-empty rows per sheet, runs in a parser worker process
+
+    xlsx sheets are streamed by openpyxl, so memory stays bounded however many
+    rows a sheet has. Files that don't declare their dimensions, which Excel
+    always does, are read through once by openpyxl to size the sheets, that
+    costs time but not memory. calamine loads a whole sheet at once, it is only
+    used for xls files, which hold at most 65,536 rows per sheet.
+
+    Args:
+        path (str): Path of the spooled file
+        extension (str): The file extension
+        max_rows (int): Rows of each sheet converted, including the header row
+        max_cell_chars (int): Maximum length of a cell
+
+    Returns:
+        tuple[str, list[int]]: The text and the offset where each sheet starts
+    """
+    sheets = (
+        read_xls_sheets(path)
+        if extension == EXCEL_OLD_EXTENSION
+        else read_xlsx_sheets(path)
+    )
+
+    text = io.StringIO()
+    sheet_offsets = []
+    for name, rows, last_row in sheets:
+        sheet_offsets.append(text.tell())
+        text.write(f"## {name}\n\n")
+
+        written = 0
+        for number, row in rows:
+            cells = [format_cell(value, max_cell_chars) for value in row]
+            if not any(cells):
+                continue
+            if written == max_rows:
+                # The rows left are not read, blank ones can't be told apart
+                if last_row is None:
+                    text.write(f"\nRows {number} and after not included\n")
+                else:
+                    text.write(f"\nRows {number} to {last_row} not included\n")
+                break
+
+            text.write(f"| {' | '.join(cells)} |\n")
+            if not written:
+                text.write(f"|{' --- |' * len(cells)}\n")
+            written += 1
+        text.write("\n")
+
+    return text.getvalue(), sheet_offsets
+
+
+SpreadsheetSheet = tuple[str, Iterator[tuple[int, tuple]], Optional[int]]
+
+
+def read_xlsx_sheets(path: str) -> Iterator[SpreadsheetSheet]:
+    """
+    Yields the name, numbered rows and last row number of each sheet, the rows
+    being read as they are iterated.
+    """
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            rows = enumerate(sheet.iter_rows(min_row=1, values_only=True), start=1)
+            # From the dimension the file declares, if any
+            last_row = sheet.max_row
+            yield sheet.title, rows, last_row
+    finally:
+        workbook.close()
+
+
+def read_xls_sheets(path: str) -> Iterator[SpreadsheetSheet]:
+    """
+    Same as read_xlsx_sheets, each sheet being loaded whole by calamine
+    """
+    workbook = CalamineWorkbook.from_path(path)
+    for name in workbook.sheet_names:
+        sheet = workbook.get_sheet_by_name(name)
+        first_row = sheet.start[0] + 1 if sheet.start else 1
+        last_row = sheet.end[0] + 1 if sheet.end else None
+        yield name, enumerate(sheet.iter_rows(), start=first_row), last_row
+
+
+def read_docx(file_contents: bytes) -> str:
+    document = Document(io.BytesIO(file_contents))
+    paragraphs = [paragraph.text for paragraph in document.paragraphs]
+    return "\n".join(paragraphs)
+
+
+def parse_file(path: str, extension: str) -> str:
+    """Extracts the text of a spooled file, runs in a parser worker process
+
+    Args:
+        path (str): Path of the spooled file
+        extension (str): The file extension
+
+    Returns:
+        str: The text extracted from the file
+
+    Raises:
+        ValueError: If the file extension is not parsed by the workers
+    """
+    with open(path, "rb") as f:
+        file_contents = f.read()
+
+    if extension == PDF_EXTENSION:
+        return read_pdf(file_contents)
+    elif extension == DOCX_EXTENSION:
+        return read_docx(file_contents)
+
+    raise ValueError(f"File extension {extension} is not supported")
+
+
+def limit_worker_memory(memory_limit: int) -> None:
+    # Allocations past the limit raise MemoryError in the worker instead of
+    # exhausting the memory of the host
+    resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+
+
+def serve_parses(connection: Connection, memory_limit: int) -> None:
+    """
+    Runs the parses received on connection one at a time, in a worker process.
+    """
+    limit_worker_memory(memory_limit)
+    while True:
+        try:
+            func, args = connection.recv()
+        except EOFError:
+            return
+
+        try:
+            result = (True, func(*args))
+        except BaseException as e:
+            result = (False, e)
+        try:
+            connection.send(result)
+        except Exception as e:
+            # The exception could not be pickled
+            connection.send((False, RuntimeError(repr(e))))
+
+
+class ParserWorker:
+    """
+    Worker process running one parse at a time, so that a parse can be stopped
+    without affecting the others.
+    """
+
+    def __init__(self, memory_limit: int) -> None:
+        # Forking a process running an event loop and threads is unsafe
+        context = multiprocessing.get_context("spawn")
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(
+            target=serve_parses,
+            args=(child_connection, memory_limit),
+            name="file-parser",
+            daemon=True,
+        )
+        self.process.start()
+        child_connection.close()
+
+    def run(
+        self, func: Callable[..., Any], args: tuple, timeout_seconds: float
+    ) -> tuple[bool, Any]:
+        """
+        Runs a parse, blocking until it completes.
+
+        Returns:
+            tuple[bool, Any]: Whether the parse succeeded, and its result or exception
+
+        Raises:
+            TimeoutError: If the parse did not complete within timeout_seconds
+            EOFError: If the worker process died
+        """
+        self.connection.send((func, args))
+        if not self.connection.poll(timeout_seconds):
+            raise TimeoutError
+        return self.connection.recv()
+
+    def stop(self) -> None:
+        self.process.terminate()
+        self.connection.close()
+
+
+class FileParser:
+    """
+    Parses uploaded files in worker processes, off the event loop.
+
+    At most max_workers parses run at once, later ones wait for a worker. Parses
+    taking longer than timeout_seconds fail, and their worker is stopped since a
+    running parse cannot be cancelled. The other parses keep running.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = PARSER_MAX_WORKERS,
+        timeout_seconds: float = PARSE_TIMEOUT_SECONDS,
+        memory_limit: int = PARSER_MEMORY_LIMIT,
+    ) -> None:
+        self.max_workers = max_workers
+        self.timeout_seconds = timeout_seconds
+        self.memory_limit = memory_limit
+
+        self._workers: set[ParserWorker] = set()
+        self._idle_workers: list[ParserWorker] = []
+        self._running: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def parse(
+        self, path: str, extension: str, max_pages: Optional[int] = None
+    ) -> ParsedFile:
+        """
+        Extracts the text of a spooled file in the worker processes.
+
+        Args:
+            path (str): Path of the spooled file
+            extension (str): The file extension
+            max_pages (Optional[int]): Maximum number of PDF pages to parse
+
+        Returns:
+            ParsedFile: The text extracted from the file
+
+        Raises:
+            ValueError: If the parse times out or exceeds the memory limit
+        """
+        if extension == PDF_EXTENSION:
+            return await self.parse_pdf(path, max_pages=max_pages)
+        if extension in SPREADSHEET_EXTENSIONS:
+            text, sheet_offsets = await self._run(read_spreadsheet, path, extension)
+            return ParsedFile(text=text, page_offsets=sheet_offsets)
+
+        return ParsedFile(text=await self._run(parse_file, path, extension))
+
+    async def parse_pdf(
+        self,
+        path: str,
+        first_page: int = 0,
+        max_pages: Optional[int] = None,
+        start_offset: int = 0,
+    ) -> ParsedFile:
+        """
+        Extracts the text of a PDF, splitting its pages across the worker processes.
+
+        Args:
+            path (str): Path of the spooled PDF
+            first_page (int): First page to parse
+            max_pages (Optional[int]): Maximum number of pages to parse
+            start_offset (int): Offset of the first page, when appending to a text
+
+        Returns:
+            ParsedFile: The text of the pages and their offsets
+
+        Raises:
+            ValueError: If the parse times out or exceeds the memory limit
+        """
+        page_count = await self._run(count_pdf_pages, path)
+        stop = page_count
+        if max_pages is not None:
+            stop = min(page_count, first_page + max_pages)
+
+        page_ranges = await asyncio.gather(
+            *[
+                self._run(read_pdf_pages, path, start, range_stop)
+                for start, range_stop in split_pages(first_page, stop, self.max_workers)
+            ]
+        )
+        text, page_offsets = join_pages(
+            [page for pages in page_ranges for page in pages], start_offset
+        )
+
+        return ParsedFile(
+            text=text,
+            page_offsets=page_offsets,
+            page_count=page_count,
+            parsed_pages=stop,
+        )
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._running = asyncio.Semaphore(self.max_workers)
+
+        async with self._running:
+            worker = await self._get_worker()
+            try:
+                succeeded, result = await asyncio.to_thread(
+                    worker.run, func, args, self.timeout_seconds
+                )
+            except TimeoutError:
+                self._stop_worker(worker)
+                raise ValueError(
+                    f"Parsing the file timed out after {self.timeout_seconds} seconds"
+                )
+            except (EOFError, OSError):
+                self._stop_worker(worker)
+                raise ValueError("The file parser worker crashed")
+            except BaseException:
+                # Cancelled, the worker is still busy with the parse
+                self._stop_worker(worker)
+                raise
+            self._idle_workers.append(worker)
+
+        if succeeded:
+            return result
+        if isinstance(result, MemoryError):
+            raise ValueError(
+                f"Parsing the file exceeded the memory limit of {self.memory_limit} bytes"
+            )
+        raise result
+
+    def shutdown(self) -> None:
+        for worker in list(self._workers):
+            self._stop_worker(worker)
+
+    async def _get_worker(self) -> ParserWorker:
+        if self._idle_workers:
+            return self._idle_workers.pop()
+
+        worker = await asyncio.to_thread(ParserWorker, self.memory_limit)
+        self._workers.add(worker)
+        return worker
+
+    def _stop_worker(self, worker: ParserWorker) -> None:
+        worker.stop()
+        self._workers.discard(worker)
+        if worker in self._idle_workers:
+            self._idle_workers.remove(worker)
+
+
+_file_parser: Optional[FileParser] = None
+
+
+def get_file_parser() -> FileParser:
+    global _file_parser
+
+    if _file_parser is None:
+        _file_parser = FileParser()
+    return _file_parser
+
+
+def shutdown_file_parser() -> None:
+    if _file_parser is not None:
+        _file_parser.shutdown()
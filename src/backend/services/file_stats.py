@@ -0,0 +1,103 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+# Number of words of the preview shown in the preamble
+PREVIEW_WORDS = 25
+# Cohere tokenizers average about 4 characters per token on English text
+CHARS_PER_TOKEN = 4
+# Words sampled from the start of the text to guess its language
+LANGUAGE_SAMPLE_WORDS = 1000
+# Share of the sampled words that must be stopwords of a language to pick it
+LANGUAGE_MIN_STOPWORD_RATIO = 0.05
+UNKNOWN_LANGUAGE = "und"
+
+STOPWORDS = {
+    "en": set(
+        "the and of to in is that for it with as was on are by this be from or which".split()
+    ),
+    "fr": set(
+        "le la les et des est un une du dans que qui pour pas sur au avec il ce sont".split()
+    ),
+    "es": set(
+        "el la los las y de que en un una es por con para se del al como su lo".split()
+    ),
+    "de": set(
+        "der die das und ist nicht ein eine zu den mit von auf für dem im sich auch es wird".split()
+    ),
+    "it": set(
+        "il di che e la un una per non sono gli della del con le nel come anche più alla".split()
+    ),
+    "pt": set(
+        "o a os as e de do da que em um uma para com não por se dos das mais".split()
+    ),
+    "nl": set(
+        "de het een en van is dat op te niet zijn voor met die ook aan er maar om wordt".split()
+    ),
+}
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class FileStats:
+    """
+    Metadata of a file's extracted text, computed once when it is uploaded.
+    """
+
+    word_count: int
+    token_count: int
+    preview: str
+    language: str
+
+
+def compute_file_stats(text: str) -> FileStats:
+    """Computes the metadata of an extracted text
+
+    Args:
+        text (str): The extracted text
+
+    Returns:
+        FileStats: The word count, estimated token count, preview and language
+    """
+    words = text.split()
+    return FileStats(
+        word_count=len(words),
+        token_count=estimate_token_count(text),
+        preview=" ".join(words[:PREVIEW_WORDS]),
+        language=detect_language(words[:LANGUAGE_SAMPLE_WORDS]),
+    )
+
+
+def estimate_token_count(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def detect_language(words: list[str]) -> str:
+    """Guesses the language of a text from the share of each language's stopwords
+
+    Args:
+        words (list[str]): Words sampled from the text
+
+    Returns:
+        str: ISO 639-1 code of the language, "und" when it can't be told
+    """
+    tokens = Counter(
+        token.lower() for word in words for token in WORD_PATTERN.findall(word)
+    )
+    total = sum(tokens.values())
+    if not total:
+        return UNKNOWN_LANGUAGE
+
+    best_language: Optional[str] = None
+    best_count = 0
+    for language, stopwords in STOPWORDS.items():
+        count = sum(tokens[stopword] for stopword in stopwords)
+        if count > best_count:
+            best_language, best_count = language, count
+
+    if best_language is None or best_count / total < LANGUAGE_MIN_STOPWORD_RATIO:
+        return UNKNOWN_LANGUAGE
+    return best_language
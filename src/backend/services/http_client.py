@@ -0,0 +1,311 @@
+import asyncio
+import ipaddress
+import random
+import socket
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Iterable, Optional
+
+import anyio
+import httpcore
+import httpx
+
+from backend.services.logger.utils import get_logger
+
+HTTP_TIMEOUT_SECONDS = 30
+HTTP_CONNECT_TIMEOUT_SECONDS = 5
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_CONNECTIONS_PER_HOST = 10
+# Idle connections kept open per worker, across all hosts. httpcore closes idle
+# connections as soon as the pool holds more than this many connections, busy or
+# not, so a lower value makes connections churn under load
+HTTP_MAX_KEEPALIVE_CONNECTIONS = HTTP_MAX_CONNECTIONS
+HTTP_KEEPALIVE_SECONDS = 30
+HTTP_RETRIES = 2
+# Delay before the first retry, doubled for each following one
+HTTP_BACKOFF_SECONDS = 0.5
+HTTP_MAX_BACKOFF_SECONDS = 10
+DNS_CACHE_SECONDS = 300
+# Responses worth retrying, the server may answer on the next attempt
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+USER_AGENT = "cohere-toolkit"
+
+logger = get_logger()
+
+
+class DNSCachingBackend(httpcore.AsyncNetworkBackend):
+    """
+    Network backend resolving host names once per ttl_seconds instead of on every
+    new connection. TLS still verifies the host name, only the TCP connection is
+    opened to the cached addresses, each tried in turn.
+    """
+
+    def __init__(
+        self,
+        backend: Optional[httpcore.AsyncNetworkBackend] = None,
+        ttl_seconds: float = DNS_CACHE_SECONDS,
+    ) -> None:
+        self.backend = backend or httpcore.AnyIOBackend()
+        self.ttl_seconds = ttl_seconds
+        self._addresses: dict[tuple[str, int], tuple[float, list[str]]] = {}
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: Optional[float] = None,
+        local_address: Optional[str] = None,
+        socket_options: Optional[Iterable[Any]] = None,
+    ) -> httpcore.AsyncNetworkStream:
+        if is_ip_address(host):
+            return await self.backend.connect_tcp(
+                host, port, timeout, local_address, socket_options
+            )
+
+        error = None
+        for address in await self.resolve(host, port):
+            try:
+                return await self.backend.connect_tcp(
+                    address, port, timeout, local_address, socket_options
+                )
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+
+        # The host may have moved, resolve it again on the next connection
+        self._addresses.pop((host, port), None)
+        raise error or httpcore.ConnectError(f"No address found for {host}")
+
+    async def resolve(self, host: str, port: int) -> list[str]:
+        cached = self._addresses.get((host, port))
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        try:
+            infos = await anyio.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        except OSError as e:
+            raise httpcore.ConnectError(str(e))
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        self._addresses[(host, port)] = (time.monotonic() + self.ttl_seconds, addresses)
+        return addresses
+
+    async def connect_unix_socket(self, *args: Any, **kwargs: Any):
+        return await self.backend.connect_unix_socket(*args, **kwargs)
+
+    async def sleep(self, seconds: float) -> None:
+        await self.backend.sleep(seconds)
+
+
+def is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+class PooledTransport(httpx.AsyncHTTPTransport):
+    """
+    Transport keeping connections alive per host, with cached DNS resolution.
+    """
+
+    def __init__(self, limits: httpx.Limits, dns_cache_seconds: float) -> None:
+        # AsyncHTTPTransport.__init__ only builds a pool with the default network
+        # backend, this one is built instead
+        self._pool = httpcore.AsyncConnectionPool(
+            ssl_context=httpx.create_ssl_context(),
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            network_backend=DNSCachingBackend(ttl_seconds=dns_cache_seconds),
+        )
+
+
+class HTTPClient:
+    """
+    Process-wide async HTTP client for the tools.
+
+    Connections are pooled and kept alive per host, and host names are resolved
+    once per DNS_CACHE_SECONDS. Connections belong to an event loop, so each loop
+    gets its own httpx client.
+
+    Requests wait for a free slot before entering the connection pool, at most
+    max_connections_per_host per host and limits.max_connections overall:
+    httpcore scans every queued request each time a connection is released,
+    which gets slow with hundreds of concurrent requests.
+
+    Failed connections and responses in RETRY_STATUS_CODES are retried with an
+    exponential backoff. Only idempotent methods are retried unless the caller
+    passes retry=True.
+    """
+
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        retries: int = HTTP_RETRIES,
+        backoff_seconds: float = HTTP_BACKOFF_SECONDS,
+        timeout: httpx.Timeout = httpx.Timeout(
+            HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS
+        ),
+        limits: httpx.Limits = httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+        ),
+        dns_cache_seconds: float = DNS_CACHE_SECONDS,
+        max_connections_per_host: int = HTTP_MAX_CONNECTIONS_PER_HOST,
+    ) -> None:
+        self.transport = transport
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self.limits = limits
+        self.dns_cache_seconds = dns_cache_seconds
+        self.max_connections_per_host = max_connections_per_host
+
+        self._clients: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, httpx.AsyncClient
+        ] = weakref.WeakKeyDictionary()
+        # Semaphores are bound to an event loop too, the None key limits all hosts
+        self._slots: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[Optional[str], asyncio.Semaphore]
+        ] = weakref.WeakKeyDictionary()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        The httpx client of the running event loop.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                transport=self.transport
+                or PooledTransport(self.limits, self.dns_cache_seconds),
+                timeout=self.timeout,
+                headers={"User-Agent": USER_AGENT},
+                follow_redirects=True,
+            )
+            self._clients[loop] = client
+        return client
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """
+        Waits until a connection to the host of url may be used.
+        """
+        slots = self._slots.setdefault(asyncio.get_running_loop(), {})
+        host = httpx.URL(url).host
+        if host not in slots:
+            slots[host] = asyncio.Semaphore(self.max_connections_per_host)
+        if None not in slots:
+            slots[None] = asyncio.Semaphore(self.limits.max_connections or 2**31)
+
+        async with slots[host], slots[None]:
+            yield
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        retries: Optional[int] = None,
+        retry: Optional[bool] = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        Sends a request, retrying failed connections and temporary errors.
+
+        Args:
+            method (str): HTTP method
+            url (str): URL
+            retries (Optional[int]): Retries, HTTP_RETRIES by default
+            retry (Optional[bool]): Whether to retry, by default only idempotent
+                methods are retried
+            **kwargs: Passed to httpx.AsyncClient.request, such as params, json,
+                headers or timeout
+
+        Returns:
+            httpx.Response: The response, of the last attempt when all failed
+
+        Raises:
+            httpx.HTTPError: If the request could not be sent after the retries
+        """
+        if retries is None:
+            retries = self.retries
+        if retry is None:
+            retry = method.upper() in IDEMPOTENT_METHODS
+        if not retry:
+            retries = 0
+
+        for attempt in range(retries + 1):
+            try:
+                async with self.slot(url):
+                    response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == retries:
+                    raise
+                logger.warning(
+                    event=f"[HTTP] {method} {url} failed, retrying: {e!r}",
+                )
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            if response.status_code not in RETRY_STATUS_CODES or attempt == retries:
+                return response
+            await response.aclose()
+            await asyncio.sleep(self._backoff(attempt, response))
+
+    async def get(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs: Any) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(
+        self, method: str, url: str, **kwargs: Any
+    ) -> AsyncIterator[httpx.Response]:
+        """
+        Sends a request without reading the response body, for large responses.
+        Not retried, since the body may be partly consumed.
+        """
+        async with self.slot(url):
+            async with self.client.stream(method, url, **kwargs) as response:
+                yield response
+
+    async def aclose(self) -> None:
+        """
+        Closes the client of the running event loop.
+        """
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    def _backoff(
+        self, attempt: int, response: Optional[httpx.Response] = None
+    ) -> float:
+        delay = self.backoff_seconds * 2**attempt
+        if response is not None:
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                delay = float(retry_after)
+        # Jitter so that clients retrying together don't all hit the host at once
+        delay *= random.uniform(0.5, 1.5)
+        return min(delay, HTTP_MAX_BACKOFF_SECONDS)
+
+
+_http_client: Optional[HTTPClient] = None
+
+
+def get_http_client() -> HTTPClient:
+    global _http_client
+
+    if _http_client is None:
+        _http_client = HTTPClient()
+    return _http_client
+
+
+async def close_http_client() -> None:
+    if _http_client is not None:
+        await _http_client.aclose()
@@ -1,13 +1,13 @@
 import logging
 from typing import Any
 
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from backend.services.logger.strategies.structured_log import StructuredLogging
 
 
 def get_logger():
-    strategy = Settings().logger.strategy
-    level_str = Settings().logger.level
+    strategy = get_settings().logger.strategy
+    level_str = get_settings().logger.level
 
     level = getattr(logging, level_str.upper(), None)
 
@@ -7,8 +7,6 @@ from functools import wraps
 from typing import Any, Callable, Dict, Union
 
 from fastapi import BackgroundTasks
-from httpx import AsyncHTTPTransport
-from httpx._client import AsyncClient
 from starlette.background import BackgroundTask
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
@@ -25,6 +23,7 @@ from backend.schemas.metrics import (
     MetricsSignal,
 )
 from backend.services.context import get_context
+from backend.services.http_client import get_http_client
 from backend.services.logger.utils import get_logger
 
 REPORT_ENDPOINT = os.getenv("REPORT_ENDPOINT", None)
@@ -151,9 +150,9 @@ async def report_metrics(signal: MetricsSignal) -> None:
 
     try:
         signal = to_dict(signal)
-        transport = AsyncHTTPTransport(retries=NUM_RETRIES)
-        async with AsyncClient(transport=transport) as client:
-            await client.post(REPORT_ENDPOINT, json=signal)
+        await get_http_client().post(
+            REPORT_ENDPOINT, json=signal, retries=NUM_RETRIES, retry=True
+        )
     except Exception as e:
         logger.error(event=f"[Metrics] Error posting report: {e}")
 
@@ -0,0 +1,484 @@
+import asyncio
+import codecs
+import re
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email.message import Message
+from typing import Optional
+
+import httpx
+from lxml import etree, html
+
+from backend.services.http_client import HTTPClient, get_http_client
+
+SCRAPE_TIMEOUT_SECONDS = 15
+# Bytes read from a page, the rest of the body is not downloaded
+SCRAPE_MAX_BYTES = 2_000_000
+SCRAPE_MAX_WORKERS = 4
+SCRAPE_CACHE_ENTRIES = 500
+SCRAPE_CACHE_MAX_CHARS = 50_000_000
+# Elements named like boilerplate but holding more text are kept, class names
+# such as "main-nav-wrapper" sometimes wrap a whole page
+BOILERPLATE_MAX_CHARS = 2000
+# Bytes searched for a <meta charset> when the headers have none
+CHARSET_SNIFF_BYTES = 2048
+# Default of browsers for HTML without a declared charset
+FALLBACK_CHARSET = "windows-1252"
+
+HTML_CONTENT_TYPES = {"text/html", "application/xhtml+xml"}
+TEXT_CONTENT_TYPES = {
+    "application/json",
+    "application/xml",
+    "text/csv",
+    "text/markdown",
+    "text/plain",
+    "text/xml",
+}
+
+# Never part of the readable content of a page
+REMOVED_TAGS = {
+    "aside",
+    "button",
+    "canvas",
+    "dialog",
+    "footer",
+    "form",
+    "head",
+    "iframe",
+    "input",
+    "menu",
+    "nav",
+    "noscript",
+    "object",
+    "script",
+    "select",
+    "style",
+    "svg",
+    "template",
+    "textarea",
+}
+BOILERPLATE_ROLES = {
+    "banner",
+    "complementary",
+    "contentinfo",
+    "dialog",
+    "menu",
+    "menubar",
+    "navigation",
+    "search",
+}
+BOILERPLATE_PATTERN = re.compile(
+    r"\b(ad|ads|advert\w*|banner|breadcrumbs?|comments?|consent|cookies?|footer|"
+    r"menu|modal|nav\w*|newsletter|popup|promo\w*|related|share|sharing|sidebar|"
+    r"social|sponsor\w*|subscribe)\b",
+    re.IGNORECASE,
+)
+BLOCK_TAGS = {
+    "address",
+    "article",
+    "blockquote",
+    "br",
+    "dd",
+    "div",
+    "dl",
+    "dt",
+    "figcaption",
+    "figure",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "hr",
+    "li",
+    "main",
+    "ol",
+    "p",
+    "pre",
+    "section",
+    "table",
+    "tr",
+    "ul",
+}
+META_CHARSET_PATTERN = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w.:-]+)""", re.I)
+MAX_AGE_PATTERN = re.compile(r"(?:^|,)\s*max-age\s*=\s*\"?(\d+)", re.IGNORECASE)
+SPACES_PATTERN = re.compile(r"[^\S\n]+")
+NEWLINES_PATTERN = re.compile(r"\n\s*\n\s*")
+
+
+@dataclass
+class ScrapedPage:
+    url: str
+    title: str
+    text: str
+    # Whether the body was cut at SCRAPE_MAX_BYTES
+    truncated: bool = False
+
+
+@dataclass
+class CachedPage:
+    page: ScrapedPage
+    etag: Optional[str]
+    last_modified: Optional[str]
+    # Monotonic time until which the page is used without asking the server
+    fresh_until: float
+
+
+class PageCache:
+    """
+    LRU cache of scraped pages, validated with the server's ETag and
+    Last-Modified headers once their Cache-Control max-age is over.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = SCRAPE_CACHE_ENTRIES,
+        max_chars: int = SCRAPE_CACHE_MAX_CHARS,
+    ) -> None:
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+
+        self._pages: OrderedDict[str, CachedPage] = OrderedDict()
+        self._chars = 0
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        cached = self._pages.get(url)
+        if cached is not None:
+            self._pages.move_to_end(url)
+        return cached
+
+    def set(self, url: str, cached: CachedPage) -> None:
+        self.delete(url)
+        self._pages[url] = cached
+        self._chars += len(cached.page.text)
+        while self._pages and (
+            len(self._pages) > self.max_entries or self._chars > self.max_chars
+        ):
+            _, evicted = self._pages.popitem(last=False)
+            self._chars -= len(evicted.page.text)
+
+    def delete(self, url: str) -> None:
+        cached = self._pages.pop(url, None)
+        if cached is not None:
+            self._chars -= len(cached.page.text)
+
+    def clear(self) -> None:
+        self._pages.clear()
+        self._chars = 0
+
+
+class WebScraper:
+    """
+    Fetches web pages and extracts their readable text.
+
+    Bodies are streamed and cut at max_bytes. HTML is parsed with lxml in a
+    thread pool, off the event loop, and navigation, ads and other boilerplate
+    are removed. Pages are cached and revalidated with conditional requests.
+    """
+
+    def __init__(
+        self,
+        http_client: Optional[HTTPClient] = None,
+        max_bytes: int = SCRAPE_MAX_BYTES,
+        timeout_seconds: float = SCRAPE_TIMEOUT_SECONDS,
+        max_workers: int = SCRAPE_MAX_WORKERS,
+        cache: Optional[PageCache] = None,
+    ) -> None:
+        self.http_client = http_client
+        self.max_bytes = max_bytes
+        self.timeout_seconds = timeout_seconds
+        self.max_workers = max_workers
+        self.cache = cache if cache is not None else PageCache()
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def scrape(self, url: str) -> ScrapedPage:
+        """
+        Returns the readable text of a web page.
+
+        Args:
+            url (str): URL of the page
+
+        Returns:
+            ScrapedPage: The title and text of the page
+
+        Raises:
+            ValueError: If the page can't be fetched or isn't text
+        """
+        cached = self.cache.get(url)
+        if cached is not None and cached.fresh_until > time.monotonic():
+            self.cache.hits += 1
+            return cached.page
+
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        client = self.http_client or get_http_client()
+        try:
+            async with client.stream(
+                "GET", url, headers=headers, timeout=self.timeout_seconds
+            ) as response:
+                if response.status_code == 304 and cached is not None:
+                    self.cache.revalidations += 1
+                    cached.fresh_until = time.monotonic() + max_age(response)
+                    return cached.page
+                if not response.is_success:
+                    raise ValueError(
+                        f"HTTP {response.status_code} {response.reason_phrase}"
+                    )
+
+                content_type, charset = parse_content_type(
+                    response.headers.get("Content-Type", "")
+                )
+                if content_type not in HTML_CONTENT_TYPES | TEXT_CONTENT_TYPES:
+                    raise ValueError(f"Unsupported content type {content_type}")
+
+                content, truncated = await self._read(response)
+        except httpx.HTTPError as e:
+            raise ValueError(repr(e))
+
+        self.cache.misses += 1
+        if content_type in HTML_CONTENT_TYPES:
+            title, text = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), extract_html_text, content, charset
+            )
+        else:
+            title, text = "", normalize_whitespace(decode(content, charset))
+        page = ScrapedPage(url=url, title=title, text=text, truncated=truncated)
+
+        self._store(url, page, response)
+        return page
+
+    async def _read(self, response: httpx.Response) -> tuple[bytes, bool]:
+        # Content-Length can't be trusted, it is the compressed size
+        chunks = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= self.max_bytes:
+                return b"".join(chunks)[: self.max_bytes], True
+        return b"".join(chunks), False
+
+    def _store(self, url: str, page: ScrapedPage, response: httpx.Response) -> None:
+        cache_control = response.headers.get("Cache-Control", "").lower()
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        seconds = max_age(response)
+        if "no-store" in cache_control or not (etag or last_modified or seconds):
+            self.cache.delete(url)
+            return
+
+        self.cache.set(
+            url,
+            CachedPage(
+                page=page,
+                etag=etag,
+                last_modified=last_modified,
+                fresh_until=time.monotonic() + seconds,
+            ),
+        )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="web-scraper"
+            )
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def parse_content_type(header: str) -> tuple[str, Optional[str]]:
+    """
+    Returns the media type and charset of a Content-Type header.
+    """
+    message = Message()
+    message["Content-Type"] = header or "application/octet-stream"
+    return message.get_content_type(), message.get_content_charset()
+
+
+def max_age(response: httpx.Response) -> int:
+    """
+    Returns for how many seconds a response may be used without revalidating it.
+    """
+    cache_control = response.headers.get("Cache-Control", "")
+    if "no-cache" in cache_control.lower():
+        return 0
+    match = MAX_AGE_PATTERN.search(cache_control)
+    return int(match.group(1)) if match else 0
+
+
+def detect_charset(content: bytes, charset: Optional[str]) -> str:
+    """
+    Picks the charset of an HTML body: the header's, a byte order mark, a
+    <meta charset> or UTF-8 if the body decodes as such, in that order.
+    """
+    for candidate in (charset, sniff_charset(content)):
+        if candidate:
+            try:
+                return codecs.lookup(candidate).name
+            except LookupError:
+                continue
+
+    try:
+        content.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # A body cut at max_bytes can end in the middle of a character
+        if e.start >= len(content) - 3 and e.reason == "unexpected end of data":
+            return "utf-8"
+        return FALLBACK_CHARSET
+
+
+def sniff_charset(content: bytes) -> Optional[str]:
+    for bom, charset in (
+        (codecs.BOM_UTF8, "utf-8-sig"),
+        (codecs.BOM_UTF16_LE, "utf-16"),
+        (codecs.BOM_UTF16_BE, "utf-16"),
+    ):
+        if content.startswith(bom):
+            return charset
+
+    match = META_CHARSET_PATTERN.search(content[:CHARSET_SNIFF_BYTES])
+    return match.group(1).decode("ascii") if match else None
+
+
+def decode(content: bytes, charset: Optional[str] = None) -> str:
+    return content.decode(detect_charset(content, charset), errors="replace")
+
+
+def extract_html_text(content: bytes, charset: Optional[str] = None) -> tuple[str, str]:
+    """
+    Extracts the title and readable text of an HTML page, without its
+    navigation, scripts, ads and other boilerplate.
+
+    Args:
+        content (bytes): The HTML body
+        charset (Optional[str]): Charset of the Content-Type header
+
+    Returns:
+        tuple[str, str]: The title and text of the page
+    """
+    text = decode(content, charset)
+    if not text.strip():
+        return "", ""
+
+    try:
+        try:
+            root = html.document_fromstring(text)
+        except ValueError:
+            # XHTML declaring its encoding can only be parsed from bytes
+            root = html.document_fromstring(
+                text.encode("utf-8"), parser=html.HTMLParser(encoding="utf-8")
+            )
+    except (etree.ParserError, ValueError):
+        return "", ""
+
+    title_element = root.find(".//title")
+    title = ""
+    if title_element is not None and title_element.text:
+        title = " ".join(title_element.text.split())
+
+    remove_boilerplate(root)
+    return title, normalize_whitespace("".join(text_parts(main_content(root))))
+
+
+def remove_boilerplate(root: html.HtmlElement) -> None:
+    elements = [root]
+    while elements:
+        for child in list(elements.pop()):
+            # Comments and processing instructions have no string tag
+            if not isinstance(child.tag, str) or is_boilerplate(child):
+                child.drop_tree()
+            else:
+                elements.append(child)
+
+
+def is_boilerplate(element: html.HtmlElement) -> bool:
+    if element.tag in REMOVED_TAGS:
+        return True
+    if element.tag in ("body", "main", "article"):
+        return False
+    if element.get("hidden") is not None or element.get("aria-hidden") == "true":
+        return True
+    if element.get("role", "").lower() in BOILERPLATE_ROLES:
+        return True
+
+    attributes = f"{element.get('class', '')} {element.get('id', '')}"
+    if not attributes.strip() or not BOILERPLATE_PATTERN.search(
+        attributes.replace("-", " ").replace("_", " ")
+    ):
+        return False
+
+    link_chars = sum(len(link.text_content()) for link in element.iter("a"))
+    return len(element.text_content()) - link_chars <= BOILERPLATE_MAX_CHARS
+
+
+def main_content(root: html.HtmlElement) -> html.HtmlElement:
+    """
+    Returns the <main> or <article> element holding most of the page's text,
+    or the whole page when there is none.
+    """
+    candidates = root.xpath("//main | //article | //*[@role='main']")
+    if not candidates:
+        return root
+
+    best = max(candidates, key=lambda element: len(element.text_content()))
+    # Pages listing several articles keep them all
+    if len(best.text_content()) < len(root.text_content()) / 3:
+        return root
+    return best
+
+
+def text_parts(root: html.HtmlElement):
+    """
+    Yields the text of an element, with line breaks around blocks.
+    """
+    for event, element in etree.iterwalk(root, events=("start", "end")):
+        if event == "start":
+            if element.tag in BLOCK_TAGS:
+                yield "\n"
+            if element.text:
+                yield element.text
+        else:
+            if element.tag in BLOCK_TAGS:
+                yield "\n"
+            elif element.tag in ("td", "th"):
+                yield " "
+            if element.tail and element is not root:
+                yield element.tail
+
+
+def normalize_whitespace(text: str) -> str:
+    lines = (SPACES_PATTERN.sub(" ", line).strip() for line in text.splitlines())
+    return NEWLINES_PATTERN.sub("\n\n", "\n".join(lines)).strip()
+
+
+_web_scraper: Optional[WebScraper] = None
+
+
+def get_web_scraper() -> WebScraper:
+    global _web_scraper
+
+    if _web_scraper is None:
+        _web_scraper = WebScraper()
+    return _web_scraper
+
+
+def shutdown_web_scraper() -> None:
+    if _web_scraper is not None:
+        _web_scraper.shutdown()
@@ -0,0 +1,607 @@
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import IO, Any, Callable, Iterator
+from uuid import uuid4
+
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+
+from backend.config.settings import get_settings
+from backend.crud import message as message_crud
+from backend.database_models.citation import Citation
+from backend.database_models.database import record_user_write
+from backend.database_models.document import Document
+from backend.database_models.message import Message
+from backend.services.logger.utils import get_logger
+
+logger = get_logger()
+
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_MAX_MEMORY_RECORDS = 1000
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_RETRY_DELAY_SECONDS = 0.5
+DEFAULT_FLUSH_INTERVAL_SECONDS = 0.05
+# Longest wait for the pending turns of a conversation, the process holding them
+# may have died before storing them
+DEFAULT_PENDING_WAIT_SECONDS = 60
+
+MESSAGE_FIELDS = [
+    "id",
+    "text",
+    "user_id",
+    "conversation_id",
+    "position",
+    "is_active",
+    "generation_id",
+    "tool_plan",
+    "agent",
+]
+DOCUMENT_FIELDS = [
+    "id",
+    "text",
+    "user_id",
+    "title",
+    "url",
+    "fields",
+    "tool_name",
+    "conversation_id",
+    "document_id",
+]
+CITATION_FIELDS = ["id", "text", "user_id", "start", "end", "document_ids"]
+
+
+class TurnRecord(BaseModel):
+    """
+    A completed chat turn waiting to be stored: the response message, its documents
+    and citations and the new conversation description.
+    """
+
+    record_id: str = Field(default_factory=lambda: str(uuid4()))
+    message: dict[str, Any]
+    documents: list[dict[str, Any]] = []
+    # Each citation row also holds "storage_document_ids", the IDs of its documents
+    citations: list[dict[str, Any]] = []
+    conversation_description: str | None = None
+
+    @property
+    def conversation_key(self) -> tuple[str, str]:
+        return self.message["conversation_id"], self.message["user_id"]
+
+    @classmethod
+    def from_turn(
+        cls,
+        message: Message,
+        documents: list[Document],
+        citations: list[Citation],
+        conversation_description: str | None = None,
+    ) -> "TurnRecord":
+        message.id = message.id or str(uuid4())
+        for document in documents:
+            document.id = document.id or str(uuid4())
+        for citation in citations:
+            citation.id = citation.id or str(uuid4())
+
+        return cls(
+            message={field: getattr(message, field) for field in MESSAGE_FIELDS},
+            documents=[
+                {field: getattr(document, field) for field in DOCUMENT_FIELDS}
+                for document in documents
+            ],
+            citations=[
+                {field: getattr(citation, field) for field in CITATION_FIELDS}
+                | {
+                    "storage_document_ids": [
+                        document.id
+                        for document in citation.documents
+                        if document.id is not None
+                    ]
+                }
+                for citation in citations
+            ],
+            conversation_description=conversation_description,
+        )
+
+    def to_models(
+        self,
+    ) -> tuple[Message, list[Document], list[Citation], str | None]:
+        # Unset values are left out so the column defaults apply
+        message = Message(
+            **{
+                field: value
+                for field, value in self.message.items()
+                if value is not None
+            }
+        )
+        documents = [
+            Document(**document, message_id=message.id) for document in self.documents
+        ]
+        documents_by_id = {document.id: document for document in documents}
+
+        citations = []
+        for row in self.citations:
+            row = dict(row)
+            storage_document_ids = row.pop("storage_document_ids", [])
+            citation = Citation(**row, message_id=message.id)
+            citation.documents.extend(
+                documents_by_id[document_id]
+                for document_id in storage_document_ids
+                if document_id in documents_by_id
+            )
+            citations.append(citation)
+
+        return message, documents, citations, self.conversation_description
+
+
+class TurnJournal:
+    """
+    Append-only JSON lines file holding every enqueued record until it is stored.
+    Stored records are acknowledged with an ack line, the file is truncated once
+    nothing is pending anymore.
+
+    Each process writes its own journal and holds a lock on it while running, the
+    journals nobody holds are left by stopped processes.
+    """
+
+    def __init__(self, path: str, failed_path: str | None = None) -> None:
+        self.path = path
+        self.failed_path = failed_path or f"{path}.failed"
+        self._lock_file: IO | None = None
+
+    def acquire(self, create: bool = True) -> bool:
+        """
+        Locks the journal for this process, without waiting.
+
+        Args:
+            create (bool): Whether to create the journal if it does not exist
+
+        Returns:
+            bool: Whether the journal was locked, False if another process holds it
+                or it does not exist
+        """
+        try:
+            lock_file = open(self.path, "a" if create else "r", encoding="utf-8")
+        except FileNotFoundError:
+            return False
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def release(self) -> None:
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def append(self, record: TurnRecord) -> None:
+        self.extend([record])
+
+    def extend(self, records: list[TurnRecord]) -> None:
+        self._write([{"record": record.model_dump(mode="json")} for record in records])
+
+    def ack(self, record_ids: list[str]) -> None:
+        self._write([{"ack": record_id} for record_id in record_ids])
+
+    def pending(self) -> list[TurnRecord]:
+        if not os.path.exists(self.path):
+            return []
+
+        records: dict[str, TurnRecord] = {}
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A partially written last line from a crash, the record was never acknowledged
+                    continue
+                if "record" in entry:
+                    record = TurnRecord.model_validate(entry["record"])
+                    records[record.record_id] = record
+                elif "ack" in entry:
+                    records.pop(entry["ack"], None)
+        return list(records.values())
+
+    def truncate(self) -> None:
+        with open(self.path, "w", encoding="utf-8"):
+            pass
+
+    def dead_letter(self, record: TurnRecord) -> None:
+        with open(self.failed_path, "a", encoding="utf-8") as f:
+            f.write(record.model_dump_json() + "\n")
+
+    def _write(self, entries: list[dict[str, Any]]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class PendingTurns:
+    """
+    Marker files of the turns not stored yet, one directory per conversation, shared
+    by the processes journaling next to the same path. A turn of a conversation may
+    be queued by any process, the next one waits for it wherever it runs.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def add(self, records: list[TurnRecord]) -> None:
+        for record in records:
+            path = self._path(record)
+            while True:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                try:
+                    open(path, "a").close()
+                    break
+                except FileNotFoundError:
+                    # The directory was removed with the last turn of another process
+                    continue
+
+    def remove(self, records: list[TurnRecord]) -> None:
+        for record in records:
+            path = self._path(record)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            try:
+                os.rmdir(os.path.dirname(path))
+            except OSError:
+                # Other turns of the conversation are pending
+                pass
+
+    def has(self, conversation_id: str, user_id: str) -> bool:
+        try:
+            return bool(os.listdir(self._directory(conversation_id, user_id)))
+        except FileNotFoundError:
+            return False
+
+    def _directory(self, conversation_id: str, user_id: str) -> str:
+        key = hashlib.sha256(f"{conversation_id}:{user_id}".encode()).hexdigest()
+        return os.path.join(self.directory, key[:32])
+
+    def _path(self, record: TurnRecord) -> str:
+        return os.path.join(self._directory(*record.conversation_key), record.record_id)
+
+
+@contextmanager
+def adoption_lock(journal_path: str) -> Iterator[None]:
+    """
+    Adopts the journals of stopped processes in one process at a time.
+    """
+    with open(f"{journal_path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def journal_paths(journal_path: str) -> list[str]:
+    """
+    Returns the journals of every process, including the shared journal written
+    before each process had its own.
+    """
+    directory, name = os.path.split(os.path.abspath(journal_path))
+    pattern = re.compile(rf"{re.escape(name)}(\.[0-9a-f]{{32}})?")
+    return sorted(
+        os.path.join(directory, file_name)
+        for file_name in os.listdir(directory)
+        if pattern.fullmatch(file_name)
+    )
+
+
+class WriteBehindQueue:
+    """
+    Stores completed turns in the background, off the request path.
+
+    Records are journaled to disk before being queued, so they survive a crash. Each
+    process journals to its own file next to journal_path, and on startup adopts and
+    replays the journals left by processes that stopped. Pending turns are also
+    marked on disk, so the next turn of a conversation waits for them in any process,
+    for at most pending_wait_seconds.
+
+    At most max_memory_records are kept in memory, the rest stay in the journal and
+    are read back once the worker catches up. A single worker stores records in
+    enqueue order, in batches of one transaction, which keeps the turns of a
+    conversation in order. Failed batches are retried with backoff, records that
+    still fail are stored one by one and moved to a dead letter file if they fail
+    again.
+    """
+
+    def __init__(
+        self,
+        journal_path: str,
+        session_factory: Callable[[], Session],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_memory_records: int = DEFAULT_MAX_MEMORY_RECORDS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        retry_delay: float = DEFAULT_RETRY_DELAY_SECONDS,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+        pending_wait_seconds: float = DEFAULT_PENDING_WAIT_SECONDS,
+    ) -> None:
+        self.journal_path = journal_path
+        self.journal = TurnJournal(
+            f"{journal_path}.{uuid4().hex}", failed_path=f"{journal_path}.failed"
+        )
+        self.pending_turns = PendingTurns(f"{journal_path}.pending")
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.max_memory_records = max_memory_records
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.flush_interval = flush_interval
+        self.pending_wait_seconds = pending_wait_seconds
+
+        self._records: deque[TurnRecord] = deque()
+        self._spilled = 0
+        self._pending_by_conversation: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._idle: asyncio.Event | None = None
+        self._worker: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        """
+        Replays the records left in the journals of stopped processes and starts the worker.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+
+        pending = await asyncio.to_thread(self._adopt_journals)
+        if pending:
+            logger.info(
+                event=f"[WriteBehind] Replaying {len(pending)} turns from the journal"
+            )
+        for record in pending:
+            self._add(record)
+        if pending:
+            self._notify()
+
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10) -> None:
+        """
+        Waits for the pending records to be stored and stops the worker.
+        Records that could not be stored in time stay in the journal.
+        """
+        if self._worker is None:
+            return
+
+        try:
+            await asyncio.wait_for(self.drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(
+                event="[WriteBehind] Stopping with pending turns, they will be replayed on startup"
+            )
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        with self._lock:
+            if not self._pending_by_conversation:
+                os.remove(self.journal.path)
+        self.journal.release()
+
+    def enqueue(self, record: TurnRecord) -> None:
+        """
+        Journals a record and queues it. Safe to call from any thread, blocks until
+        the journal is synced to disk so call it off the event loop.
+        """
+        with self._lock:
+            self.journal.append(record)
+            self.pending_turns.add([record])
+            self._add(record)
+
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._notify)
+
+    def has_pending(self, conversation_id: str, user_id: str) -> bool:
+        """
+        Whether turns of a conversation queued by any process are not stored yet.
+        """
+        with self._lock:
+            if (conversation_id, user_id) in self._pending_by_conversation:
+                return True
+        return self.pending_turns.has(conversation_id, user_id)
+
+    async def wait_for_conversation(self, conversation_id: str, user_id: str) -> None:
+        """
+        Waits until the pending turns of a conversation are stored, so a new turn
+        reads the complete history.
+        """
+        deadline = time.monotonic() + self.pending_wait_seconds
+        while self.has_pending(conversation_id, user_id):
+            if time.monotonic() > deadline:
+                logger.warning(
+                    event=f"[WriteBehind] Turns of conversation {conversation_id} still pending, not waiting any longer"
+                )
+                return
+            await asyncio.sleep(self.flush_interval)
+
+    async def drain(self) -> None:
+        """
+        Waits until every queued record is stored.
+        """
+        while self._has_records():
+            self._idle.clear()
+            await self._idle.wait()
+
+    def _adopt_journals(self) -> list[TurnRecord]:
+        """
+        Moves the pending records of the journals no running process holds into
+        this process's journal, and returns them.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.journal_path)), exist_ok=True)
+        with adoption_lock(self.journal_path):
+            self.journal.acquire()
+            for path in journal_paths(self.journal_path):
+                orphan = TurnJournal(path)
+                if path == os.path.abspath(self.journal.path) or not orphan.acquire(
+                    create=False
+                ):
+                    continue
+                try:
+                    # Appended before the orphan is removed, replaying a stored turn is a no-op
+                    self.journal.extend(orphan.pending())
+                    os.remove(path)
+                finally:
+                    orphan.release()
+            pending = self.journal.pending()
+            # Journals written before the markers existed have none
+            self.pending_turns.add(pending)
+        return pending
+
+    def _add(self, record: TurnRecord) -> None:
+        if self._spilled or len(self._records) >= self.max_memory_records:
+            self._spilled += 1
+        else:
+            self._records.append(record)
+        key = record.conversation_key
+        self._pending_by_conversation[key] = (
+            self._pending_by_conversation.get(key, 0) + 1
+        )
+
+    def _notify(self) -> None:
+        self._wakeup.set()
+
+    def _has_records(self) -> bool:
+        with self._lock:
+            return bool(self._pending_by_conversation)
+
+    def _next_batch(self) -> list[TurnRecord]:
+        with self._lock:
+            if not self._records and self._spilled:
+                # Read the spilled records back, everything pending in the journal is spilled
+                # since the in-memory queue is empty and records are handled one batch at a time
+                spilled = self.journal.pending()
+                self._records.extend(spilled[: self.max_memory_records])
+                self._spilled = max(len(spilled) - self.max_memory_records, 0)
+
+            batch = []
+            while self._records and len(batch) < self.batch_size:
+                batch.append(self._records.popleft())
+            return batch
+
+    def _done(self, records: list[TurnRecord]) -> None:
+        with self._lock:
+            self.journal.ack([record.record_id for record in records])
+            self.pending_turns.remove(records)
+            for record in records:
+                key = record.conversation_key
+                self._pending_by_conversation[key] -= 1
+                if self._pending_by_conversation[key] == 0:
+                    del self._pending_by_conversation[key]
+
+            if not self._records and not self._spilled:
+                self.journal.truncate()
+
+    async def _run(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            # Give concurrent turns a chance to join the batch
+            await asyncio.sleep(self.flush_interval)
+
+            while batch := self._next_batch():
+                await self._store(batch)
+                self._done(batch)
+
+            self._idle.set()
+
+    async def _store(self, batch: list[TurnRecord]) -> None:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await asyncio.to_thread(self._write, batch)
+                return
+            except Exception as e:
+                logger.warning(
+                    event=f"[WriteBehind] Error storing {len(batch)} turns, attempt {attempt}: {e}"
+                )
+                if attempt < self.max_attempts:
+                    await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+
+        # Isolate the records that cannot be stored so they do not block the others
+        for record in batch:
+            try:
+                await asyncio.to_thread(self._write, [record])
+            except Exception as e:
+                logger.error(
+                    event=f"[WriteBehind] Moving turn {record.record_id} to the dead letter file: {e}"
+                )
+                self.journal.dead_letter(record)
+
+    def _write(self, batch: list[TurnRecord]) -> None:
+        with self.session_factory() as session:
+            message_crud.create_messages_with_documents_and_citations(
+                session, [record.to_models() for record in batch]
+            )
+
+        for record in batch:
+            record_user_write(record.message["user_id"])
+
+
+_write_behind_queue: WriteBehindQueue | None = None
+
+
+def get_write_behind_queue() -> WriteBehindQueue | None:
+    """
+    Returns the write-behind queue if it is enabled and started, None otherwise.
+    """
+    return _write_behind_queue
+
+
+async def wait_for_pending_turns(conversation_id: str | None, user_id: str) -> None:
+    """
+    Waits until the queued turns of a conversation are stored, if the queue is enabled.
+
+    Args:
+        conversation_id (str): Conversation ID, None for a new conversation.
+        user_id (str): User ID.
+    """
+    if _write_behind_queue is None or not conversation_id:
+        return
+
+    await _write_behind_queue.wait_for_conversation(conversation_id, user_id)
+
+
+async def start_write_behind_queue() -> None:
+    global _write_behind_queue
+
+    if not get_settings().database.write_behind_enabled:
+        return
+
+    from backend.database_models.database import engine
+
+    _write_behind_queue = WriteBehindQueue(
+        journal_path=get_settings().database.write_behind_journal_path,
+        session_factory=lambda: Session(engine),
+    )
+    await _write_behind_queue.start()
+
+
+async def stop_write_behind_queue() -> None:
+    global _write_behind_queue
+
+    if _write_behind_queue is None:
+        return
+
+    await _write_behind_queue.stop()
+    _write_behind_queue = None
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import statistics
+import threading
+import time
+from http import HTTPStatus
+from typing import Any, Callable
+
+import pytest
+
+# Name of the test report properties holding the benchmark results
+BENCHMARK_PROPERTY = "benchmark"
+
+
+def pytest_collection_modifyitems(config, items) -> None:
+    """
+    Benchmarks are slow, they are skipped unless selected with -m benchmark
+    """
+    if "benchmark" in config.getoption("markexpr", ""):
+        return
+
+    skip = pytest.mark.skip(reason="Run benchmarks with -m benchmark")
+    for item in items:
+        if item.get_closest_marker("benchmark"):
+            item.add_marker(skip)
+
+
+def pytest_terminal_summary(terminalreporter) -> None:
+    """
+    Lists the results reported by the benchmarks at the end of the run
+    """
+    reports = [
+        report
+        for reports in terminalreporter.stats.values()
+        for report in reports
+        if getattr(report, "when", None) == "call"
+    ]
+    results = [
+        (report.nodeid, value)
+        for report in reports
+        for name, value in report.user_properties
+        if name == BENCHMARK_PROPERTY
+    ]
+    if not results:
+        return
+
+    terminalreporter.write_sep("=", "benchmark results")
+    for nodeid, value in results:
+        terminalreporter.write_line(f"{nodeid}: {value}")
+
+
+@pytest.fixture
+def report_benchmark(record_property) -> Callable[[str], None]:
+    """
+    Returns a function recording a benchmark result in the test report, they
+    are listed at the end of the run
+    """
+
+    def report(result: str) -> None:
+        record_property(BENCHMARK_PROPERTY, result)
+
+    return report
+
+
+@pytest.fixture(autouse=True)
+def disable_info_logging():
+    """
+    The test engine echoes every statement, which would dominate the timings
+    """
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def benchmark(report_benchmark) -> Callable[..., dict[str, float]]:
+    """
+    Returns a function that times a callable over a number of rounds,
+    reports the results and returns them in milliseconds
+    """
+
+    def run(
+        name: str, func: Callable[..., Any], *args: Any, rounds: int = 5, **kwargs: Any
+    ) -> dict[str, float]:
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            func(*args, **kwargs)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        result = {
+            "min": min(timings),
+            "mean": statistics.mean(timings),
+            "max": max(timings),
+        }
+        report_benchmark(
+            f"{name}: min {result['min']:.2f}ms, "
+            f"mean {result['mean']:.2f}ms, max {result['max']:.2f}ms ({rounds} rounds)"
+        )
+        return result
+
+    return run
+
+
+class KeepAliveServer:
+    """
+    Minimal HTTP/1.1 server keeping connections alive, counting the
+    connections opened by the clients. Runs its own event loop in a thread so
+    that blocking clients can be measured too.
+
+    respond is called with the path and lowercased headers of each request and
+    returns the status, headers and body of the response.
+    """
+
+    def __init__(
+        self,
+        respond: Callable[[str, dict[str, str]], tuple[int, dict[str, str], bytes]],
+        latency_seconds: float = 0,
+    ) -> None:
+        self.respond = respond
+        self.latency_seconds = latency_seconds
+        self.connections = 0
+        self.loop = asyncio.new_event_loop()
+        self.port = None
+        self.started = threading.Event()
+
+    def start(self) -> str:
+        threading.Thread(target=self.run, daemon=True).start()
+        self.started.wait()
+        return f"http://127.0.0.1:{self.port}"
+
+    def run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        server = self.loop.run_until_complete(
+            asyncio.start_server(self.handle, "127.0.0.1", 0)
+        )
+        self.port = server.sockets[0].getsockname()[1]
+        self.started.set()
+        self.loop.run_forever()
+        server.close()
+        self.loop.close()
+
+    def stop(self) -> None:
+        asyncio.run_coroutine_threadsafe(self.close_connections(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    async def close_connections(self) -> None:
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.connections += 1
+        try:
+            while True:
+                request_line, *lines = (
+                    (await reader.readuntil(b"\r\n\r\n")).decode().split("\r\n")
+                )
+                headers = {}
+                for line in filter(None, lines):
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                if "content-length" in headers:
+                    await reader.readexactly(int(headers["content-length"]))
+
+                await asyncio.sleep(self.latency_seconds)
+                status, response_headers, body = self.respond(
+                    request_line.split(" ")[1], headers
+                )
+                response_headers["Content-Length"] = str(len(body))
+                writer.write(
+                    f"HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n".encode()
+                    + "".join(
+                        f"{name}: {value}\r\n"
+                        for name, value in response_headers.items()
+                    ).encode()
+                    + b"\r\n"
+                    + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
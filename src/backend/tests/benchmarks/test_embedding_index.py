@@ -0,0 +1,52 @@
+import time
+
+import numpy as np
+import pytest
+
+from backend.services.embedding_index import EmbeddingIndex
+
+pytestmark = pytest.mark.benchmark
+
+NUM_DOCUMENTS = 1_000
+CHUNKS_PER_DOCUMENT = 1_000
+DIMENSIONS = 128
+TOP_K = 10
+
+
+def test_search_1m_chunks(tmp_path, benchmark, report_benchmark) -> None:
+    index = EmbeddingIndex(str(tmp_path / "index"), "benchmark")
+    rng = np.random.default_rng(0)
+
+    start = time.perf_counter()
+    for document in range(NUM_DOCUMENTS):
+        index.append(
+            str(document),
+            rng.standard_normal((CHUNKS_PER_DOCUMENT, DIMENSIONS), dtype=np.float32),
+        )
+    report_benchmark(
+        f"append {NUM_DOCUMENTS * CHUNKS_PER_DOCUMENT:,} chunks: "
+        f"{time.perf_counter() - start:.2f}s"
+    )
+
+    query = rng.standard_normal(DIMENSIONS, dtype=np.float32)
+    # The last chunk of a document is looked up by its own embedding
+    expected = rng.standard_normal(DIMENSIONS, dtype=np.float32)
+    index.append("expected", np.vstack([query * 0.1, expected]))
+
+    def search(document_ids=None) -> None:
+        results = index.search(expected, TOP_K, document_ids)
+        assert results[0][:2] == ("expected", 1)
+
+    benchmark("search 1M chunks", search)
+    benchmark(
+        "search 10 documents of 1M chunks",
+        search,
+        [str(document) for document in range(9)] + ["expected"],
+    )
+    benchmark(
+        "append a 1,000 chunk document",
+        index.append,
+        "appended",
+        rng.standard_normal((CHUNKS_PER_DOCUMENT, DIMENSIONS), dtype=np.float32),
+    )
+    benchmark("tombstone a document", index.delete, ["0"], rounds=1)
@@ -0,0 +1,248 @@
+import asyncio
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+import pytest
+from fastapi import UploadFile as FastAPIUploadFile
+from openpyxl import Workbook
+
+from backend.crud import file as file_crud
+from backend.services.file import (
+    build_file,
+    create_files,
+    get_file_content,
+    parse_batch_uploads,
+    spool_batch_uploads,
+)
+from backend.services.file_parsing import (
+    PDF_EXTENSION,
+    FileParser,
+    read_pdf,
+    read_spreadsheet,
+)
+from backend.tests.factories import get_factory
+
+pytestmark = pytest.mark.benchmark
+
+TEST_DATA_PATH = "src/backend/tests/test_data"
+SPREADSHEET_ROWS = 100_000
+SPREADSHEET_COLUMNS = 8
+PDF_FILES = sorted(
+    os.path.join(TEST_DATA_PATH, name)
+    for name in os.listdir(TEST_DATA_PATH)
+    if name.endswith(".pdf")
+)
+
+
+async def measure_loop_lag(done: asyncio.Event) -> float:
+    """
+    Returns the longest time the event loop was blocked while parsing
+    """
+    max_lag = 0.0
+    while not done.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        max_lag = max(max_lag, time.perf_counter() - start - 0.005)
+    return max_lag
+
+
+def describe_parse(name: str, elapsed: float, max_lag: float) -> str:
+    total_mb = sum(os.path.getsize(path) for path in PDF_FILES) / 1_000_000
+    return (
+        f"{name}: {len(PDF_FILES)} PDFs, {total_mb:.1f}MB in {elapsed:.2f}s "
+        f"({total_mb / elapsed:.2f}MB/s), event loop blocked up to {max_lag * 1000:.0f}ms"
+    )
+
+
+@pytest.mark.asyncio
+async def test_parse_pdfs_on_event_loop(report_benchmark):
+    async def parse_all() -> None:
+        for path in PDF_FILES:
+            with open(path, "rb") as f:
+                read_pdf(f.read())
+            await asyncio.sleep(0)
+
+    done = asyncio.Event()
+    lag = asyncio.create_task(measure_loop_lag(done))
+    start = time.perf_counter()
+    await parse_all()
+    elapsed = time.perf_counter() - start
+    done.set()
+
+    report_benchmark(describe_parse("read_pdf on the event loop", elapsed, await lag))
+
+
+@pytest.mark.asyncio
+async def test_parse_pdfs_in_worker_pool(report_benchmark):
+    parser = FileParser()
+    # Start the workers outside of the measurement
+    await parser.parse(PDF_FILES[0], PDF_EXTENSION)
+
+    done = asyncio.Event()
+    lag = asyncio.create_task(measure_loop_lag(done))
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *[parser.parse(path, PDF_EXTENSION) for path in PDF_FILES]
+    )
+    elapsed = time.perf_counter() - start
+    done.set()
+    parser.shutdown()
+
+    assert all(result.text for result in results)
+    report_benchmark(
+        describe_parse(
+            f"FileParser with {parser.max_workers} worker(s)", elapsed, await lag
+        )
+    )
+
+
+@pytest.mark.asyncio
+async def test_parse_large_pdf_by_pages(report_benchmark):
+    path = os.path.join(TEST_DATA_PATH, "Mount_Everest.pdf")
+    parser = FileParser()
+    await parser.parse(PDF_FILES[0], PDF_EXTENSION)
+
+    for name, max_pages in [("all pages", None), ("first 8 pages", 8)]:
+        start = time.perf_counter()
+        parsed = await parser.parse(path, PDF_EXTENSION, max_pages=max_pages)
+        elapsed = time.perf_counter() - start
+        report_benchmark(
+            f"{name} of a {parsed.page_count} page PDF with "
+            f"{parser.max_workers} worker(s): {parsed.parsed_pages} pages in {elapsed:.2f}s"
+        )
+    parser.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_batch_upload_sequential_vs_concurrent(report_benchmark):
+    def uploads() -> list[FastAPIUploadFile]:
+        files = []
+        for path in PDF_FILES:
+            with open(path, "rb") as f:
+                files.append(
+                    FastAPIUploadFile(
+                        io.BytesIO(f.read()), filename=os.path.basename(path)
+                    )
+                )
+        return files
+
+    # Start the workers outside of the measurement
+    await get_file_content(uploads()[0])
+
+    start = time.perf_counter()
+    for file in uploads():
+        await get_file_content(file)
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [
+        upload
+        async for upload in parse_batch_uploads(await spool_batch_uploads(uploads()))
+    ]
+    concurrent = time.perf_counter() - start
+
+    assert all(upload.error is None for upload in results)
+    report_benchmark(
+        f"batch upload of {len(PDF_FILES)} PDFs: sequential {sequential:.2f}s, "
+        f"concurrent {concurrent:.2f}s ({os.cpu_count()} CPU(s))"
+    )
+
+
+@pytest.mark.asyncio
+async def test_reupload_reuses_stored_content(session, user, report_benchmark):
+    path = os.path.join(TEST_DATA_PATH, "Mount_Everest.pdf")
+    conversation = get_factory("Conversation", session).create(user_id=user.id)
+
+    def upload() -> FastAPIUploadFile:
+        with open(path, "rb") as f:
+            return FastAPIUploadFile(io.BytesIO(f.read()), filename="Mount_Everest.pdf")
+
+    timings = []
+    for _ in range(2):
+        start = time.perf_counter()
+        parsed = await get_file_content(upload(), session=session, user_id=user.id)
+        file, file_content = build_file(
+            user.id, conversation.id, "Mount_Everest.pdf", 1, parsed
+        )
+        create_files(session, [file], [file_content])
+        timings.append(time.perf_counter() - start)
+
+    stats = file_crud.get_file_content_stats(session)
+    report_benchmark(
+        f"upload of a {os.path.getsize(path) / 1_000_000:.1f}MB PDF: "
+        f"first {timings[0]:.2f}s, again {timings[1]:.3f}s, "
+        f"{stats['storage_saved_bytes']} bytes of text not stored again"
+    )
+    assert stats["reused_files"] == 1
+
+
+def read_spreadsheet_with_pandas(path: str) -> str:
+    # How spreadsheets were read before, the first sheet only
+    import pandas as pd
+    from python_calamine.pandas import pandas_monkeypatch
+
+    pandas_monkeypatch()
+    return pd.read_excel(path, engine="calamine").to_string()
+
+
+def peak_memory() -> int:
+    """
+    Returns the peak resident memory of the process in KB. Unlike ru_maxrss,
+    the peak of the parent process is not carried over to a spawned one.
+    """
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return 0
+
+
+def measure_in_process(
+    func: Callable[[str], Any], path: str
+) -> tuple[float, int, int, int]:
+    """
+    Runs a spreadsheet reader in a fresh process, returning the time taken, the
+    length of the text, the peak memory of the process before reading and the
+    peak memory after, in KB
+    """
+    baseline_rss = peak_memory()
+    start = time.perf_counter()
+    text = func(path)
+    elapsed = time.perf_counter() - start
+    if isinstance(text, tuple):
+        text = text[0]
+    return elapsed, len(text), baseline_rss, peak_memory()
+
+
+def test_read_100k_row_spreadsheet(tmp_path, report_benchmark):
+    # Saved with the sheet dimensions declared, as Excel does
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "Orders"
+    sheet.append([f"column_{column}" for column in range(SPREADSHEET_COLUMNS)])
+    for row in range(SPREADSHEET_ROWS):
+        sheet.append(
+            [row, row * 1.5, f"customer {row % 1000}", "2024-01-01"]
+            + [row % 7] * (SPREADSHEET_COLUMNS - 4)
+        )
+    path = str(tmp_path / "orders.xlsx")
+    workbook.save(path)
+
+    results = {}
+    for func in [read_spreadsheet_with_pandas, read_spreadsheet]:
+        with ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            results[func] = pool.submit(measure_in_process, func, path).result()
+        elapsed, length, baseline_rss, max_rss = results[func]
+        report_benchmark(
+            f"{func.__name__} of {SPREADSHEET_ROWS:,} rows: {elapsed:.2f}s, "
+            f"{length:,} characters, peak memory {max_rss / 1024:.0f}MB "
+            f"({(max_rss - baseline_rss) / 1024:.0f}MB over the process before reading)"
+        )
+
+    assert results[read_spreadsheet][1] < results[read_spreadsheet_with_pandas][1]
@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+import pytest
+import requests
+
+from backend.services.http_client import HTTPClient
+from backend.tests.benchmarks.conftest import KeepAliveServer
+from backend.tools.python_interpreter import PythonInterpreter
+
+pytestmark = pytest.mark.benchmark
+
+CONCURRENT_CALLS = 500
+# Simulated latency of the remote host
+LATENCY_SECONDS = 0.005
+BODY = b'{"success": true, "std_out": "42"}'
+
+
+@pytest.mark.asyncio
+async def test_concurrent_python_interpreter_calls(
+    monkeypatch, report_benchmark
+) -> None:
+    server = KeepAliveServer(
+        lambda path, headers: (200, {"Content-Type": "application/json"}, BODY),
+        latency_seconds=LATENCY_SECONDS,
+    )
+    url = server.start()
+    monkeypatch.setattr(PythonInterpreter, "INTERPRETER_URL", url)
+    tool = PythonInterpreter()
+
+    async def blocking_call() -> None:
+        # How the tools called their APIs before, blocking the event loop
+        response = requests.post(url, json={"code": "print(42)"})
+        assert tool._clean_response(response.json())[0]["text"] == "42"
+
+    def report(name: str, elapsed: float) -> None:
+        report_benchmark(
+            f"{CONCURRENT_CALLS} concurrent calls, {name}: "
+            f"{elapsed:.2f}s ({CONCURRENT_CALLS / elapsed:.0f} calls/s), "
+            f"{server.connections} connections"
+        )
+
+    start = time.perf_counter()
+    await asyncio.gather(*(blocking_call() for _ in range(CONCURRENT_CALLS)))
+    report("blocking requests", time.perf_counter() - start)
+
+    client = HTTPClient()
+    monkeypatch.setattr(
+        "backend.tools.python_interpreter.get_http_client", lambda: client
+    )
+    for name in ("shared client, cold", "shared client, warm"):
+        server.connections = 0
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(tool.call({"code": "print(42)"}) for _ in range(CONCURRENT_CALLS))
+        )
+        report(name, time.perf_counter() - start)
+        assert all(result[0]["text"] == "42" for result in results)
+
+    await client.aclose()
+    server.stop()
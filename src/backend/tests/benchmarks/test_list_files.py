@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from backend.crud import file as file_crud
+from backend.database_models.file import File
+from backend.schemas.file import ListFile
+from backend.schemas.user import User
+from backend.tests.factories import get_factory
+
+pytestmark = pytest.mark.benchmark
+
+NUM_FILES = 1_000
+FILE_CONTENT_SIZE = 50_000
+
+
+def test_list_1000_files(session: Session, user: User, benchmark) -> None:
+    conversation = get_factory("Conversation", session).create(user_id=user.id)
+    session.execute(
+        insert(File),
+        [
+            {
+                "user_id": user.id,
+                "conversation_id": conversation.id,
+                "file_name": f"file_{i}.txt",
+                "file_path": f"file_{i}.txt",
+                "file_size": FILE_CONTENT_SIZE,
+                "file_content": "x" * FILE_CONTENT_SIZE,
+            }
+            for i in range(NUM_FILES)
+        ],
+    )
+    session.flush()
+
+    def list_files(with_content: bool) -> None:
+        session.expunge_all()
+        files = file_crud.get_files_by_conversation_id(
+            session, conversation.id, user.id, with_content=with_content
+        )
+        assert len(files) == NUM_FILES
+        _ = [ListFile.model_validate(file) for file in files]
+
+    benchmark("list 1,000 files", list_files, with_content=False)
+    benchmark("list 1,000 files with content", list_files, with_content=True)
@@ -0,0 +1,33 @@
+import time
+
+import pytest
+
+from community.tools import LlamaIndexUploadPDFRetriever
+
+pytestmark = pytest.mark.benchmark
+
+TEST_DATA_PATH = "src/backend/tests/test_data"
+PDF_NAMES = ["Cardistry.pdf", "Mariana_Trench.pdf", "Mount_Everest.pdf", "Tapas.pdf"]
+QUERIES = 20
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pdf_name", PDF_NAMES)
+async def test_repeated_queries(pdf_name, report_benchmark) -> None:
+    retriever = LlamaIndexUploadPDFRetriever(f"{TEST_DATA_PATH}/{pdf_name}")
+
+    start = time.perf_counter()
+    first = await retriever.call({"query": "history"})
+    first_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(QUERIES):
+        result = await retriever.call({"query": "history"})
+    cached_elapsed = (time.perf_counter() - start) / QUERIES
+
+    assert result == first
+    report_benchmark(
+        f"{pdf_name} query, first: {first_elapsed * 1000:.0f}ms, "
+        f"next: {cached_elapsed * 1000:.2f}ms, "
+        f"{sum(len(document['text']) for document in first) / 1000:.1f}K characters"
+    )
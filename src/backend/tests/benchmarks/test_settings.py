@@ -0,0 +1,43 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.config.settings import Settings, get_settings, reload_settings
+from backend.main import create_app
+from backend.services.auth.jwt import JWTService
+
+pytestmark = pytest.mark.benchmark
+
+REQUESTS = 1_000
+
+
+def test_settings_per_request(benchmark) -> None:
+    benchmark(
+        "Settings() per request",
+        lambda: [Settings().auth.secret_key for _ in range(REQUESTS)],
+        rounds=3,
+    )
+    benchmark(
+        "get_settings() per request",
+        lambda: [get_settings().auth.secret_key for _ in range(REQUESTS)],
+        rounds=3,
+    )
+
+
+def test_jwt_verification_per_request(benchmark, monkeypatch) -> None:
+    monkeypatch.setenv("AUTH_SECRET_KEY", "benchmark")
+    reload_settings()
+    token = JWTService().create_and_encode_jwt({"user_id": "benchmark"})
+
+    benchmark(
+        "JWTService().decode_jwt per request",
+        lambda: [JWTService().decode_jwt(token) for _ in range(REQUESTS)],
+        rounds=3,
+    )
+
+
+def test_app_startup(benchmark) -> None:
+    def start_app() -> None:
+        with TestClient(create_app()):
+            pass
+
+    benchmark("create_app startup", start_app, rounds=3)
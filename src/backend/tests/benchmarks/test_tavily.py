@@ -0,0 +1,149 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+from tavily import TavilyClient
+
+from backend.services.file_parsing import read_pdf
+from backend.services.http_client import HTTPClient
+from backend.tests.benchmarks.conftest import KeepAliveServer
+from backend.tools.tavily import TavilyInternetSearch
+
+pytestmark = pytest.mark.benchmark
+
+TEST_DATA_PATH = "src/backend/tests/test_data"
+CONCURRENT_SEARCHES = 8
+# Latency of the Tavily API with raw content
+SEARCH_LATENCY_SECONDS = 0.3
+# Latency of a rerank call, and its cost per document
+RERANK_LATENCY_SECONDS = 0.1
+RERANK_SECONDS_PER_DOCUMENT = 0.0005
+QUERY = "highest mountain above sea level"
+
+
+def tavily_response() -> bytes:
+    """
+    Returns an advanced search response with raw content, 6 pages built from
+    the text of the test PDFs
+    """
+    texts = []
+    for name in sorted(os.listdir(TEST_DATA_PATH)):
+        if name.endswith(".pdf"):
+            with open(os.path.join(TEST_DATA_PATH, name), "rb") as f:
+                texts.append(read_pdf(f.read()))
+
+    results = []
+    for i in range(6):
+        text = texts[i % len(texts)]
+        paragraphs = [" ".join(p.split()) for p in text.split("\n\n") if p.strip()]
+        results.append(
+            {
+                "url": f"https://example.com/page/{i}",
+                "title": f"Page {i}",
+                "content": " ".join(text.split()[:80]),
+                "score": 0.9,
+                # Pages usually put one sentence or list item per line
+                "raw_content": "\n".join(
+                    line for p in paragraphs for line in p.split(". ")
+                ),
+            }
+        )
+    return json.dumps({"query": QUERY, "results": results}).encode()
+
+
+class MockRerankModel:
+    def __init__(self) -> None:
+        self.documents = 0
+
+    async def invoke_rerank(self, query, documents, ctx, **kwargs):
+        self.documents += len(documents)
+        await asyncio.sleep(
+            RERANK_LATENCY_SECONDS + RERANK_SECONDS_PER_DOCUMENT * len(documents)
+        )
+        return {
+            "results": [
+                {"index": i, "relevance_score": (i * 7919 % 1000) / 1000}
+                for i in range(len(documents))
+            ]
+        }
+
+
+async def search_before(url: str, query: str, model: MockRerankModel) -> list:
+    """
+    The previous implementation: a blocking search, every raw content line
+    reranked in sequential batches and URLs deduped in a list
+    """
+    client = TavilyClient(api_key="key")
+    client.base_url = url
+    result = client.search(
+        query=query, search_depth="advanced", include_raw_content=True
+    )
+
+    expanded = []
+    for result in result["results"]:
+        expanded.append(result)
+        for snippet in result["raw_content"].split("\n"):
+            if result["content"] != snippet and len(snippet.split()) > 10:
+                expanded.append(
+                    {"url": result["url"], "title": result["title"], "content": snippet}
+                )
+
+    relevance_scores = [None] * len(expanded)
+    for batch_start in range(0, len(expanded), 500):
+        batch = expanded[batch_start : batch_start + 500]
+        output = await model.invoke_rerank(
+            query=query,
+            documents=[f"{s['title']} {s['content']}" for s in batch],
+            ctx=None,
+        )
+        for b in output["results"]:
+            relevance_scores[batch_start + b["index"]] = b["relevance_score"]
+
+    reranked, seen_urls = [], []
+    for _, result in sorted(
+        zip(relevance_scores, expanded), key=lambda x: x[0], reverse=True
+    ):
+        if result["url"] not in seen_urls:
+            seen_urls.append(result["url"])
+            reranked.append(result)
+    return reranked[:6]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_searches(monkeypatch, report_benchmark) -> None:
+    body = tavily_response()
+    server = KeepAliveServer(
+        lambda path, headers: (200, {"Content-Type": "application/json"}, body),
+        latency_seconds=SEARCH_LATENCY_SECONDS,
+    )
+    url = server.start()
+    client = HTTPClient()
+    monkeypatch.setattr("backend.tools.tavily.TAVILY_SEARCH_URL", url)
+    monkeypatch.setattr("backend.tools.tavily.get_http_client", lambda: client)
+    report_benchmark(f"Tavily response: {len(body) / 1000:.0f}KB")
+
+    tool = TavilyInternetSearch()
+    for name, search in (
+        ("before", lambda model: search_before(url, QUERY, model)),
+        (
+            "after",
+            lambda model: tool.call({"query": QUERY}, model_deployment=model),
+        ),
+    ):
+        model = MockRerankModel()
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            *(search(model) for _ in range(CONCURRENT_SEARCHES))
+        )
+        elapsed = time.perf_counter() - start
+        assert all(len(result) == 6 for result in results)
+        report_benchmark(
+            f"{CONCURRENT_SEARCHES} concurrent searches, {name}: "
+            f"{elapsed:.2f}s, {model.documents // CONCURRENT_SEARCHES} documents "
+            f"reranked per search"
+        )
+
+    await client.aclose()
+    server.stop()
@@ -0,0 +1,80 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.orm import Session
+
+from backend.crud import message as message_crud
+from backend.database_models.citation import Citation
+from backend.database_models.document import Document
+from backend.database_models.message import Message
+from backend.schemas.user import User
+from backend.tests.factories import get_factory
+
+pytestmark = pytest.mark.benchmark
+
+NUM_DOCUMENTS = 50
+NUM_CITATIONS = 100
+DOCUMENTS_PER_CITATION = 3
+
+
+def build_turn(
+    user_id: str, conversation_id: str
+) -> tuple[Message, list[Document], list[Citation]]:
+    message = Message(
+        id=str(uuid4()),
+        text="x" * 2_000,
+        user_id=user_id,
+        conversation_id=conversation_id,
+        position=1,
+        agent="CHATBOT",
+    )
+    documents = [
+        Document(
+            document_id=f"doc_{i}",
+            text="x" * 1_000,
+            title=f"Title {i}",
+            url=f"https://example.com/{i}",
+            tool_name="web_search",
+            fields={"title": f"Title {i}", "url": f"https://example.com/{i}"},
+            user_id=user_id,
+            conversation_id=conversation_id,
+            message_id=message.id,
+        )
+        for i in range(NUM_DOCUMENTS)
+    ]
+    citations = []
+    for i in range(NUM_CITATIONS):
+        cited = [
+            documents[(i + j) % NUM_DOCUMENTS] for j in range(DOCUMENTS_PER_CITATION)
+        ]
+        citation = Citation(
+            text=f"citation {i}",
+            user_id=user_id,
+            start=i * 10,
+            end=i * 10 + 5,
+            document_ids=[document.document_id for document in cited],
+        )
+        citation.documents.extend(cited)
+        citations.append(citation)
+    return message, documents, citations
+
+
+def test_persist_turn_with_50_documents_and_100_citations(
+    session: Session, user: User, benchmark
+) -> None:
+    conversation = get_factory("Conversation", session).create(user_id=user.id)
+
+    def persist_with_cascades() -> None:
+        message, documents, citations = build_turn(user.id, conversation.id)
+        message.documents = documents
+        message.citations = citations
+        message_crud.create_message(session, message)
+
+    def persist_in_bulk() -> None:
+        message, documents, citations = build_turn(user.id, conversation.id)
+        message_crud.create_message_with_documents_and_citations(
+            session, message, documents, citations
+        )
+
+    benchmark("persist turn through ORM cascades", persist_with_cascades)
+    benchmark("persist turn in bulk", persist_in_bulk)
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+from langchain_community.embeddings import DeterministicFakeEmbedding
+
+from backend.config.settings import reload_settings
+from backend.tools import LangChainVectorDBRetriever
+from backend.tools.utils import vector_store
+
+pytestmark = pytest.mark.benchmark
+
+TEST_DATA_PATH = "src/backend/tests/test_data"
+PDF_NAMES = ["Cardistry.pdf", "Mariana_Trench.pdf", "Mount_Everest.pdf", "Tapas.pdf"]
+QUERIES = 5
+# Latency of an embed request, and its cost per text
+EMBED_LATENCY_SECONDS = 0.2
+EMBED_SECONDS_PER_TEXT = 0.002
+EMBED_BATCH_SIZE = 96
+
+
+class SlowEmbeddings(DeterministicFakeEmbedding):
+    """
+    Local embeddings as slow as the embed API
+    """
+
+    model: str = "fake-model"
+
+    def embed_documents(self, texts):
+        for start in range(0, len(texts), EMBED_BATCH_SIZE):
+            batch = texts[start : start + EMBED_BATCH_SIZE]
+            time.sleep(EMBED_LATENCY_SECONDS + EMBED_SECONDS_PER_TEXT * len(batch))
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        time.sleep(EMBED_LATENCY_SECONDS + EMBED_SECONDS_PER_TEXT)
+        return super().embed_query(text)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pdf_name", PDF_NAMES)
+async def test_repeated_queries(
+    pdf_name, tmp_path, monkeypatch, report_benchmark
+) -> None:
+    monkeypatch.setenv("VECTOR_RETRIEVER_PERSIST_DIRECTORY", str(tmp_path))
+    reload_settings()
+    retriever = LangChainVectorDBRetriever(
+        f"{TEST_DATA_PATH}/{pdf_name}", embeddings=SlowEmbeddings(size=1024)
+    )
+
+    start = time.perf_counter()
+    first = await retriever.call({"query": "history"})
+    first_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(QUERIES):
+        assert await retriever.call({"query": "history"}) == first
+    cached_elapsed = (time.perf_counter() - start) / QUERIES
+
+    # A new worker process only finds the persisted store
+    monkeypatch.setattr(vector_store, "_vector_stores", {})
+    monkeypatch.setattr(vector_store, "_clients", {})
+    start = time.perf_counter()
+    assert await retriever.call({"query": "history"}) == first
+    persisted_elapsed = time.perf_counter() - start
+
+    report_benchmark(
+        f"{pdf_name} query, first: {first_elapsed * 1000:.0f}ms, "
+        f"next: {cached_elapsed * 1000:.0f}ms, "
+        f"new process: {persisted_elapsed * 1000:.0f}ms"
+    )
+    monkeypatch.undo()
+    reload_settings()
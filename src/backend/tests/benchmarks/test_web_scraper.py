@@ -0,0 +1,154 @@
+import asyncio
+import os
+import time
+
+import pytest
+from bs4 import BeautifulSoup
+
+from backend.services.file_parsing import read_pdf
+from backend.services.http_client import HTTPClient
+from backend.services.web_scraper import WebScraper, extract_html_text
+from backend.tests.benchmarks.conftest import KeepAliveServer
+
+pytestmark = pytest.mark.benchmark
+
+TEST_DATA_PATH = "src/backend/tests/test_data"
+PAGES_PER_ARTICLE = 25
+LATENCY_SECONDS = 0.02
+
+LAYOUT = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8"><title>{title} - Encyclopedia</title>
+<style>{style}</style>
+<script>{script}</script>
+</head>
+<body class="skin-vector">
+<div id="cookie-consent" class="cookie-banner">We use cookies to improve your experience.
+<button>Accept all</button><button>Settings</button></div>
+<header class="site-header"><a class="logo" href="/">Encyclopedia</a>
+<nav class="main-nav"><ul>{nav}</ul></nav>
+<form class="search"><input name="q" placeholder="Search"></form></header>
+<div class="page">
+<aside id="sidebar"><h3>Contents</h3><ul>{nav}</ul></aside>
+<main id="content"><article>
+<h1>{title}</h1>
+<div class="share-buttons"><a href="#">Share</a><a href="#">Tweet</a></div>
+{paragraphs}
+<div class="related-articles"><h3>Related</h3><ul>{nav}</ul></div>
+</article></main>
+</div>
+<footer><ul>{nav}</ul><p>Text is available under a free license.</p></footer>
+<script>{script}</script>
+</body>
+</html>"""
+
+
+def saved_pages() -> dict[str, bytes]:
+    """
+    Builds a corpus of saved pages from the text of the test PDFs, wrapped in
+    the layout of a typical article page: inline styles and scripts, menus,
+    a cookie banner, a sidebar, share buttons and a footer.
+    """
+    nav = "".join(f'<li><a href="/wiki/{i}">Link {i}</a></li>' for i in range(150))
+    style = "".join(
+        f".c{i} {{ margin: {i}px; color: #{i:06x}; }}\n" for i in range(800)
+    )
+    script = "".join(f"window.v{i} = {{a: {i}, b: '{i}'}};\n" for i in range(1000))
+
+    pages = {}
+    for name in sorted(os.listdir(TEST_DATA_PATH)):
+        if not name.endswith(".pdf"):
+            continue
+        with open(os.path.join(TEST_DATA_PATH, name), "rb") as f:
+            text = read_pdf(f.read())
+        title = name.removesuffix(".pdf").replace("_", " ")
+        paragraphs = "\n".join(
+            f"<p>{paragraph}</p>" for paragraph in text.split("\n\n") if paragraph
+        )
+        for i in range(PAGES_PER_ARTICLE):
+            pages[f"/{name}/{i}"] = LAYOUT.format(
+                title=title, style=style, script=script, nav=nav, paragraphs=paragraphs
+            ).encode()
+    return pages
+
+
+async def measure_loop_lag(done: asyncio.Event) -> float:
+    """
+    Returns the longest time the event loop was blocked while scraping
+    """
+    max_lag = 0.0
+    while not done.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.005)
+        max_lag = max(max_lag, time.perf_counter() - start - 0.005)
+    return max_lag
+
+
+def test_extract_text(benchmark, report_benchmark) -> None:
+    pages = list(saved_pages().values())
+    total_mb = sum(len(page) for page in pages) / 1_000_000
+    report_benchmark(f"corpus: {len(pages)} pages, {total_mb:.1f}MB")
+
+    def soup() -> None:
+        for page in pages:
+            BeautifulSoup(page.decode(), "html.parser").get_text(separator="\n")
+
+    def lxml() -> None:
+        for page in pages:
+            extract_html_text(page)
+
+    benchmark("html.parser get_text", soup, rounds=1)
+    benchmark("lxml without boilerplate", lxml, rounds=3)
+
+    before = BeautifulSoup(pages[0].decode(), "html.parser").get_text(separator="\n")
+    _, after = extract_html_text(pages[0])
+    report_benchmark(
+        f"text of a page: {len(before):,} chars before, {len(after):,} after"
+    )
+
+
+@pytest.mark.asyncio
+async def test_scrape_concurrently(report_benchmark) -> None:
+    pages = saved_pages()
+    fetches = []
+
+    def respond(path: str, headers: dict[str, str]):
+        fetches.append(path)
+        if headers.get("if-none-match") == '"v1"':
+            return 304, {"ETag": '"v1"'}, b""
+        return 200, {"Content-Type": "text/html", "ETag": '"v1"'}, pages[path]
+
+    server = KeepAliveServer(respond, latency_seconds=LATENCY_SECONDS)
+    url = server.start()
+    client = HTTPClient()
+    scraper = WebScraper(http_client=client)
+
+    async def scrape_before(path: str) -> None:
+        # The scrape tool parsed the whole page on the event loop
+        response = await client.get(url + path)
+        BeautifulSoup(response.text, "html.parser").get_text(separator="\n")
+
+    async def scrape_after(path: str) -> None:
+        await scraper.scrape(url + path)
+
+    for name, scrape in (
+        ("html.parser on the event loop", scrape_before),
+        ("WebScraper", scrape_after),
+        ("WebScraper, revalidated", scrape_after),
+    ):
+        done = asyncio.Event()
+        lag = asyncio.create_task(measure_loop_lag(done))
+        start = time.perf_counter()
+        await asyncio.gather(*(scrape(path) for path in pages))
+        elapsed = time.perf_counter() - start
+        done.set()
+        report_benchmark(
+            f"scrape {len(pages)} pages concurrently, {name}: "
+            f"{elapsed:.2f}s, event loop blocked up to {await lag * 1000:.0f}ms"
+        )
+
+    assert scraper.cache.revalidations == len(pages)
+    scraper.shutdown()
+    await client.aclose()
+    server.stop()
@@ -0,0 +1,53 @@
+import os
+from unittest.mock import patch
+
+import yaml
+
+from backend.config import settings as settings_module
+from backend.config.settings import get_settings, reload_settings
+from backend.services.env import update_env_file
+
+
+def test_get_settings_is_cached() -> None:
+    assert get_settings() is get_settings()
+
+
+def test_reload_settings_reads_environment(monkeypatch) -> None:
+    monkeypatch.setenv("LOG_LEVEL", "DEBUG")
+    assert get_settings().logger.level != "DEBUG"
+
+    reload_settings()
+    assert get_settings().logger.level == "DEBUG"
+
+
+def test_update_env_file_reloads_settings(tmp_path) -> None:
+    cached = get_settings()
+
+    with patch.dict(os.environ), patch(
+        "backend.services.env.find_dotenv", return_value=str(tmp_path / ".env")
+    ):
+        os.environ.pop("LOG_LEVEL", None)
+        update_env_file({"LOG_LEVEL": "WARNING"})
+
+        assert get_settings() is not cached
+        assert get_settings().logger.level == "WARNING"
+
+
+def test_hot_reload_settings_on_file_change(monkeypatch, tmp_path) -> None:
+    with open(settings_module.config_file) as f:
+        config = yaml.safe_load(f)
+    config["feature_flags"]["hot_reload_settings"] = True
+    config_file = tmp_path / "configuration.yaml"
+    config_file.write_text(yaml.dump(config))
+    monkeypatch.setattr(settings_module, "config_file", str(config_file))
+    monkeypatch.setattr(settings_module, "SETTINGS_WATCH_INTERVAL_SECONDS", 0)
+    reload_settings()
+    assert get_settings().logger.level == "INFO"
+
+    config["logger"]["level"] = "ERROR"
+    config_file.write_text(yaml.dump(config))
+    # Make sure the modification time changes on coarse grained file systems
+    mtime = config_file.stat().st_mtime + 1
+    os.utime(config_file, (mtime, mtime))
+
+    assert get_settings().logger.level == "ERROR"
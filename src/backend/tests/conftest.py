@@ -10,10 +10,13 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import Session
 
 from backend.config.deployments import AVAILABLE_MODEL_DEPLOYMENTS, ModelDeploymentName
-from backend.database_models import get_session
+from backend.config.settings import reload_settings
+from backend.database_models import get_read_session, get_session
 from backend.main import app, create_app
 from backend.schemas.deployment import Deployment
 from backend.schemas.user import User
+from backend.services.auth.token_cache import token_blacklist, verified_tokens
+from backend.services.cache import clear_caches
 from backend.tests.factories import get_factory
 
 DATABASE_URL = os.environ["DATABASE_URL"]
@@ -72,6 +75,7 @@ def session_client(session: Session) -> Generator[TestClient, None, None]:
     app = create_app()
 
     app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_read_session] = override_get_session
 
     print("Session at fixture " + str(session))
 
@@ -135,6 +139,7 @@ def session_client_chat(session_chat: Session) -> Generator[TestClient, None, No
 
     app = create_app()
     app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_read_session] = override_get_session
 
     print("Session at fixture " + str(session_chat))
 
@@ -144,6 +149,26 @@ def session_client_chat(session_chat: Session) -> Generator[TestClient, None, No
     app.dependency_overrides = {}
 
 
+@pytest.fixture(autouse=True)
+def restore_settings() -> Generator[None, None, None]:
+    """
+    Environment variables patched by a test must not leak into the cached settings
+    """
+    yield
+    reload_settings()
+
+
+@pytest.fixture(autouse=True)
+def clear_caches_after_test() -> Generator[None, None, None]:
+    """
+    Cached rows are rolled back after each test, reload them in the next one
+    """
+    yield
+    verified_tokens.clear()
+    token_blacklist.clear()
+    clear_caches()
+
+
 @pytest.fixture
 def user(session: Session) -> User:
     return get_factory("User", session).create(id="1")
@@ -122,6 +122,123 @@ def test_list_converstions_with_agent_id_filter_and_pagination(session, user):
         assert conversation.title == f"Conversation {i + 5} with agent"
 
 
+def test_search_conversations_by_title(session, user):
+    conversation = get_factory("Conversation", session).create(
+        title="There are seven colors in the rainbow", user_id=user.id
+    )
+    _ = get_factory("Conversation", session).create(
+        title="Hello, how are you?", user_id=user.id
+    )
+
+    conversations = conversation_crud.search_conversations(
+        session, user_id=user.id, query="colors"
+    )
+    assert [c.id for c in conversations] == [conversation.id]
+
+
+def test_search_conversations_by_message_text(session, user):
+    conversation = get_factory("Conversation", session).create(
+        title="Untitled", user_id=user.id
+    )
+    _ = get_factory("Message", session).create(
+        text="What is the capital of Mongolia?",
+        conversation_id=conversation.id,
+        user_id=user.id,
+    )
+
+    conversations = conversation_crud.search_conversations(
+        session, user_id=user.id, query="mongolia"
+    )
+    assert [c.id for c in conversations] == [conversation.id]
+
+
+def test_search_conversations_matches_prefix(session, user):
+    conversation = get_factory("Conversation", session).create(
+        title="Quarterly revenue report", user_id=user.id
+    )
+
+    conversations = conversation_crud.search_conversations(
+        session, user_id=user.id, query="quart rev"
+    )
+    assert [c.id for c in conversations] == [conversation.id]
+
+
+def test_search_conversations_ranks_title_matches_first(session, user):
+    message_match = get_factory("Conversation", session).create(
+        title="Untitled", user_id=user.id
+    )
+    _ = get_factory("Message", session).create(
+        text="Tell me about volcanoes",
+        conversation_id=message_match.id,
+        user_id=user.id,
+    )
+    title_match = get_factory("Conversation", session).create(
+        title="Volcanoes", user_id=user.id
+    )
+
+    conversations = conversation_crud.search_conversations(
+        session, user_id=user.id, query="volcano"
+    )
+    assert [c.id for c in conversations] == [title_match.id, message_match.id]
+
+
+def test_search_conversations_only_returns_user_conversations(session, user):
+    other_user = get_factory("User", session).create(id="other_user")
+    _ = get_factory("Conversation", session).create(
+        title="Volcanoes", user_id=other_user.id
+    )
+
+    conversations = conversation_crud.search_conversations(
+        session, user_id=user.id, query="volcano"
+    )
+    assert conversations == []
+
+
+def test_search_conversations_without_terms(session, user):
+    _ = get_factory("Conversation", session).create(title="Volcanoes", user_id=user.id)
+
+    conversations = conversation_crud.search_conversations(
+        session, user_id=user.id, query="?!"
+    )
+    assert conversations == []
+
+
+def test_search_conversations_after_title_update(session, user):
+    conversation = get_factory("Conversation", session).create(
+        title="Volcanoes", user_id=user.id
+    )
+    new_conversation_data = UpdateConversationRequest(title="Glaciers")
+    conversation_crud.update_conversation(session, conversation, new_conversation_data)
+
+    assert (
+        conversation_crud.search_conversations(
+            session, user_id=user.id, query="volcano"
+        )
+        == []
+    )
+    conversations = conversation_crud.search_conversations(
+        session, user_id=user.id, query="glacier"
+    )
+    assert [c.id for c in conversations] == [conversation.id]
+
+
+def test_search_conversations_after_message_delete(session, user):
+    conversation = get_factory("Conversation", session).create(
+        title="Untitled", user_id=user.id
+    )
+    message = get_factory("Message", session).create(
+        text="Tell me about volcanoes",
+        conversation_id=conversation.id,
+        user_id=user.id,
+    )
+    message_crud.delete_message(session, message.id, user.id)
+
+    conversations = conversation_crud.search_conversations(
+        session, user_id=user.id, query="volcano"
+    )
+    assert conversations == []
+
+
 def test_update_conversation(session, user):
     conversation = get_factory("Conversation", session).create(
         title="Hello, World!",
@@ -1,7 +1,9 @@
 import pytest
+from sqlalchemy import inspect, text
 
+from backend.crud import conversation as conversation_crud
 from backend.crud import file as file_crud
-from backend.database_models.file import File
+from backend.database_models.file import File, FileContent
 from backend.schemas.file import UpdateFileRequest
 from backend.tests.factories import get_factory
 
@@ -125,6 +127,52 @@ def test_list_files_by_conversation_id_empty(session, user):
     assert len(files) == 0
 
 
+def test_list_files_by_conversation_id_defers_content(session, user):
+    _ = get_factory("File", session).create(
+        file_name="test.txt",
+        file_content="test content",
+        conversation_id="1",
+        user_id=user.id,
+    )
+    session.expire_all()
+
+    files = file_crud.get_files_by_conversation_id(session, "1", user.id)
+    assert len(files) == 1
+    assert "file_content" in inspect(files[0]).unloaded
+
+
+def test_list_files_by_conversation_id_with_content(session, user):
+    _ = get_factory("File", session).create(
+        file_name="test.txt",
+        file_content="test content",
+        conversation_id="1",
+        user_id=user.id,
+    )
+    session.expire_all()
+
+    files = file_crud.get_files_by_conversation_id(
+        session, "1", user.id, with_content=True
+    )
+    assert len(files) == 1
+    assert "file_content" not in inspect(files[0]).unloaded
+    assert files[0].file_content == "test content"
+
+
+def test_get_files_by_file_names_loads_content(session, user):
+    _ = get_factory("File", session).create(
+        file_name="test.txt",
+        file_content="test content",
+        conversation_id="1",
+        user_id=user.id,
+    )
+    session.expire_all()
+
+    files = file_crud.get_files_by_file_names(session, ["test.txt"], user.id)
+    assert len(files) == 1
+    assert "file_content" not in inspect(files[0]).unloaded
+    assert files[0].file_content == "test content"
+
+
 def test_list_files_by_user_id(session, user):
     for i in range(10):
         _ = get_factory("File", session).create(
@@ -168,3 +216,204 @@ def test_delete_file(session, user):
 
     file_crud.delete_file(session, file.id, user.id)
     assert file_crud.get_file(session, file.id, user.id) is None
+
+
+def test_create_file_updates_total_file_size(session, user):
+    file_crud.create_file(
+        session,
+        File(
+            file_name="test.txt",
+            file_path="test.txt",
+            file_size=100,
+            conversation_id="1",
+            user_id=user.id,
+        ),
+    )
+    file_crud.batch_create_files(
+        session,
+        [
+            File(
+                file_name="test2.txt",
+                file_path="test2.txt",
+                file_size=200,
+                conversation_id="1",
+                user_id=user.id,
+            ),
+            File(
+                file_name="test3.txt",
+                file_path="test3.txt",
+                file_size=300,
+                conversation_id="1",
+                user_id=user.id,
+            ),
+        ],
+    )
+
+    assert file_crud.get_total_file_size(session, user.id) == 600
+
+
+def test_get_total_file_size_no_files(session, user):
+    assert file_crud.get_total_file_size(session, user.id) == 0
+
+
+def test_create_file_exceeds_max_total_file_size(session, user):
+    _ = get_factory("File", session).create(
+        file_name="test.txt", file_size=900, conversation_id="1", user_id=user.id
+    )
+
+    with pytest.raises(ValueError):
+        file_crud.create_file(
+            session,
+            File(
+                file_name="test2.txt",
+                file_path="test2.txt",
+                file_size=200,
+                conversation_id="1",
+                user_id=user.id,
+            ),
+            max_total_file_size=1000,
+        )
+
+    assert file_crud.get_files_by_file_names(session, ["test2.txt"], user.id) == []
+
+
+def test_delete_file_updates_total_file_size(session, user):
+    file = get_factory("File", session).create(
+        file_name="test.txt", file_size=100, conversation_id="1", user_id=user.id
+    )
+    _ = get_factory("File", session).create(
+        file_name="test2.txt", file_size=200, conversation_id="1", user_id=user.id
+    )
+
+    file_crud.delete_file(session, file.id, user.id)
+
+    assert file_crud.get_total_file_size(session, user.id) == 200
+
+
+def test_delete_conversation_cascade_updates_total_file_size(session, user):
+    _ = get_factory("File", session).create(
+        file_name="test.txt", file_size=100, conversation_id="1", user_id=user.id
+    )
+
+    conversation_crud.delete_conversation(session, "1", user.id)
+
+    assert file_crud.get_total_file_size(session, user.id) == 0
+
+
+def test_reconcile_user_file_usage(session, user):
+    _ = get_factory("File", session).create(
+        file_name="test.txt", file_size=100, conversation_id="1", user_id=user.id
+    )
+    session.execute(
+        text("UPDATE user_file_usage SET total_file_size = 5 WHERE user_id = :user_id"),
+        {"user_id": user.id},
+    )
+
+    assert file_crud.reconcile_user_file_usage(session) == 1
+    assert file_crud.get_total_file_size(session, user.id) == 100
+    assert file_crud.reconcile_user_file_usage(session) == 0
+
+
+def test_append_file_content(session, user):
+    file = get_factory("File", session).create(
+        file_content="page 1",
+        page_offsets=[0],
+        conversation_id="1",
+        user_id=user.id,
+    )
+
+    file_crud.append_file_content(session, file.id, user.id, "page 2", [6])
+    session.refresh(file)
+
+    assert file.file_content == "page 1page 2"
+    assert file.page_offsets == [0, 6]
+
+
+def test_append_file_content_wrong_user(session, user):
+    file = get_factory("File", session).create(
+        file_content="page 1", conversation_id="1", user_id=user.id
+    )
+
+    file_crud.append_file_content(session, file.id, "123", "page 2")
+    session.refresh(file)
+
+    assert file.file_content == "page 1"
+
+
+def create_shared_file(session, user, conversation_id="1", content_hash="abc"):
+    file = File(
+        file_name="test.pdf",
+        file_path="test.pdf",
+        file_size=100,
+        conversation_id=conversation_id,
+        user_id=user.id,
+        content_hash=content_hash,
+    )
+    return file_crud.batch_create_files(
+        session,
+        [file],
+        file_contents=[
+            FileContent(
+                user_id=user.id,
+                content_hash=content_hash,
+                file_content="shared text",
+                content_size=11,
+                parse_seconds=2.5,
+            )
+        ],
+    )[0]
+
+
+def get_file_contents(session, user):
+    session.expire_all()
+    return session.query(FileContent).filter(FileContent.user_id == user.id).all()
+
+
+def test_batch_create_files_shares_content(session, user):
+    file = create_shared_file(session, user)
+    other_file = create_shared_file(session, user)
+
+    file_contents = get_file_contents(session, user)
+    assert len(file_contents) == 1
+    assert file_contents[0].ref_count == 2
+    assert file.content == other_file.content == "shared text"
+    assert file.file_content == ""
+
+    stats = file_crud.get_file_content_stats(session)
+    assert stats["reused_files"] == 1
+    assert stats["storage_saved_bytes"] == 11
+    assert stats["parse_seconds_saved"] == 2.5
+
+
+def test_delete_file_releases_shared_content(session, user):
+    file = create_shared_file(session, user)
+    other_file = create_shared_file(session, user)
+
+    file_crud.delete_file(session, file.id, user.id)
+    assert get_file_contents(session, user)[0].ref_count == 1
+
+    file_crud.delete_file(session, other_file.id, user.id)
+    assert get_file_contents(session, user) == []
+
+
+def test_delete_conversation_cascade_releases_shared_content(session, user):
+    conversation = get_factory("Conversation", session).create(user_id=user.id)
+    create_shared_file(session, user)
+    create_shared_file(session, user, conversation_id=conversation.id)
+
+    conversation_crud.delete_conversation(session, conversation.id, user.id)
+    assert get_file_contents(session, user)[0].ref_count == 1
+
+    conversation_crud.delete_conversation(session, "1", user.id)
+    assert get_file_contents(session, user) == []
+
+
+def test_get_file_contents_by_hashes(session, user):
+    create_shared_file(session, user, content_hash="abc")
+    create_shared_file(session, user, content_hash="def")
+
+    file_contents = file_crud.get_file_contents_by_hashes(
+        session, user.id, ["abc", "xyz"]
+    )
+    assert [file_content.content_hash for file_content in file_contents] == ["abc"]
+    assert file_crud.get_file_contents_by_hashes(session, "123", ["abc"]) == []
@@ -3,7 +3,11 @@ import pytest
 from backend.crud import citation as citation_crud
 from backend.crud import document as document_crud
 from backend.crud import message as message_crud
+from backend.database_models.citation import Citation
+from backend.database_models.conversation import Conversation
+from backend.database_models.document import Document
 from backend.database_models.message import Message
+from backend.database_models.tool_call import ToolCall
 from backend.schemas.message import UpdateMessage
 from backend.tests.factories import get_factory
 
@@ -33,6 +37,135 @@ def test_create_message(session, conversation, user):
     assert message.conversation_id == message_data.conversation_id
 
 
+def test_create_user_message_with_new_conversation(session, user):
+    conversation = Conversation(id="new", user_id=user.id, title="New")
+    message_data = Message(
+        text="Hello, World!",
+        user_id=user.id,
+        conversation_id=conversation.id,
+        position=0,
+        agent="USER",
+    )
+
+    message = message_crud.create_user_message(session, message_data, conversation)
+
+    message = message_crud.get_message(session, message.id, user.id)
+    assert message.text == "Hello, World!"
+    assert message.conversation_id == "new"
+
+
+def test_create_user_message_attaches_files(session, conversation, user):
+    attached_message = get_factory("Message", session).create(
+        conversation_id=conversation.id, user_id=user.id
+    )
+    new_file = get_factory("File", session).create(
+        conversation_id=conversation.id, user_id=user.id, message_id=None
+    )
+    attached_file = get_factory("File", session).create(
+        conversation_id=conversation.id,
+        user_id=user.id,
+        message_id=attached_message.id,
+    )
+    message_data = Message(
+        text="Hello, World!",
+        user_id=user.id,
+        conversation_id=conversation.id,
+        position=1,
+        agent="USER",
+    )
+
+    message = message_crud.create_user_message(
+        session,
+        message_data,
+        conversation,
+        file_ids=[new_file.id, attached_file.id],
+    )
+
+    assert new_file.message_id == message.id
+    assert attached_file.message_id == attached_message.id
+
+
+def test_create_message_with_tool_calls(session, conversation, user):
+    message_data = Message(
+        text="I will search the web.",
+        user_id=user.id,
+        conversation_id=conversation.id,
+        position=1,
+        agent="CHATBOT",
+    )
+    tool_calls = [
+        ToolCall(name="web_search", parameters={"query": "hello"}),
+        ToolCall(name="calculator", parameters={"code": "1+1"}),
+    ]
+
+    message = message_crud.create_message_with_tool_calls(
+        session, message_data, tool_calls
+    )
+
+    assert sorted(t.name for t in message.tool_calls) == ["calculator", "web_search"]
+
+
+def test_create_message_with_documents_and_citations(session, conversation, user):
+    message_data = Message(
+        text="Paris is the capital of France.",
+        user_id=user.id,
+        conversation_id=conversation.id,
+        position=1,
+        agent="CHATBOT",
+    )
+    documents = [
+        Document(
+            document_id=f"doc_{i}",
+            text=f"Document {i}",
+            title=f"Title {i}",
+            url=f"https://example.com/{i}",
+            tool_name="web_search",
+            fields={"title": f"Title {i}"},
+            user_id=user.id,
+            conversation_id=conversation.id,
+        )
+        for i in range(2)
+    ]
+    citation = Citation(
+        text="Paris",
+        user_id=user.id,
+        start=0,
+        end=5,
+        document_ids=["doc_0", "doc_1"],
+    )
+    citation.documents.extend(documents)
+
+    message = message_crud.create_message_with_documents_and_citations(
+        session, message_data, documents, [citation]
+    )
+
+    assert sorted(d.document_id for d in message.documents) == ["doc_0", "doc_1"]
+    assert all(d.created_at is not None for d in message.documents)
+    assert len(message.citations) == 1
+    assert message.citations[0].id == citation.id
+    assert sorted(d.id for d in message.citations[0].documents) == sorted(
+        d.id for d in documents
+    )
+
+
+def test_create_message_without_documents_and_citations(session, conversation, user):
+    message_data = Message(
+        text="Hello, World!",
+        user_id=user.id,
+        conversation_id=conversation.id,
+        position=1,
+        agent="CHATBOT",
+    )
+
+    message = message_crud.create_message_with_documents_and_citations(
+        session, message_data, [], [], conversation_description="Hello, World!"
+    )
+    assert message.documents == []
+    assert message.citations == []
+    session.refresh(conversation)
+    assert conversation.description == "Hello, World!"
+
+
 def test_get_message(session, conversation, user):
     _ = get_factory("Message", session).create(
         id="1", text="Hello, World!", conversation_id=conversation.id, user_id=user.id
@@ -3,6 +3,7 @@ from unittest.mock import patch
 import pytest
 
 from backend.config.auth import ENABLED_AUTH_STRATEGY_MAPPING
+from backend.config.settings import reload_settings
 
 
 @pytest.fixture(autouse=True)
@@ -26,7 +27,12 @@ def mock_oidc_env(monkeypatch):
 
 
 @pytest.fixture(autouse=True)
-def mock_enabled_auth(mock_google_env, mock_oidc_env):
+def mock_settings(mock_auth_secret_key_env, mock_google_env, mock_oidc_env):
+    reload_settings()
+
+
+@pytest.fixture(autouse=True)
+def mock_enabled_auth(mock_settings):
     # Can directly use class since no external calls are made
     from backend.services.auth import BasicAuthentication, GoogleOAuth, OpenIDConnect
 
@@ -97,3 +97,18 @@ def test_validate_authorization_blacklisted_token(
 
     assert response.status_code == 401
     assert response.json() == {"detail": "Bearer token is blacklisted."}
+
+
+def test_validate_authorization_token_revoked_by_logout(
+    session_client: TestClient,
+):
+    token = JWTService().create_and_encode_jwt({"user_id": "test"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    response = session_client.get("/v1/logout", headers=headers)
+    assert response.status_code == 200
+
+    # The token was verified and cached by the first request
+    response = session_client.get("/v1/logout", headers=headers)
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Bearer token is blacklisted."}
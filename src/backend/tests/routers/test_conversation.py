@@ -1,15 +1,24 @@
+import json
 import os
 from unittest.mock import patch
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
+from sse_starlette.sse import AppStatus
 
 from backend.config.deployments import ModelDeploymentName
-from backend.database_models import Citation, Conversation, Document, File, Message
+from backend.database_models import (
+    Citation,
+    Conversation,
+    Document,
+    File,
+    FileContent,
+    Message,
+)
 from backend.schemas.metrics import MetricsData, MetricsMessageType
 from backend.schemas.user import User
-from backend.services.file import MAX_FILE_SIZE, MAX_TOTAL_FILE_SIZE
+from backend.services.file import MAX_TOTAL_FILE_SIZE
 from backend.tests.factories import get_factory
 
 
@@ -772,14 +781,12 @@ def test_batch_upload_total_files_exceeds_limit(
 
 
 def test_batch_upload_single_file_exceeds_limit(
-    session_client: TestClient, session: Session, user
+    session_client: TestClient, session: Session, user, monkeypatch
 ) -> None:
-    _ = get_factory("Conversation", session).create(user_id=user.id)
+    monkeypatch.setattr("backend.services.file.MAX_FILE_SIZE", 1_000_000)
     file_paths = {
         "Mariana_Trench.pdf": "src/backend/tests/test_data/Mariana_Trench.pdf",
         "Cardistry.pdf": "src/backend/tests/test_data/Cardistry.pdf",
-        "26mb.pdf": "src/backend/tests/test_data/26mb.pdf",
-        "Tapas.pdf": "src/backend/tests/test_data/Tapas.pdf",
         "Mount_Everest.pdf": "src/backend/tests/test_data/Mount_Everest.pdf",
     }
     files = [
@@ -793,12 +800,101 @@ def test_batch_upload_single_file_exceeds_limit(
         "/v1/conversations/batch_upload_file",
         files=files,
         headers={"User-Id": conversation.user_id},
+        data={"conversation_id": conversation.id},
     )
 
-    assert response.status_code == 400
-    assert response.json() == {
-        "detail": f"26mb.pdf exceeds the maximum allowed size of {MAX_FILE_SIZE} bytes."
+    results = response.json()
+    assert response.status_code == 200
+    assert [result["file_name"] for result in results] == list(file_paths.keys())
+    assert [result["status"] for result in results] == [
+        "uploaded",
+        "uploaded",
+        "failed",
+    ]
+    assert results[2] == {
+        "id": None,
+        "created_at": None,
+        "updated_at": None,
+        "conversation_id": None,
+        "file_name": "Mount_Everest.pdf",
+        "file_path": None,
+        "file_size": os.path.getsize(file_paths["Mount_Everest.pdf"]),
+        "status": "failed",
+        "error": "File size exceeds the maximum allowed size of 1000000 bytes.",
+    }
+    assert session.query(File).filter_by(conversation_id=conversation.id).count() == 2
+
+
+def test_batch_upload_unsupported_file_does_not_fail_batch(
+    session_client: TestClient, session: Session, user
+) -> None:
+    conversation = get_factory("Conversation", session).create(user_id=user.id)
+    files = [
+        ("files", ("notes.txt", b"Some notes")),
+        ("files", ("program.exe", b"binary")),
+        ("files", ("Tapas.pdf", open("src/backend/tests/test_data/Tapas.pdf", "rb"))),
+    ]
+
+    response = session_client.post(
+        "/v1/conversations/batch_upload_file",
+        files=files,
+        headers={"User-Id": conversation.user_id},
+        data={"conversation_id": conversation.id},
+    )
+
+    results = response.json()
+    assert response.status_code == 200
+    assert [result["status"] for result in results] == [
+        "uploaded",
+        "failed",
+        "uploaded",
+    ]
+    assert results[1]["error"] == "File extension exe is not supported"
+    assert results[0]["conversation_id"] == conversation.id
+    assert session.get(File, results[0]["id"]).content == "Some notes"
+
+
+def test_batch_upload_file_stream_progress(
+    session_client: TestClient, session: Session, user, monkeypatch
+) -> None:
+    # The exit event of the SSE responses is bound to the loop of the previous test client
+    monkeypatch.setattr(AppStatus, "should_exit_event", None)
+    conversation = get_factory("Conversation", session).create(user_id=user.id)
+    files = [
+        ("files", ("notes.txt", b"Some notes")),
+        ("files", ("program.exe", b"binary")),
+        ("files", ("Tapas.pdf", open("src/backend/tests/test_data/Tapas.pdf", "rb"))),
+    ]
+
+    response = session_client.post(
+        "/v1/conversations/batch_upload_file",
+        files=files,
+        headers={"User-Id": conversation.user_id},
+        data={"conversation_id": conversation.id, "stream": "true"},
+    )
+
+    assert response.status_code == 200
+    events = []
+    for line in response.text.splitlines():
+        if line.startswith("event:"):
+            events.append({"event": line.removeprefix("event:").strip()})
+        elif line.startswith("data:"):
+            events[-1]["data"] = json.loads(line.removeprefix("data:"))
+
+    progress = [event["data"] for event in events if event["event"] == "progress"]
+    assert [event["completed"] for event in progress] == [1, 2, 3]
+    assert {(event["file_name"], event["status"]) for event in progress} == {
+        ("notes.txt", "parsed"),
+        ("program.exe", "failed"),
+        ("Tapas.pdf", "parsed"),
     }
+    assert events[-1]["event"] == "done"
+    assert [result["status"] for result in events[-1]["data"]] == [
+        "uploaded",
+        "failed",
+        "uploaded",
+    ]
+    assert session.query(File).filter_by(conversation_id=conversation.id).count() == 2
 
 
 def test_batch_upload_file_nonexistent_conversation_creates_new_conversation(
@@ -1071,3 +1167,41 @@ def test_fail_generate_title_nonexistent_conversation(
     )
     assert response.status_code == 404
     assert response.json() == {"detail": f"Conversation with ID: 123 not found."}
+
+
+def test_upload_same_file_again_reuses_content(
+    session_client: TestClient, session: Session, user
+) -> None:
+    responses = []
+    for endpoint in ["upload_file", "batch_upload_file", "batch_upload_file"]:
+        field = "file" if endpoint == "upload_file" else "files"
+        responses.append(
+            session_client.post(
+                f"/v1/conversations/{endpoint}",
+                files=[
+                    (
+                        field,
+                        (
+                            "Tapas.pdf",
+                            open("src/backend/tests/test_data/Tapas.pdf", "rb"),
+                        ),
+                    )
+                ],
+                headers={"User-Id": user.id},
+            )
+        )
+
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    session.expire_all()
+    file_contents = session.query(FileContent).filter_by(user_id=user.id).all()
+    assert len(file_contents) == 1
+    assert file_contents[0].ref_count == 3
+    assert "Tapas" in file_contents[0].file_content
+
+    file_ids = [responses[0].json()["id"]] + [
+        response.json()[0]["id"] for response in responses[1:]
+    ]
+    for file_id in file_ids:
+        file = session.get(File, file_id)
+        assert file.content_hash == file_contents[0].content_hash
+        assert file.content == file_contents[0].file_content
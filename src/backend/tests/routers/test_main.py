@@ -14,4 +14,21 @@ def test_health_ok(client: TestClient) -> None:
     response = client.get("/health")
 
     assert response.status_code == 200
-    assert response.json() == {"status": "OK"}
+    assert response.json()["status"] == "OK"
+    assert set(response.json()["caches"]) == {
+        "agents",
+        "users",
+        "agent_tool_metadata",
+    }
+
+
+def test_file_content_health(client: TestClient) -> None:
+    response = client.get("/health/files")
+
+    assert response.status_code == 200
+    assert set(response.json()["file_contents"]) == {
+        "contents",
+        "reused_files",
+        "storage_saved_bytes",
+        "parse_seconds_saved",
+    }
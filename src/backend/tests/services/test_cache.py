@@ -0,0 +1,141 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.crud import agent as agent_crud
+from backend.crud import agent_tool_metadata as agent_tool_metadata_crud
+from backend.crud import user as user_crud
+from backend.database_models.agent import Agent
+from backend.schemas.agent import UpdateAgentRequest
+from backend.schemas.user import UpdateUser
+from backend.services.cache import EntityCache, agent_cache, get_cache_stats
+from backend.tests.factories import get_factory
+
+
+@pytest.fixture
+def statements(session: Session) -> list[str]:
+    executed = []
+    event.listen(
+        session.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: executed.append(statement),
+    )
+    return executed
+
+
+def new_request_session(session: Session) -> Session:
+    # A session per request, sharing the test transaction
+    return Session(bind=session.connection(), join_transaction_mode="create_savepoint")
+
+
+def test_get_agent_is_cached_per_request(session, user, statements):
+    agent = get_factory("Agent", session).create(user_id=user.id)
+    statements.clear()
+
+    assert agent_crud.get_agent_by_id(session, agent.id) is agent
+    assert agent_crud.get_agent_by_id(session, agent.id) is agent
+    assert len(statements) == 1
+
+
+def test_get_agent_is_cached_across_requests(session, user, statements):
+    agent = get_factory("Agent", session).create(user_id=user.id, tools=["wikipedia"])
+    agent_crud.get_agent_by_id(session, agent.id)
+    statements.clear()
+
+    request_session = new_request_session(session)
+    cached = agent_crud.get_agent_by_id(request_session, agent.id)
+
+    assert cached is not agent
+    assert cached.name == agent.name
+    assert cached.tools == ["wikipedia"]
+    assert statements == []
+
+
+def test_cached_agent_can_be_updated(session, user):
+    agent = get_factory("Agent", session).create(user_id=user.id)
+    agent_crud.get_agent_by_id(session, agent.id)
+
+    request_session = new_request_session(session)
+    cached = agent_crud.get_agent_by_id(request_session, agent.id)
+    agent_crud.update_agent(request_session, cached, UpdateAgentRequest(name="updated"))
+
+    request_session = new_request_session(session)
+    assert agent_crud.get_agent_by_id(request_session, agent.id).name == "updated"
+
+
+def test_delete_agent_invalidates_cache(session, user):
+    agent = get_factory("Agent", session).create(user_id=user.id)
+    agent_crud.get_agent_by_id(session, agent.id)
+
+    agent_crud.delete_agent(session, agent.id)
+
+    assert agent_crud.get_agent_by_id(session, agent.id) is None
+    assert agent_crud.get_agent_by_id(new_request_session(session), agent.id) is None
+
+
+def test_agent_tool_metadata_changes_invalidate_cache(session, user):
+    agent = get_factory("Agent", session).create(user_id=user.id)
+    assert (
+        agent_tool_metadata_crud.get_all_agent_tool_metadata_by_agent_id(
+            session, agent.id
+        )
+        == []
+    )
+
+    metadata = get_factory("AgentToolMetadata", session).build(
+        user_id=user.id, agent_id=agent.id, tool_name="google_drive"
+    )
+    agent_tool_metadata_crud.create_agent_tool_metadata(session, metadata)
+
+    request_session = new_request_session(session)
+    cached = agent_tool_metadata_crud.get_all_agent_tool_metadata_by_agent_id(
+        request_session, agent.id
+    )
+    assert [m.id for m in cached] == [metadata.id]
+
+    agent_tool_metadata_crud.delete_agent_tool_metadata_by_id(session, metadata.id)
+    request_session = new_request_session(session)
+    assert (
+        agent_tool_metadata_crud.get_all_agent_tool_metadata_by_agent_id(
+            request_session, agent.id
+        )
+        == []
+    )
+
+
+def test_update_user_invalidates_cache(session):
+    user = get_factory("User", session).create(fullname="Before")
+    user_crud.get_user(session, user.id)
+
+    user_crud.update_user(session, user, UpdateUser(fullname="After"))
+
+    request_session = new_request_session(session)
+    assert user_crud.get_user(request_session, user.id).fullname == "After"
+
+
+def test_cache_disabled_without_ttl(session, user, statements):
+    cache = EntityCache("agents", Agent, ttl_seconds=0)
+    agent = get_factory("Agent", session).create(user_id=user.id)
+
+    def load() -> Agent:
+        return session.query(Agent).filter(Agent.id == agent.id).first()
+
+    cache.get(session, agent.id, load)
+    cache.get(new_request_session(session), agent.id, load)
+
+    assert cache.stats()["misses"] == 2
+
+
+def test_cache_stats(session, user):
+    before = agent_cache.stats()
+    agent = get_factory("Agent", session).create(user_id=user.id)
+
+    agent_crud.get_agent_by_id(session, agent.id)
+    agent_crud.get_agent_by_id(session, agent.id)
+    agent_crud.get_agent_by_id(new_request_session(session), agent.id)
+
+    stats = get_cache_stats()["agents"]
+    assert stats["misses"] - before["misses"] == 1
+    assert stats["request_hits"] - before["request_hits"] == 1
+    assert stats["hits"] - before["hits"] == 1
+    assert 0 < stats["hit_rate"] <= 1
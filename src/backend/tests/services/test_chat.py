@@ -0,0 +1,187 @@
+from typing import Any, AsyncGenerator
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.chat.enums import StreamEvent
+from backend.database_models.citation import Citation
+from backend.database_models.conversation import Conversation
+from backend.database_models.document import Document
+from backend.database_models.file import File
+from backend.database_models.message import Message
+from backend.database_models.user import User
+from backend.schemas.cohere_chat import CohereChatRequest
+from backend.schemas.context import Context
+from backend.services.chat import generate_chat_stream, process_chat
+from backend.services.write_behind import WriteBehindQueue, wait_for_pending_turns
+from backend.tests.factories import get_factory
+
+# Statements and commits allowed for a whole turn: setup, streaming and end of turn
+CHAT_TURN_ROUND_TRIP_BUDGET = 15
+
+
+class RoundTripCounter:
+    def __init__(self, session: Session) -> None:
+        self.statements = 0
+        self.commits = 0
+        event.listen(session.get_bind(), "before_cursor_execute", self._on_execute)
+        event.listen(session, "after_commit", self._on_commit)
+
+    @property
+    def total(self) -> int:
+        return self.statements + self.commits
+
+    def _on_execute(self, *args: Any) -> None:
+        self.statements += 1
+
+    def _on_commit(self, *args: Any) -> None:
+        self.commits += 1
+
+
+async def model_stream() -> AsyncGenerator[dict[str, Any], None]:
+    yield {"event_type": StreamEvent.STREAM_START, "generation_id": "generation"}
+    yield {
+        "event_type": StreamEvent.SEARCH_RESULTS,
+        "documents": [
+            {"id": f"doc_{i}", "text": f"Document {i}", "title": f"Title {i}"}
+            for i in range(20)
+        ],
+        "search_results": [],
+    }
+    yield {"event_type": StreamEvent.TEXT_GENERATION, "text": "Hello there!"}
+    yield {
+        "event_type": StreamEvent.CITATION_GENERATION,
+        "citations": [
+            {"text": "Hello", "start": 0, "end": 5, "document_ids": [f"doc_{i}"]}
+            for i in range(20)
+        ],
+    }
+    yield {"event_type": StreamEvent.STREAM_END, "finish_reason": "COMPLETE"}
+
+
+async def run_turn(session: Session, user: User, chat_request: CohereChatRequest):
+    ctx = Context()
+    ctx.with_user_id(user.id)
+
+    (
+        session,
+        chat_request,
+        _,
+        response_message,
+        should_store,
+        _,
+        next_message_position,
+        ctx,
+    ) = process_chat(session, chat_request, None, ctx)
+
+    async for _ in generate_chat_stream(
+        session,
+        model_stream(),
+        response_message,
+        should_store,
+        ctx,
+        next_message_position=next_message_position,
+    ):
+        pass
+
+    return ctx.get_conversation_id()
+
+
+@pytest.mark.asyncio
+async def test_new_chat_turn_stays_under_round_trip_budget(
+    session: Session, user: User
+) -> None:
+    counter = RoundTripCounter(session)
+
+    conversation_id = await run_turn(
+        session, user, CohereChatRequest(message="Hello, how are you?")
+    )
+
+    assert counter.total <= CHAT_TURN_ROUND_TRIP_BUDGET
+    conversation = session.get(Conversation, (conversation_id, user.id))
+    assert conversation.title == "Hello, how are you?"
+    assert conversation.description == "Hello there!"
+    assert [message.text for message in conversation.messages] == [
+        "Hello, how are you?",
+        "Hello there!",
+    ]
+    assert (
+        session.query(Document).filter_by(conversation_id=conversation_id).count() == 20
+    )
+    assert (
+        session.query(Citation)
+        .filter_by(message_id=conversation.messages[1].id)
+        .count()
+        == 20
+    )
+
+
+@pytest.mark.asyncio
+async def test_existing_chat_turn_with_files_stays_under_round_trip_budget(
+    session: Session, user: User
+) -> None:
+    conversation = get_factory("Conversation", session).create(user_id=user.id)
+    _ = get_factory("Message", session).create(
+        conversation_id=conversation.id, user_id=user.id, position=0, is_active=True
+    )
+    files = [
+        get_factory("File", session).create(
+            conversation_id=conversation.id, user_id=user.id, message_id=None
+        )
+        for _ in range(5)
+    ]
+    session.expunge_all()
+    counter = RoundTripCounter(session)
+
+    await run_turn(
+        session,
+        user,
+        CohereChatRequest(
+            message="What is in these files?",
+            conversation_id=conversation.id,
+            file_ids=[file.id for file in files],
+        ),
+    )
+
+    assert counter.total <= CHAT_TURN_ROUND_TRIP_BUDGET
+    user_message = (
+        session.query(Message)
+        .filter_by(conversation_id=conversation.id, position=1, agent="USER")
+        .one()
+    )
+    attached_files = session.query(File).filter_by(message_id=user_message.id).all()
+    assert len(attached_files) == 5
+
+
+@pytest.mark.asyncio
+async def test_chat_turn_with_write_behind_queue(
+    session: Session, user: User, tmp_path, monkeypatch
+) -> None:
+    queue = WriteBehindQueue(
+        str(tmp_path / "journal.jsonl"),
+        lambda: Session(
+            bind=session.connection(), join_transaction_mode="create_savepoint"
+        ),
+        flush_interval=0,
+    )
+    monkeypatch.setattr("backend.services.write_behind._write_behind_queue", queue)
+    await queue.start()
+
+    conversation_id = await run_turn(
+        session, user, CohereChatRequest(message="Hello, how are you?")
+    )
+    # The response message is stored in the background
+    assert queue.has_pending(conversation_id, user.id)
+    await wait_for_pending_turns(conversation_id, user.id)
+    await queue.stop()
+
+    session.expire_all()
+    conversation = session.get(Conversation, (conversation_id, user.id))
+    assert conversation.description == "Hello there!"
+    assert [message.text for message in conversation.messages] == [
+        "Hello, how are you?",
+        "Hello there!",
+    ]
+    assert len(conversation.messages[1].documents) == 20
+    assert len(conversation.messages[1].citations) == 20
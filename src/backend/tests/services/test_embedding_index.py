@@ -0,0 +1,134 @@
+import threading
+
+import numpy as np
+import pytest
+
+from backend.services.embedding_index import EmbeddingIndex, HashEmbedder
+
+
+@pytest.fixture
+def index(tmp_path):
+    return EmbeddingIndex(str(tmp_path / "index"), "test")
+
+
+def test_hash_embedder_is_deterministic():
+    embedder = HashEmbedder(dimensions=64)
+
+    first, second, other = embedder.embed(
+        ["zebras live in Africa", "zebras live in Africa", "penguins"],
+        "search_document",
+    )
+
+    assert first.shape == (64,)
+    assert np.array_equal(first, second)
+    assert not np.array_equal(first, other)
+
+
+def test_search_returns_closest_chunks(index):
+    index.append("a", np.array([[1, 0, 0], [0, 1, 0]]))
+    index.append("b", np.array([[0, 0, 1], [1, 1, 0]]))
+
+    results = index.search(np.array([1, 0.1, 0]), top_k=2)
+
+    assert [(document_id, number) for document_id, number, _ in results] == [
+        ("a", 0),
+        ("b", 1),
+    ]
+    assert results[0][2] == pytest.approx(1 / np.linalg.norm([1, 0.1]))
+
+
+def test_search_filters_documents(index):
+    index.append("a", np.array([[1, 0]]))
+    index.append("b", np.array([[0.9, 0.1]]))
+
+    results = index.search(np.array([1, 0]), top_k=5, document_ids=["b", "c"])
+
+    assert [document_id for document_id, _, _ in results] == ["b"]
+
+
+def test_append_replaces_document(index):
+    index.append("a", np.array([[1, 0], [0, 1]]))
+    index.append("a", np.array([[0, 1]]))
+
+    assert index.document_rows() == {"a": 1}
+    assert index.load_metadata().deleted_rows == 2
+    assert [number for _, number, _ in index.search(np.array([1, 0]), top_k=5)] == [0]
+
+
+def test_append_grows_matrix(index, monkeypatch):
+    monkeypatch.setattr(
+        "backend.services.embedding_index.EMBEDDING_INDEX_GROWTH_ROWS", 1
+    )
+    for i in range(10):
+        index.append(str(i), np.full((3, 4), i + 1))
+
+    metadata = index.load_metadata()
+    assert metadata.rows == 30
+    assert metadata.capacity >= 30
+    assert {document_id for document_id, _, _ in index.search(np.ones(4), 30)} == {
+        str(i) for i in range(10)
+    }
+
+
+def test_append_document_without_chunks(index):
+    index.append("empty", np.empty((0, 0)))
+
+    assert index.document_rows() == {"empty": 0}
+    assert index.search(np.array([1, 0]), top_k=5) == []
+
+
+def test_append_rejects_other_dimensions(index):
+    index.append("a", np.array([[1, 0]]))
+
+    with pytest.raises(ValueError):
+        index.append("b", np.array([[1, 0, 0]]))
+
+
+def test_delete_tombstones_and_compacts(index):
+    index.append("a", np.array([[1, 0]]))
+    index.append("b", np.array([[0, 1], [1, 1]]))
+    index.append("c", np.array([[1, 0.5]]))
+
+    index.delete(["a"])
+    metadata = index.load_metadata()
+    assert metadata.deleted_rows == 1
+    assert "a" not in {document_id for document_id, _, _ in index.search([1, 0], 5)}
+
+    index.delete(["b"])
+    metadata = index.load_metadata()
+    assert metadata.deleted_rows == 0
+    assert metadata.rows == 1
+    assert index.search(np.array([1, 0.5]), top_k=5)[0][:2] == ("c", 0)
+
+
+def test_search_waits_for_writers(index):
+    index.append("a", np.array([[1, 0]]))
+    index.append("b", np.array([[0, 1]]))
+    results = []
+
+    # A compaction in another process moves the rows before saving the metadata
+    with index._write_lock():
+        search = threading.Thread(
+            target=lambda: results.extend(index.search(np.array([0, 1]), top_k=1))
+        )
+        search.start()
+        search.join(0.1)
+        assert search.is_alive()
+
+        metadata = index.load_metadata()
+        index._tombstone(metadata, "a")
+        index._compact(metadata)
+        index._save(metadata)
+    search.join(5)
+
+    assert [result[:2] for result in results] == [("b", 0)]
+
+
+def test_index_of_other_embedder_is_reset(tmp_path):
+    EmbeddingIndex(str(tmp_path / "index"), "old").append("a", np.array([[1, 0]]))
+
+    index = EmbeddingIndex(str(tmp_path / "index"), "new")
+
+    assert index.document_rows() == {}
+    index.append("b", np.array([[1, 0, 0]]))
+    assert index.search(np.array([1, 0, 0]), top_k=5)[0][0] == "b"
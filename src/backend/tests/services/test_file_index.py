@@ -0,0 +1,59 @@
+from backend.services.file_index import (
+    CHUNK_HARD_WORD_LIMIT,
+    CHUNK_SOFT_WORD_LIMIT,
+    ChunkIndex,
+    build_chunk_index,
+    chunk_offsets,
+    search_chunks,
+)
+
+
+def test_chunk_offsets_ends_chunks_at_sentences():
+    sentence = " ".join(["word"] * 9) + " end."
+    text = " ".join([sentence] * 30)
+
+    offsets = chunk_offsets(text)
+
+    assert len(offsets) > 1
+    for start, end in offsets[:-1]:
+        chunk = text[start:end]
+        assert chunk.endswith("end.")
+        assert CHUNK_SOFT_WORD_LIMIT < len(chunk.split()) <= CHUNK_HARD_WORD_LIMIT
+    assert text[offsets[-1][1] :] == ""
+
+
+def test_chunk_offsets_splits_text_without_sentences():
+    text = " ".join(["word"] * (CHUNK_HARD_WORD_LIMIT * 2 + 1))
+
+    offsets = chunk_offsets(text)
+
+    assert [len(text[start:end].split()) for start, end in offsets] == [
+        CHUNK_HARD_WORD_LIMIT,
+        CHUNK_HARD_WORD_LIMIT,
+        1,
+    ]
+
+
+def test_chunk_index_round_trip():
+    index = build_chunk_index("The cat sat on the mat. " * 50)
+
+    assert ChunkIndex.from_bytes(index.to_bytes()) == index
+
+
+def test_search_chunks_ranks_matching_chunks():
+    filler = " ".join(["filler."] * (CHUNK_SOFT_WORD_LIMIT + 1))
+    first = build_chunk_index(f"{filler} {filler} Zebras live in Africa.")
+    second = build_chunk_index(f"Penguins live in Antarctica. {filler}")
+
+    results = search_chunks([first, second], "where do zebras live", top_k=2)
+
+    assert results[0][:2] == (0, 2)
+    assert results[1][:2] == (1, 0)
+    assert results[0][2] > results[1][2]
+
+
+def test_search_chunks_without_match():
+    index = build_chunk_index("Nothing relevant here.")
+
+    assert search_chunks([index], "zebras", top_k=5) == []
+    assert search_chunks([], "zebras", top_k=5) == []
@@ -0,0 +1,276 @@
+import asyncio
+import datetime
+import hashlib
+import io
+import os
+import time
+
+import pytest
+from fastapi import UploadFile as FastAPIUploadFile
+from openpyxl import Workbook
+from pypdf import PdfReader
+from sqlalchemy.orm import Session
+
+from backend.database_models.file import File
+from backend.services import file as file_service
+from backend.services.file import (
+    complete_file_content,
+    get_file_content,
+    spool_upload,
+)
+from backend.services.file_parsing import (
+    EXCEL_EXTENSION,
+    FileParser,
+    join_pages,
+    read_spreadsheet,
+    split_pages,
+)
+from backend.tests.factories import get_factory
+
+TEST_DATA_PATH = "src/backend/tests/test_data"
+
+
+def upload(file_name: str) -> FastAPIUploadFile:
+    with open(os.path.join(TEST_DATA_PATH, file_name), "rb") as f:
+        return FastAPIUploadFile(io.BytesIO(f.read()), filename=file_name)
+
+
+@pytest.fixture
+def parser():
+    parser = FileParser(max_workers=1)
+    yield parser
+    parser.shutdown()
+
+
+@pytest.fixture
+def pdf_path() -> str:
+    return os.path.join(TEST_DATA_PATH, "Tapas.pdf")
+
+
+@pytest.fixture
+def spreadsheet_path(tmp_path) -> str:
+    workbook = Workbook()
+    people = workbook.active
+    people.title = "People"
+    people.append(["Name", "Born", "Notes"])
+    people.append(["Ada", datetime.date(2015, 12, 10), "first | programmer"])
+    people.append([None, None, None])
+    people.append(["Alan", 1912.0, "x" * 300])
+    numbers = workbook.create_sheet("Numbers")
+    for i in range(5):
+        numbers.append([i, i * 1.5])
+
+    path = str(tmp_path / "workbook.xlsx")
+    workbook.save(path)
+    return path
+
+
+@pytest.mark.asyncio
+async def test_get_file_content_parses_pdf():
+    parsed = await get_file_content(upload("Mount_Everest.pdf"))
+
+    assert "Everest" in parsed.text
+    assert parsed.page_count == parsed.parsed_pages == 63
+    assert len(parsed.page_offsets) == 63
+    assert not parsed.is_partial
+
+
+@pytest.mark.asyncio
+async def test_get_file_content_reads_text():
+    file = FastAPIUploadFile(io.BytesIO(b"Hello world"), filename="hello.txt")
+
+    parsed = await get_file_content(file)
+
+    assert parsed.text == "Hello world"
+    assert parsed.page_offsets is None
+
+
+@pytest.mark.asyncio
+async def test_get_file_content_unsupported_extension():
+    file = FastAPIUploadFile(io.BytesIO(b"binary"), filename="file.exe")
+
+    with pytest.raises(ValueError, match="not supported"):
+        await get_file_content(file)
+
+
+@pytest.mark.asyncio
+async def test_spool_upload_copies_file():
+    path, content_hash = await spool_upload(upload("Tapas.pdf"))
+
+    with open(path, "rb") as f, open(f"{TEST_DATA_PATH}/Tapas.pdf", "rb") as original:
+        content = original.read()
+        assert f.read() == content
+    assert content_hash == hashlib.sha256(content).hexdigest()
+    os.remove(path)
+
+
+@pytest.mark.asyncio
+async def test_spool_upload_enforces_size_limit(monkeypatch, tmp_path):
+    monkeypatch.setattr(file_service, "MAX_FILE_SIZE", 1_000)
+    monkeypatch.setattr(file_service, "SPOOL_CHUNK_SIZE", 512)
+    monkeypatch.setattr("tempfile.tempdir", str(tmp_path))
+
+    with pytest.raises(ValueError, match="maximum allowed size"):
+        await spool_upload(upload("Tapas.pdf"))
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_parser_timeout_restarts_workers(parser, pdf_path):
+    parser.timeout_seconds = 0.001
+
+    with pytest.raises(ValueError, match="timed out"):
+        await parser.parse(pdf_path, "pdf")
+
+    parser.timeout_seconds = 60
+    assert "Tapas" in (await parser.parse(pdf_path, "pdf")).text
+
+
+@pytest.mark.asyncio
+async def test_parser_timeout_only_fails_its_parse(pdf_path):
+    parser = FileParser(max_workers=2, timeout_seconds=3)
+
+    timed_out, parsed = await asyncio.gather(
+        parser._run(time.sleep, 30),
+        parser.parse(pdf_path, "pdf"),
+        return_exceptions=True,
+    )
+    parser.shutdown()
+
+    assert isinstance(timed_out, ValueError)
+    assert "Tapas" in parsed.text
+
+
+@pytest.mark.asyncio
+async def test_parser_memory_limit(parser, pdf_path):
+    parser.memory_limit = 1_000_000
+
+    with pytest.raises(ValueError):
+        await parser.parse(pdf_path, "pdf")
+
+
+def test_join_pages_offsets():
+    text, page_offsets = join_pages(["ab", "", "cde"], start_offset=10)
+
+    assert text == "abcde"
+    assert page_offsets == [10, 12, 12]
+
+
+def test_split_pages():
+    assert split_pages(0, 63, 4) == [(0, 16), (16, 32), (32, 48), (48, 63)]
+    assert split_pages(5, 20, 4) == [(5, 20)]
+    assert split_pages(0, 0, 4) == [(0, 0)]
+
+
+@pytest.mark.asyncio
+async def test_parse_pdf_page_offsets(parser):
+    path = os.path.join(TEST_DATA_PATH, "Mount_Everest.pdf")
+    parser.max_workers = 4
+    pages = [page.extract_text().replace("\x00", "") for page in PdfReader(path).pages]
+
+    parsed = await parser.parse(path, "pdf")
+
+    assert parsed.text == "".join(pages)
+    for number, offset in enumerate(parsed.page_offsets):
+        assert parsed.text[offset:].startswith(pages[number])
+
+
+@pytest.mark.asyncio
+async def test_get_file_content_page_cap():
+    parsed = await get_file_content(upload("Mount_Everest.pdf"), max_pages=10)
+
+    assert parsed.page_count == parsed.parsed_pages == 10
+    assert len(parsed.page_offsets) == 10
+    assert parsed.spooled_path is None
+
+
+@pytest.mark.asyncio
+async def test_complete_file_content(session, user):
+    parsed = await get_file_content(upload("Mount_Everest.pdf"), foreground_pages=2)
+
+    assert parsed.is_partial
+    assert parsed.parsed_pages == 2
+    assert os.path.exists(parsed.spooled_path)
+
+    conversation = get_factory("Conversation", session).create(user_id=user.id)
+    file = get_factory("File", session).create(
+        user_id=user.id,
+        conversation_id=conversation.id,
+        file_content=parsed.text,
+        page_offsets=parsed.page_offsets,
+    )
+    await complete_file_content(
+        file.id,
+        user.id,
+        parsed,
+        session_factory=lambda: Session(
+            bind=session.connection(), join_transaction_mode="create_savepoint"
+        ),
+    )
+    session.expire_all()
+
+    complete = await get_file_content(
+        upload("Mount_Everest.pdf"), foreground_pages=None
+    )
+    file = session.get(File, file.id)
+    assert file.file_content == complete.text
+    assert file.page_offsets == complete.page_offsets
+    assert not os.path.exists(parsed.spooled_path)
+
+
+@pytest.mark.asyncio
+async def test_get_file_content_reuses_stored_content(session, user, monkeypatch):
+    parsed = await get_file_content(
+        upload("Tapas.pdf"), session=session, user_id=user.id
+    )
+    conversation = get_factory("Conversation", session).create(user_id=user.id)
+    file, file_content = file_service.build_file(
+        user.id, conversation.id, "Tapas.pdf", 100, parsed
+    )
+    file_service.create_files(session, [file], [file_content])
+
+    def fail():
+        raise AssertionError("The file should not be parsed again")
+
+    monkeypatch.setattr(file_service, "get_file_parser", fail)
+    reused = await get_file_content(
+        upload("Tapas.pdf"), session=session, user_id=user.id
+    )
+
+    assert reused.text == parsed.text
+    assert reused.page_offsets == parsed.page_offsets
+    assert reused.content_hash == parsed.content_hash
+    assert reused.parse_seconds == pytest.approx(parsed.parse_seconds)
+
+
+def test_read_spreadsheet(spreadsheet_path):
+    text, sheet_offsets = read_spreadsheet(spreadsheet_path, max_cell_chars=10)
+
+    people, numbers = text[: sheet_offsets[1]], text[sheet_offsets[1] :]
+    assert people == (
+        "## People\n\n"
+        "| Name | Born | Notes |\n"
+        "| --- | --- | --- |\n"
+        "| Ada | 2015-12-10 | first \\| p… |\n"
+        "| Alan | 1912 | xxxxxxxxx… |\n\n"
+    )
+    assert numbers.startswith("## Numbers\n\n| 0 | 0 |\n| --- | --- |\n| 1 | 1.5 |")
+    assert sheet_offsets[0] == 0
+
+
+def test_read_spreadsheet_row_cap(spreadsheet_path):
+    text, sheet_offsets = read_spreadsheet(spreadsheet_path, max_rows=2)
+
+    assert text[sheet_offsets[1] :] == (
+        "## Numbers\n\n| 0 | 0 |\n| --- | --- |\n| 1 | 1.5 |\n\n"
+        "Rows 3 to 5 not included\n\n"
+    )
+
+
+@pytest.mark.asyncio
+async def test_parser_reads_every_sheet(parser, spreadsheet_path):
+    parsed = await parser.parse(spreadsheet_path, EXCEL_EXTENSION)
+
+    assert len(parsed.page_offsets) == 2
+    assert parsed.text[parsed.page_offsets[1] :].startswith("## Numbers")
+    assert not parsed.is_partial
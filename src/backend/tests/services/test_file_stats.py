@@ -0,0 +1,95 @@
+from sqlalchemy import event
+
+from backend.chat.custom.custom import CustomChat
+from backend.crud import file as file_crud
+from backend.services.file import build_file
+from backend.services.file_parsing import ParsedFile
+from backend.services.file_stats import (
+    PREVIEW_WORDS,
+    UNKNOWN_LANGUAGE,
+    compute_file_stats,
+    detect_language,
+)
+from backend.tests.factories import get_factory
+
+
+def test_compute_file_stats():
+    text = " ".join(f"word{i}" for i in range(100))
+
+    stats = compute_file_stats(text)
+
+    assert stats.word_count == 100
+    assert stats.preview == " ".join(f"word{i}" for i in range(PREVIEW_WORDS))
+    assert stats.token_count == len(text) // 4 + 1
+
+
+def test_compute_file_stats_empty_text():
+    stats = compute_file_stats("")
+
+    assert stats.word_count == 0
+    assert stats.token_count == 0
+    assert stats.preview == ""
+    assert stats.language == UNKNOWN_LANGUAGE
+
+
+def test_detect_language():
+    assert detect_language("The summit of the mountain is in Nepal".split()) == "en"
+    assert detect_language("Le sommet de la montagne est au Népal".split()) == "fr"
+    assert detect_language("Der Gipfel des Berges ist in Nepal".split()) == "de"
+    assert detect_language("8848 86 29031 7".split()) == UNKNOWN_LANGUAGE
+
+
+def test_build_file_stores_stats():
+    file, _ = build_file(
+        "1", "1", "notes.txt", 10, ParsedFile(text="The notes of the meeting")
+    )
+
+    assert file.word_count == 5
+    assert file.preview == "The notes of the meeting"
+    assert file.language == "en"
+
+
+def test_preamble_uses_stored_stats(session, user):
+    conversation = get_factory("Conversation", session).create(user_id=user.id)
+    file, _ = build_file(
+        user.id,
+        conversation.id,
+        "notes.txt",
+        10,
+        ParsedFile(text="The notes of the meeting"),
+    )
+    file_crud.batch_create_files(session, [file])
+    session.expire_all()
+
+    statements = []
+    event.listen(
+        session.get_bind(),
+        "before_cursor_execute",
+        lambda *args: statements.append(args[2]),
+    )
+    chat_history = CustomChat().add_files_to_chat_history(
+        [], conversation.id, session, user.id
+    )
+
+    assert "Filename: notes.txt\nWord Count: 5 Preview: The notes of the meeting" in (
+        chat_history[0].message
+    )
+    assert all("file_content" not in statement for statement in statements)
+
+
+def test_preamble_computes_missing_stats(session, user):
+    conversation = get_factory("Conversation", session).create(user_id=user.id)
+    get_factory("File", session).create(
+        user_id=user.id,
+        conversation_id=conversation.id,
+        file_name="old.txt",
+        file_content="An old file without stats",
+    )
+
+    chat_history = CustomChat().add_files_to_chat_history(
+        [], conversation.id, session, user.id
+    )
+
+    assert "Word Count: 5 Preview: An old file without stats" in (
+        chat_history[0].message
+    )
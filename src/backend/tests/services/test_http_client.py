@@ -0,0 +1,197 @@
+import asyncio
+
+import httpcore
+import httpx
+import pytest
+
+from backend.services.http_client import (
+    DNSCachingBackend,
+    HTTPClient,
+    PooledTransport,
+)
+
+
+def client_for(responses, **kwargs) -> tuple[HTTPClient, list[httpx.Request]]:
+    """
+    Returns a client answering requests with the given responses, or raising the
+    given exceptions, in order
+    """
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        response = responses[min(len(requests), len(responses)) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    client = HTTPClient(
+        transport=httpx.MockTransport(handler), backoff_seconds=0, **kwargs
+    )
+    return client, requests
+
+
+@pytest.mark.asyncio
+async def test_request_retries_temporary_errors():
+    client, requests = client_for(
+        [
+            httpx.ConnectError("refused"),
+            httpx.Response(503),
+            httpx.Response(200, text="ok"),
+        ]
+    )
+
+    response = await client.get("http://example.com")
+
+    assert response.text == "ok"
+    assert len(requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_request_returns_last_response_after_retries():
+    client, requests = client_for([httpx.Response(503)], retries=1)
+
+    response = await client.get("http://example.com")
+
+    assert response.status_code == 503
+    assert len(requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_request_raises_after_retries():
+    client, requests = client_for([httpx.ConnectError("refused")], retries=1)
+
+    with pytest.raises(httpx.ConnectError):
+        await client.get("http://example.com")
+    assert len(requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_post_is_not_retried_by_default():
+    client, requests = client_for(
+        [httpx.Response(503), httpx.Response(503), httpx.Response(200)]
+    )
+
+    assert (await client.post("http://example.com")).status_code == 503
+    assert (await client.post("http://example.com", retry=True)).status_code == 200
+    assert len(requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_client_is_reused_per_event_loop():
+    client, _ = client_for([httpx.Response(200)])
+
+    assert client.client is client.client
+    other_loop_client = await asyncio.get_running_loop().run_in_executor(
+        None, asyncio.run, get_client(client)
+    )
+    assert other_loop_client is not client.client
+
+    await client.aclose()
+
+
+async def get_client(client: HTTPClient) -> httpx.AsyncClient:
+    return client.client
+
+
+class FakeBackend(httpcore.AsyncNetworkBackend):
+    def __init__(self) -> None:
+        self.hosts = []
+
+    async def connect_tcp(self, host, port, *args, **kwargs):
+        self.hosts.append(host)
+        if host == "10.0.0.2":
+            raise httpcore.ConnectError("unreachable")
+        return "stream"
+
+
+@pytest.mark.asyncio
+async def test_dns_caching_backend():
+    backend = DNSCachingBackend(FakeBackend())
+    resolved = []
+
+    async def resolve(host, port):
+        resolved.append(host)
+        return ["10.0.0.1"]
+
+    backend.resolve = resolve
+    await backend.connect_tcp("example.com", 443)
+    await backend.connect_tcp("127.0.0.1", 443)
+
+    assert backend.backend.hosts == ["10.0.0.1", "127.0.0.1"]
+    assert resolved == ["example.com"]
+
+
+@pytest.mark.asyncio
+async def test_dns_caching_backend_caches_addresses(monkeypatch):
+    backend = DNSCachingBackend(FakeBackend())
+    lookups = []
+
+    async def getaddrinfo(host, port, **kwargs):
+        lookups.append(host)
+        return [(None, None, None, None, ("10.0.0.2", port))]
+
+    monkeypatch.setattr("anyio.getaddrinfo", getaddrinfo)
+    assert await backend.resolve("example.com", 443) == ["10.0.0.2"]
+    assert await backend.resolve("example.com", 443) == ["10.0.0.2"]
+    assert lookups == ["example.com"]
+
+    # A failed connection drops the cached address
+    with pytest.raises(httpcore.ConnectError):
+        await backend.connect_tcp("example.com", 443)
+    await backend.resolve("example.com", 443)
+    assert lookups == ["example.com", "example.com"]
+
+
+@pytest.mark.asyncio
+async def test_dns_caching_backend_tries_each_address():
+    backend = DNSCachingBackend(FakeBackend())
+    backend._addresses[("example.com", 443)] = (float("inf"), ["10.0.0.2", "10.0.0.1"])
+
+    assert await backend.connect_tcp("example.com", 443) == "stream"
+    assert backend.backend.hosts == ["10.0.0.2", "10.0.0.1"]
+    # One of the addresses answered, they stay cached
+    assert ("example.com", 443) in backend._addresses
+
+
+def test_pooled_transport_builds_one_pool(monkeypatch):
+    pools = []
+    connection_pool = httpcore.AsyncConnectionPool
+
+    def build_pool(*args, **kwargs):
+        pools.append(kwargs)
+        return connection_pool(*args, **kwargs)
+
+    monkeypatch.setattr(httpcore, "AsyncConnectionPool", build_pool)
+    transport = PooledTransport(httpx.Limits(max_connections=5), 60)
+
+    assert len(pools) == 1
+    assert isinstance(pools[0]["network_backend"], DNSCachingBackend)
+    assert transport._pool._max_connections == 5
+
+
+@pytest.mark.asyncio
+async def test_requests_per_host_are_limited():
+    active = {"example.com": 0, "example.org": 0}
+    peak = dict(active)
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        active[host] += 1
+        peak[host] = max(peak[host], active[host])
+        await asyncio.sleep(0.01)
+        active[host] -= 1
+        return httpx.Response(200)
+
+    client = HTTPClient(
+        transport=httpx.MockTransport(handler), max_connections_per_host=2
+    )
+    await asyncio.gather(
+        *(
+            client.get(f"http://{host}/{i}")
+            for i in range(5)
+            for host in ("example.com", "example.org")
+        )
+    )
+
+    assert peak == {"example.com": 2, "example.org": 2}
@@ -0,0 +1,120 @@
+import datetime
+import time
+
+import freezegun
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.services.auth.token_cache import (
+    BloomFilter,
+    TokenBlacklist,
+    VerifiedTokenCache,
+)
+from backend.tests.factories import get_factory
+
+freezegun.configure(extend_ignore_list=["transformers"])
+
+
+@pytest.fixture
+def statements(session: Session) -> list[str]:
+    executed = []
+    event.listen(
+        session.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: executed.append(statement),
+    )
+    return executed
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom_filter = BloomFilter(1000)
+    items = [f"token_{i}" for i in range(1000)]
+    for item in items:
+        bloom_filter.add(item)
+
+    assert all(item in bloom_filter for item in items)
+    assert bloom_filter.count == 1000
+
+
+def test_bloom_filter_false_positive_rate():
+    bloom_filter = BloomFilter(1000, error_rate=0.01)
+    for i in range(1000):
+        bloom_filter.add(f"token_{i}")
+
+    false_positives = sum(f"other_{i}" in bloom_filter for i in range(10000))
+    assert false_positives < 300
+
+
+def test_verified_token_cache_drops_expired_tokens():
+    cache = VerifiedTokenCache()
+    cache.set("token", {"jti": "id", "exp": time.time() + 60})
+    assert cache.get("token")["jti"] == "id"
+
+    with freezegun.freeze_time(datetime.timedelta(minutes=2)):
+        assert cache.get("token") is None
+    assert cache.get("token") is None
+
+
+def test_verified_token_cache_is_bounded():
+    cache = VerifiedTokenCache(max_size=2)
+    expiry = time.time() + 60
+    for token in ["first", "second", "third"]:
+        cache.set(token, {"exp": expiry})
+
+    assert cache.get("first") is None
+    assert cache.get("third") is not None
+
+
+def test_blacklist_lookup_without_database_queries(session, statements):
+    get_factory("Blacklist", session).create(token_id="revoked")
+    blacklist = TokenBlacklist(refresh_seconds=60)
+
+    assert blacklist.is_blacklisted(session, "revoked")
+    statements.clear()
+
+    assert not blacklist.is_blacklisted(session, "valid")
+    assert blacklist.is_blacklisted(session, "revoked")
+    assert statements == []
+
+
+def test_blacklist_refreshes_incrementally(session, statements):
+    now = datetime.datetime.now()
+    blacklist = TokenBlacklist(refresh_seconds=0)
+    get_factory("Blacklist", session).create(token_id="first", created_at=now)
+    assert blacklist.is_blacklisted(session, "first")
+
+    get_factory("Blacklist", session).create(token_id="second", created_at=now)
+    statements.clear()
+    assert blacklist.is_blacklisted(session, "second")
+    assert "created_at >=" in statements[0]
+
+
+def test_blacklist_revocation_takes_effect_after_refresh(session):
+    blacklist = TokenBlacklist(refresh_seconds=60)
+    assert not blacklist.is_blacklisted(session, "token")
+
+    # Blacklisted by another process
+    get_factory("Blacklist", session).create(token_id="token")
+    assert not blacklist.is_blacklisted(session, "token")
+
+    blacklist._refreshed_at -= 60
+    assert blacklist.is_blacklisted(session, "token")
+
+
+def test_blacklist_add_takes_effect_immediately(session):
+    blacklist = TokenBlacklist(refresh_seconds=60)
+    assert not blacklist.is_blacklisted(session, "token")
+
+    blacklist.add("token")
+    assert blacklist.is_blacklisted(session, "token")
+
+
+def test_blacklist_is_rebuilt_when_full(session):
+    blacklist = TokenBlacklist(refresh_seconds=0, capacity=2)
+    for i in range(5):
+        get_factory("Blacklist", session).create(token_id=f"token_{i}")
+
+    assert blacklist.is_blacklisted(session, "token_0")
+    assert blacklist.capacity >= 5
+    assert all(blacklist.is_blacklisted(session, f"token_{i}") for i in range(5))
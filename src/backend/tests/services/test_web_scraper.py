@@ -0,0 +1,219 @@
+import httpx
+import pytest
+
+from backend.services.http_client import HTTPClient
+from backend.services.web_scraper import (
+    WebScraper,
+    detect_charset,
+    extract_html_text,
+)
+
+PAGE = b"""<!DOCTYPE html>
+<html>
+<head><title>  Mount   Everest </title><style>body { color: red; }</style></head>
+<body>
+  <div class="cookie-banner">We use cookies. <button>Accept</button></div>
+  <nav><a href="/">Home</a> <a href="/about">About</a></nav>
+  <div id="main-sidebar"><a href="/a">Popular</a> <a href="/b">Trending</a></div>
+  <article>
+    <h1>Mount Everest</h1>
+    <p>Mount Everest is Earth's <b>highest</b> mountain above sea level.</p>
+    <p>It lies in the Mahalangur Himal.</p>
+    <table><tr><td>Elevation</td><td>8,849 m</td></tr></table>
+    <script>var tracking = true;</script>
+    <!-- a comment -->
+  </article>
+  <footer>Copyright</footer>
+</body>
+</html>"""
+
+
+def scraper_for(responses: list[httpx.Response]) -> tuple[WebScraper, list]:
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return responses[min(len(requests), len(responses)) - 1]
+
+    client = HTTPClient(transport=httpx.MockTransport(handler), backoff_seconds=0)
+    return WebScraper(http_client=client, max_workers=1), requests
+
+
+def test_extract_html_text_removes_boilerplate():
+    title, text = extract_html_text(PAGE)
+
+    assert title == "Mount Everest"
+    assert text == (
+        "Mount Everest\n\n"
+        "Mount Everest is Earth's highest mountain above sea level.\n\n"
+        "It lies in the Mahalangur Himal.\n\n"
+        "Elevation 8,849 m"
+    )
+
+
+def test_extract_html_text_keeps_large_boilerplate_named_elements():
+    paragraph = "<p>" + "Everest is high. " * 200 + "</p>"
+    _, text = extract_html_text(
+        f'<div class="main-nav-wrapper">{paragraph}</div>'.encode()
+    )
+
+    assert text.startswith("Everest is high.")
+
+
+def test_extract_html_text_empty_page():
+    assert extract_html_text(b"") == ("", "")
+    assert extract_html_text(b"   ") == ("", "")
+
+
+def test_detect_charset():
+    assert detect_charset("é".encode("latin-1"), "iso-8859-1") == "iso8859-1"
+    assert detect_charset(b'<meta charset="shift_jis">', None) == "shift_jis"
+    assert detect_charset("é".encode(), None) == "utf-8"
+    # Cut in the middle of a character
+    assert detect_charset("é".encode()[:1], None) == "utf-8"
+    assert detect_charset(b"caf\xe9 au lait", None) == "windows-1252"
+    assert detect_charset(b"text", "unknown-charset") == "utf-8"
+
+
+@pytest.mark.asyncio
+async def test_scrape_decodes_html_with_header_charset():
+    scraper, _ = scraper_for(
+        [
+            httpx.Response(
+                200,
+                content="<p>Café crème</p>".encode("latin-1"),
+                headers={"Content-Type": "text/html; charset=ISO-8859-1"},
+            )
+        ]
+    )
+
+    page = await scraper.scrape("http://example.com")
+
+    assert page.text == "Café crème"
+    assert not page.truncated
+
+
+@pytest.mark.asyncio
+async def test_scrape_plain_text():
+    scraper, _ = scraper_for(
+        [
+            httpx.Response(
+                200,
+                text="line  one\n\n\n\nline two",
+                headers={"Content-Type": "text/plain"},
+            )
+        ]
+    )
+
+    page = await scraper.scrape("http://example.com/file.txt")
+
+    assert page.text == "line one\n\nline two"
+
+
+@pytest.mark.asyncio
+async def test_scrape_truncates_at_max_bytes():
+    scraper, _ = scraper_for(
+        [
+            httpx.Response(
+                200,
+                text="word " * 1000,
+                headers={"Content-Type": "text/plain"},
+            )
+        ]
+    )
+    scraper.max_bytes = 100
+
+    page = await scraper.scrape("http://example.com")
+
+    assert page.truncated
+    assert len(page.text) <= 100
+
+
+@pytest.mark.asyncio
+async def test_scrape_rejects_unsupported_content_type():
+    scraper, _ = scraper_for(
+        [
+            httpx.Response(
+                200, content=b"%PDF", headers={"Content-Type": "application/pdf"}
+            )
+        ]
+    )
+
+    with pytest.raises(ValueError, match="Unsupported content type application/pdf"):
+        await scraper.scrape("http://example.com/file.pdf")
+
+
+@pytest.mark.asyncio
+async def test_scrape_raises_on_http_error():
+    scraper, _ = scraper_for([httpx.Response(404)])
+
+    with pytest.raises(ValueError, match="HTTP 404 Not Found"):
+        await scraper.scrape("http://example.com")
+
+
+@pytest.mark.asyncio
+async def test_scrape_revalidates_cached_page():
+    scraper, requests = scraper_for(
+        [
+            httpx.Response(
+                200,
+                content=PAGE,
+                headers={
+                    "Content-Type": "text/html",
+                    "ETag": '"v1"',
+                    "Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT",
+                },
+            ),
+            httpx.Response(304),
+        ]
+    )
+
+    first = await scraper.scrape("http://example.com")
+    second = await scraper.scrape("http://example.com")
+
+    assert second is first
+    assert requests[1].headers["If-None-Match"] == '"v1"'
+    assert requests[1].headers["If-Modified-Since"] == "Wed, 21 Oct 2015 07:28:00 GMT"
+    assert scraper.cache.revalidations == 1
+
+
+@pytest.mark.asyncio
+async def test_scrape_uses_fresh_cached_page():
+    scraper, requests = scraper_for(
+        [
+            httpx.Response(
+                200,
+                content=PAGE,
+                headers={"Content-Type": "text/html", "Cache-Control": "max-age=60"},
+            )
+        ]
+    )
+
+    await scraper.scrape("http://example.com")
+    await scraper.scrape("http://example.com")
+
+    assert len(requests) == 1
+    assert scraper.cache.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_scrape_does_not_cache_no_store():
+    scraper, requests = scraper_for(
+        [
+            httpx.Response(
+                200,
+                content=PAGE,
+                headers={
+                    "Content-Type": "text/html",
+                    "Cache-Control": "no-store",
+                    "ETag": '"v1"',
+                },
+            )
+        ]
+    )
+
+    await scraper.scrape("http://example.com")
+    await scraper.scrape("http://example.com")
+
+    assert len(requests) == 2
+    assert "If-None-Match" not in requests[1].headers
@@ -0,0 +1,314 @@
+import asyncio
+import os
+
+import pytest
+from sqlalchemy.orm import Session
+
+from backend.database_models.citation import Citation
+from backend.database_models.conversation import Conversation
+from backend.database_models.document import Document
+from backend.database_models.message import Message, MessageAgent
+from backend.database_models.user import User
+from backend.services.write_behind import (
+    PendingTurns,
+    TurnJournal,
+    TurnRecord,
+    WriteBehindQueue,
+)
+from backend.tests.factories import get_factory
+
+
+@pytest.fixture
+def conversation(session: Session, user: User) -> Conversation:
+    return get_factory("Conversation", session).create(user_id=user.id)
+
+
+@pytest.fixture
+def journal_path(tmp_path) -> str:
+    return str(tmp_path / "journal.jsonl")
+
+
+def create_queue(session: Session, journal_path: str, **kwargs) -> WriteBehindQueue:
+    # Worker sessions share the test transaction, rollbacks only undo their own savepoint
+    return WriteBehindQueue(
+        journal_path,
+        lambda: Session(
+            bind=session.connection(), join_transaction_mode="create_savepoint"
+        ),
+        flush_interval=0,
+        retry_delay=0,
+        **kwargs,
+    )
+
+
+def create_record(
+    conversation: Conversation, text: str = "Hello!", position: int = 1
+) -> TurnRecord:
+    message = Message(
+        text=text,
+        user_id=conversation.user_id,
+        conversation_id=conversation.id,
+        position=position,
+        agent=MessageAgent.CHATBOT,
+    )
+    document = Document(
+        document_id="doc_0",
+        text="Document",
+        title="Title",
+        user_id=conversation.user_id,
+        conversation_id=conversation.id,
+    )
+    citation = Citation(
+        text="Hello",
+        user_id=conversation.user_id,
+        start=0,
+        end=5,
+        document_ids=["doc_0"],
+    )
+    citation.documents.append(document)
+    return TurnRecord.from_turn(
+        message, [document], [citation], conversation_description=text
+    )
+
+
+def get_messages(session: Session, conversation: Conversation) -> list[Message]:
+    session.expire_all()
+    return (
+        session.query(Message)
+        .filter_by(conversation_id=conversation.id)
+        .order_by(Message.position)
+        .all()
+    )
+
+
+@pytest.mark.asyncio
+async def test_enqueue_stores_turn(session, conversation, journal_path):
+    queue = create_queue(session, journal_path)
+    await queue.start()
+
+    record = create_record(conversation)
+    queue.enqueue(record)
+    assert queue.has_pending(conversation.id, conversation.user_id)
+    await queue.wait_for_conversation(conversation.id, conversation.user_id)
+    await queue.stop()
+
+    messages = get_messages(session, conversation)
+    assert [m.id for m in messages] == [record.message["id"]]
+    assert [d.document_id for d in messages[0].documents] == ["doc_0"]
+    assert len(messages[0].citations) == 1
+    assert messages[0].citations[0].documents[0].document_id == "doc_0"
+    session.refresh(conversation)
+    assert conversation.description == "Hello!"
+    assert TurnJournal(journal_path).pending() == []
+
+
+@pytest.mark.asyncio
+async def test_enqueue_keeps_conversation_order(session, conversation, journal_path):
+    queue = create_queue(session, journal_path, batch_size=2)
+    await queue.start()
+
+    for position in range(5):
+        queue.enqueue(create_record(conversation, f"Turn {position}", position))
+    await queue.drain()
+    await queue.stop()
+
+    messages = get_messages(session, conversation)
+    assert [m.text for m in messages] == [f"Turn {i}" for i in range(5)]
+    session.refresh(conversation)
+    assert conversation.description == "Turn 4"
+
+
+@pytest.mark.asyncio
+async def test_enqueue_spills_to_journal(session, conversation, journal_path):
+    queue = create_queue(session, journal_path, max_memory_records=2, batch_size=1)
+    await queue.start()
+
+    for position in range(6):
+        queue.enqueue(create_record(conversation, f"Turn {position}", position))
+    assert len(queue._records) == 2
+    await queue.drain()
+    await queue.stop()
+
+    messages = get_messages(session, conversation)
+    assert [m.text for m in messages] == [f"Turn {i}" for i in range(6)]
+
+
+@pytest.mark.asyncio
+async def test_start_replays_journal(session, conversation, journal_path):
+    journal = TurnJournal(journal_path)
+    stored = create_record(conversation, "Stored", 1)
+    pending = create_record(conversation, "Pending", 2)
+    journal.append(stored)
+    journal.append(pending)
+    journal.ack([stored.record_id])
+
+    queue = create_queue(session, journal_path)
+    await queue.start()
+    await queue.drain()
+    await queue.stop()
+
+    messages = get_messages(session, conversation)
+    assert [m.text for m in messages] == ["Pending"]
+    assert journal.pending() == []
+
+
+@pytest.mark.asyncio
+async def test_replay_skips_turns_already_stored(session, conversation, journal_path):
+    record = create_record(conversation)
+    get_factory("Message", session).create(
+        id=record.message["id"],
+        text="Hello!",
+        conversation_id=conversation.id,
+        user_id=conversation.user_id,
+    )
+    # Crashed after storing the turn, before acknowledging it
+    TurnJournal(journal_path).append(record)
+
+    queue = create_queue(session, journal_path)
+    await queue.start()
+    await queue.drain()
+    await queue.stop()
+
+    assert len(get_messages(session, conversation)) == 1
+    assert not TurnJournal(journal_path).pending()
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried(session, conversation, journal_path):
+    calls = []
+
+    def flaky_session_factory() -> Session:
+        calls.append(1)
+        if len(calls) == 1:
+            raise ConnectionError("Database unavailable")
+        return Session(
+            bind=session.connection(), join_transaction_mode="create_savepoint"
+        )
+
+    queue = WriteBehindQueue(
+        journal_path, flaky_session_factory, flush_interval=0, retry_delay=0
+    )
+    await queue.start()
+    queue.enqueue(create_record(conversation))
+    await queue.drain()
+    await queue.stop()
+
+    assert len(calls) == 2
+    assert len(get_messages(session, conversation)) == 1
+
+
+@pytest.mark.asyncio
+async def test_failing_turn_is_dead_lettered(session, conversation, journal_path):
+    queue = create_queue(session, journal_path, max_attempts=2)
+    await queue.start()
+
+    orphan = create_record(conversation, "Orphan")
+    orphan.message["conversation_id"] = "deleted"
+    orphan.documents[0]["conversation_id"] = "deleted"
+    valid = create_record(conversation, "Valid", 2)
+    queue.enqueue(orphan)
+    queue.enqueue(valid)
+    await queue.drain()
+    await queue.stop()
+
+    assert [m.text for m in get_messages(session, conversation)] == ["Valid"]
+    with open(f"{journal_path}.failed") as f:
+        assert TurnRecord.model_validate_json(f.readline()) == orphan
+    assert TurnJournal(journal_path).pending() == []
+
+
+@pytest.mark.asyncio
+async def test_workers_keep_separate_journals(session, conversation, journal_path):
+    first = create_queue(session, journal_path)
+    second = create_queue(session, journal_path)
+    await first.start()
+    await second.start()
+
+    # Records of a worker that are not stored yet
+    pending = create_record(conversation, "Pending", 1)
+    first.journal.append(pending)
+    second.enqueue(create_record(conversation, "Stored", 2))
+    await second.drain()
+
+    # The other worker emptied its own journal only
+    assert first.journal.pending() == [pending]
+    assert second.journal.pending() == []
+
+    # A worker starting meanwhile leaves the journals of running workers alone
+    third = create_queue(session, journal_path)
+    await third.start()
+    assert third.journal.pending() == []
+    assert first.journal.pending() == [pending]
+
+    await second.stop()
+    await third.stop()
+    first.journal.release()
+
+
+@pytest.mark.asyncio
+async def test_turns_wait_for_turns_pending_in_other_workers(
+    session, conversation, journal_path
+):
+    first = create_queue(session, journal_path)
+    second = create_queue(session, journal_path)
+    await first.start()
+    await second.start()
+
+    # The worker of the first process is busy elsewhere
+    first._worker.cancel()
+    first.enqueue(create_record(conversation, "Pending"))
+    assert second.has_pending(conversation.id, conversation.user_id)
+
+    wait = asyncio.create_task(
+        second.wait_for_conversation(conversation.id, conversation.user_id)
+    )
+    await asyncio.sleep(0.05)
+    assert not wait.done()
+
+    first._worker = asyncio.create_task(first._run())
+    first._notify()
+    await asyncio.wait_for(wait, 5)
+
+    assert [m.text for m in get_messages(session, conversation)] == ["Pending"]
+    assert not second.has_pending(conversation.id, conversation.user_id)
+    await first.stop()
+    await second.stop()
+
+
+@pytest.mark.asyncio
+async def test_wait_for_pending_turns_gives_up(session, conversation, journal_path):
+    # Turns left by a process that died before storing them
+    PendingTurns(f"{journal_path}.pending").add([create_record(conversation)])
+    queue = create_queue(session, journal_path, pending_wait_seconds=0)
+    await queue.start()
+
+    await asyncio.wait_for(
+        queue.wait_for_conversation(conversation.id, conversation.user_id), 5
+    )
+    await queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_start_adopts_journals_of_stopped_workers(
+    session, conversation, journal_path
+):
+    stopped = create_queue(session, journal_path)
+    await stopped.start()
+    await stopped.stop()
+    crashed = create_queue(session, journal_path)
+    await crashed.start()
+    crashed.journal.append(create_record(conversation, "Pending"))
+    # The process died with a pending turn, releasing its lock
+    crashed._worker.cancel()
+    crashed.journal.release()
+
+    queue = create_queue(session, journal_path)
+    await queue.start()
+    await queue.drain()
+    await queue.stop()
+
+    assert [m.text for m in get_messages(session, conversation)] == ["Pending"]
+    # The journals of the stopped workers are removed
+    assert not os.path.exists(stopped.journal.path)
+    assert not os.path.exists(crashed.journal.path)
+    assert not os.path.exists(queue.journal.path)
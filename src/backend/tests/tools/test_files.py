@@ -0,0 +1,300 @@
+import asyncio
+
+import pytest
+from sqlalchemy.orm import Session
+
+from backend.config.settings import reload_settings
+from backend.crud import file as file_crud
+from backend.services.embedding_index import (
+    EmbeddingIndex,
+    get_embedder,
+    get_embedding_index,
+)
+from backend.services.file import (
+    build_file,
+    create_files,
+    delete_file_embeddings,
+    index_file_embeddings,
+)
+from backend.services.file_index import CHUNK_SOFT_WORD_LIMIT
+from backend.services.file_parsing import ParsedFile
+from backend.tests.factories import get_factory
+from backend.tools import ReadFileTool, SearchFileTool
+
+FILLER = " ".join(["filler."] * (CHUNK_SOFT_WORD_LIMIT + 1))
+
+
+@pytest.fixture(autouse=True)
+def conversation(session, user):
+    return get_factory("Conversation", session).create(id="1", user_id=user.id)
+
+
+def upload(session, user, file_name, text, content_hash=None, page_offsets=None):
+    parsed = ParsedFile(text, page_offsets=page_offsets, content_hash=content_hash)
+    file, file_content = build_file(user.id, "1", file_name, len(text), parsed)
+    create_files(session, [file], [file_content] if file_content else None)
+
+
+async def read(session, user, **parameters):
+    return await ReadFileTool().call(
+        {"filename": "book.pdf", **parameters}, session=session, user_id=user.id
+    )
+
+
+@pytest.fixture
+def book(session, user):
+    pages = [f"Page {number} " + "word " * 99 for number in range(1, 101)]
+    page_offsets = [sum(len(page) for page in pages[:number]) for number in range(100)]
+    upload(session, user, "book.pdf", "".join(pages), "hash", page_offsets)
+    return pages
+
+
+@pytest.mark.asyncio
+async def test_read_file_caps_size(session, user, book):
+    results = await read(session, user, max_chars=1_100)
+
+    assert results[0]["text"] == "".join(book[:2])
+    assert (
+        results[0]["range"]
+        == f"Characters 0-{len(results[0]['text'])} of {len(''.join(book))}, pages 1-2 of 100"
+    )
+    assert results[0]["next_offset"] == str(len(results[0]["text"]))
+
+
+@pytest.mark.asyncio
+async def test_read_file_default_size_cap(session, user, book):
+    results = await read(session, user)
+
+    assert len(results[0]["text"]) <= ReadFileTool.MAX_CHARS
+    assert results[0]["text"].startswith("Page 1 ")
+
+
+@pytest.mark.asyncio
+async def test_read_file_by_page(session, user, book):
+    results = await read(session, user, page=100)
+
+    assert results[0]["text"] == book[-1]
+    assert results[0]["range"].endswith("pages 100-100 of 100")
+    assert "next_offset" not in results[0]
+
+
+@pytest.mark.asyncio
+async def test_read_file_by_offset(session, user, book):
+    results = await read(session, user, offset="10", max_chars="20")
+
+    assert results[0]["text"] == "".join(book)[10:30].rsplit(" ", 1)[0] + " "
+    assert results[0]["next_offset"] == str(10 + len(results[0]["text"]))
+
+
+@pytest.mark.asyncio
+async def test_read_file_by_chunk(session, user):
+    text = " ".join(f"sentence{i}." for i in range(500))
+    upload(session, user, "book.pdf", text)
+
+    results = await read(session, user, chunk=1, max_chars=10_000)
+
+    assert results[0]["text"].startswith("sentence101.")
+
+
+@pytest.mark.asyncio
+async def test_read_file_invalid_page(session, user, book):
+    results = await read(session, user, page=101)
+
+    assert results[0]["text"] == "Page 101 is out of range, book.pdf has 100 page(s)"
+
+
+@pytest.mark.asyncio
+async def test_read_file_outline(session, user, book):
+    results = await read(session, user, outline=True)
+
+    lines = results[0]["text"].split("\n")
+    assert (
+        lines[0]
+        == f"book.pdf: {len(''.join(book))} characters, 10100 words, 100 page(s)"
+    )
+    assert len(lines) == 1 + ReadFileTool.MAX_OUTLINE_ENTRIES
+    assert lines[1] == "Pages 1-2 (offset 0): Page 1 " + " ".join(["word"] * 10)
+
+
+@pytest.mark.asyncio
+async def test_read_file_outline_of_chunks(session, user):
+    upload(session, user, "book.pdf", FILLER)
+
+    results = await read(session, user, outline="true")
+
+    assert results[0]["text"].split("\n")[1] == "Chunk 0 (offset 0): " + " ".join(
+        ["filler."] * ReadFileTool.OUTLINE_PREVIEW_WORDS
+    )
+
+
+@pytest.mark.asyncio
+async def test_search_file_returns_matching_chunks(session, user):
+    upload(session, user, "animals.txt", f"{FILLER} Zebras live in Africa. {FILLER}")
+    upload(session, user, "birds.txt", f"Penguins live in Antarctica. {FILLER}", "hash")
+
+    results = await SearchFileTool().call(
+        {"search_query": "zebras", "filenames": ["animals.txt", "birds.txt"]},
+        session=session,
+        user_id=user.id,
+    )
+
+    assert len(results) == 1
+    assert results[0]["title"] == "animals.txt"
+    assert results[0]["text"].startswith("Zebras live in Africa. filler.")
+
+
+@pytest.mark.asyncio
+async def test_search_file_uses_shared_chunk_index(session, user):
+    upload(session, user, "birds.txt", f"Penguins live in Antarctica. {FILLER}", "hash")
+
+    assert file_crud.get_files_by_file_names(session, ["birds.txt"], user.id)[
+        0
+    ].content_chunk_index
+
+    results = await SearchFileTool().call(
+        {"search_query": "penguins", "filenames": ["birds.txt"]},
+        session=session,
+        user_id=user.id,
+    )
+
+    assert len(results) == 1
+    assert results[0]["text"].startswith("Penguins live in Antarctica. filler.")
+
+
+@pytest.mark.asyncio
+async def test_search_file_without_match_returns_first_chunks(session, user):
+    upload(session, user, "animals.txt", f"{FILLER} {FILLER} Zebras.")
+
+    results = await SearchFileTool().call(
+        {"search_query": "penguins", "filenames": ["animals.txt"]},
+        session=session,
+        user_id=user.id,
+    )
+
+    assert [result["text"] for result in results] == [FILLER, FILLER, "Zebras."]
+
+
+@pytest.fixture
+def hash_embedder(monkeypatch, tmp_path):
+    monkeypatch.setenv("SEARCH_FILE_EMBEDDER", "hash")
+    monkeypatch.setenv("SEARCH_FILE_EMBEDDING_INDEX_PATH", str(tmp_path))
+    reload_settings()
+    yield get_embedder()
+    monkeypatch.undo()
+    reload_settings()
+
+
+async def index(session, user, file_names):
+    files = file_crud.get_files_by_file_names(session, file_names, user.id)
+    await index_file_embeddings(
+        [file.id for file in files],
+        user.id,
+        session_factory=lambda: Session(
+            bind=session.connection(), join_transaction_mode="create_savepoint"
+        ),
+    )
+    return files
+
+
+@pytest.mark.asyncio
+async def test_search_file_uses_embedding_index(session, user, hash_embedder):
+    upload(session, user, "animals.txt", f"{FILLER} Zebras live in Africa.")
+    await index(session, user, ["animals.txt"])
+
+    results = await SearchFileTool().call(
+        {"search_query": "zebras", "filenames": ["animals.txt"]},
+        session=session,
+        user_id=user.id,
+    )
+
+    assert results[0]["text"].endswith("Zebras live in Africa.")
+
+
+@pytest.mark.asyncio
+async def test_search_file_does_not_embed_files(
+    session, user, hash_embedder, monkeypatch
+):
+    upload(session, user, "animals.txt", f"{FILLER} Zebras live in Africa.")
+    embedded = []
+    monkeypatch.setattr(
+        hash_embedder, "embed", lambda texts, input_type: embedded.append(texts)
+    )
+
+    results = await SearchFileTool().call(
+        {"search_query": "zebras", "filenames": ["animals.txt"]},
+        session=session,
+        user_id=user.id,
+    )
+
+    # The file is not indexed yet, it is searched lexically
+    assert results[0]["text"].endswith("Zebras live in Africa.")
+    assert embedded == []
+    assert get_embedding_index(user.id, hash_embedder).document_rows() == {}
+
+
+@pytest.mark.asyncio
+async def test_search_file_falls_back_when_index_fails(
+    session, user, hash_embedder, monkeypatch
+):
+    upload(session, user, "animals.txt", f"{FILLER} Zebras live in Africa.")
+    await index(session, user, ["animals.txt"])
+
+    def fail(*args, **kwargs):
+        raise ValueError("mmap length is greater than file size")
+
+    monkeypatch.setattr(EmbeddingIndex, "search", fail)
+    results = await SearchFileTool().call(
+        {"search_query": "zebras", "filenames": ["animals.txt"]},
+        session=session,
+        user_id=user.id,
+    )
+
+    assert results[0]["text"].endswith("Zebras live in Africa.")
+
+
+@pytest.mark.asyncio
+async def test_index_file_embeddings_after_upload(session, user, hash_embedder):
+    upload(session, user, "animals.txt", f"{FILLER} Zebras live in Africa.")
+    file = file_crud.get_files_by_file_names(session, ["animals.txt"], user.id)[0]
+
+    await index_file_embeddings(
+        [file.id],
+        user.id,
+        session_factory=lambda: Session(
+            bind=session.connection(), join_transaction_mode="create_savepoint"
+        ),
+    )
+
+    index = get_embedding_index(user.id, hash_embedder)
+    assert index.document_rows() == {file.id: 2}
+
+    delete_file_embeddings([file.id], user.id)
+    assert index.document_rows() == {}
+
+
+def test_delete_conversation_deletes_file_embeddings(
+    session_client, session, user, hash_embedder
+):
+    other = get_factory("Conversation", session).create(id="2", user_id=user.id)
+    upload(session, user, "animals.txt", "Zebras live in Africa.")
+    other_file, _ = build_file(user.id, other.id, "plants.txt", 6, ParsedFile("Plants"))
+    create_files(session, [other_file])
+    asyncio.run(index(session, user, ["animals.txt", "plants.txt"]))
+
+    response = session_client.delete(
+        "/v1/conversations/1", headers={"User-Id": user.id}
+    )
+
+    assert response.status_code == 200
+    index_rows = get_embedding_index(user.id, hash_embedder).document_rows()
+    assert list(index_rows) == [other_file.id]
+
+
+def test_delete_user_deletes_embeddings(session_client, session, user, hash_embedder):
+    upload(session, user, "animals.txt", "Zebras live in Africa.")
+    asyncio.run(index(session, user, ["animals.txt"]))
+
+    response = session_client.delete(f"/v1/users/{user.id}")
+
+    assert response.status_code == 200
+    assert get_embedding_index(user.id, hash_embedder).document_rows() == {}
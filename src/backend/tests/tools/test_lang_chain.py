@@ -1,10 +1,15 @@
 import os
+import shutil
+from collections import OrderedDict
 from unittest.mock import MagicMock, patch
 
 import pytest
+from langchain_community.embeddings import DeterministicFakeEmbedding
 from langchain_core.documents.base import Document
 
+from backend.config.settings import reload_settings
 from backend.tools import LangChainVectorDBRetriever, LangChainWikiRetriever
+from backend.tools.utils import vector_store
 
 is_cohere_env_set = (
     os.environ.get("COHERE_API_KEY") is not None
@@ -128,11 +133,9 @@ async def test_vector_db_retriever() -> None:
     db_get_relevant_docs_mock = MagicMock()
     db_get_relevant_docs_mock.get_relevant_docs.return_value = mock_docs
 
-    with patch(
-        "langchain_community.vectorstores.Chroma.from_documents"
-    ) as mock_from_documents:
+    with patch("backend.tools.lang_chain.get_vector_store") as mock_get_vector_store:
         mock_db = MagicMock()
-        mock_from_documents.return_value = mock_db
+        mock_get_vector_store.return_value = mock_db
         mock_db.as_retriever().get_relevant_documents.return_value = mock_docs
         result = await retriever.call({"query": query})
 
@@ -150,12 +153,138 @@ async def test_vector_db_retriever_no_docs() -> None:
     db_get_relevant_docs_mock = MagicMock()
     db_get_relevant_docs_mock.get_relevant_docs.return_value = mock_docs
 
-    with patch(
-        "langchain_community.vectorstores.Chroma.from_documents"
-    ) as mock_from_documents:
+    with patch("backend.tools.lang_chain.get_vector_store") as mock_get_vector_store:
         mock_db = MagicMock()
-        mock_from_documents.return_value = mock_db
+        mock_get_vector_store.return_value = mock_db
         mock_db.as_retriever().get_relevant_documents.return_value = mock_docs
         result = await retriever.call({"query": query})
 
     assert result == []
+
+
+class CountingEmbeddings(DeterministicFakeEmbedding):
+    """
+    Local embeddings counting the documents embedded
+    """
+
+    model: str = "fake-model"
+    embedded: int = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def vector_store_path(tmp_path, monkeypatch) -> str:
+    monkeypatch.setenv(
+        "VECTOR_RETRIEVER_PERSIST_DIRECTORY", str(tmp_path / "vector_store")
+    )
+    reload_settings()
+    yield str(tmp_path / "vector_store")
+    monkeypatch.undo()
+    reload_settings()
+
+
+@pytest.fixture
+def pdf_path(tmp_path) -> str:
+    path = str(tmp_path / "Mariana_Trench.pdf")
+    shutil.copy("src/backend/tests/test_data/Mariana_Trench.pdf", path)
+    return path
+
+
+@pytest.mark.asyncio
+async def test_vector_db_retriever_reuses_store(vector_store_path, pdf_path) -> None:
+    embeddings = CountingEmbeddings(size=32)
+    retriever = LangChainVectorDBRetriever(pdf_path, embeddings=embeddings)
+
+    first = await retriever.call({"query": "What is the mariana trench?"})
+    embedded = embeddings.embedded
+    second = await retriever.call({"query": "What is the mariana trench?"})
+
+    assert first and first == second
+    assert embedded > 0
+    assert embeddings.embedded == embedded
+
+
+@pytest.mark.asyncio
+async def test_vector_db_retriever_loads_persisted_store(
+    vector_store_path, pdf_path, monkeypatch
+) -> None:
+    embeddings = CountingEmbeddings(size=32)
+    await LangChainVectorDBRetriever(pdf_path, embeddings=embeddings).call(
+        {"query": "trench"}
+    )
+    embedded = embeddings.embedded
+
+    # Another process only has the persisted collections
+    monkeypatch.setattr(vector_store, "_vector_stores", {})
+    monkeypatch.setattr(vector_store, "_clients", {})
+    result = await LangChainVectorDBRetriever(pdf_path, embeddings=embeddings).call(
+        {"query": "trench"}
+    )
+
+    assert result
+    assert embeddings.embedded == embedded
+
+
+@pytest.mark.asyncio
+async def test_vector_db_retriever_rebuilds_modified_file(
+    vector_store_path, pdf_path
+) -> None:
+    embeddings = CountingEmbeddings(size=32)
+    retriever = LangChainVectorDBRetriever(pdf_path, embeddings=embeddings)
+    await retriever.call({"query": "trench"})
+    embedded = embeddings.embedded
+
+    shutil.copy("src/backend/tests/test_data/Tapas.pdf", pdf_path)
+    result = await retriever.call({"query": "tapas"})
+
+    assert embeddings.embedded > embedded
+    assert any("tapa" in document["text"].lower() for document in result)
+    # The collection of the previous content is deleted, with its lock file
+    client = vector_store.get_client(vector_store_path)
+    assert len(client.list_collections()) == 1
+    assert [
+        name for name in os.listdir(vector_store_path) if name.endswith(".lock")
+    ] == [f"{client.list_collections()[0].name}.lock"]
+
+
+def test_delete_collection_skips_collection_being_built(vector_store_path) -> None:
+    client = vector_store.get_client(vector_store_path)
+    client.create_collection("building")
+    with vector_store.build_lock(vector_store_path, "building"):
+        vector_store.delete_collection(client, vector_store_path, "building")
+
+    assert [collection.name for collection in client.list_collections()] == ["building"]
+    assert os.path.exists(vector_store.lock_path(vector_store_path, "building"))
+
+
+def test_file_content_hashes_are_bounded(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(vector_store, "CONTENT_HASH_CACHE_SIZE", 2)
+    monkeypatch.setattr(vector_store, "_content_hashes", OrderedDict())
+    paths = []
+    for number in range(3):
+        paths.append(str(tmp_path / f"{number}.txt"))
+        with open(paths[-1], "w") as f:
+            f.write(str(number))
+        vector_store.file_content_hash(paths[-1])
+
+    assert [key[0] for key in vector_store._content_hashes] == paths[1:]
+
+
+@pytest.mark.asyncio
+async def test_vector_db_retriever_store_per_embedding_model(
+    vector_store_path, pdf_path
+) -> None:
+    first_model = CountingEmbeddings(size=32)
+    second_model = CountingEmbeddings(size=32, model="other-model")
+
+    await LangChainVectorDBRetriever(pdf_path, embeddings=first_model).call(
+        {"query": "trench"}
+    )
+    await LangChainVectorDBRetriever(pdf_path, embeddings=second_model).call(
+        {"query": "trench"}
+    )
+
+    assert second_model.embedded == first_model.embedded
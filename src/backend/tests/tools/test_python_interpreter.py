@@ -0,0 +1,258 @@
+import asyncio
+import base64
+import json
+import os
+import sys
+import tempfile
+
+import httpx
+import pytest
+
+from backend.config.settings import reload_settings
+from backend.services.http_client import HTTPClient
+from backend.tools import PythonInterpreter, python_interpreter
+from backend.tools.python_interpreter import InterpreterClient
+
+
+class StubInterpreter:
+    """
+    Local stand-in for the interpreter service: runs the code in a Python
+    subprocess, in a directory holding the files of the request, and returns the
+    files the code created or changed
+    """
+
+    def __init__(self) -> None:
+        self.requests = []
+        self.killed = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        self.requests.append(payload)
+
+        with tempfile.TemporaryDirectory() as directory:
+            for input_file in payload.get("files", []):
+                with open(os.path.join(directory, input_file["filename"]), "wb") as f:
+                    f.write(base64.b64decode(input_file["b64_data"]))
+            before = self.read_files(directory)
+
+            process = await asyncio.create_subprocess_exec(
+                sys.executable,
+                "-c",
+                payload["code"],
+                cwd=directory,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                std_out, std_err = await process.communicate()
+            except asyncio.CancelledError:
+                process.kill()
+                await process.wait()
+                self.killed += 1
+                raise
+
+            output_files = [
+                {"filename": name, "b64_data": base64.b64encode(data).decode()}
+                for name, data in self.read_files(directory).items()
+                if before.get(name) != data
+            ]
+
+        result = {
+            "success": process.returncode == 0,
+            "std_out": std_out.decode(),
+            "std_err": std_err.decode(),
+            "output_files": output_files,
+        }
+        if process.returncode:
+            result["error"] = {
+                "type": "RuntimeError",
+                "message": std_err.decode().strip().splitlines()[-1],
+            }
+        return httpx.Response(200, json=result)
+
+    @staticmethod
+    def read_files(directory: str) -> dict[str, bytes]:
+        files = {}
+        for name in os.listdir(directory):
+            with open(os.path.join(directory, name), "rb") as f:
+                files[name] = f.read()
+        return files
+
+
+@pytest.fixture
+def interpreter() -> StubInterpreter:
+    return StubInterpreter()
+
+
+@pytest.fixture
+def client(interpreter) -> InterpreterClient:
+    return InterpreterClient(
+        "http://interpreter",
+        timeout_seconds=10,
+        max_output_bytes=100_000,
+        max_output_file_bytes=1000,
+        session_ttl_seconds=1800,
+        max_sessions=100,
+        max_session_files_bytes=1000,
+        max_sessions_files_bytes=10_000,
+        http_client=HTTPClient(transport=httpx.MockTransport(interpreter)),
+    )
+
+
+@pytest.fixture
+def tool(client, monkeypatch):
+    monkeypatch.setattr(PythonInterpreter, "INTERPRETER_URL", "http://interpreter")
+    monkeypatch.setitem(
+        python_interpreter._interpreter_clients, "http://interpreter", client
+    )
+    return PythonInterpreter()
+
+
+@pytest.fixture
+def warm_sessions(monkeypatch):
+    monkeypatch.setenv("PYTHON_INTERPRETER_WARM_SESSIONS", "true")
+    reload_settings()
+    yield
+    monkeypatch.undo()
+    reload_settings()
+
+
+@pytest.mark.asyncio
+async def test_call(tool) -> None:
+    results = await tool.call({"code": "print(6 * 7)"})
+
+    assert results[0]["success"] == "True"
+    assert results[0]["text"] == "42\n"
+
+
+@pytest.mark.asyncio
+async def test_call_error(tool) -> None:
+    results = await tool.call({"code": "1 / 0"})
+
+    assert results[0]["success"] == "False"
+    assert results[0]["text"] == "ZeroDivisionError: division by zero"
+
+
+@pytest.mark.asyncio
+async def test_call_output_files(tool) -> None:
+    results = await tool.call(
+        {
+            "code": "open('small.txt', 'w').write('a' * 10)\n"
+            "open('large.txt', 'w').write('a' * 5000)"
+        }
+    )
+
+    outputs = {json.loads(r["output_file"])["filename"]: r for r in results[1:]}
+    assert outputs["small.txt"]["text"] == "Created output file small.txt"
+    assert json.loads(outputs["small.txt"]["output_file"])["b64_data"]
+    assert outputs["large.txt"]["text"] == (
+        "Could not return output file large.txt: "
+        "The file is larger than 1000 bytes and was not returned"
+    )
+    assert "b64_data" not in json.loads(outputs["large.txt"]["output_file"])
+
+
+@pytest.mark.asyncio
+async def test_run_output_too_large(client) -> None:
+    result = await client.run("print('a' * 200_000)")
+
+    assert result["success"] is False
+    assert result["error"]["message"] == (
+        "The Python interpreter failed: the output is larger than 100000 bytes"
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_timeout(client, interpreter) -> None:
+    client.timeout_seconds = 0.5
+
+    result = await client.run("import time; time.sleep(10)")
+
+    assert result["success"] is False
+    assert result["error"]["message"] == (
+        "The code did not finish running within 0.5 seconds"
+    )
+    assert interpreter.killed == 1
+
+
+@pytest.mark.asyncio
+async def test_run_cancelled(client, interpreter) -> None:
+    run = asyncio.create_task(client.run("import time; time.sleep(10)", "session"))
+    await asyncio.sleep(0.5)
+    run.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await run
+
+    assert interpreter.killed == 1
+    # The session is usable again
+    result = await asyncio.wait_for(client.run("print('ok')", "session"), 5)
+    assert result["std_out"] == "ok\n"
+
+
+@pytest.mark.asyncio
+async def test_warm_session_keeps_files(tool, interpreter, warm_sessions) -> None:
+    kwargs = {"user_id": "user", "conversation_id": "conversation"}
+    await tool.call({"code": "open('data.csv', 'w').write('1,2,3')"}, **kwargs)
+    results = await tool.call(
+        {"code": "print(sum(map(int, open('data.csv').read().split(','))))"},
+        **kwargs,
+    )
+    other_conversation = await tool.call(
+        {"code": "open('data.csv')"}, user_id="user", conversation_id="other"
+    )
+
+    assert results[0]["text"] == "6\n"
+    assert [f["filename"] for f in interpreter.requests[1]["files"]] == ["data.csv"]
+    assert other_conversation[0]["success"] == "False"
+
+
+@pytest.mark.asyncio
+async def test_runs_are_cold_by_default(tool, interpreter) -> None:
+    kwargs = {"user_id": "user", "conversation_id": "conversation"}
+    await tool.call({"code": "open('data.csv', 'w').write('1,2,3')"}, **kwargs)
+    results = await tool.call({"code": "open('data.csv')"}, **kwargs)
+
+    assert results[0]["success"] == "False"
+    assert "files" not in interpreter.requests[1]
+
+
+@pytest.mark.asyncio
+async def test_runs_without_conversation_are_cold(
+    tool, interpreter, warm_sessions
+) -> None:
+    kwargs = {"user_id": "user", "trace_id": "trace"}
+    await tool.call({"code": "open('data.csv', 'w').write('1,2,3')"}, **kwargs)
+    results = await tool.call({"code": "open('data.csv')"}, **kwargs)
+
+    assert results[0]["success"] == "False"
+    assert "files" not in interpreter.requests[1]
+
+
+@pytest.mark.asyncio
+async def test_session_eviction_skips_running_sessions(client) -> None:
+    client.max_sessions = 2
+    running = client._get_session("running")
+    client._get_session("idle")
+
+    async with running.lock:
+        client._get_session("new")
+
+    assert list(client._sessions) == ["running", "new"]
+
+
+@pytest.mark.asyncio
+async def test_session_files_are_capped_across_sessions(client) -> None:
+    client.max_session_files_bytes = 2000
+    client.max_sessions_files_bytes = 2000
+    code = "open('data.txt', 'w').write('a' * 600)"
+    for session_id in ["first", "second", "third"]:
+        await client.run(code, session_id)
+
+    # 600 bytes take 800 characters in base64
+    assert list(client._sessions) == ["second", "third"]
+    assert client._files_bytes == 1600
+
+    await client.run("open('other.txt', 'w').write('a' * 600)", "second")
+
+    assert list(client._sessions) == ["second"]
+    assert client._files_bytes == 1600
@@ -0,0 +1,134 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from backend.services.http_client import HTTPClient
+from backend.tools import TavilyInternetSearch
+
+
+class MockRerankModel:
+    """
+    Scores documents by the number of times they mention "tapas"
+    """
+
+    def __init__(self) -> None:
+        self.batches = []
+        self.active = 0
+        self.max_active = 0
+
+    async def invoke_rerank(self, query, documents, ctx, **kwargs):
+        self.batches.append(documents)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return {
+            "results": [
+                {"index": i, "relevance_score": document.lower().count("tapas")}
+                for i, document in enumerate(documents)
+            ]
+        }
+
+
+def page(url: str, content: str, raw_content: str) -> dict:
+    return {
+        "url": url,
+        "title": url.split("/")[-1],
+        "content": content,
+        "raw_content": raw_content,
+    }
+
+
+@pytest.fixture
+def tavily_results(monkeypatch):
+    results = []
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json={"results": results})
+
+    client = HTTPClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr("backend.tools.tavily.get_http_client", lambda: client)
+    monkeypatch.setattr(TavilyInternetSearch, "TAVILY_API_KEY", "key")
+    return results, requests
+
+
+@pytest.mark.asyncio
+async def test_call_reranks_snippets_and_dedups_urls(tavily_results) -> None:
+    results, requests = tavily_results
+    filler = "word " * 15
+    results.extend(
+        [
+            page(
+                "https://a.com/spain",
+                "Spain summary",
+                f"Too short\n{filler} tapas tapas tapas\n{filler} tapas",
+            ),
+            page("https://b.com/food", "Food summary", f"{filler} tapas tapas"),
+            page("https://c.com/none", "Nothing", None),
+        ]
+    )
+    model = MockRerankModel()
+
+    output = await TavilyInternetSearch().call(
+        {"query": "what are tapas"}, model_deployment=model
+    )
+
+    assert requests[0]["query"] == "what are tapas"
+    assert requests[0]["include_raw_content"]
+    assert output == [
+        {"url": "https://a.com/spain", "text": f"{filler.strip()} tapas tapas tapas"},
+        {"url": "https://b.com/food", "text": f"{filler.strip()} tapas tapas"},
+        {"url": "https://c.com/none", "text": "Nothing"},
+    ]
+    # Summaries and snippets of at least 10 words
+    assert len(model.batches[0]) == 6
+
+
+@pytest.mark.asyncio
+async def test_call_without_results(tavily_results) -> None:
+    output = await TavilyInternetSearch().call(
+        {"query": "tapas"}, model_deployment=MockRerankModel()
+    )
+
+    assert output == []
+
+
+def test_select_snippets_caps_snippets_per_page() -> None:
+    tool = TavilyInternetSearch()
+    filler = "word " * 15
+    lines = [f"{filler} line {i}" for i in range(50)]
+    lines[30] = f"{filler} tapas recipes"
+    lines[40] = lines[0]
+
+    snippets = tool.select_snippets(
+        "tapas recipes",
+        page("https://a.com", "summary", "\n".join(lines)),
+    )
+
+    assert len(snippets) == tool.MAX_SNIPPETS_PER_PAGE
+    assert f"{filler.strip()} tapas recipes" in snippets
+    assert len(set(snippets)) == len(snippets)
+
+
+@pytest.mark.asyncio
+async def test_rerank_batches_run_concurrently(monkeypatch) -> None:
+    monkeypatch.setattr(TavilyInternetSearch, "RERANK_BATCH_SIZE", 2)
+    model = MockRerankModel()
+    snippets = [
+        {"url": f"https://{i}.com", "title": "", "content": "tapas " * i}
+        for i in range(5)
+    ]
+
+    reranked = await TavilyInternetSearch().rerank_page_snippets(
+        "tapas", snippets, model=model
+    )
+
+    assert [len(batch) for batch in model.batches] == [2, 2, 1]
+    assert model.max_active == 3
+    assert [result["url"] for result in reranked] == [
+        f"https://{i}.com" for i in range(4, -1, -1)
+    ]
@@ -0,0 +1,51 @@
+import httpx
+import pytest
+
+from backend.services.http_client import HTTPClient
+from backend.services.web_scraper import WebScraper
+from backend.tools import WebScrapeTool
+
+
+@pytest.fixture
+def web_scraper(monkeypatch):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/missing":
+            return httpx.Response(404)
+        return httpx.Response(
+            200,
+            text="<title>Tapas</title><p>Tapas are small Spanish dishes.</p>",
+            headers={"Content-Type": "text/html"},
+        )
+
+    scraper = WebScraper(
+        http_client=HTTPClient(transport=httpx.MockTransport(handler), retries=0),
+        max_workers=1,
+    )
+    monkeypatch.setattr("backend.tools.web_scrape.get_web_scraper", lambda: scraper)
+    yield scraper
+    scraper.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_web_scrape(web_scraper) -> None:
+    results = await WebScrapeTool().call({"url": "http://example.com/tapas"})
+
+    assert results == [
+        {
+            "text": "Tapas are small Spanish dishes.",
+            "title": "Tapas",
+            "url": "http://example.com/tapas",
+        }
+    ]
+
+
+@pytest.mark.asyncio
+async def test_web_scrape_error(web_scraper) -> None:
+    results = await WebScrapeTool().call({"url": "http://example.com/missing"})
+
+    assert results == [
+        {
+            "text": "Cannot open and scrape URL http://example.com/missing, Error: HTTP 404 Not Found",
+            "url": "http://example.com/missing",
+        }
+    ]
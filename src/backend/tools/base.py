@@ -4,7 +4,7 @@ from typing import Any, Dict, List, Optional
 
 from fastapi import Request
 
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from backend.database_models.database import DBSessionDep
 
 
@@ -48,9 +48,9 @@ class BaseToolAuthentication:
     """
 
     def __init__(self, *args, **kwargs):
-        self.BACKEND_HOST = Settings().auth.backend_hostname
-        self.FRONTEND_HOST = Settings().auth.frontend_hostname
-        self.AUTH_SECRET_KEY = Settings().auth.secret_key
+        self.BACKEND_HOST = get_settings().auth.backend_hostname
+        self.FRONTEND_HOST = get_settings().auth.frontend_hostname
+        self.AUTH_SECRET_KEY = get_settings().auth.secret_key
 
         self._post_init_check()
 
@@ -1,16 +1,44 @@
-from typing import Any, Dict, List
+import asyncio
+import bisect
+import math
+from typing import Any, Dict, List, Optional, Tuple
 
 import backend.crud.file as file_crud
+from backend.database_models.file import File
+from backend.services.embedding_index import (
+    Embedder,
+    get_embedder,
+    get_embedding_index,
+)
+from backend.services.file import get_file_extension, load_chunk_index
+from backend.services.file_index import ChunkIndex, fuse_rankings, search_chunks
+from backend.services.file_parsing import SPREADSHEET_EXTENSIONS
+from backend.services.logger.utils import get_logger
 from backend.tools.base import BaseTool
 
+logger = get_logger()
+
 
 class ReadFileTool(BaseTool):
     """
     This class reads a file from the file system.
+
+    Large files are read in windows of up to max_chars characters, starting at a
+    page (a sheet for spreadsheets), a chunk or a character offset. The outline
+    mode lists the pages or chunks of a file with their first words, so that the model can pick where to
+    read next.
     """
 
     NAME = "read_document"
-    MAX_NUM_CHUNKS = 10
+    # Default size of a read, about 5,000 tokens
+    MAX_CHARS = 20_000
+    # Largest window the model can ask for
+    MAX_CHARS_LIMIT = 100_000
+    # Pages or chunks are grouped in sections past this number of outline entries
+    MAX_OUTLINE_ENTRIES = 50
+    OUTLINE_PREVIEW_WORDS = 12
+    # Characters of a section split into its preview words
+    OUTLINE_PREVIEW_CHARS = 200
 
     def __init__(self):
         pass
@@ -33,14 +61,179 @@ class ReadFileTool(BaseTool):
             return []
 
         file = files[0]
-        return [
-            {
-                "text": file.file_content,
-                "title": file.file_name,
-                "url": file.file_path,
-            }
+        try:
+            if parse_bool(parameters.get("outline")):
+                return [await asyncio.to_thread(self.outline, file)]
+            return [await asyncio.to_thread(self.read, file, parameters)]
+        except ValueError as e:
+            return [{"text": str(e), "title": file.file_name, "url": file.file_path}]
+
+    def read(self, file: File, parameters: dict) -> Dict[str, Any]:
+        """
+        Reads a window of a file, from the page, chunk or character offset given
+        in the parameters, in that order of precedence.
+
+        Args:
+            file (File): File with its content loaded
+            parameters (dict): Tool call parameters
+
+        Returns:
+            Dict[str, Any]: The window, its range and where the next one starts
+
+        Raises:
+            ValueError: If a parameter is invalid
+        """
+        content = file.content
+        page_offsets = file.content_page_offsets or []
+        max_chars = min(
+            parse_int(parameters, "max_chars", self.MAX_CHARS, minimum=1),
+            self.MAX_CHARS_LIMIT,
+        )
+
+        page = parse_int(parameters, "page", None, minimum=1)
+        chunk = parse_int(parameters, "chunk", None, minimum=0)
+        # A window ends at the last page or chunk boundary it contains
+        boundaries = page_offsets
+        if page is not None:
+            if page > max(len(page_offsets), 1):
+                raise ValueError(
+                    f"{page_unit(file).capitalize()} {page} is out of range, "
+                    f"{file.file_name} has {len(page_offsets) or 1} {page_unit(file)}(s)"
+                )
+            start = page_offsets[page - 1] if page_offsets else 0
+        elif chunk is not None:
+            offsets = load_chunk_index(file).offsets
+            if chunk >= len(offsets):
+                raise ValueError(
+                    f"Chunk {chunk} is out of range, {file.file_name} has "
+                    f"{len(offsets)} chunk(s)"
+                )
+            start = offsets[chunk][0]
+            boundaries = [end for _, end in offsets]
+        else:
+            start = min(parse_int(parameters, "offset", 0, minimum=0), len(content))
+
+        end = window_end(content, start, max_chars, boundaries)
+        window_range = f"Characters {start}-{end} of {len(content)}"
+        if page_offsets:
+            first_page = bisect.bisect_right(page_offsets, start)
+            last_page = bisect.bisect_left(page_offsets, end)
+            window_range += (
+                f", {page_unit(file)}s {first_page}-{max(first_page, last_page)} "
+                f"of {len(page_offsets)}"
+            )
+
+        document = {
+            "text": content[start:end],
+            "title": file.file_name,
+            "url": file.file_path,
+            "range": window_range,
+        }
+        if end < len(content):
+            document["next_offset"] = str(end)
+        return document
+
+    def outline(self, file: File) -> Dict[str, Any]:
+        """
+        Lists the pages of a file, or its chunks when it has no pages, with their
+        offset and first words. Sections of several pages or chunks are listed for
+        large files.
+
+        Args:
+            file (File): File with its content loaded
+
+        Returns:
+            Dict[str, Any]: The outline
+        """
+        content = file.content
+        page_offsets = file.content_page_offsets
+        # Pages are numbered from 1 and chunks from 0, as when reading them
+        if page_offsets:
+            unit, starts, first_number = page_unit(file).capitalize(), page_offsets, 1
+        else:
+            offsets = load_chunk_index(file).offsets
+            unit, starts, first_number = "Chunk", [start for start, _ in offsets], 0
+
+        word_count = file.word_count
+        if word_count is None:
+            word_count = len(content.split())
+        lines = [
+            f"{file.file_name}: {len(content)} characters, {word_count} words, "
+            f"{len(starts)} {unit.lower()}(s)"
         ]
 
+        section_size = max(1, math.ceil(len(starts) / self.MAX_OUTLINE_ENTRIES))
+        for section in range(0, len(starts), section_size):
+            first = section + first_number
+            last = min(section + section_size, len(starts)) - 1 + first_number
+            label = f"{unit} {first}" if first == last else f"{unit}s {first}-{last}"
+            start = starts[section]
+            # Only the start of the section is split into words
+            words = content[start : start + self.OUTLINE_PREVIEW_CHARS].split()
+            preview = " ".join(words[: self.OUTLINE_PREVIEW_WORDS])
+            lines.append(f"{label} (offset {start}): {preview}")
+
+        return {
+            "text": "\n".join(lines),
+            "title": file.file_name,
+            "url": file.file_path,
+        }
+
+
+def page_unit(file: File) -> str:
+    # Spreadsheets are split in sheets instead of pages
+    if get_file_extension(file.file_name) in SPREADSHEET_EXTENSIONS:
+        return "sheet"
+    return "page"
+
+
+def parse_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("true", "1", "yes")
+    return bool(value)
+
+
+def parse_int(
+    parameters: dict, name: str, default: Optional[int], minimum: int
+) -> Optional[int]:
+    value = parameters.get(name)
+    if value is None or value == "":
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer, got {value!r}")
+    if value < minimum:
+        raise ValueError(f"{name} must be at least {minimum}, got {value}")
+    return value
+
+
+def window_end(content: str, start: int, max_chars: int, boundaries: List[int]) -> int:
+    """Finds the end of a window of at most max_chars characters, at the last page
+    or chunk boundary in it, else at the last whitespace so words are not cut
+
+    Args:
+        content (str): The file content
+        start (int): Start of the window
+        max_chars (int): Maximum size of the window
+        boundaries (List[int]): Offsets where pages or chunks end or start
+
+    Returns:
+        int: End of the window
+    """
+    end = start + max_chars
+    if end >= len(content):
+        return len(content)
+
+    position = bisect.bisect_right(boundaries, end) - 1
+    if position >= 0 and boundaries[position] > start:
+        return boundaries[position]
+
+    whitespace = max(content.rfind(" ", start, end), content.rfind("\n", start, end))
+    if whitespace > start + max_chars // 2:
+        return whitespace + 1
+    return end
+
 
 class SearchFileTool(BaseTool):
     """
@@ -76,14 +269,102 @@ class SearchFileTool(BaseTool):
         if not files:
             return []
 
+        return await asyncio.to_thread(self.search, files, query)
+
+    def search(self, files: List[File], query: str) -> List[Dict[str, Any]]:
+        """
+        Returns the chunks of the files best matching the query, using the chunk
+        index built at upload instead of the whole files. When an embedder is
+        configured, lexical and semantic matches are merged. Blocks on the
+        embedder, run in a thread.
+
+        Args:
+            files (List[File]): Files to search, with their content loaded
+            query (str): The search query
+
+        Returns:
+            List[Dict[str, Any]]: Up to MAX_NUM_CHUNKS chunks, best first. The
+                first chunks of the files when none matches the query.
+        """
+        indexes = [load_chunk_index(file) for file in files]
+
+        rankings = [
+            [
+                (position, number)
+                for position, number, _ in search_chunks(
+                    indexes, query, self.MAX_NUM_CHUNKS
+                )
+            ]
+        ]
+        embedder = get_embedder()
+        if embedder is not None:
+            rankings.append(self.search_embeddings(files, indexes, query, embedder))
+
+        matches = fuse_rankings(rankings)[: self.MAX_NUM_CHUNKS]
+        if not matches:
+            matches = [
+                (position, number)
+                for position, index in enumerate(indexes)
+                for number in range(len(index.offsets))
+            ][: self.MAX_NUM_CHUNKS]
+
         results = []
-        for file in files:
+        for position, number in matches:
+            file = files[position]
+            start, end = indexes[position].offsets[number]
             results.append(
                 {
-                    "text": file.file_content,
+                    "text": file.content[start:end],
                     "title": file.file_name,
                     "url": file.file_path,
                 }
             )
 
         return results
+
+    def search_embeddings(
+        self,
+        files: List[File],
+        indexes: List[ChunkIndex],
+        query: str,
+        embedder: Embedder,
+    ) -> List[Tuple[int, int]]:
+        """
+        Finds the chunks of the files closest to the query in the embedding index.
+        Files are embedded after their upload, the ones not indexed yet are only
+        searched lexically.
+
+        Returns:
+            List[Tuple[int, int]]: Position of the file in files and chunk number
+                of the best chunks, best first. Empty when the embedder or the
+                index fails, or no file is indexed.
+        """
+        index = get_embedding_index(files[0].user_id, embedder)
+        document_rows = index.document_rows()
+        positions = {
+            file.id: position
+            for position, file in enumerate(files)
+            if file.id in document_rows
+        }
+        if not positions:
+            return []
+
+        try:
+            query_embedding = embedder.embed([query], "search_query")[0]
+        except Exception as e:
+            logger.error(event=f"[SearchFileTool] Error embedding the query: {e}")
+            return []
+
+        try:
+            matches = index.search(
+                query_embedding, self.MAX_NUM_CHUNKS, list(positions)
+            )
+        except Exception as e:
+            logger.error(event=f"[SearchFileTool] Error searching the embeddings: {e}")
+            return []
+
+        return [
+            (positions[file_id], number)
+            for file_id, number, _ in matches
+            if number < len(indexes[positions[file_id]].offsets)
+        ]
@@ -1,15 +1,14 @@
-import os
-from typing import Any, Dict, List
+import asyncio
+from typing import Any, Dict, List, Optional
 
 from langchain.text_splitter import CharacterTextSplitter
 from langchain_cohere import CohereEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_community.retrievers import WikipediaRetriever
-from langchain_community.vectorstores import Chroma
+from langchain_core.embeddings import Embeddings
 
-from backend.config.settings import Settings
-from backend.model_deployments.cohere_platform import COHERE_API_KEY_ENV_VAR
+from backend.config.settings import get_settings
 from backend.tools.base import BaseTool
+from backend.tools.utils.vector_store import get_vector_store
 
 """
 Plug in your lang chain retrieval implementation here. 
@@ -57,29 +56,32 @@ class LangChainWikiRetriever(BaseTool):
 class LangChainVectorDBRetriever(BaseTool):
     """
     This class retrieves documents from a vector database using the langchain package.
+
+    The file is embedded once per content and embedding model, in a vector store
+    persisted for the next calls and processes.
     """
 
     NAME = "vector_retriever"
-    COHERE_API_KEY = Settings().deployments.cohere_platform.api_key
+    COHERE_API_KEY = get_settings().deployments.cohere_platform.api_key
 
-    def __init__(self, filepath: str):
+    def __init__(self, filepath: str, embeddings: Optional[Embeddings] = None):
         self.filepath = filepath
+        self.embeddings = embeddings
 
     @classmethod
     def is_available(cls) -> bool:
         return cls.COHERE_API_KEY is not None
 
     async def call(self, parameters: dict, **kwargs: Any) -> List[Dict[str, Any]]:
-        cohere_embeddings = CohereEmbeddings(cohere_api_key=self.COHERE_API_KEY)
-
-        # Load text files and split into chunks
-        loader = PyPDFLoader(self.filepath)
-        text_splitter = CharacterTextSplitter(chunk_size=300, chunk_overlap=0)
-        pages = loader.load_and_split(text_splitter)
-
-        # Create a vector store from the documents
-        db = Chroma.from_documents(documents=pages, embedding=cohere_embeddings)
         query = parameters.get("query", "")
+        # Loading, embedding and searching block, they run in a thread
+        return await asyncio.to_thread(self.retrieve, query)
+
+    def retrieve(self, query: str) -> List[Dict[str, Any]]:
+        embeddings = self.embeddings or CohereEmbeddings(
+            cohere_api_key=self.COHERE_API_KEY
+        )
+        db = get_vector_store(self.filepath, embeddings)
         input_docs = db.as_retriever().get_relevant_documents(query)
 
         return [dict({"text": doc.page_content}) for doc in input_docs]
@@ -1,18 +1,232 @@
+import asyncio
 import json
-import os
-from typing import Any, Dict, Mapping
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Mapping, Optional
 
-import requests
+import httpx
 from dotenv import load_dotenv
 from langchain_core.tools import Tool as LangchainTool
 from pydantic.v1 import BaseModel, Field
 
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
+from backend.services.http_client import HTTPClient, get_http_client
 from backend.tools.base import BaseTool
 
 load_dotenv()
 
 
+@dataclass
+class InterpreterSession:
+    """
+    Files created by the earlier runs of a conversation, sent with its next runs
+    so that code can build on them.
+    """
+
+    # Base64 data of each file name, oldest first
+    files: OrderedDict[str, str] = field(default_factory=OrderedDict)
+    last_used: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    # Size of the base64 data of the files
+    size: int = 0
+
+    def add_files(self, output_files: list[Dict[str, Any]], max_bytes: int) -> None:
+        """
+        Keeps the files created by a run, dropping the oldest files past max_bytes
+        """
+        for output_file in output_files:
+            filename = output_file.get("filename")
+            if not filename or "b64_data" not in output_file:
+                continue
+            self.files.pop(filename, None)
+            self.files[filename] = output_file["b64_data"]
+
+        self.size = sum(len(data) for data in self.files.values())
+        while self.files and self.size > max_bytes:
+            _, data = self.files.popitem(last=False)
+            self.size -= len(data)
+
+
+class InterpreterClient:
+    """
+    Runs code on the Python interpreter over the pooled HTTP connections.
+
+    Runs taking longer than timeout_seconds are abandoned. Responses are streamed
+    and abandoned past max_output_bytes, and output files larger than
+    max_output_file_bytes are left out of the results.
+
+    Runs with a session_id are warm: the files created by the earlier runs of the
+    session are sent with the code, and runs of a session are sequential.
+
+    Sessions unused for session_ttl_seconds are dropped with their files, as are
+    the least recently used ones past max_sessions sessions or past
+    max_sessions_files_bytes of files in all sessions. The oldest files of a
+    session are dropped past max_session_files_bytes.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        timeout_seconds: float,
+        max_output_bytes: int,
+        max_output_file_bytes: int,
+        session_ttl_seconds: float,
+        max_sessions: int,
+        max_session_files_bytes: int,
+        max_sessions_files_bytes: int,
+        http_client: Optional[HTTPClient] = None,
+    ) -> None:
+        self.url = url
+        self.timeout_seconds = timeout_seconds
+        self.max_output_bytes = max_output_bytes
+        self.max_output_file_bytes = max_output_file_bytes
+        self.session_ttl_seconds = session_ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_session_files_bytes = max_session_files_bytes
+        self.max_sessions_files_bytes = max_sessions_files_bytes
+        self.http_client = http_client
+
+        self._sessions: OrderedDict[str, InterpreterSession] = OrderedDict()
+        # Size of the files of all sessions
+        self._files_bytes = 0
+
+    async def run(self, code: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Runs code on the interpreter.
+
+        Args:
+            code (str): Python code
+            session_id (Optional[str]): Session of the run, for warm runs
+
+        Returns:
+            Dict[str, Any]: The interpreter's result, with an error message
+                when the run failed, timed out or its output was too large
+        """
+        if session_id is None:
+            return await self._run(code, [])
+
+        session = self._get_session(session_id)
+        async with session.lock:
+            files = [
+                {"filename": filename, "b64_data": data}
+                for filename, data in session.files.items()
+            ]
+            result = await self._run(code, files)
+            size = session.size
+            session.add_files(
+                result.get("output_files", []), self.max_session_files_bytes
+            )
+            session.last_used = time.monotonic()
+            # Sessions dropped while their run was waiting are not counted
+            if self._sessions.get(session_id) is session:
+                self._files_bytes += session.size - size
+
+        self._drop_sessions(
+            lambda oldest: self._files_bytes > self.max_sessions_files_bytes
+        )
+        return result
+
+    async def _run(self, code: str, files: list[Dict[str, str]]) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"code": code}
+        if files:
+            payload["files"] = files
+
+        client = self.http_client or get_http_client()
+        try:
+            async with asyncio.timeout(self.timeout_seconds):
+                async with client.stream(
+                    "POST", self.url, json=payload, timeout=self.timeout_seconds
+                ) as response:
+                    response.raise_for_status()
+                    content = await self._read(response)
+        except (TimeoutError, httpx.TimeoutException):
+            return error_result(
+                f"The code did not finish running within {self.timeout_seconds} seconds"
+            )
+        except (httpx.HTTPError, ValueError) as e:
+            return error_result(f"The Python interpreter failed: {e}")
+
+        try:
+            result = json.loads(content)
+        except ValueError:
+            return error_result("The Python interpreter returned an invalid response")
+
+        result["output_files"] = [
+            self._cap_output_file(output_file)
+            for output_file in result.get("output_files") or []
+        ]
+        return result
+
+    async def _read(self, response: httpx.Response) -> bytes:
+        chunks = []
+        size = 0
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+            if size > self.max_output_bytes:
+                raise ValueError(
+                    f"the output is larger than {self.max_output_bytes} bytes"
+                )
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _cap_output_file(self, output_file: Dict[str, Any]) -> Dict[str, Any]:
+        # Base64 encodes 3 bytes in 4 characters
+        size = len(output_file.get("b64_data") or "") * 3 // 4
+        if size <= self.max_output_file_bytes:
+            return output_file
+
+        return {
+            "filename": output_file.get("filename", ""),
+            "error": f"The file is larger than {self.max_output_file_bytes} bytes and was not returned",
+        }
+
+    def _get_session(self, session_id: str) -> InterpreterSession:
+        now = time.monotonic()
+        self._drop_sessions(
+            lambda oldest: len(self._sessions) >= self.max_sessions
+            or now - oldest.last_used >= self.session_ttl_seconds
+        )
+
+        session = self._sessions.pop(session_id, None) or InterpreterSession()
+        self._sessions[session_id] = session
+        return session
+
+    def _drop_sessions(self, should_drop: Callable[[InterpreterSession], bool]) -> None:
+        # Sessions are ordered by last use, the least recently used are at the
+        # start. Sessions running code are skipped, the next ones are dropped in
+        # their place
+        for oldest_id, oldest in list(self._sessions.items()):
+            if not should_drop(oldest):
+                break
+            if not oldest.lock.locked():
+                del self._sessions[oldest_id]
+                self._files_bytes -= oldest.size
+
+
+def error_result(message: str) -> Dict[str, Any]:
+    return {"success": False, "error": {"type": "ToolError", "message": message}}
+
+
+_interpreter_clients: Dict[str, InterpreterClient] = {}
+
+
+def get_interpreter_client(url: str) -> InterpreterClient:
+    if url not in _interpreter_clients:
+        settings = get_settings().tools.python_interpreter
+        _interpreter_clients[url] = InterpreterClient(
+            url,
+            timeout_seconds=settings.timeout_seconds,
+            max_output_bytes=settings.max_output_bytes,
+            max_output_file_bytes=settings.max_output_file_bytes,
+            session_ttl_seconds=settings.session_ttl_seconds,
+            max_sessions=settings.max_sessions,
+            max_session_files_bytes=settings.max_session_files_bytes,
+            max_sessions_files_bytes=settings.max_sessions_files_bytes,
+        )
+    return _interpreter_clients[url]
+
+
 class LangchainPythonInterpreterToolInput(BaseModel):
     code: str = Field(description="Python code to execute.")
 
@@ -24,7 +238,7 @@ class PythonInterpreter(BaseTool):
     """
 
     NAME = "toolkit_python_interpreter"
-    INTERPRETER_URL = Settings().tools.python_interpreter.url
+    INTERPRETER_URL = get_settings().tools.python_interpreter.url
 
     @classmethod
     def is_available(cls) -> bool:
@@ -35,11 +249,25 @@ class PythonInterpreter(BaseTool):
             raise Exception("Python Interpreter tool called while URL not set")
 
         code = parameters.get("code", "")
-        res = requests.post(self.INTERPRETER_URL, json={"code": code})
-        clean_res = self._clean_response(res.json())
+        result = await get_interpreter_client(self.INTERPRETER_URL).run(
+            code, session_id=self._session_id(**kwargs)
+        )
+        clean_res = self._clean_response(result)
 
         return clean_res
 
+    def _session_id(self, **kwargs: Any) -> Optional[str]:
+        """
+        Runs of the same conversation share a warm session, if enabled
+        """
+        if not get_settings().tools.python_interpreter.warm_sessions:
+            return None
+
+        conversation_id = kwargs.get("conversation_id")
+        if not conversation_id:
+            return None
+        return f"{kwargs.get('user_id')}:{conversation_id}"
+
     def _clean_response(self, result: Any) -> Dict[str, str]:
         if "final_expression" in result:
             result["final_expression"] = str(result["final_expression"])
@@ -62,7 +290,12 @@ class PythonInterpreter(BaseTool):
                 error_message = r.get("error", {}).get("message", "")
                 r.setdefault("text", error_message)
             elif r.get("output_file") and r.get("output_file").get("filename"):
-                if r["output_file"]["filename"] != "":
+                if r["output_file"].get("error"):
+                    r.setdefault(
+                        "text",
+                        f"Could not return output file {r['output_file']['filename']}: {r['output_file']['error']}",
+                    )
+                elif r["output_file"]["filename"] != "":
                     r.setdefault(
                         "text", f"Created output file {r['output_file']['filename']}"
                     )
@@ -1,21 +1,29 @@
-import copy
-import os
+import asyncio
+import math
 from typing import Any, Dict, List
 
 from langchain_community.tools.tavily_search import TavilySearchResults
-from tavily import TavilyClient
 
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from backend.model_deployments.base import BaseDeployment
+from backend.services.file_index import tokenize
+from backend.services.http_client import get_http_client
 from backend.tools.base import BaseTool
 
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+TAVILY_TIMEOUT_SECONDS = 100
+
 
 class TavilyInternetSearch(BaseTool):
     NAME = "web_search"
-    TAVILY_API_KEY = Settings().tools.web_search.api_key
+    TAVILY_API_KEY = get_settings().tools.web_search.api_key
+    RERANK_BATCH_SIZE = 500
+    # Snippets of a page's raw content sent to the reranker, besides its summary
+    MAX_SNIPPETS_PER_PAGE = 20
+    MIN_SNIPPET_WORDS = 10
+    MAX_SNIPPET_WORDS = 300
 
     def __init__(self):
-        self.client = TavilyClient(api_key=self.TAVILY_API_KEY)
         self.num_results = 6
 
     @classmethod
@@ -24,9 +32,7 @@ class TavilyInternetSearch(BaseTool):
 
     async def call(self, parameters: dict, **kwargs: Any) -> List[Dict[str, Any]]:
         query = parameters.get("query", "")
-        result = self.client.search(
-            query=query, search_depth="advanced", include_raw_content=True
-        )
+        result = await self.search(query)
 
         if "results" not in result:
             return []
@@ -37,18 +43,14 @@ class TavilyInternetSearch(BaseTool):
             expanded.append(result)
 
             # Get other snippets
-            snippets = result["raw_content"].split("\n")
-            for snippet in snippets:
-                if result["content"] != snippet:
-                    if len(snippet.split()) <= 10:
-                        continue  # Skip snippets with less than 10 words
-
-                    new_result = {
+            for snippet in self.select_snippets(query, result):
+                expanded.append(
+                    {
                         "url": result["url"],
                         "title": result["title"],
-                        "content": snippet.strip(),
+                        "content": snippet,
                     }
-                    expanded.append(new_result)
+                )
 
         reranked_results = await self.rerank_page_snippets(
             query, expanded, model=kwargs.get("model_deployment"), **kwargs
@@ -59,6 +61,51 @@ class TavilyInternetSearch(BaseTool):
             for result in reranked_results
         ]
 
+    async def search(self, query: str) -> Dict[str, Any]:
+        response = await get_http_client().post(
+            TAVILY_SEARCH_URL,
+            json={
+                "api_key": self.TAVILY_API_KEY,
+                "query": query,
+                "search_depth": "advanced",
+                "include_raw_content": True,
+            },
+            timeout=TAVILY_TIMEOUT_SECONDS,
+            # Searching has no side effect, it can be retried
+            retry=True,
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def select_snippets(self, query: str, result: Dict[str, Any]) -> List[str]:
+        """
+        Splits the raw content of a page in snippets and keeps the
+        MAX_SNIPPETS_PER_PAGE sharing the most terms with the query, so that
+        long pages don't flood the reranker.
+        """
+        seen = {result["content"]}
+        snippets = []
+        for line in (result.get("raw_content") or "").split("\n"):
+            words = line.split()
+            if len(words) <= self.MIN_SNIPPET_WORDS:
+                continue  # Skip snippets with less than 10 words
+
+            snippet = " ".join(words[: self.MAX_SNIPPET_WORDS])
+            if snippet not in seen:
+                seen.add(snippet)
+                snippets.append(snippet)
+
+        if len(snippets) <= self.MAX_SNIPPETS_PER_PAGE:
+            return snippets
+
+        query_terms = set(tokenize(query))
+        scores = [len(query_terms.intersection(tokenize(s))) for s in snippets]
+        best = sorted(range(len(snippets)), key=lambda i: scores[i], reverse=True)[
+            : self.MAX_SNIPPETS_PER_PAGE
+        ]
+        # Keep the snippets in the order of the page
+        return [snippets[i] for i in sorted(best)]
+
     async def rerank_page_snippets(
         self,
         query: str,
@@ -69,31 +116,38 @@ class TavilyInternetSearch(BaseTool):
         if len(snippets) == 0:
             return []
 
-        rerank_batch_size = 500
-        relevance_scores = [None for _ in range(len(snippets))]
-        for batch_start in range(0, len(snippets), rerank_batch_size):
-            snippet_batch = snippets[batch_start : batch_start + rerank_batch_size]
-            batch_output = await model.invoke_rerank(
-                query=query,
-                documents=[
-                    f"{snippet['title']} {snippet['content']}"
-                    for snippet in snippet_batch
-                ],
-                ctx=None,
-                **kwargs,
-            )
-            for b in batch_output.get("results", []):
+        batch_starts = range(0, len(snippets), self.RERANK_BATCH_SIZE)
+        batch_outputs = await asyncio.gather(
+            *[
+                model.invoke_rerank(
+                    query=query,
+                    documents=[
+                        f"{snippet['title']} {snippet['content']}"
+                        for snippet in snippets[
+                            batch_start : batch_start + self.RERANK_BATCH_SIZE
+                        ]
+                    ],
+                    ctx=None,
+                    **kwargs,
+                )
+                for batch_start in batch_starts
+            ]
+        )
+
+        relevance_scores = [-math.inf for _ in range(len(snippets))]
+        for batch_start, batch_output in zip(batch_starts, batch_outputs):
+            for b in (batch_output or {}).get("results", []):
                 index = b.get("index", None)
                 relevance_score = b.get("relevance_score", None)
-                if index is not None:
+                if index is not None and relevance_score is not None:
                     relevance_scores[batch_start + index] = relevance_score
 
-        reranked, seen_urls = [], []
+        reranked, seen_urls = [], set()
         for _, result in sorted(
             zip(relevance_scores, snippets), key=lambda x: x[0], reverse=True
         ):
             if result["url"] not in seen_urls:
-                seen_urls.append(result["url"])
+                seen_urls.add(result["url"])
                 reranked.append(result)
 
         return reranked[: self.num_results]
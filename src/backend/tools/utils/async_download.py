@@ -1,16 +1,22 @@
 import asyncio
 import functools
 
-import aiohttp
-
+from backend.services.http_client import close_http_client, get_http_client
 from backend.services.logger.utils import get_logger
 
-TIMEOUT = aiohttp.ClientTimeout(total=120)
+TIMEOUT_SECONDS = 120
 logger = get_logger()
 
 
 def sync_perform(id_to_urls: dict[str, str], access_token: str) -> dict[str, str]:
-    return asyncio.run(_download_files(id_to_urls, access_token))
+    async def download_files() -> dict[str, str]:
+        try:
+            return await _download_files(id_to_urls, access_token)
+        finally:
+            # The event loop is closed after the download, and its connections too
+            await close_http_client()
+
+    return asyncio.run(download_files())
 
 
 async def async_perform(
@@ -22,22 +28,18 @@ async def async_perform(
 async def _download_files(
     id_to_urls: dict[str, str], access_token: str
 ) -> dict[str, str]:
-    async with aiohttp.ClientSession() as session:
-        tasks = [
-            _download(session, id, url, access_token)
-            for (id, url) in id_to_urls.items()
-        ]
-        id_to_texts = await asyncio.gather(*tasks)
-        return functools.reduce(lambda x, y: x | y, id_to_texts)
-
-
-async def _download(
-    session: aiohttp.ClientSession, id: str, url: str, access_token: str
-):
+    tasks = [_download(id, url, access_token) for (id, url) in id_to_urls.items()]
+    id_to_texts = await asyncio.gather(*tasks)
+    return functools.reduce(lambda x, y: x | y, id_to_texts, {})
+
+
+async def _download(id: str, url: str, access_token: str):
     headers = {"Authorization": f"Bearer {access_token}"}
     try:
-        async with session.get(url, headers=headers, timeout=TIMEOUT) as response:
-            return {id: await response.text()}
+        response = await get_http_client().get(
+            url, headers=headers, timeout=TIMEOUT_SECONDS
+        )
+        return {id: response.text}
     except Exception as e:
         logger.error(event=f"[Async Download]: Error fetching url: {url}, {e}")
         return {}
@@ -0,0 +1,236 @@
+import fcntl
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import chromadb
+from chromadb.config import Settings as ChromaSettings
+from langchain.text_splitter import CharacterTextSplitter
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_community.vectorstores import Chroma
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from backend.config.settings import get_settings
+
+VECTOR_STORE_CHUNK_SIZE = 300
+VECTOR_STORE_CHUNK_OVERLAP = 0
+# Bump when the loading or splitting of files changes, so that stores are rebuilt
+VECTOR_STORE_VERSION = 1
+HASH_BLOCK_BYTES = 1 << 20
+# Content hashes kept in memory, the least recently used are dropped first
+CONTENT_HASH_CACHE_SIZE = 1024
+
+_clients: dict[str, chromadb.ClientAPI] = {}
+_vector_stores: dict[tuple[str, str], Chroma] = {}
+# Content hash of each file, by path, modification time and size
+_content_hashes: OrderedDict[tuple[str, int, int], str] = OrderedDict()
+_lock = threading.Lock()
+
+
+def file_content_hash(path: str) -> str:
+    """
+    Returns the SHA-256 of a file, hashed again only when it was modified.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        if key in _content_hashes:
+            _content_hashes.move_to_end(key)
+            return _content_hashes[key]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BLOCK_BYTES):
+            digest.update(block)
+
+    with _lock:
+        # Previous versions of the file
+        for cached in [cached for cached in _content_hashes if cached[0] == key[0]]:
+            del _content_hashes[cached]
+        _content_hashes[key] = digest.hexdigest()
+        while len(_content_hashes) > CONTENT_HASH_CACHE_SIZE:
+            _content_hashes.popitem(last=False)
+    return digest.hexdigest()
+
+
+def embedding_model_name(embeddings: Embeddings) -> str:
+    return getattr(embeddings, "model", None) or type(embeddings).__name__
+
+
+def collection_name(content_hash: str, model: str) -> str:
+    """
+    Name of the collection of a file's chunks embedded with a model.
+    """
+    key = (
+        f"{VECTOR_STORE_VERSION}:{content_hash}:{model}:"
+        f"{VECTOR_STORE_CHUNK_SIZE}:{VECTOR_STORE_CHUNK_OVERLAP}"
+    )
+    # Chroma names are limited to 63 characters
+    return "file-" + hashlib.sha256(key.encode()).hexdigest()[:48]
+
+
+def load_chunks(path: str) -> list[Document]:
+    loader = PyPDFLoader(path)
+    text_splitter = CharacterTextSplitter(
+        chunk_size=VECTOR_STORE_CHUNK_SIZE, chunk_overlap=VECTOR_STORE_CHUNK_OVERLAP
+    )
+    return loader.load_and_split(text_splitter)
+
+
+def get_vector_store(
+    path: str, embeddings: Embeddings, persist_directory: Optional[str] = None
+) -> Chroma:
+    """
+    Returns the vector store of a PDF's chunks, built once per file content and
+    embedding model and persisted in persist_directory for other processes.
+
+    Building a store for a modified file deletes the store of its previous
+    content. Blocks on the embedding model, call it in a thread.
+
+    Args:
+        path (str): Path of the PDF
+        embeddings (Embeddings): Embedding model
+        persist_directory (Optional[str]): Directory of the stores, from the
+            settings by default
+
+    Returns:
+        Chroma: The vector store
+    """
+    persist_directory = (
+        persist_directory or get_settings().tools.vector_retriever.persist_directory
+    )
+    name = collection_name(file_content_hash(path), embedding_model_name(embeddings))
+    key = (os.path.abspath(persist_directory), name)
+    if key in _vector_stores:
+        return _vector_stores[key]
+
+    client = get_client(persist_directory)
+    with build_lock(persist_directory, name):
+        if key in _vector_stores:
+            return _vector_stores[key]
+
+        if not is_complete(client, name):
+            build_vector_store(client, persist_directory, name, path, embeddings)
+
+        vector_store = Chroma(
+            client=client, collection_name=name, embedding_function=embeddings
+        )
+        _vector_stores[key] = vector_store
+    return vector_store
+
+
+def build_vector_store(
+    client: chromadb.ClientAPI,
+    persist_directory: str,
+    name: str,
+    path: str,
+    embeddings: Embeddings,
+) -> None:
+    source = os.path.abspath(path)
+    try:
+        # Left by a build that did not complete
+        client.delete_collection(name)
+    except ValueError:
+        pass
+
+    chunks = load_chunks(path)
+    vector_store = Chroma(
+        client=client,
+        collection_name=name,
+        embedding_function=embeddings,
+        collection_metadata={"source": source},
+    )
+    if chunks:
+        vector_store.add_documents(
+            chunks, ids=[str(number) for number in range(len(chunks))]
+        )
+    # The chunk count marks the collection as complete
+    client.get_collection(name).modify(
+        metadata={"source": source, "chunks": len(chunks)}
+    )
+
+    # Collections of the previous contents of the file
+    for collection in client.list_collections():
+        if (
+            collection.name != name
+            and (collection.metadata or {}).get("source") == source
+        ):
+            delete_collection(client, persist_directory, collection.name)
+
+
+def delete_collection(
+    client: chromadb.ClientAPI, persist_directory: str, name: str
+) -> None:
+    """
+    Deletes a collection with its lock file, unless it is being built.
+    """
+    try:
+        with build_lock(persist_directory, name, blocking=False):
+            client.delete_collection(name)
+            # Processes waiting for the lock take a new one, see build_lock
+            os.remove(lock_path(persist_directory, name))
+    except BlockingIOError:
+        return
+
+    for key in [key for key in _vector_stores if key[1] == name]:
+        del _vector_stores[key]
+
+
+def is_complete(client: chromadb.ClientAPI, name: str) -> bool:
+    try:
+        collection = client.get_collection(name)
+    except ValueError:
+        return False
+    chunks = (collection.metadata or {}).get("chunks")
+    return chunks is not None and collection.count() == chunks
+
+
+def get_client(persist_directory: str) -> chromadb.ClientAPI:
+    path = os.path.abspath(persist_directory)
+    with _lock:
+        if path not in _clients:
+            os.makedirs(path, exist_ok=True)
+            _clients[path] = chromadb.PersistentClient(
+                path=path, settings=ChromaSettings(anonymized_telemetry=False)
+            )
+        return _clients[path]
+
+
+def lock_path(persist_directory: str, name: str) -> str:
+    return os.path.join(persist_directory, f"{name}.lock")
+
+
+@contextmanager
+def build_lock(
+    persist_directory: str, name: str, blocking: bool = True
+) -> Iterator[None]:
+    """
+    Builds a collection in one thread of one process at a time.
+
+    Raises BlockingIOError when blocking is False and the lock is held.
+    """
+    path = lock_path(persist_directory, name)
+    while True:
+        lock_file = open(path, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            lock_file.close()
+            raise
+        # The lock file is deleted with its collection, possibly while waiting
+        try:
+            if os.path.samestat(os.fstat(lock_file.fileno()), os.stat(path)):
+                break
+        except FileNotFoundError:
+            pass
+        lock_file.close()
+
+    try:
+        yield
+    finally:
+        fcntl.flock(lock_file, fcntl.LOCK_UN)
+        lock_file.close()
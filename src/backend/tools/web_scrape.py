@@ -1,8 +1,6 @@
 from typing import Any, Dict, List
 
-from bs4 import BeautifulSoup
-from requests import get
-
+from backend.services.web_scraper import get_web_scraper
 from backend.tools.base import BaseTool
 
 
@@ -16,25 +14,21 @@ class WebScrapeTool(BaseTool):
     async def call(self, parameters: dict, **kwargs: Any) -> List[Dict[str, Any]]:
         url = parameters.get("url")
 
-        response = get(url)
-        if not response.ok:
-            error_message = f"HTTP {response.status_code} {response.reason}"
+        try:
+            page = await get_web_scraper().scrape(url)
+        except ValueError as e:
             return [
-                (
-                    {
-                        "text": f"Cannot open and scrape URL {url}, Error: {error_message}",
-                        "url": url,
-                    }
-                )
+                {
+                    "text": f"Cannot open and scrape URL {url}, Error: {e}",
+                    "url": url,
+                }
             ]
 
-        soup = BeautifulSoup(response.text, "html.parser")
-        text = soup.get_text(separator="\n")
-
         return [
             (
                 {
-                    "text": text,
+                    "text": page.text,
+                    "title": page.title,
                     "url": url,
                 }
             )
@@ -1,39 +1,66 @@
+import shutil
+from unittest.mock import patch
+
+import pytest
+from llama_index.core import SimpleDirectoryReader
+
 from community.tools import LlamaIndexUploadPDFRetriever
+from community.tools.llama_index import MAX_CHUNKS
+
+
+@pytest.fixture
+def pdf_path(tmp_path) -> str:
+    path = str(tmp_path / "document.pdf")
+    shutil.copy("src/backend/tests/test_data/Mariana_Trench.pdf", path)
+    return path
+
+
+@pytest.mark.asyncio
+async def test_pdf_retriever(pdf_path) -> None:
+    retriever = LlamaIndexUploadPDFRetriever(pdf_path)
+    query = "How deep is the Challenger Deep?"
+
+    result = await retriever.call({"query": query})
+
+    assert 0 < len(result) <= MAX_CHUNKS
+    assert any("Challenger Deep" in document["text"] for document in result)
+
+
+@pytest.mark.asyncio
+async def test_pdf_retriever_parses_once(pdf_path) -> None:
+    retriever = LlamaIndexUploadPDFRetriever(pdf_path)
+
+    with patch(
+        "community.tools.llama_index.SimpleDirectoryReader",
+        wraps=SimpleDirectoryReader,
+    ) as mock_reader:
+        first = await retriever.call({"query": "mariana trench"})
+        second = await LlamaIndexUploadPDFRetriever(pdf_path).call(
+            {"query": "mariana trench"}
+        )
+        other = await retriever.call({"query": "pressure at the bottom"})
+
+    assert mock_reader.call_count == 1
+    assert first == second
+    assert other != first
+
+
+@pytest.mark.asyncio
+async def test_pdf_retriever_parses_modified_file(pdf_path) -> None:
+    retriever = LlamaIndexUploadPDFRetriever(pdf_path)
+    await retriever.call({"query": "trench"})
+
+    shutil.copy("src/backend/tests/test_data/Tapas.pdf", pdf_path)
+    result = await retriever.call({"query": "tapas"})
+
+    assert "tapa" in result[0]["text"].lower()
+
+
+@pytest.mark.asyncio
+async def test_pdf_retriever_no_matching_chunks(pdf_path) -> None:
+    retriever = LlamaIndexUploadPDFRetriever(pdf_path)
 
+    result = await retriever.call({"query": "zzzzzz"})
 
-def test_pdf_retriever() -> None:
-    file_path = "src/backend/tests/test_data/Mariana_Trench.pdf"
-    retriever = LlamaIndexUploadPDFRetriever(file_path)
-    query = "What is the mariana trench?"
-    expected_docs = [
-        {
-            "text": "Location of the Mariana TrenchMariana Trench\nThe Mariana Trench is an oceanic trench located in the\nwestern Pacific Ocean, about 200 kilometres (124 mi)\neast of the Mariana Islands; it is the deepest oceanic\ntrench on Earth. It is crescent-shaped and measures\nabout 2,550 km (1,580 mi) in length and 69 km (43 mi)\nin width. The maximum know n depth is 10,984 ± 25\nmetres (36,037 ± 82 ft; 6,006 ± 14 fathoms;\n6.825 ± 0.016 mi) at the southern end of a small slot-\nshaped valley in its floor know n as the Challenger\nDeep.[1] The deepest point of the trench is more than\n2 km (1.2 mi) farther from sea level than the peak of\nMount Everest.[a]\nAt the bottom of the trench, the water column above\nexerts a pressure of 1,086 bar (15,750 psi), more than\n1,071 times the standard atmospheric pressure at sea\nlevel. At this pressure, the density of water is increased\nby 4.96% . The temperature at the bottom is 1 to 4 °C (34\nto 39 ° F).[4]\nIn 2009, the Mariana Trench was established as a US\nNational Monum ent.[5]\nOne-celled organisms called monothalamea have been\nfound in the trench at a record depth of 10.6 km (35,000 ft; 6.6 mi) below the sea surface by researchers\nfrom Scripps Institution of Oceanography. [6] Data has also sugge sted that microbial life forms thrive within\nthe trench.[7][8]\nThe Mariana Trench is named after the nearby Mariana Islands, which are named Las Marianas in hono r of\nSpanish Queen Mariana of Austria. The islands are part of the island arc that is formed on an over-riding\nplate, called the Mariana Plate (also named for the islands), on t he western side of the trench.\nThe Mariana Trench is part of the Izu–Bonin–M ariana subduc tion system that forms the bounda ry between\ntwo tectonic plates. In this system, the western edge of one plate, the Pacific Plate, is subduc ted (i.e., thrust)\nbeneath the smaller Mariana Plate that lies to the west. Crustal material at the western edge of the Pacific\nPlate is some of the oldest oceanic crust on Earth (up to 170 million years old), and is, therefore, cooler and\ndenser; hence its great height difference relative to the higher-riding (and younge r) Mariana Plate. The\ndeepest area at the plate bounda ry is the Mariana Trench proper.Coordinates: 11°21′N 142°12′E\nEtymology\nGeology"
-        },
-        {
-            "text": 'The Pacific plate is subducted beneath the Mariana Plate,\ncreating the Mariana trench, and (further on) the arc of the\nMariana Islands, as water trapped in the plate is released\nand explodes upward to form island volcanoes and\nearthquakes.\nOcean trenches in the western\nPacificThe movement of the Pacific and Mariana\nplates is also indirectly respons ible for the\nformation of the Mariana Islands. These\nvolcanic islands are caused by flux melting of\nthe uppe r mantle due to the release of water\nthat is trapped in minerals of the subducted\nportion of  the Pacific Plate.\nThe trench was first sounde d during the\nChallenger expedition in 1875 using a\nweighted rope, which recorded a depth of\n4,475 fathoms (8,184 metres; 26,850\nfeet).[9][10] In 1877, a map was published\ncalled Tiefenkarte des Grossen Ozeans ("Depth\nmap of the Great Ocean") by Petermann,\nwhich showed a Challenger Tief ("Challenger deep") at the location\nof that soundi ng. In 1899, USS Nero, a conve rted collier, recorded\na depth of 5,269 f athoms (9,636 m etres; 31,614 f eet).[11]\nIn 1951, unde r Chief Scientist Thomas Gaskell, Challenger II\nsurveyed the trench using echo sounding, a much more precise and\nvastly easier way to measure depth than the soundi ng equipment\nand drag lines used in the original expedition. During this survey,\nthe deepest part of the trench was recorded when the Challenger II\nmeasured a depth of 5,960 fathoms (10,900 metres; 35,760 feet) at\n11°19′N 142° 15′E,[12] know n as the Challenger Deep.[13]\nIn 1957, the Soviet vessel Vityaz reported a depth of 11,034 m\n(36,201 ft; 6,033 fathoms) at a location dubbe d the Mariana\nHollow.[14]\nIn 1962, the surface ship M.V. Spencer F. Baird recorded a\nmaximum depth of 10,915 m (35,810  ft; 5,968 fathoms) using\nprecision depth gauges.\nIn 1984, the Japanese survey vessel Takuyō (拓洋 ) collected data\nfrom the Mariana Trench using a narrow, multi-beam echo sounde r;\nit reported a maximum depth of 10,924 metres (35,840 ft), also\nreported as 10,920 ± 10 m (35,827 ± 33 ft; 5,971.1 ± 5.5 fathoms).[15] Remotely Operated Vehicle KAIKO\nreached the deepest area of the Mariana Trench and made the deepest diving record of 10,91 1 m (35,797 ft;\n5,966 f athoms) on 24 M arch 1995.[16]\nDuring surveys carried out between 1997 and 2001, a spot was found along the Mariana Trench that had a\ndepth similar to the Challenger Deep, possibly even deeper. It was discovered while scientists from the\nHawaii Institute of Geophys ics and Planetology were completing a survey around Guam; they used a sonar\nmapping system towed behind the research ship to conduc t the survey. This new spot was named the\nHMRG (Hawaii Mapping R esearch Group) Deep, after the group of  scientists who di scovered it.[17]Research history'
-        },
-        {
-            "text": "The bathyscaphe Trieste (designed\nby Auguste Piccard), the first crewed\nvehicle to reach the bottom of the\nMariana Trench[22]On 1 June 2009, mapping aboard the RV Kilo Moana  (mothership of the Nereus vehicle), indicated a spot\nwith a depth of 10,971 m (35,994 ft; 5,999 fathoms). The sonar mapping of the Challenger Deep was\npossible by its Simrad EM120 sonar multibeam bathymetry system for deep water. The sonar system uses\nphase and amplitude bottom detection, with an accuracy of better than 0.2%  of water depth across the entire\nswath (implying that the depth figure is accurate to ± 22 m etres (72 ft; 12 fathoms)).[18][19]\nIn 2011, it was announc ed at the American Geophys ical Union Fall Meeting that a US Navy hydrographic\nship equipped with a multibeam echosounde r conduc ted a survey which mapped the entire trench to 100 m\n(330 ft; 55 fathoms) resolution.[2] The mapping revealed the existence of four rocky outcrops thought  to be\nformer seamounts.[20]\nThe Mariana Trench is a site chosen by researchers at Washington University in St. Louis and the Woods\nHole Oceanographic Institution in 2012 for a seismic survey to investigate the subsurface water cycle.\nUsing both ocean-bottom seismometers and hydrophone s, the scientists are able to map structures as deep\nas 97 ki lometres (318,000 f t; 53,000 f athoms; 60 m i) beneath the surface.[21]\nAs of 2022, 22 crewed descents and seven uncrewed descents have\nbeen achieved. The first was the crewed descent by Swiss-\ndesigned, Italian-built, United States Navy-owned bathyscaphe\nTrieste, which reached the bottom at 1:06 pm on 23 January 1960,\nwith Don Walsh and Jacques Piccard on board.[13][23] Iron shot\nwas used for ballast, with gasoline for buoya ncy.[13] The onboa rd\nsystems indicated a depth of 37,800  feet (11,521 m; 6,300\nfathoms),[24] but this was later revised to 35,814 feet (10,916 m;\n5,969 fathoms).[25] The depth was estimated from a conve rsion of\npressure measured and calculations based on the water density from\nsea surface to seabed.[23]\nThis was followed by the uncrewed ROVs Kaikō in 1996 and\nNereus in 2009. The first three expeditions directly measured very\nsimilar depths of 10,902 to 10,916 m (35,768 to 35,814 ft; 5,961 to\n5,969 fathoms).[26][27] The fourth was made by Canadian film director James Cameron on 26 March 2012.\nHe reached the bottom of the Mariana Trench in the submersible vessel Deepsea Challenger, diving to a\ndepth of 10,908 m  (35,787 f t; 5,965 f athoms).[28][29][30]\nIn July 2015, members of the National Oceanic and Atmospheric Administration, Oregon State University,\nand the Coast Guard submerged a hydrophone  into the deepest part of the Mariana Trench, the Challenger\nDeep, never having previously deployed one past a mile. The titanium-shelled hydrophone  was designed to\nwithstand the immense pressure 7 mi (37,000 ft; 6,200 fathoms; 11,000 m) unde r.[31] Although researchers\nwere unable to retrieve the hydrophone  until November, the data capacity was full within the first 23 days.\nAfter months of analyzing the sounds , the experts were surprised to pick up natural sounds  like\nearthqua kes, typhoons , baleen whales, and machine-made sounds  such as boats.[32] Due to the mission's\nsuccess, the researchers announc ed plans to deploy a second hydrophone  in 2017 for an extended period of\ntime.\nVictor Vescovo achieved a new record descent to 10,92 8 m (35,853 ft; 5,976 fathoms) on 28 April 2019\nusing the DSV Limiting Factor, a Triton 36000/ 2 model manufactured by Florida-based Triton Submarines.\nHe dived four times between 28 A pril and 5 May 2019, becoming the first person to dive into Challenger\nDeep more than onc e.[33][34][35]D e s c e n t s"
-        },
-        {
-            "text": 'On 8 May 2020, a joint project between the Russian shipbuilders, scientific teams of the Russian Academy\nof Sciences with the suppor t of the Russian Founda tion for Advanced Research Projects and the Pacific\nFleet submerged the autonom ous unde rwater vehicle Vityaz-D to the bottom of the Mariana Trench at a\ndepth of 10,028 m (32,900 ft; 5,483 fathoms). Vityaz-D is the first unde rwater vehicle to operate\nautonom ously at the extreme depths of the Mariana Trench. The duration of the mission, excluding diving\nand surfacing, w as more than 3 hour s.[36][37]\nOn 10 November 2020, the Chinese submersible Fendouz he reached the bottom of the Mariana Trench at a\ndepth of 10,909 m  (35,791 f t; 5,965 f athoms).[38][39]\nThe expedition conduc ted in 1960 claimed to have observed, with great surprise because of the high\npressure, large creatures living at the bottom, such as a flatfish about 30 cm (12 in) long,[24] and shrimp.[40]\nAccording to Piccard, "The bottom appeared light and clear, a waste of firm diatomaceous ooze".[24] Many\nmarine biologists are now skeptical of the suppos ed sighting of the flatfish, and it is sugge sted that the\ncreature may instead have been a sea cucumber.[41][42] During the second expedition, the uncrewed vehicle\nKaikō collected mud samples from the seabed.[43] Tiny or ganisms were found t o be living in those samples.\nIn July 2011, a research expedition deployed untethered landers, called drop cams, equipped with digital\nvideo cameras and lights to explore this deep-sea region. Among many other living organisms, some\ngigantic single-celled foraminiferans with a size of more than 10 cm (4 in), belonging to the class of\nmonothalamea, were observed.[44] Monothalamea are noteworthy for their size, their extreme abunda nce on\nthe seafloor, and their role as hosts for a variety of organisms.\nIn December 2014, a new species of snailfish was discovered at a depth of 8,145 m (26,722 ft; 4,454\nfathoms), breaking the previous record for the deepest living fish seen on vi deo.[45]\nDuring the 2014 expedition, several new species were filmed, including huge amphipods  know n as\nsupergiants. Deep-sea gigantism is the process where species grow larger than their shallow-water\nrelatives.[45]\nIn May 2017, a n uni dentified type of snailfish was filmed at a depth of 8,178 m etres (26,800 f t).[46]\nIn 2016, a research expedition looke d at the chemical makeup of crustacean scavengers collected from the\nrange of 7,841–10,250 m (25,725–33 ,629 ft; 4,288–5,605 fathoms) within the trench. Within these\norganisms, the researchers found extremely elevated concentrations of PCBs, a chemical toxin banned in\nthe 1970s  for its environmental harm, concentrated at all depths within the sediment of the trench.[47]\nFurther research has found that amphipods  also ingest microplastics, with 100%  of amphipods having at\nleast one piece of synthetic material in their stomachs.[48][49]\nIn 2019, Victor Vescovo reported finding a plastic bag and candy wrappers at the bottom of the trench.[50]\nThat year, Scientific American also reported that carbon-14 from nuclear bomb testing has been found in the\nbodies of aquatic animals found i n the trench.[51]Life\nP o l l u t i o n\nPossible nuclear waste disposal site'
-        },
-        {
-            "text": 'Like other oceanic trenches, the Mariana Trench has been propos ed as a site for nuclear waste\ndisposal[52][53] in the hope  that tectonic plate subduc tion occurring at the site might eventually push the\nnuclear waste deep into the Earth\'s mantle, the second layer of the Earth. However, ocean dumping of\nnuclear waste is prohibited by international law.[52][53][54] Furthermore, plate subduc tion zones are\nassociated with very large megathrust earthqua kes, the effects of which are unpredictable for the safety of\nlong-term disposal of nuclear wastes within the hadope lagic ecosystem.[53]\nOceania portal\nMarianas Trench Marine National Monument, United States national monument at the\ntrench. This National Monument protects 246,610 square kilometres (95,216 sq mi) of\nsubmerged lands and waters of the Mariana Archipelago. It includes some of the Mariana\nTrench, but not the deepest part, the Challenger Deep, which lies just outside the monument\narea.\nChallenger Deep\nList of people who descended to Challenger Deep\nLitke Deep, closest point to Earth\'s center\na. Mariana Trench is 10,994 m (36,070 ft; 6.831 mi) deep,[2] while Mount Everest is 8,848 m\n(29,029 ft; 5.498 mi) tall.[3] The difference is 2,146 m (7,041 ft; 1.333 mi), or at least no less\nthan 2,104 m (6,903 ft; 1.307 mi), accounting for the combined 42 m (138 ft; 0.026 mi)\nuncertainty in the measurements.\n1. Gardner, James V.; Armstrong, Andrew A.; Calder, Brian R.; Beaudoin, Jonathan (2 January\n2014). "So, How Deep Is the Mariana Trench?" (http://ccom.unh.edu/sites/default/files/public\nations/Gardner-et-al-2014-Challenger-Deep.pdf) (PDF). Marine Geodesy. Informa UK\nLimited. 3 7 (1): 1–13. Bibcode:2014MarGe..37....1G (https://ui.adsabs.harvard.edu/abs/2014\nMarGe..37....1G). doi:10.1080/01490419.2013.837849 (https://doi.org/10.1080%2F0149041\n9.2013.837849). ISSN 0149-0419 (https://www.worldcat.org/issn/0149-0419).\nS2CID 128668687 (https://api.semanticscholar.org/CorpusID:128668687).\n2. "Scientists map Mariana Trench, deepest known section of ocean in the world" (https://www.t\nelegraph.co.uk/news/earth/environment/8940571/Scientists-map-Mariana-Trench-deepest-k\nnown-section-of-ocean-in-the-world.html). The Telegraph. 7 December 2011. Archived (http\ns://ghostarchive.org/archive/20220110/https://www.telegraph.co.uk/news/earth/environment/\n8940571/Scientists-map-Mariana-Trench-deepest-known-section-of-ocean-in-the-world.htm\nl) from the original on 10 January 2022. Retrieved 23 June 2018.\n3. "Official height for Everest set" (http://news.bbc.co.uk/2/hi/south_asia/8608913.stm). BBC\nNews. 8 April 2010. Retrieved 24 June 2018.\n4. "The Temperature in the Mariana Trench" (http://www.infoplease.com/askeds/temperature-m\nariana-trench.html). Infoplease. 28 February 2017.\n5. "About the Monument – Mariana Trench" (https://www.fws.gov/refuge/Mariana_Trench_Marin\ne_National_Monument/about/About_the_Monument.html). U.S. Fish and Wildlife Service.See also\nNotes\nReferences'
-        },
-        {
-            "text": '6. "Giant amoeba found in Mariana Trench – 6.6 miles beneath the sea" (http://latimesblogs.lati\nmes.com/nationnow/2011/10/giant-amoeba-found-mariana-trench-beneath-the-sea.html).\nLos Angeles Times. 26 October 2011. Retrieved 23 March 2012.\n7. Choi, Charles Q. (17 March 2013). "Microbes Thrive in Deepest Spot on Earth" (http://www.li\nvescience.com/27954-microbes-mariana-trench.html). LiveScience. Retrieved 17 March\n2013.\n8. Glud, Ronnie; Wenzhöfer, Frank; Middleboe, Mathias; Oguri, Kazumasa; Turnewitsch,\nRobert; Canfield, Donald E.; Kitazato, Hiroshi (17 March 2013). "High rates of microbial\ncarbon turnover in sediments in the deepest oceanic trench on Earth". Nature Geoscience. 6\n(4): 284–288. Bibcode:2013NatGe...6..284G (https://ui.adsabs.harvard.edu/abs/2013NatGe...\n6..284G). doi:10.1038/ngeo1773 (https://doi.org/10.1038%2Fngeo1773).\n9. "About the Mariana Trench – Deepsea Challenge Expedition" (https://web.archive.org/web/2\n0130628083954/http://deepseachallenge.com/the-expedition/mariana-trench/).\nDeepseachallenge.com. 26 March 2012. Archived from the original (http://deepseachalleng\ne.com/the-expedition/mariana-trench/) on 28 June 2013. Retrieved 8 July 2013.\n10. Aitken, Frédéric; Foulc, Jean-Numa (2019). "Chapter 4". From deep sea to laboratory. 1 : the\nfirst explorations of the deep sea by H.M.S. Challenger (1872–1876) (http://www.iste.co.uk/b\nook.php?id=1474). London. ISBN 9781786303745.\n11. Theberge, A. (24 March 2009). "Thirty Years of Discovering the Mariana Trench" (https://ww\nw.hydro-international.com/content/article/thirty-years-of-discovering-the-mariana-trench).\nHydro International. Retrieved 31 July 2010.\n12. Gaskell, Thomas F. (1960). Under The Deep Oceans: Twentieth Century Voyages of\nDiscovery (1st ed.). Eyre & Spottiswood. p. 121.\n13. "The Mariana Trench – Exploration" (http://www.marianatrench.com/mariana_trench-explorat\nion_001.htm). marianatrench.com.\n14. "Mariana Trench" (https://www.britannica.com/place/Pacific-Ocean). Encyclopædia\nBritannica. 18 July 2023.\n15. Tani, S. "Continental shelf survey of Japan" (https://web.archive.org/web/20110309013717/h\nttp://www.gmat.unsw.edu.au/ablos/ABLOS08Folder/Session4-Paper4-Tani.pdf) (PDF).\nArchived from the original (http://www.gmat.unsw.edu.au/ablos/ABLOS08Folder/Session4-P\naper4-Tani.pdf) (PDF) on 9 March 2011. Retrieved 24 December 2010.\n16. Development and Construction of Launcher System of 10000m‐Class Remotely Operated\nVehicle KAIKO (http://www.mhi.co.jp/technology/review/abstractj-32-6-427.html) Archived (htt\nps://web.archive.org/web/20150402104327/http://www.mhi.co.jp/technology/review/abstractj-\n32-6-427.html) 2 April 2015 at the Wayback Machine Mitsubishi Heavy Industry\n17. Whitehouse, David (16 July 2003). "Sea floor survey reveals deep hole" (http://news.bbc.co.\nuk/2/hi/science/nature/3071749.stm). BBC News. Retrieved 17 December 2011.\n18. "Daily Reports for R/V KILO MOANA June and July 2009" (https://web.archive.org/web/2010\n0121061243/http://www.soest.hawaii.edu/UMC/Reports/Archives/KMreportJuneJuly2009.ht\nml). University of Hawaii Marine Center. Archived from the original (http://www.soest.hawaii.e\ndu/UMC/Reports/Archives/KMreportJuneJuly2009.html) on 21 January 2010. Retrieved\n4 January 2010.\n19. "Inventory of Scientific Equipment aboard the R/V KILO MOANA" (https://web.archive.org/we\nb/20100613143513/http://www.soest.hawaii.edu/UMC/KM/scienceequipment.htm).\nUniversity of Hawaii Marine Center. Archived from the original (http://www.soest.hawaii.edu/\nUMC/KM/scienceequipment.htm) on 13 June 2010.\n20. Duncan Geere (7 February 2012). "Four \'bridges\' span the Mariana Trench" (https://web.arch\nive.org/web/20120311150303/http://www.wired.co.uk/news/archive/2012-02/07/bridges-mari\nana-trench). Wired. Archived from the original (https://www.wired.co.uk/news/archive/2012-0\n2/07/bridges-mariana-trench) on 11 March 2012. Retrieved 23 March 2012.'
-        },
-        {
-            "text": '21. "Seismic Survey at the Mariana Trench Will Follow Water Dragged Down into the Earth\'s\nMantle" (https://www.sciencedaily.com/releases/2012/03/120322142201.htm). ScienceDaily.\n22 March 2012. Retrieved 23 March 2012.\n22. Strickland, Eliza (29 February 2012). "Don Walsh Describes the Trip to the Bottom of the\nMariana Trench" (https://spectrum.ieee.org/geek-life/profiles/don-walsh-describes-the-trip-to-t\nhe-bottom-of-the-mariana-trench). IEEE Spectrum. Retrieved 8 July 2013.\n23. "Mariana Trench" (https://web.archive.org/web/20120318064310/http://earthquake.usgs.gov/\nearthquakes/world/guam/mariana_trench.php). Earthquake Hazards Program. United States\nGeological Survey. 21 October 2009. Archived from the original (https://earthquake.usgs.gov/\nearthquakes/world/guam/mariana_trench.php) on 18 March 2012. Retrieved 23 March 2012.\n24. "NOAA Ocean Explorer: History: Quotations: Soundings, Sea-Bottom, and Geophysics" (htt\np://oceanexplorer.noaa.gov/history/quotes/soundings/soundings.html). NOAA Ocean\nExploration and Research.\n25. "Bathyscaphe" (https://www.britannica.com/technology/bathyscaphe). Encyclopædia\nBritannica. 18 April 2020. Retrieved 11 November 2020.\n26. "7,000 m Class Remotely Operated Vehicle: KAIKO 7000" (https://web.archive.org/web/2020\n0410211118/http://www.jamstec.go.jp/e/about/equipment/ships/kaiko7000.html). Japan\nAgency for Marine-Earth Science and Technology. Archived from the original (http://www.jam\nstec.go.jp/e/about/equipment/ships/kaiko7000.html) on 10 April 2020. Retrieved\n11 November 2020.\n27. "Robot sub reaches deepest ocean" (http://news.bbc.co.uk/2/hi/science/nature/8080324.st\nm). BBC. 3 June 2009. Retrieved 11 November 2020.\n28. "A man took a submarine to the deepest place on Earth – and found trash" (https://www.cbc.c\na/news/world/trash-littering-ocean-floor-deepest-submarine-dive-1.5134717). CBC.ca.\nThomson Reuters. 13 May 2019. Retrieved 11 November 2020.\n29. "James Cameron has reached deepest spot on Earth" (https://www.nbcnews.com/id/wbna46\n850002). NBC News. 25 March 2012. Retrieved 25 March 2012.\n30. Broad, William J. (25 March 2012). "Filmmaker in Submarine Voyages to Bottom of Sea" (htt\nps://www.nytimes.com/2012/03/26/science/james-camerons-submarine-trip-to-challenger-de\nep.html). The New York Times. Retrieved 25 March 2012.\n31. Schneider, Kate (7 March 2016). "Eerie sounds from the bottom of the Earth" (https://www.ne\nws.com.au/travel/destinations/eerie-sounds-from-the-bottom-of-the-earth/news-story/53fffdfcb\n549bfcb80c4ea8833b7968b). News.com.au. Retrieved 11 November 2020.\n32. Chappell, Bill (4 March 2016). "Deep-Sea Audio Recordings Reveal A Noisy Mariana\nTrench, Surprising Scientists" (https://www.npr.org/sections/thetwo-way/2016/03/04/4692135\n80/unique-audio-recordings-find-a-noisy-mariana-trench-and-surprise-scientists). NPR.\nRetrieved 1 May 2016.\n33. Fitzherbert, Stephanie (13 May 2019). "Deepest Submarine Dive in history, Five Deeps\nExpedition Conquers Challenger Deep" (https://fivedeeps.com/wp-content/uploads/2019/05/\nFDE-Challenger-Release-FINAL-5132019.pdf) (PDF). The Five Deeps. Retrieved\n11 November 2020.\n34. Loomis, Ilima (3 July 2019). "Limiting Factor Was a Science Opportunity for a Deep-Sea\nGeologist" (https://eos.org/articles/limiting-factor-was-a-science-opportunity-for-a-deep-sea-g\neologist). Eos. Retrieved 11 November 2020.\n35. Blain, Loz (15 May 2019). "Victor Vescovo and the DSV Limiting Factor have found new\ndepths in the Mariana Trench" (https://newatlas.com/five-deeps-dsv-limiting-factor-mariana-tr\nench/59690/). New Atlas. Retrieved 11 November 2020.\n36. "Russian Submarine "Vityaz" Reached the Bottom of the Mariana Trench" (https://www.rgo.r\nu/en/article/russian-submarine-vityaz-reached-bottom-mariana-trench). Russian\nGeographical Society. 13 May 2020. Retrieved 11 November 2020.'
-        },
-        {
-            "text": '37. "Vityaz-D explored Mariana Trench according to preinstalled program — developer" (https://t\nass.com/defense/1166477). TASS. 10 June 2020. Retrieved 11 November 2020.\n38. Westcott, Ben (11 November 2020). "China breaks national record for Mariana Trench\nmanned-dive amid race for deep sea resources" (https://web.archive.org/web/202011111848\n11/https://edition.cnn.com/2020/11/11/asia/china-record-dive-mariana-trench-intl-hnk/). CNN.\nArchived from the original (https://edition.cnn.com/2020/11/11/asia/china-record-dive-marian\na-trench-intl-hnk/) on 11 November 2020. Retrieved 11 November 2020.\n39. Cheng, Xiang; Liu, Liang (10 November 2020). ""奋⽃者 " 号载⼈潜⽔器突破万⽶海深  潜⼊全\n球最深海域 " (https://news.cctv.com/2020/11/10/ARTIQc1R6lp4IlMJT8G3SNqY201110.shtm\nl) [The "Striver" manned submersible breaks through 10,000 meters and dives into the\nworld\'s deepest waters]. China Central Television. Retrieved 11 November 2020.\n40. "Bathyscaphe Trieste | Mariana Trench | Challenger Deep" (http://geology.com/records/bathy\nscaphe-trieste.shtml). Geology.com. Retrieved 1 March 2012.\n41. "James Cameron dives deep for Avatar" (https://www.theguardian.com/environment/2011/ja\nn/18/james-cameron-dives-deep-avatar) Archived (https://web.archive.org/web/2017011806\n4643/https://www.theguardian.com/environment/2011/jan/18/james-cameron-dives-deep-ava\ntar) 18 January 2017 at the Wayback Machine, Guardian, 18 January 2011\n42. "James Cameron heads into the abyss" (http://www.nature.com/news/james-cameron-heads\n-into-the-abyss-1.10246) Archived (https://web.archive.org/web/20120901025830/http://www.\nnature.com/news/james-cameron-heads-into-the-abyss-1.10246) 1 September 2012 at the\nWayback Machine, Nature, 19 March 2012\n43. Woods, Michael; Mary B. Woods (2009). Seven Natural Wonders of the Arctic, Antarctica,\nand the Oceans (https://archive.org/details/sevennaturalwond0000wood_u5g0). Twenty-First\nCentury Books. p. 13 (https://archive.org/details/sevennaturalwond0000wood_u5g0/page/1\n3). ISBN 978-0-8225-9075-0. Retrieved 23 March 2012.\n44. "Giant amoebas discovered in the deepest ocean trench" (http://www.livescience.com/16678\n-giant-amoebas-discovered-deepest-ocean-trench.html). Live Science. 21 October 2011.\nRetrieved 26 March 2012.\n45. Morelle, Rebecca (9 December 2014). "New record for deepest fish" (https://www.bbc.co.uk/\nnews/science-environment-30541065). BBC News. Retrieved 26 August 2017.\n46. "Ghostly fish in Mariana Trench in the Pacific is deepest ever recorded" (https://www.cbc.ca/\nnews/technology/deepest-fish-1.4263003). CBC News. 25 August 2017. Retrieved\n26 August 2017.\n47. Jamieson, Alan J.; Malkocs, Tamas; Piertney, Stuart B.; Fujii, Toyonobu; Zhang, Zulin (13\nFebruary 2017). "Bioaccumulation of persistent organic pollutants in the deepest ocean\nfauna". Nature Ecology & Evolution. 1 (3): 51. doi:10.1038/s41559-016-0051 (https://doi.org/\n10.1038%2Fs41559-016-0051). hdl:2164/9142 (https://hdl.handle.net/2164%2F9142).\nISSN 2397-334X (https://www.worldcat.org/issn/2397-334X). PMID 28812719 (https://pubme\nd.ncbi.nlm.nih.gov/28812719). S2CID 9192602 (https://api.semanticscholar.org/CorpusID:91\n92602).\n48. Jamieson, A. J.; Brooks, L. S. R.; Reid, W. D. K.; Piertney, S. B.; Narayanaswamy, B. E.;\nLinley, T. D. (28 February 2019). "Microplastics and synthetic particles ingested by deep-sea\namphipods in six of the deepest marine ecosystems on Earth" (https://www.ncbi.nlm.nih.gov/\npmc/articles/PMC6408374). Royal Society Open Science. 6 (2): 180667.\nBibcode:2019RSOS....680667J (https://ui.adsabs.harvard.edu/abs/2019RSOS....680667J).\ndoi:10.1098/rsos.180667 (https://doi.org/10.1098%2Frsos.180667). ISSN 2054-5703 (https://\nwww.worldcat.org/issn/2054-5703). PMC 6408374 (https://www.ncbi.nlm.nih.gov/pmc/article\ns/PMC6408374). PMID 30891254 (https://pubmed.ncbi.nlm.nih.gov/30891254).'
-        },
-        {
-            "text": '49. Robbins, Gary (5 September 2019). "UCSD discovers surge in plastics pollution off Santa\nBarbara" (https://www.latimes.com/california/story/2019-09-04/uc-san-diego-discovers-explo\nsion-in-plastics-products-in-seafloor-off-santa-barbara). Los Angeles Times. Retrieved\n5 September 2019.\n50. Street, Francesca (13 May 2019). "Deepest ocean dive recorded: How Victor Vescovo did it"\n(https://www.cnn.com/travel/article/victor-vescovo-deepest-dive-pacific/index.html). CNN\nTravel. CNN. Retrieved 13 May 2019.\n51. Levy, Adam (15 May 2019). ""Bomb Carbon" Has Been Found in Deep-Ocean Creatures" (h\nttps://www.scientificamerican.com/article/bomb-carbon-has-been-found-in-deep-ocean-creat\nures/). Scientific American.\n52. Hafemeister, David W. (2007). Physics of societal issues: calculations on national security,\nenvironment, and energy (https://books.google.com/books?id=LT4MSqv9QUIC&pg=PA187).\nBerlin: Springer. p. 187. ISBN 978-0-387-95560-5.\n53. Kingsley, Marvin G.; Rogers, Kenneth H. (2007). Calculated risks: highly radioactive waste\nand homeland security (https://books.google.com/books?id=bOP4-BpYXrEC&pg=PA75).\nAldershot, Hants, England: Ashgate. pp. 75–76. ISBN 978-0-7546-7133-6.\n54. "Dumping and Loss overview" (https://web.archive.org/web/20110605190619/http://www.la\nw.berkeley.edu/centers/ilr/ona/pages/dumping2.htm). Oceans in the Nuclear Age. Archived\nfrom the original (http://www.law.berkeley.edu/centers/ilr/ona/pages/dumping2.htm) on 5\nJune 2011. Retrieved 18 September 2010.\nMariana Trench Dive (25 March 2012) (https://web.archive.org/web/20140625050833/http://d\neepseachallenge.com/) – Deepsea Challenger\nMariana Trench Dive (23 January 1960) (http://www.britishpathe.com/video/they-dived-7-mil\nes/query/mariana+trench) – Trieste (Newsreel)\nMariana Trench Dive (50th Anniv) (http://www.vvdailypress.com/articles/walsh-18116-regret-\nmiles.html) Archived (https://web.archive.org/web/20130603064615/http://www.vvdailypress.\ncom/articles/walsh-18116-regret-miles.html) 3 June 2013 at the Wayback Machine – Trieste\n– Capt Don Walsh\nMariana Trench – Maps (Google) (https://maps.google.com/maps?q=11.317,+142.25(Marian\na+Trench)&z=6)\nNOAA – Ocean Explorer (http://oceanexplorer.noaa.gov) (Ofc Ocean Exploration & Rsch)\nNOAA – Ocean Explorer – Multimedia (http://oceanexplorer.noaa.gov/explorations/06fire/bac\nkground/marianaarc/marianaarc.html) – Mariana Arc (podcast (http://oceanexplorer.noaa.go\nv/explorations/podcast/oceanexplorer_podcast.xml))\nNOAA – Ocean Explorer – Video Playlist (https://www.youtube.com/view_play_list?p=94B79\n5FD631011E0) – Ring of Fire (2004–2006)\nRetrieved from "https://en.wikipedia.org/w/index.php?title=Mariana_Trench&oldid=1187694887"External links\n'
-        },
-    ]
-    result = retriever.call({"query": query})
-
-    assert expected_docs == result
+    assert len(result) == MAX_CHUNKS
+    assert result[0]["text"].startswith("Location of the Mariana Trench")
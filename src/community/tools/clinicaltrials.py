@@ -1,7 +1,8 @@
 from typing import Any, Dict, List
 
-import requests
+import httpx
 
+from backend.services.http_client import get_http_client
 from community.tools import BaseTool
 
 
@@ -21,10 +22,11 @@ class ClinicalTrials(BaseTool):
     def is_available(cls) -> bool:
         return True
 
-    def call(
+    async def call(
         self,
         parameters: Dict[str, Any],
         n_max_studies: int = 10,
+        **kwargs: Any,
     ) -> List[Dict[str, Any]]:
         query_params = {"sort": "LastUpdatePostDate"}
         if condition := parameters.get("condition", ""):
@@ -38,15 +40,15 @@ class ClinicalTrials(BaseTool):
         query_params["pageSize"] = n_max_studies
 
         try:
-            response = requests.get(self._url, params=query_params)
+            response = await get_http_client().get(self._url, params=query_params)
             response.raise_for_status()
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             return [{"text": f"Could not retrieve studies: {str(e)}"}]
 
         return self._parse_response(response, location, intervention)
 
     def _parse_response(
-        self, response: requests.Response, location: str, intervention: str
+        self, response: httpx.Response, location: str, intervention: str
     ) -> List[Dict[str, Any]]:
         data = response.json()
         return [
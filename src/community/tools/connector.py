@@ -1,7 +1,6 @@
 from typing import Any, Dict, List
 
-import requests
-
+from backend.services.http_client import get_http_client
 from community.tools import BaseTool
 
 """
@@ -32,6 +31,6 @@ class ConnectorRetriever(BaseTool):
             "Authorization": f"Bearer {self.auth}",
         }
 
-        response = requests.post(self.url, json=body, headers=headers)
+        response = await get_http_client().post(self.url, json=body, headers=headers)
 
         return response.json()["results"]
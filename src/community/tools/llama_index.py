@@ -1,7 +1,13 @@
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Any, Dict, List
 
 from llama_index.core import SimpleDirectoryReader
 
+from backend.services.file_index import ChunkIndex, build_chunk_index, search_chunks
 from community.tools import BaseTool
 
 """
@@ -13,6 +19,73 @@ More details:
 https://docs.llamaindex.ai/en/stable/module_guides/querying/retriever/root.html
 """
 
+# Chunks returned per query
+MAX_CHUNKS = 5
+# Parsed files kept in memory, the least recently used are dropped first
+PARSED_DOCUMENTS_CACHE_SIZE = 32
+
+
+@dataclass
+class ParsedDocument:
+    """
+    Text and chunk index of each page of a parsed file.
+    """
+
+    pages: list[str]
+    indexes: list[ChunkIndex]
+
+
+# Parsed files by path, modification time and size
+_parsed_documents: OrderedDict[tuple[str, int, int], ParsedDocument] = OrderedDict()
+_lock = threading.Lock()
+
+
+def parse_document(path: str) -> ParsedDocument:
+    """
+    Parses a file with llama_index, once until the file is modified.
+    """
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        if key in _parsed_documents:
+            _parsed_documents.move_to_end(key)
+            return _parsed_documents[key]
+
+    docs = SimpleDirectoryReader(input_files=[path]).load_data()
+    pages = [doc.text for doc in docs]
+    document = ParsedDocument(
+        pages=pages, indexes=[build_chunk_index(page) for page in pages]
+    )
+
+    with _lock:
+        # Previous versions of the file
+        for cached in [cached for cached in _parsed_documents if cached[0] == key[0]]:
+            del _parsed_documents[cached]
+        _parsed_documents[key] = document
+        while len(_parsed_documents) > PARSED_DOCUMENTS_CACHE_SIZE:
+            _parsed_documents.popitem(last=False)
+    return document
+
+
+def select_chunks(document: ParsedDocument, query: str, top_k: int) -> list[str]:
+    """
+    Returns the chunks of a document most relevant to the query, or its first
+    chunks when none matches.
+    """
+    results = search_chunks(document.indexes, query, top_k)
+    if not results:
+        results = [
+            (page, number, 0)
+            for page, index in enumerate(document.indexes)
+            for number in range(len(index.offsets))
+        ][:top_k]
+
+    chunks = []
+    for page, number, _ in results:
+        start, end = document.indexes[page].offsets[number]
+        chunks.append(document.pages[page][start:end])
+    return chunks
+
 
 class LlamaIndexUploadPDFRetriever(BaseTool):
     """
@@ -30,5 +103,6 @@ class LlamaIndexUploadPDFRetriever(BaseTool):
         return True
 
     async def call(self, parameters: dict, **kwargs: Any) -> List[Dict[str, Any]]:
-        docs = SimpleDirectoryReader(input_files=[self.filepath]).load_data()
-        return [dict({"text": doc.text}) for doc in docs]
+        document = await asyncio.to_thread(parse_document, self.filepath)
+        chunks = select_chunks(document, parameters.get("query", ""), MAX_CHUNKS)
+        return [dict({"text": chunk}) for chunk in chunks]
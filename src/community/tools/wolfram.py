@@ -3,7 +3,7 @@ from typing import Any, Dict, List
 
 from langchain_community.utilities.wolfram_alpha import WolframAlphaAPIWrapper
 
-from backend.config.settings import Settings
+from backend.config.settings import get_settings
 from community.tools import BaseTool
 
 
@@ -16,7 +16,7 @@ class WolframAlpha(BaseTool):
 
     NAME = "wolfram_alpha"
 
-    wolfram_app_id = Settings().tools.wolfram_alpha.app_id
+    wolfram_app_id = get_settings().tools.wolfram_alpha.app_id
 
     def __init__(self):
         self.app_id = self.wolfram_app_id